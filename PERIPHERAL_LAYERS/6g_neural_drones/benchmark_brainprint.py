@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark for brainprint verification throughput.
+
+hash mode enrolls a population of users in a BrainprintTemplateStore and
+measures how many verifications per second a single core sustains, for both
+genuine and impostor attempts.
+
+embedding mode fills a BrainprintEmbeddingIndex with synthetic templates
+(1M by default) and measures enrollment, 1:1 verification and 1:N
+identification. It requires NumPy.
+
+Usage:
+    python benchmark_brainprint.py [--users N] [--verifications N]
+    python benchmark_brainprint.py --mode embedding [--templates N] [--dim N]
+"""
+
+import argparse
+import time
+
+from brainprint_store import BrainprintTemplateStore, feature_digest
+
+
+def run(users: int, verifications: int) -> dict:
+    """Run the benchmark and return verifications per second."""
+    store = BrainprintTemplateStore()
+    genuine = []
+    for i in range(users):
+        features = feature_digest(f"user{i}", "muse", "passthought")
+        store.enroll(f"user{i}", features)
+        genuine.append((f"user{i}", features))
+
+    impostor = feature_digest("impostor", "muse", "passthought")
+    attempts = [genuine[i % users] for i in range(verifications)]
+
+    verify = store.verify
+    start = time.perf_counter()
+    for user_id, features in attempts:
+        verify(user_id, features)
+    genuine_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for user_id, _ in attempts:
+        verify(user_id, impostor)
+    impostor_elapsed = time.perf_counter() - start
+
+    return {
+        "users": users,
+        "verifications": verifications,
+        "genuine_per_sec": verifications / genuine_elapsed,
+        "impostor_per_sec": verifications / impostor_elapsed,
+    }
+
+
+def run_embeddings(templates: int, dim: int, probes: int) -> dict:
+    """Run the embedding benchmark and return timings."""
+    import numpy as np
+
+    from brainprint_index import BrainprintEmbeddingIndex
+
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((templates, dim), dtype=np.float32)
+    user_ids = [f"user{i}" for i in range(templates)]
+
+    index = BrainprintEmbeddingIndex(dim, initial_capacity=templates)
+    start = time.perf_counter()
+    index.add_many(user_ids, data)
+    enroll_elapsed = time.perf_counter() - start
+
+    # Probes are noisy re-captures of enrolled users
+    targets = rng.integers(0, templates, size=probes)
+    noisy = data[targets] + 0.2 * rng.standard_normal((probes, dim), dtype=np.float32)
+
+    start = time.perf_counter()
+    for row, probe in zip(targets, noisy):
+        index.verify(user_ids[row], probe, 0.8)
+    verify_elapsed = time.perf_counter() - start
+
+    correct = 0
+    start = time.perf_counter()
+    for row, probe in zip(targets, noisy):
+        best = index.identify(probe, top_k=1)
+        correct += bool(best) and best[0][0] == user_ids[row]
+    identify_elapsed = time.perf_counter() - start
+
+    return {
+        "templates": templates,
+        "dim": dim,
+        "enroll_seconds": enroll_elapsed,
+        "verify_per_sec": probes / verify_elapsed,
+        "identify_ms": identify_elapsed / probes * 1000,
+        "identify_accuracy": correct / probes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--verifications", type=int, default=500_000)
+    parser.add_argument("--mode", choices=("hash", "embedding"), default="hash")
+    parser.add_argument("--templates", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--probes", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.mode == "embedding":
+        result = run_embeddings(args.templates, args.dim, args.probes)
+        print(f"Enrolled templates:  {result['templates']:,} x {result['dim']}")
+        print(f"Bulk enroll:         {result['enroll_seconds']:.2f} s")
+        print(f"1:1 verify (per s):  {result['verify_per_sec']:,.0f}")
+        print(f"1:N identify:        {result['identify_ms']:.1f} ms/probe")
+        print(f"Rank-1 accuracy:     {result['identify_accuracy']:.1%}")
+        return
+
+    result = run(args.users, args.verifications)
+    print(f"Enrolled users:      {result['users']:,}")
+    print(f"Verifications:       {result['verifications']:,}")
+    print(f"Genuine  (per sec):  {result['genuine_per_sec']:,.0f}")
+    print(f"Impostor (per sec):  {result['impostor_per_sec']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
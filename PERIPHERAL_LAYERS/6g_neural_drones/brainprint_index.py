@@ -0,0 +1,228 @@
+"""
+Brainprint Embedding Index - Similarity Matching for EEG Feature Vectors
+
+Real brainprints are noisy feature vectors, not reproducible byte strings, so
+they are matched by similarity rather than equality. This index keeps every
+enrolled template as a row of one contiguous float32 matrix and scores probes
+against it with vectorized cosine similarity or Euclidean distance:
+
+- 1:1 verification scores a probe against one user's row
+- 1:N identification scores a probe against every row in a single pass
+
+Enrollment and withdrawal are incremental. Withdrawal moves the last row into
+the freed slot, so the matrix never has holes and removal is O(dim).
+
+Requires NumPy.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from brainprint_store import feature_digest
+
+
+class BrainprintEmbeddingIndex:
+    """
+    Contiguous float32 matrix of brainprint templates indexed by user.
+
+    Scores are "higher is better" for both metrics: cosine similarity in
+    [-1, 1] for ``metric="cosine"`` and negative Euclidean distance for
+    ``metric="l2"``. Thresholds are compared with ``>=``.
+    """
+
+    METRICS = ("cosine", "l2")
+
+    def __init__(self, dim: int, metric: str = "cosine", initial_capacity: int = 1024):
+        if dim < 1:
+            raise ValueError("dim must be at least 1")
+        if metric not in self.METRICS:
+            raise ValueError(f"metric must be one of {self.METRICS}")
+
+        self.dim = dim
+        self.metric = metric
+        self._matrix = np.empty((max(1, initial_capacity), dim), dtype=np.float32)
+        # Squared row norms, used by the L2 expansion |x-p|^2 = |x|^2 - 2x.p + |p|^2
+        self._sq_norms = np.empty(self._matrix.shape[0], dtype=np.float32)
+        self._size = 0
+        self._row_of: Dict[str, int] = {}
+        self._user_at: List[str] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._row_of
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only view of the enrolled rows."""
+        view = self._matrix[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def add(self, user_id: str, embedding: Sequence[float]) -> None:
+        """Enroll or replace one user's template."""
+        vector = self._prepare(embedding)
+
+        row = self._row_of.get(user_id)
+        if row is None:
+            self._reserve(self._size + 1)
+            row = self._size
+            self._size += 1
+            self._row_of[user_id] = row
+            self._user_at.append(user_id)
+
+        self._matrix[row] = vector
+        self._sq_norms[row] = vector @ vector
+
+    def add_many(self, user_ids: Sequence[str], embeddings: np.ndarray) -> None:
+        """
+        Enroll a batch of new users in one copy.
+
+        All user IDs must be new; use add() to replace existing templates.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.shape != (len(user_ids), self.dim):
+            raise ValueError(f"expected shape ({len(user_ids)}, {self.dim})")
+        duplicates = [u for u in user_ids if u in self._row_of]
+        if duplicates or len(set(user_ids)) != len(user_ids):
+            raise ValueError("add_many() requires unique, not yet enrolled user IDs")
+
+        if self.metric == "cosine":
+            embeddings = embeddings / self._safe_norms(embeddings)[:, None]
+
+        start = self._size
+        end = start + len(user_ids)
+        self._reserve(end)
+        self._matrix[start:end] = embeddings
+        self._sq_norms[start:end] = np.einsum("ij,ij->i", embeddings, embeddings)
+        for offset, user_id in enumerate(user_ids):
+            self._row_of[user_id] = start + offset
+        self._user_at.extend(user_ids)
+        self._size = end
+
+    def remove(self, user_id: str) -> bool:
+        """Withdraw a user's template. Returns False if none was enrolled."""
+        row = self._row_of.pop(user_id, None)
+        if row is None:
+            return False
+
+        last = self._size - 1
+        if row != last:
+            moved = self._user_at[last]
+            self._matrix[row] = self._matrix[last]
+            self._sq_norms[row] = self._sq_norms[last]
+            self._user_at[row] = moved
+            self._row_of[moved] = row
+        self._user_at.pop()
+        self._size = last
+        return True
+
+    def score(self, user_id: str, probe: Sequence[float]) -> Optional[float]:
+        """1:1 score of a probe against one user, or None if not enrolled."""
+        row = self._row_of.get(user_id)
+        if row is None:
+            return None
+        vector = self._prepare(probe)
+        if self.metric == "cosine":
+            return float(self._matrix[row] @ vector)
+        return -float(np.linalg.norm(self._matrix[row] - vector))
+
+    def verify(
+        self,
+        user_id: str,
+        probe: Sequence[float],
+        threshold: float,
+    ) -> Tuple[bool, Optional[float]]:
+        """1:1 verification. Returns (accepted, score)."""
+        score = self.score(user_id, probe)
+        return score is not None and score >= threshold, score
+
+    def identify(
+        self,
+        probe: Sequence[float],
+        top_k: int = 1,
+        threshold: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        1:N identification against every enrolled template.
+
+        Returns up to ``top_k`` (user_id, score) pairs, best first, dropping
+        any below ``threshold``.
+        """
+        if self._size == 0 or top_k < 1:
+            return []
+
+        scores = self._score_all(self._prepare(probe))
+        k = min(top_k, self._size)
+        if k < self._size:
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(self._size)
+        ranked = candidates[np.argsort(scores[candidates])[::-1]]
+
+        results = []
+        for row in ranked:
+            value = float(scores[row])
+            if threshold is not None and value < threshold:
+                break
+            results.append((self._user_at[row], value))
+        return results
+
+    def _score_all(self, vector: np.ndarray) -> np.ndarray:
+        """Score one prepared probe against every row."""
+        dots = self._matrix[:self._size] @ vector
+        if self.metric == "cosine":
+            return dots
+        sq = self._sq_norms[:self._size] - 2.0 * dots + (vector @ vector)
+        np.maximum(sq, 0.0, out=sq)
+        return -np.sqrt(sq, out=sq)
+
+    def _prepare(self, embedding: Sequence[float]) -> np.ndarray:
+        """Validate a vector and normalize it for cosine scoring."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.dim,):
+            raise ValueError(f"expected a vector of length {self.dim}")
+        if self.metric == "cosine":
+            norm = float(np.linalg.norm(vector))
+            if norm > 0.0:
+                vector = vector / norm
+        return vector
+
+    @staticmethod
+    def _safe_norms(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0.0] = 1.0
+        return norms
+
+    def _reserve(self, needed: int) -> None:
+        """Grow capacity geometrically so appends stay amortized O(dim)."""
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        self._matrix = matrix
+        self._sq_norms = sq_norms
+
+    def __repr__(self) -> str:
+        return (
+            f"BrainprintEmbeddingIndex(dim={self.dim}, metric={self.metric!r}, "
+            f"templates={self._size})"
+        )
+
+
+def simulated_embedding(dim: int, *parts: str) -> np.ndarray:
+    """
+    Deterministic stand-in for extracted EEG features.
+
+    The same parts always produce the same unit-variance float32 vector.
+    """
+    seed = int.from_bytes(feature_digest(*parts)[:8], "big")
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal(dim, dtype=np.float32)
@@ -0,0 +1,80 @@
+"""
+Brainprint Template Store - Keyed, Constant-Time Brainprint Verification
+
+Enrollment produces a template once: a keyed HMAC-SHA256 digest of the
+extracted brainprint features. Only the digest is kept, never raw EEG, and
+without the store key the digest cannot be linked across systems.
+
+Verification is a dictionary lookup followed by a constant-time comparison,
+so it neither leaks how much of a candidate matched nor depends on how many
+users are enrolled.
+"""
+
+import hashlib
+import hmac
+import secrets
+from typing import Dict, Optional, Union
+
+
+class BrainprintTemplateStore:
+    """
+    Index from user ID to keyed brainprint template.
+
+    Each store has its own key. Pass the same key to restore templates that
+    were enrolled by an earlier process; otherwise a random key is generated.
+    """
+
+    DIGEST = "sha256"
+
+    def __init__(self, key: Optional[bytes] = None):
+        self._key = key if key is not None else secrets.token_bytes(32)
+        self._templates: Dict[str, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._templates
+
+    def derive(self, features: Union[str, bytes]) -> bytes:
+        """Compute the keyed template digest for extracted features."""
+        if isinstance(features, str):
+            features = features.encode()
+        return hmac.digest(self._key, features, self.DIGEST)
+
+    def enroll(self, user_id: str, features: Union[str, bytes]) -> str:
+        """
+        Store the template for a user and return it as a hex string.
+
+        Re-enrolling replaces the previous template.
+        """
+        template = self.derive(features)
+        self._templates[user_id] = template
+        return template.hex()
+
+    def verify(self, user_id: str, features: Union[str, bytes]) -> bool:
+        """Check freshly extracted features against the enrolled template."""
+        template = self._templates.get(user_id)
+        if template is None:
+            return False
+        return hmac.compare_digest(template, self.derive(features))
+
+    def remove(self, user_id: str) -> bool:
+        """Delete a user's template. Returns False if none was stored."""
+        return self._templates.pop(user_id, None) is not None
+
+    def __repr__(self) -> str:
+        return f"BrainprintTemplateStore(templates={len(self._templates)})"
+
+
+def feature_digest(*parts: str) -> bytes:
+    """
+    Canonical feature encoding for simulated captures.
+
+    Parts are prefixed with their length in bytes, once UTF-8 encoded, so
+    that ("ab", "c") and ("a", "bc") differ.
+    """
+    encoded = [part.encode() for part in parts]
+    return hashlib.sha256(
+        b"".join(len(data).to_bytes(4, "big") + data for data in encoded)
+    ).digest()
@@ -0,0 +1,202 @@
+"""
+Message Journal - Bounded, Withdrawable Log for Brain-to-Brain Messages
+
+Brain-to-brain messages are among the most sensitive data this layer handles.
+The journal keeps them under the same Custodian Kernel constraints as
+brainprints:
+
+1. Bounded - only a fixed number of messages are held in memory
+2. Spillable - older messages move to per-pair segment files on disk
+3. Minimal - content is kept as a hash unless the policy allows storing it
+4. Replayable - per-pair sequence numbers make one conversation cheap to read
+5. Withdrawable - a user's segments are deleted whole, never filtered
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+PairKey = Tuple[str, str]
+
+
+@dataclass
+class JournalEntry:
+    """Single brain-to-brain message as recorded by the journal"""
+    seq: int                              # Per-pair sequence number
+    timestamp: float                      # Epoch seconds
+    sender: str
+    receiver: str
+    message_type: str
+    content_hash: str                     # SHA-256 of the content
+    content: Optional[str] = None         # Only kept when policy allows
+    encrypted: bool = True
+
+
+class MessageJournal:
+    """
+    Append-only journal of brain-to-brain messages keyed by (sender, receiver).
+
+    At most ``max_in_memory`` entries are buffered in memory. When the bound is
+    exceeded, the buffer of the pair that has waited longest is flushed to its
+    segment file in ``spill_dir``. Without a ``spill_dir`` that buffer is
+    dropped instead, so memory stays bounded either way.
+    """
+
+    def __init__(
+        self,
+        max_in_memory: int = 1000,
+        spill_dir: Optional[str] = None,
+        store_content: bool = True,
+    ):
+        if max_in_memory < 1:
+            raise ValueError("max_in_memory must be at least 1")
+
+        self.max_in_memory = max_in_memory
+        self.spill_dir = spill_dir
+        self.store_content = store_content
+
+        # Pairs ordered by the age of their oldest buffered entry
+        self._buffers: "OrderedDict[PairKey, List[JournalEntry]]" = OrderedDict()
+        self._in_memory = 0
+        self._next_seq: Dict[PairKey, int] = {}
+        self._spilled: Set[PairKey] = set()
+        self._pairs_by_user: Dict[str, Set[PairKey]] = {}
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        """Number of entries currently held in memory."""
+        return self._in_memory
+
+    def append(
+        self,
+        sender: str,
+        receiver: str,
+        message_type: str,
+        content: str,
+        encrypted: bool = True,
+    ) -> JournalEntry:
+        """Record a message and return its journal entry."""
+        pair = (sender, receiver)
+        seq = self._next_seq.get(pair, 0)
+        self._next_seq[pair] = seq + 1
+
+        entry = JournalEntry(
+            seq=seq,
+            timestamp=time.time(),
+            sender=sender,
+            receiver=receiver,
+            message_type=message_type,
+            content_hash=hashlib.sha256(content.encode()).hexdigest(),
+            content=content if self.store_content else None,
+            encrypted=encrypted,
+        )
+
+        buffer = self._buffers.get(pair)
+        if buffer is None:
+            buffer = self._buffers[pair] = []
+            self._pairs_by_user.setdefault(sender, set()).add(pair)
+            self._pairs_by_user.setdefault(receiver, set()).add(pair)
+        buffer.append(entry)
+        self._in_memory += 1
+
+        if self._in_memory > self.max_in_memory:
+            self._evict_oldest()
+
+        return entry
+
+    def replay(
+        self,
+        sender: str,
+        receiver: str,
+        since_seq: int = 0,
+    ) -> Iterator[JournalEntry]:
+        """
+        Yield one conversation's entries in sequence order.
+
+        Spilled entries are streamed from the pair's segment file before the
+        in-memory tail, so nothing is materialized beyond a single line.
+        """
+        pair = (sender, receiver)
+
+        if pair in self._spilled:
+            with open(self._segment_path(pair), "r", encoding="utf-8") as segment:
+                for line in segment:
+                    record = json.loads(line)
+                    if record["seq"] >= since_seq:
+                        yield JournalEntry(**record)
+
+        for entry in self._buffers.get(pair, ()):
+            if entry.seq >= since_seq:
+                yield entry
+
+    def pairs_for_user(self, user_id: str) -> Set[PairKey]:
+        """Return every conversation the user has taken part in."""
+        return set(self._pairs_by_user.get(user_id, ()))
+
+    def forget_user(self, user_id: str) -> int:
+        """
+        Delete every segment involving the user.
+
+        KERNEL REQUIREMENT: Withdrawal removes neural data completely.
+        Whole segments are dropped, so the cost is proportional to the user's
+        own conversations rather than to the size of the journal.
+
+        Returns the number of conversations deleted.
+        """
+        pairs = self._pairs_by_user.pop(user_id, set())
+
+        for pair in pairs:
+            buffer = self._buffers.pop(pair, None)
+            if buffer is not None:
+                self._in_memory -= len(buffer)
+
+            if pair in self._spilled:
+                self._spilled.discard(pair)
+                try:
+                    os.remove(self._segment_path(pair))
+                except FileNotFoundError:
+                    pass
+
+            self._next_seq.pop(pair, None)
+
+            other = pair[1] if pair[0] == user_id else pair[0]
+            other_pairs = self._pairs_by_user.get(other)
+            if other_pairs is not None:
+                other_pairs.discard(pair)
+                if not other_pairs:
+                    del self._pairs_by_user[other]
+
+        return len(pairs)
+
+    def _evict_oldest(self) -> None:
+        """Move the longest-waiting buffer out of memory."""
+        pair, buffer = self._buffers.popitem(last=False)
+        self._in_memory -= len(buffer)
+
+        if not self.spill_dir:
+            # No spill target: bounded retention drops the oldest messages.
+            # The pair stays indexed so forget_user() still clears sequencing.
+            return
+
+        with open(self._segment_path(pair), "a", encoding="utf-8") as segment:
+            for entry in buffer:
+                segment.write(json.dumps(asdict(entry)) + "\n")
+        self._spilled.add(pair)
+
+    def _segment_path(self, pair: PairKey) -> str:
+        """Segment file for a pair; user IDs are hashed to keep paths safe."""
+        digest = hashlib.sha256(f"{pair[0]}\0{pair[1]}".encode()).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest[:32]}.jsonl")
+
+    def __repr__(self) -> str:
+        return (
+            f"MessageJournal(in_memory={self._in_memory}, "
+            f"pairs={len(self._next_seq)}, spilled={len(self._spilled)})"
+        )
@@ -7,11 +7,19 @@ the three core questions of the Custodian Kernel Core Directive.
 """
 
 from enum import Enum
-from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
+from typing import Callable, List, Dict, Optional, Tuple
 from dataclasses import dataclass
-import time
 from datetime import datetime
 
+from brainprint_store import BrainprintTemplateStore, feature_digest
+from message_journal import MessageJournal
+
+try:
+    from brainprint_index import BrainprintEmbeddingIndex, simulated_embedding
+except ImportError:  # NumPy not installed - embedding matching unavailable
+    BrainprintEmbeddingIndex = None
+
 
 class EEGDevice(Enum):
     """Supported EEG hardware interfaces"""
@@ -51,9 +59,14 @@ class ConsentLevel(Enum):
     COERCED = "coerced"              # Forced participation
 
 
-@dataclass
+@dataclass(frozen=True)
 class NeuralDataPolicy:
-    """Data handling policy for brainwave information"""
+    """
+    Data handling policy for brainwave information.
+    
+    Immutable and hashable: its kernel verdict is computed once and cached.
+    To change the policy, assign a new one to the interface.
+    """
     purpose: str                          # Why collecting
     retention_period: str                 # How long stored
     raw_eeg_stored: bool                  # Store raw signals?
@@ -65,6 +78,88 @@ class NeuralDataPolicy:
     alternatives_available: bool          # Other auth methods?
 
 
+@dataclass(frozen=True)
+class KernelRule:
+    """One kernel check applied to a NeuralDataPolicy"""
+    question: int                                  # 1, 2 or 3
+    broken: Callable[[NeuralDataPolicy], bool]     # True when the policy fails
+    violation: str                                 # Reported at validation
+    issue: Optional[str] = None                    # Reported by compliance checks
+
+
+def _not_explicit(policy: NeuralDataPolicy) -> bool:
+    return policy.consent_level != ConsentLevel.EXPLICIT_INFORMED
+
+
+# The three kernel questions as one rule table, in reporting order
+KERNEL_RULES: Tuple[KernelRule, ...] = (
+    # Question 1: Does this infringe on pursuit?
+    KernelRule(1, lambda p: not p.user_can_delete,
+               "VIOLATION Q1: Users cannot delete their brainprint - infringes autonomy",
+               "Q1: Users cannot delete brainprint"),
+    KernelRule(1, lambda p: not p.alternatives_available,
+               "VIOLATION Q1: No alternative auth methods - forces neural participation",
+               "Q1: No alternative auth methods"),
+    KernelRule(1, lambda p: p.consent_level == ConsentLevel.NONE,
+               "VIOLATION Q1: No consent obtained - infringes privacy pursuit"),
+    # Question 2: Am I fucking anyone over?
+    KernelRule(2, lambda p: p.third_party_access and _not_explicit(p),
+               "VIOLATION Q2: Third-party access without explicit consent - fucking users over",
+               "Q2: Third-party access without explicit consent"),
+    KernelRule(2, lambda p: p.raw_eeg_stored,
+               "WARNING Q2: Storing raw EEG is high risk - could expose sensitive info"),
+    KernelRule(2, lambda p: p.used_for_inference and _not_explicit(p),
+               "VIOLATION Q2: Using brain data to infer health/emotions without explicit consent"),
+    KernelRule(2, lambda p: not p.encrypted,
+               "VIOLATION Q2: Brain data not encrypted - security failure fucks users over",
+               "Q2: Neural data not encrypted"),
+    # Question 3: Am I forcing compliance?
+    KernelRule(3, lambda p: p.consent_level == ConsentLevel.COERCED,
+               "VIOLATION Q3: Coerced participation - forcing compliance",
+               "Q3: Coerced enrollment"),
+    KernelRule(3, lambda p: not p.alternatives_available,
+               "VIOLATION Q3: No alternatives - forcing neural auth as only option",
+               "Q3: No alternatives - forced neural auth"),
+)
+
+
+@dataclass(frozen=True)
+class PolicyVerdict:
+    """Result of running KERNEL_RULES over one policy"""
+    violations: Tuple[str, ...]
+    issues: Tuple[str, ...]
+    question_compliant: Tuple[bool, bool, bool]
+    
+    def compliance_report(self) -> Dict:
+        """Compliance with each question, as returned by check_kernel_compliance()"""
+        q1, q2, q3 = self.question_compliant
+        return {
+            "question_1_compliant": q1,
+            "question_2_compliant": q2,
+            "question_3_compliant": q3,
+            "overall_compliant": q1 and q2 and q3,
+            "issues": list(self.issues)
+        }
+
+
+@lru_cache(maxsize=128)
+def evaluate_policy(policy: NeuralDataPolicy) -> PolicyVerdict:
+    """
+    Run the kernel rule table over a policy.
+    
+    Cached per policy value, so each distinct policy is evaluated once.
+    """
+    broken = [rule for rule in KERNEL_RULES if rule.broken(policy)]
+    return PolicyVerdict(
+        violations=tuple(rule.violation for rule in broken),
+        issues=tuple(rule.issue for rule in broken if rule.issue),
+        question_compliant=tuple(
+            not any(rule.question == q and rule.issue for rule in broken)
+            for q in (1, 2, 3)
+        )
+    )
+
+
 @dataclass
 class BrainprintEnrollment:
     """User's brainprint registration data"""
@@ -104,47 +199,42 @@ class CustodianNeuralInterface:
     3. Am I making up a rule to force compliance?
     """
     
-    def __init__(self, data_policy: NeuralDataPolicy):
-        self.data_policy = data_policy
+    # Minimum cosine similarity for an embedding match
+    EMBEDDING_THRESHOLD = 0.80
+    
+    def __init__(
+        self,
+        data_policy: NeuralDataPolicy,
+        template_key: Optional[bytes] = None,
+        embedding_dim: int = 0
+    ):
+        self.data_policy = data_policy  # Validated against the kernel
         self.enrolled_users: Dict[str, BrainprintEnrollment] = {}
+        self.templates = BrainprintTemplateStore(template_key)
+        
+        # Optional feature-vector matching (requires NumPy)
+        self.embeddings = None
+        if embedding_dim:
+            if BrainprintEmbeddingIndex is None:
+                raise ImportError("Embedding matching requires NumPy: pip install numpy")
+            self.embeddings = BrainprintEmbeddingIndex(embedding_dim)
         self.auth_log: List[AuthenticationAttempt] = []
-        
-        # Validate policy against kernel on initialization
-        self._validate_policy()
-    
-    def _validate_policy(self):
+
+    @property
+    def data_policy(self) -> NeuralDataPolicy:
+        """Active data policy"""
+        return self._data_policy
+    
+    @data_policy.setter
+    def data_policy(self, policy: NeuralDataPolicy):
+        """Replace the policy; it is validated before taking effect."""
+        self._validate_policy(policy)
+        self._data_policy = policy
+        self._verdict = evaluate_policy(policy)
+    
+    def _validate_policy(self, policy: Optional[NeuralDataPolicy] = None):
         """Ensure data policy aligns with Custodian Kernel"""
-        violations = []
-        
-        # Question 1: Does this infringe on pursuit?
-        if not self.data_policy.user_can_delete:
-            violations.append("VIOLATION Q1: Users cannot delete their brainprint - infringes autonomy")
-        
-        if not self.data_policy.alternatives_available:
-            violations.append("VIOLATION Q1: No alternative auth methods - forces neural participation")
-        
-        if self.data_policy.consent_level == ConsentLevel.NONE:
-            violations.append("VIOLATION Q1: No consent obtained - infringes privacy pursuit")
-        
-        # Question 2: Am I fucking anyone over?
-        if self.data_policy.third_party_access and self.data_policy.consent_level != ConsentLevel.EXPLICIT_INFORMED:
-            violations.append("VIOLATION Q2: Third-party access without explicit consent - fucking users over")
-        
-        if self.data_policy.raw_eeg_stored:
-            violations.append("WARNING Q2: Storing raw EEG is high risk - could expose sensitive info")
-        
-        if self.data_policy.used_for_inference and self.data_policy.consent_level != ConsentLevel.EXPLICIT_INFORMED:
-            violations.append("VIOLATION Q2: Using brain data to infer health/emotions without explicit consent")
-        
-        if not self.data_policy.encrypted:
-            violations.append("VIOLATION Q2: Brain data not encrypted - security failure fucks users over")
-        
-        # Question 3: Am I forcing compliance?
-        if self.data_policy.consent_level == ConsentLevel.COERCED:
-            violations.append("VIOLATION Q3: Coerced participation - forcing compliance")
-        
-        if not self.data_policy.alternatives_available:
-            violations.append("VIOLATION Q3: No alternatives - forcing neural auth as only option")
+        violations = evaluate_policy(policy or self.data_policy).violations
         
         if violations:
             raise ValueError(
@@ -160,7 +250,8 @@ class CustodianNeuralInterface:
         method: AuthenticationMethod,
         informed_consent: bool,
         can_withdraw: bool = True,
-        num_sessions: int = 3
+        num_sessions: int = 3,
+        features=None
     ) -> BrainprintEnrollment:
         """
         Enroll a user's brainprint for authentication.
@@ -169,6 +260,9 @@ class CustodianNeuralInterface:
         - informed_consent must be True
         - can_withdraw must be True (user can remove brainprint anytime)
         - Multiple enrollment sessions for robust brainprint
+        
+        features: optional captured feature vector (e.g. from eeg_ingest);
+        requires embedding matching. Simulated when omitted.
         """
         
         # Kernel enforcement
@@ -184,6 +278,9 @@ class CustodianNeuralInterface:
                 "Permanent enrollment without deletion rights violates autonomy."
             )
         
+        if features is not None and self.embeddings is None:
+            raise RuntimeError("Captured features require embedding matching (embedding_dim > 0)")
+        
         print(f"[NEURAL INTERFACE] Enrolling user {user_id}")
         print(f"  Device: {device.value}")
         print(f"  Method: {method.value}")
@@ -197,8 +294,15 @@ class CustodianNeuralInterface:
         # 2. Extract unique features
         # 3. Create irreversible hash (NOT store raw EEG)
         # 4. Validate reproducibility
+        # The keyed template is computed once here and indexed by user.
+        
+        signature = self._extract_brainprint_features(user_id, device, method)
+        brainprint_hash = self.templates.enroll(user_id, signature)
         
-        brainprint_hash = self._generate_brainprint_hash(user_id, device, method)
+        if self.embeddings is not None:
+            if features is None:
+                features = self._extract_brainprint_embedding(user_id, device, method)
+            self.embeddings.add(user_id, features)
         
         enrollment = BrainprintEnrollment(
             user_id=user_id,
@@ -225,14 +329,21 @@ class CustodianNeuralInterface:
         user_id: str,
         device: EEGDevice,
         current_state: BrainState,
-        signal_quality: float = 0.95
+        signal_quality: float = 0.95,
+        features=None
     ) -> Tuple[bool, str]:
         """
         Authenticate user via brainwave comparison.
         
+        features: optional captured feature vector (e.g. from eeg_ingest);
+        requires embedding matching. Simulated when omitted.
+        
         Returns: (success: bool, message: str)
         """
         
+        if features is not None and self.embeddings is None:
+            raise RuntimeError("Captured features require embedding matching (embedding_dim > 0)")
+        
         if user_id not in self.enrolled_users:
             return False, f"User {user_id} not enrolled"
         
@@ -249,13 +360,20 @@ class CustodianNeuralInterface:
         # 3. Compare to stored brainprint hash
         # 4. Account for state differences
         
-        current_brainprint = self._generate_brainprint_hash(user_id, device, enrollment.auth_method)
+        if self.embeddings is not None:
+            probe = features
+            if probe is None:
+                probe = self._extract_brainprint_embedding(user_id, device, enrollment.auth_method)
+            matched, _ = self.embeddings.verify(user_id, probe, self.EMBEDDING_THRESHOLD)
+        else:
+            signature = self._extract_brainprint_features(user_id, device, enrollment.auth_method)
+            matched = self.templates.verify(user_id, signature)
         
         # State mismatch reduces accuracy
         state_mismatch = current_state != enrollment.baseline_state
         
         # Calculate match confidence
-        base_confidence = 0.97 if current_brainprint == enrollment.brainprint_hash else 0.15
+        base_confidence = 0.97 if matched else 0.15
         
         # Adjust for state and signal quality
         if state_mismatch:
@@ -313,6 +431,9 @@ class CustodianNeuralInterface:
         
         # Delete brainprint
         del self.enrolled_users[user_id]
+        self.templates.remove(user_id)
+        if self.embeddings is not None:
+            self.embeddings.remove(user_id)
         
         # Remove from logs (or anonymize)
         self.auth_log = [
@@ -325,6 +446,19 @@ class CustodianNeuralInterface:
         
         return True
     
+    def identify_user(self, probe, top_k: int = 1) -> List[Tuple[str, float]]:
+        """
+        1:N identification of an EEG feature vector against all enrollments.
+        
+        Returns up to top_k (user_id, similarity) pairs above the match
+        threshold, best first. Requires the interface to be created with
+        an embedding_dim.
+        """
+        if self.embeddings is None:
+            raise RuntimeError("Identification requires embedding matching (embedding_dim > 0)")
+        
+        return self.embeddings.identify(probe, top_k=top_k, threshold=self.EMBEDDING_THRESHOLD)
+    
     def get_user_neural_data_report(self, user_id: str) -> Dict:
         """
         Provide user with full report of their neural data.
@@ -370,65 +504,33 @@ class CustodianNeuralInterface:
         """
         Verify system compliance with Custodian Kernel.
         
-        Returns dict showing compliance with each question.
+        Returns dict showing compliance with each question. The verdict is
+        computed once per policy and refreshed when the policy is replaced.
         """
-        
-        q1_compliant = True
-        q2_compliant = True
-        q3_compliant = True
-        
-        issues = []
-        
-        # Question 1: Does this infringe on pursuit?
-        if not self.data_policy.user_can_delete:
-            q1_compliant = False
-            issues.append("Q1: Users cannot delete brainprint")
-        
-        if not self.data_policy.alternatives_available:
-            q1_compliant = False
-            issues.append("Q1: No alternative auth methods")
-        
-        # Question 2: Fucking people over?
-        if self.data_policy.third_party_access and self.data_policy.consent_level != ConsentLevel.EXPLICIT_INFORMED:
-            q2_compliant = False
-            issues.append("Q2: Third-party access without explicit consent")
-        
-        if not self.data_policy.encrypted:
-            q2_compliant = False
-            issues.append("Q2: Neural data not encrypted")
-        
-        # Question 3: Forcing compliance?
-        if self.data_policy.consent_level == ConsentLevel.COERCED:
-            q3_compliant = False
-            issues.append("Q3: Coerced enrollment")
-        
-        if not self.data_policy.alternatives_available:
-            q3_compliant = False
-            issues.append("Q3: No alternatives - forced neural auth")
-        
-        return {
-            "question_1_compliant": q1_compliant,
-            "question_2_compliant": q2_compliant,
-            "question_3_compliant": q3_compliant,
-            "overall_compliant": q1_compliant and q2_compliant and q3_compliant,
-            "issues": issues
-        }
+        return self._verdict.compliance_report()
     
-    def _generate_brainprint_hash(self, user_id: str, device: EEGDevice, method: AuthenticationMethod) -> str:
+    def _extract_brainprint_features(self, user_id: str, device: EEGDevice, method: AuthenticationMethod) -> bytes:
         """
-        Simulate brainprint hash generation.
+        Simulate brainprint feature extraction.
         
         In real implementation, this would:
         1. Process EEG signals
         2. Extract unique features (alpha peaks, beta patterns, etc.)
-        3. Create irreversible hash
-        4. NOT store raw EEG
+        
+        The features are then hashed with the template store's key, so the
+        raw EEG is never stored. The simulation is deterministic per user,
+        device and method so that a genuine user reproduces their template.
         """
-        import hashlib
+        return feature_digest(user_id, device.value, method.value)
+    
+    def _extract_brainprint_embedding(self, user_id: str, device: EEGDevice, method: AuthenticationMethod):
+        """
+        Simulate extraction of a brainprint feature vector.
         
-        # Simulate unique brainprint per user
-        data = f"{user_id}_{device.value}_{method.value}_{time.time()}"
-        return hashlib.sha256(data.encode()).hexdigest()
+        In real implementation this would be band powers, spectral peaks and
+        connectivity measures computed from the captured EEG.
+        """
+        return simulated_embedding(self.embeddings.dim, user_id, device.value, method.value)
 
 
 class BrainToBrainInterface:
@@ -438,9 +540,22 @@ class BrainToBrainInterface:
     CRITICAL: This is the highest-stakes neural technology.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        data_policy: Optional[NeuralDataPolicy] = None,
+        max_messages_in_memory: int = 1000,
+        spill_dir: Optional[str] = None
+    ):
         self.active_connections: Dict[Tuple[str, str], datetime] = {}
-        self.message_log: List[Dict] = []
+        
+        # Message content is kept only when the policy permits storing raw
+        # neural data; otherwise the journal records a hash of it.
+        store_content = data_policy is None or data_policy.raw_eeg_stored
+        self.message_journal = MessageJournal(
+            max_in_memory=max_messages_in_memory,
+            spill_dir=spill_dir,
+            store_content=store_content
+        )
     
     def establish_connection(
         self,
@@ -500,15 +615,13 @@ class BrainToBrainInterface:
             return False, "No active connection between these parties"
         
         # Log message
-        log_entry = {
-            "timestamp": datetime.now(),
-            "sender": sender_id,
-            "receiver": receiver_id,
-            "type": message_type,
-            "content": content,
-            "encrypted": True
-        }
-        self.message_log.append(log_entry)
+        self.message_journal.append(
+            sender=sender_id,
+            receiver=receiver_id,
+            message_type=message_type,
+            content=content,
+            encrypted=True
+        )
         
         print(f"[NEURAL MESSAGE] {sender_id} -> {receiver_id}")
         print(f"  Type: {message_type}")
@@ -517,11 +630,12 @@ class BrainToBrainInterface:
         
         return True, "Neural message transmitted"
     
-    def disconnect(self, user_id: str) -> int:
+    def disconnect(self, user_id: str, erase_messages: bool = True) -> int:
         """
         Disconnect user from all brain-to-brain connections.
         
         KERNEL REQUIREMENT: Instant disconnect capability.
+        By default the user's message segments are deleted as well.
         """
         
         disconnected = 0
@@ -535,6 +649,10 @@ class BrainToBrainInterface:
         for key in connections_to_remove:
             del self.active_connections[key]
         
+        if erase_messages:
+            erased = self.message_journal.forget_user(user_id)
+            print(f"[ERASED] {erased} conversation segment(s) involving {user_id} deleted")
+        
         print(f"[DISCONNECT] User {user_id} disconnected from {disconnected} brain link(s)")
         print(f"[COGNITIVE LIBERTY] User exercised right to disconnect")
         
@@ -630,7 +748,7 @@ if __name__ == "__main__":
     neural_interface.enroll_user("bob", EEGDevice.SIX_G_NEURAL, AuthenticationMethod.CONTINUOUS, True)
     
     # Establish brain-to-brain link
-    b2b = BrainToBrainInterface()
+    b2b = BrainToBrainInterface(compliant_policy)
     success, msg = b2b.establish_connection(
         sender_id="alice",
         receiver_id="bob",
@@ -0,0 +1,476 @@
+"""
+Tests for the 6G Neural Interface peripheral layer
+
+This module provides tests for:
+- neural_interface.py - Kernel-compliant brainwave interfaces
+- brainprint_store.py - Keyed brainprint template store
+- brainprint_index.py - Feature-vector brainprint matching (requires NumPy)
+- eeg_ingest.py - Streaming EEG band-power pipeline (requires NumPy)
+- message_journal.py - Bounded brain-to-brain message journal
+"""
+
+import contextlib
+import dataclasses
+import hashlib
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from brainprint_store import BrainprintTemplateStore, feature_digest
+from message_journal import MessageJournal
+from neural_interface import (
+    AuthenticationMethod,
+    BrainState,
+    BrainToBrainInterface,
+    ConsentLevel,
+    CustodianNeuralInterface,
+    EEGDevice,
+    NeuralDataPolicy,
+    evaluate_policy,
+)
+
+
+def make_policy(**overrides) -> NeuralDataPolicy:
+    """Build a kernel-compliant policy, optionally overriding fields."""
+    fields = dict(
+        purpose="User authentication only",
+        retention_period="Until user withdraws",
+        raw_eeg_stored=False,
+        third_party_access=False,
+        user_can_delete=True,
+        used_for_inference=False,
+        encrypted=True,
+        consent_level=ConsentLevel.EXPLICIT_INFORMED,
+        alternatives_available=True,
+    )
+    fields.update(overrides)
+    return NeuralDataPolicy(**fields)
+
+
+class TestBrainprintTemplateStore(unittest.TestCase):
+    """Tests for the BrainprintTemplateStore class."""
+
+    def test_verify_genuine_and_impostor(self):
+        """Test that only the enrolled features verify."""
+        store = BrainprintTemplateStore()
+        store.enroll("alice", feature_digest("alice", "muse"))
+        self.assertTrue(store.verify("alice", feature_digest("alice", "muse")))
+        self.assertFalse(store.verify("alice", feature_digest("bob", "muse")))
+        self.assertFalse(store.verify("carol", feature_digest("alice", "muse")))
+
+    def test_templates_are_keyed(self):
+        """Test that the same features yield different templates per key."""
+        features = feature_digest("alice", "muse")
+        first = BrainprintTemplateStore(b"k1").enroll("alice", features)
+        second = BrainprintTemplateStore(b"k2").enroll("alice", features)
+        again = BrainprintTemplateStore(b"k1").enroll("alice", features)
+        self.assertNotEqual(first, second)
+        self.assertEqual(first, again)
+
+    def test_feature_digest_is_length_prefixed(self):
+        """Test that part boundaries are part of the encoding."""
+        self.assertNotEqual(feature_digest("ab", "c"), feature_digest("a", "bc"))
+        # The prefix counts encoded bytes, not characters
+        self.assertEqual(
+            feature_digest("\u00e9", "x"),
+            hashlib.sha256(b"\x00\x00\x00\x02\xc3\xa9\x00\x00\x00\x01x").digest(),
+        )
+
+    def test_remove(self):
+        """Test that removing a template stops verification."""
+        store = BrainprintTemplateStore()
+        store.enroll("alice", b"features")
+        self.assertTrue(store.remove("alice"))
+        self.assertFalse(store.verify("alice", b"features"))
+        self.assertFalse(store.remove("alice"))
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestBrainprintEmbeddingIndex(unittest.TestCase):
+    """Tests for the BrainprintEmbeddingIndex class."""
+
+    def setUp(self):
+        """Set up an index with synthetic templates."""
+        from brainprint_index import BrainprintEmbeddingIndex
+
+        self.index_class = BrainprintEmbeddingIndex
+        self.rng = np.random.default_rng(42)
+        self.data = self.rng.standard_normal((500, 32), dtype=np.float32)
+        self.users = [f"user{i}" for i in range(500)]
+
+    def _noisy(self, row: int) -> "np.ndarray":
+        return self.data[row] + 0.1 * self.rng.standard_normal(32, dtype=np.float32)
+
+    def test_verify_cosine(self):
+        """Test 1:1 verification of genuine and impostor probes."""
+        index = self.index_class(32)
+        index.add_many(self.users, self.data)
+        accepted, score = index.verify("user7", self._noisy(7), 0.8)
+        self.assertTrue(accepted)
+        self.assertGreater(score, 0.9)
+        accepted, _ = index.verify("user7", self._noisy(8), 0.8)
+        self.assertFalse(accepted)
+
+    def test_identify_both_metrics(self):
+        """Test 1:N identification returns the genuine user first."""
+        for metric in ("cosine", "l2"):
+            index = self.index_class(32, metric=metric, initial_capacity=4)
+            for user_id, row in zip(self.users, self.data):
+                index.add(user_id, row)
+            best = index.identify(self._noisy(123), top_k=3)
+            self.assertEqual(best[0][0], "user123", metric)
+            self.assertEqual(len(best), 3)
+            self.assertGreaterEqual(best[0][1], best[1][1])
+
+    def test_remove_keeps_matrix_contiguous(self):
+        """Test that withdrawal compacts rows and preserves other users."""
+        index = self.index_class(32)
+        index.add_many(self.users, self.data)
+        self.assertTrue(index.remove("user0"))
+        self.assertFalse(index.remove("user0"))
+        self.assertEqual(len(index), 499)
+        self.assertEqual(index.matrix.shape, (499, 32))
+        self.assertEqual(index.identify(self._noisy(499))[0][0], "user499")
+        self.assertNotEqual(index.identify(self._noisy(0))[0][0], "user0")
+
+    def test_add_many_rejects_duplicates(self):
+        """Test that bulk enrollment refuses already enrolled users."""
+        index = self.index_class(32)
+        index.add("user0", self.data[0])
+        with self.assertRaises(ValueError):
+            index.add_many(self.users[:2], self.data[:2])
+
+    def test_one_million_templates(self):
+        """Test enrollment and identification at 1M templates."""
+        count, dim = 1_000_000, 16
+        data = self.rng.standard_normal((count, dim), dtype=np.float32)
+        index = self.index_class(dim, initial_capacity=count)
+        index.add_many([f"u{i}" for i in range(count)], data)
+
+        for row in (0, 654_321, count - 1):
+            probe = data[row] + 0.05 * self.rng.standard_normal(dim, dtype=np.float32)
+            self.assertEqual(index.identify(probe)[0][0], f"u{row}")
+
+        index.remove("u0")
+        self.assertEqual(len(index), count - 1)
+        self.assertEqual(index.identify(data[count - 1])[0][0], f"u{count - 1}")
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestEEGPipeline(unittest.TestCase):
+    """Tests for the eeg_ingest module."""
+
+    CHANNELS = 64
+    RATE = 1000
+    BLOCK = 50
+
+    def setUp(self):
+        """Import the pipeline lazily so the module is optional."""
+        import eeg_ingest
+
+        self.ingest = eeg_ingest
+
+    def _blocks(self, seconds: float, peak_hz: float) -> list:
+        source = self.ingest.synthetic_blocks(
+            self.CHANNELS, self.RATE, self.BLOCK, seconds, peak_hz=peak_hz
+        )
+        return [block.copy() for block in source]
+
+    def test_ring_buffer_window_wraps(self):
+        """Test that the window is the latest samples, oldest first."""
+        ring = self.ingest.RingBuffer(channels=2, capacity=5)
+        for start in range(0, 12, 3):
+            block = np.arange(start, start + 3, dtype=np.float32)
+            ring.write(np.stack([block, -block], axis=1))
+        np.testing.assert_array_equal(ring.window()[0], [7, 8, 9, 10, 11])
+        np.testing.assert_array_equal(ring.window()[1], [-7, -8, -9, -10, -11])
+        self.assertTrue(np.shares_memory(ring.window(), ring._data))
+
+    def test_read_blocks_from_file_and_socket(self):
+        """Test that blocks are reassembled across short reads."""
+        samples = np.arange(4 * 3 * 2, dtype="<f4").reshape(-1, 3)
+        payload = samples.tobytes() + b"\x00\x00"
+
+        from_file = [b.copy() for b in self.ingest.read_blocks(io.BytesIO(payload), 3, 2)]
+        self.assertEqual(len(from_file), 4)
+        np.testing.assert_array_equal(np.concatenate(from_file), samples)
+
+        left, right = socket.socketpair()
+        self.addCleanup(left.close)
+
+        def send_slowly():
+            with right:
+                for i in range(0, len(payload), 5):
+                    right.sendall(payload[i:i + 5])
+
+        threading.Thread(target=send_slowly).start()
+        with left.makefile("rb") as stream:
+            from_socket = [b.copy() for b in self.ingest.read_blocks(stream, 3, 2)]
+        np.testing.assert_array_equal(np.concatenate(from_socket), samples)
+
+    def test_band_powers_and_state(self):
+        """Test that the dominant rhythm selects the band and state."""
+        alpha = self.ingest.EEGPipeline(self.CHANNELS, self.RATE)
+        features = list(alpha.run(self._blocks(2, peak_hz=10.0)))[-1]
+        self.assertGreater(features.band("alpha").mean(), 10 * features.band("beta").mean())
+        self.assertEqual(features.state, BrainState.CALM_RELAXED)
+
+        beta = self.ingest.EEGPipeline(self.CHANNELS, self.RATE)
+        features = list(beta.run(self._blocks(2, peak_hz=20.0)))[-1]
+        self.assertEqual(features.state, BrainState.STRESSED)
+
+        theta = self.ingest.EEGPipeline(self.CHANNELS, self.RATE)
+        features = list(theta.run(self._blocks(2, peak_hz=6.0)))[-1]
+        self.assertEqual(features.state, BrainState.FATIGUED)
+
+    def test_no_allocation_after_warm_up(self):
+        """Test that steady-state frames allocate no arrays."""
+        pipeline = self.ingest.EEGPipeline(self.CHANNELS, self.RATE)
+        blocks = self._blocks(3, peak_hz=10.0)
+        warm, steady = blocks[:25], blocks[25:]
+        for block in warm:
+            pipeline.feed(block)
+
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            for block in steady:
+                pipeline.feed(block)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # Only transient view headers remain; a per-frame spectrum buffer
+        # (channels x in-band bins x float32) alone would be several KB
+        self.assertLess(peak - baseline, 4096)
+
+    def test_real_time_rate(self):
+        """Test 64 channels at 1 kHz are processed faster than real time."""
+        seconds = 5
+        blocks = self._blocks(seconds, peak_hz=10.0)
+        pipeline = self.ingest.EEGPipeline(self.CHANNELS, self.RATE)
+        start = time.perf_counter()
+        for _ in pipeline.run(blocks):
+            pass
+        self.assertLess(time.perf_counter() - start, seconds)
+
+    def test_authenticate_stream(self):
+        """Test that pipeline frames drive enrollment and authentication."""
+        pipeline = self.ingest.EEGPipeline(self.CHANNELS, self.RATE)
+        frames = pipeline.run(self._blocks(3, peak_hz=10.0))
+        enrollment_frame = next(frames)
+
+        interface = CustodianNeuralInterface(
+            make_policy(), embedding_dim=enrollment_frame.vector.size
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            interface.enroll_user(
+                "alice",
+                EEGDevice.RESEARCH_64CH,
+                AuthenticationMethod.CONTINUOUS,
+                informed_consent=True,
+                features=enrollment_frame.vector.copy(),
+            )
+
+        results = list(self.ingest.authenticate_stream(
+            interface, "alice", EEGDevice.RESEARCH_64CH, frames, every=5
+        ))
+        self.assertTrue(results)
+        self.assertTrue(all(success for success, _ in results))
+        self.assertEqual(interface.auth_log[-1].current_state, BrainState.CALM_RELAXED)
+
+
+class TestCustodianNeuralInterface(unittest.TestCase):
+    """Tests for the CustodianNeuralInterface class."""
+
+    def setUp(self):
+        """Set up an interface with one enrolled user."""
+        self.interface = CustodianNeuralInterface(make_policy())
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.interface.enroll_user(
+                "alice",
+                EEGDevice.MUSE_HEADBAND,
+                AuthenticationMethod.PASSTHOUGHT,
+                informed_consent=True,
+            )
+
+    def test_enrolled_user_authenticates(self):
+        """Test that an enrolled user matches their own template."""
+        success, _ = self.interface.authenticate_user(
+            "alice", EEGDevice.MUSE_HEADBAND, BrainState.CALM_RELAXED
+        )
+        self.assertTrue(success)
+        self.assertGreater(self.interface.auth_log[-1].match_confidence, 0.9)
+
+    def test_withdrawn_user_removed_from_templates(self):
+        """Test that withdrawal deletes the stored template."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.interface.withdraw_user("alice")
+        self.assertNotIn("alice", self.interface.templates)
+
+    def test_compliant_policy_verdict(self):
+        """Test the compliance report of a compliant policy."""
+        report = self.interface.check_kernel_compliance()
+        self.assertTrue(report["overall_compliant"])
+        self.assertEqual(report["issues"], [])
+
+    def test_violating_policy_rejected(self):
+        """Test that every broken rule is reported at construction."""
+        policy = make_policy(
+            alternatives_available=False,
+            consent_level=ConsentLevel.COERCED,
+        )
+        with self.assertRaises(ValueError) as context:
+            CustodianNeuralInterface(policy)
+        message = str(context.exception)
+        self.assertIn("VIOLATION Q1: No alternative auth methods", message)
+        self.assertIn("VIOLATION Q3: Coerced participation", message)
+
+        verdict = evaluate_policy(policy)
+        self.assertEqual(verdict.question_compliant, (False, True, False))
+        self.assertEqual(len(verdict.issues), 3)
+
+    def test_verdict_cached_per_policy(self):
+        """Test that equal policies share one cached verdict."""
+        self.assertIs(evaluate_policy(make_policy()), evaluate_policy(make_policy()))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            self.interface.data_policy.encrypted = False
+
+    def test_replacing_policy_refreshes_verdict(self):
+        """Test that assigning a new policy revalidates it."""
+        self.interface.data_policy = make_policy(purpose="Research")
+        self.assertEqual(self.interface.data_policy.purpose, "Research")
+        self.assertTrue(self.interface.check_kernel_compliance()["overall_compliant"])
+
+        with self.assertRaises(ValueError):
+            self.interface.data_policy = make_policy(encrypted=False)
+        self.assertTrue(self.interface.data_policy.encrypted)
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_embedding_enrollment_and_identification(self):
+        """Test that embedding matching follows enroll and withdraw."""
+        interface = CustodianNeuralInterface(make_policy(), embedding_dim=32)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for user_id in ("alice", "bob"):
+                interface.enroll_user(
+                    user_id,
+                    EEGDevice.MUSE_HEADBAND,
+                    AuthenticationMethod.PASSTHOUGHT,
+                    informed_consent=True,
+                )
+        success, _ = interface.authenticate_user(
+            "bob", EEGDevice.MUSE_HEADBAND, BrainState.CALM_RELAXED
+        )
+        self.assertTrue(success)
+
+        probe = interface._extract_brainprint_embedding(
+            "bob", EEGDevice.MUSE_HEADBAND, AuthenticationMethod.PASSTHOUGHT
+        )
+        self.assertEqual(interface.identify_user(probe)[0][0], "bob")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            interface.withdraw_user("bob")
+        self.assertEqual(interface.identify_user(probe), [])
+
+
+class TestMessageJournal(unittest.TestCase):
+    """Tests for the MessageJournal class."""
+
+    def setUp(self):
+        """Set up a temporary spill directory."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.spill_dir = self._tmp.name
+
+    def test_sequence_numbers_are_per_pair(self):
+        """Test that each conversation has its own sequence."""
+        journal = MessageJournal()
+        journal.append("alice", "bob", "thought", "one")
+        journal.append("alice", "carol", "thought", "two")
+        entry = journal.append("alice", "bob", "thought", "three")
+        self.assertEqual(entry.seq, 1)
+
+    def test_memory_is_bounded(self):
+        """Test that the in-memory size never exceeds the bound."""
+        journal = MessageJournal(max_in_memory=5)
+        for i in range(50):
+            journal.append(f"user{i % 7}", "bob", "signal", str(i))
+            self.assertLessEqual(len(journal), 5)
+
+    def test_replay_reads_spilled_segments_in_order(self):
+        """Test that spilled and buffered entries replay as one sequence."""
+        journal = MessageJournal(max_in_memory=3, spill_dir=self.spill_dir)
+        for i in range(10):
+            journal.append("alice", "bob", "thought", f"msg {i}")
+            journal.append("carol", "dave", "thought", f"noise {i}")
+
+        replayed = list(journal.replay("alice", "bob"))
+        self.assertEqual([e.seq for e in replayed], list(range(10)))
+        self.assertEqual(replayed[-1].content, "msg 9")
+
+    def test_replay_since_seq(self):
+        """Test replaying a conversation from a given sequence number."""
+        journal = MessageJournal(max_in_memory=2, spill_dir=self.spill_dir)
+        for i in range(6):
+            journal.append("alice", "bob", "thought", str(i))
+        seqs = [e.seq for e in journal.replay("alice", "bob", since_seq=4)]
+        self.assertEqual(seqs, [4, 5])
+
+    def test_content_stored_as_hash_only(self):
+        """Test that content is not retained when storing is disallowed."""
+        journal = MessageJournal(store_content=False)
+        entry = journal.append("alice", "bob", "emotion", "secret")
+        self.assertIsNone(entry.content)
+        self.assertEqual(len(entry.content_hash), 64)
+
+    def test_forget_user_deletes_segments(self):
+        """Test that withdrawal removes buffers and segment files."""
+        journal = MessageJournal(max_in_memory=2, spill_dir=self.spill_dir)
+        for i in range(5):
+            journal.append("alice", "bob", "thought", str(i))
+        journal.append("carol", "dave", "thought", "kept")
+        self.assertTrue(os.listdir(self.spill_dir))
+
+        self.assertEqual(journal.forget_user("bob"), 1)
+        self.assertEqual(list(journal.replay("alice", "bob")), [])
+        self.assertEqual(journal.pairs_for_user("alice"), set())
+        self.assertEqual(len(list(journal.replay("carol", "dave"))), 1)
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+
+class TestBrainToBrainInterface(unittest.TestCase):
+    """Tests for the BrainToBrainInterface class."""
+
+    def _connect(self, b2b: BrainToBrainInterface) -> None:
+        b2b.establish_connection("alice", "bob", True, True, "a_hash", "b_hash")
+
+    def test_policy_controls_content_storage(self):
+        """Test that a policy without raw storage journals hashes only."""
+        b2b = BrainToBrainInterface(make_policy(raw_eeg_stored=False))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self._connect(b2b)
+            b2b.send_neural_message("alice", "bob", "thought", "hello")
+        entry = next(b2b.message_journal.replay("alice", "bob"))
+        self.assertIsNone(entry.content)
+
+    def test_disconnect_erases_messages(self):
+        """Test that disconnecting deletes the user's conversations."""
+        b2b = BrainToBrainInterface()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self._connect(b2b)
+            b2b.send_neural_message("alice", "bob", "thought", "hello")
+            self.assertEqual(b2b.disconnect("bob"), 1)
+        self.assertEqual(list(b2b.message_journal.replay("alice", "bob")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,42 +9,109 @@ Modules:
     ai_client: AI client integration layer
     gateway: Request interception and routing
     evaluator: Detailed evaluation engine
+    metrics: Counters and latency histograms for /metrics
+    tracing: Per-request spans and the slow request report
+    profiler: On-demand sampling profiler
+    upstreams: Load-balanced pool of OpenAI-compatible backends
+    admission: Adaptive concurrency limiting for the gateway
+    batching: Micro-batching of model calls
+    directive_registry: Versioned, hot-reloadable directive bundles
+    tenants: Per-tenant directive bundles, compiled lazily
+    context_window: Trimming conversations to a token budget
+    sessions: Server-side conversation state for delta uploads
+    http_clients: Pooled, HTTP/2-capable upstream clients with cached DNS
 """
 
-from core_directive import (
-    ActionResult,
-    CoreDirective,
-    DirectiveEvaluation,
-    evaluate,
-    get_directive,
-    is_allowed,
-)
-from ai_client import (
-    AIResponse,
-    GovernedAIClient,
-    MockAIModel,
-    create_client,
-    create_test_client,
-)
-from gateway import (
-    AuditEntry,
-    GovernanceGateway,
-    GatewayRequest,
-    GatewayResponse,
-    create_gateway,
-    content_filter_middleware,
-    rate_limit_middleware,
-)
-from evaluator import (
-    ConflictAssessment,
-    ConflictType,
-    DetailedEvaluation,
-    DirectiveEvaluator,
-    ImpactAssessment,
-    ImpactCategory,
-    evaluate_detailed,
-    get_evaluator,
-)
+import importlib
+
+# Exported names and the module that defines each. Modules are imported on
+# first attribute access, so importing the package costs nothing beyond this
+# file and a verdict check never loads the gateway or AI client.
+_EXPORTS = {
+    # Core Directive
+    "ActionResult": "core_directive",
+    "CoreDirective": "core_directive",
+    "DirectiveEvaluation": "core_directive",
+    "evaluate": "core_directive",
+    "get_directive": "core_directive",
+    "is_allowed": "core_directive",
+    # AI Client
+    "AIResponse": "ai_client",
+    "AsyncAIModelProtocol": "ai_client",
+    "GovernedAIClient": "ai_client",
+    "MockAIModel": "ai_client",
+    "create_client": "ai_client",
+    "create_test_client": "ai_client",
+    # Gateway
+    "AuditEntry": "gateway",
+    "GovernanceGateway": "gateway",
+    "GatewayRequest": "gateway",
+    "GatewayResponse": "gateway",
+    "create_gateway": "gateway",
+    "content_filter_middleware": "gateway",
+    "rate_limit_middleware": "gateway",
+    # Evaluator
+    "ConflictAssessment": "evaluator",
+    "ConflictType": "evaluator",
+    "DetailedEvaluation": "evaluator",
+    "DirectiveEvaluator": "evaluator",
+    "ImpactAssessment": "evaluator",
+    "ImpactCategory": "evaluator",
+    "evaluate_detailed": "evaluator",
+    "get_evaluator": "evaluator",
+    # Metrics
+    "MetricsRegistry": "metrics",
+    "get_registry": "metrics",
+    # Tracing
+    "Tracer": "tracing",
+    "get_tracer": "tracing",
+    # Profiler
+    "SamplingProfiler": "profiler",
+    "start_profile": "profiler",
+    # Upstreams
+    "Backend": "upstreams",
+    "UpstreamPool": "upstreams",
+    "create_pool": "upstreams",
+    "upstream_route": "upstreams",
+    # Admission
+    "AdmissionController": "admission",
+    "GradientLimiter": "admission",
+    "Overloaded": "admission",
+    "create_admission": "admission",
+    # Batching
+    "BatchingModel": "batching",
+    # Directive registry
+    "DirectiveRegistry": "directive_registry",
+    "get_directive_registry": "directive_registry",
+    # Tenants
+    "TenantDirectives": "tenants",
+    "get_tenant_directives": "tenants",
+    # Context window
+    "Conversation": "context_window",
+    "TokenCounter": "context_window",
+    # Sessions
+    "SessionStore": "sessions",
+    "get_session_store": "sessions",
+    # Upstream clients
+    "create_http_client": "http_clients",
+    "create_async_http_client": "http_clients",
+    "get_dns_cache": "http_clients",
+}
+
+
+def __getattr__(name: str):
+    """Import the defining module of an exported name on first access."""
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # Later lookups bypass __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 __version__ = "0.1.0"
 __all__ = [
@@ -57,6 +124,7 @@ __all__ = [
     "is_allowed",
     # AI Client
     "AIResponse",
+    "AsyncAIModelProtocol",
     "GovernedAIClient",
     "MockAIModel",
     "create_client",
@@ -78,4 +146,41 @@ __all__ = [
     "ImpactCategory",
     "evaluate_detailed",
     "get_evaluator",
+    # Metrics
+    "MetricsRegistry",
+    "get_registry",
+    # Tracing
+    "Tracer",
+    "get_tracer",
+    # Profiler
+    "SamplingProfiler",
+    "start_profile",
+    # Upstreams
+    "Backend",
+    "UpstreamPool",
+    "create_pool",
+    "upstream_route",
+    # Admission
+    "AdmissionController",
+    "GradientLimiter",
+    "Overloaded",
+    "create_admission",
+    # Batching
+    "BatchingModel",
+    # Directive registry
+    "DirectiveRegistry",
+    "get_directive_registry",
+    # Tenants
+    "TenantDirectives",
+    "get_tenant_directives",
+    # Context window
+    "Conversation",
+    "TokenCounter",
+    # Sessions
+    "SessionStore",
+    "get_session_store",
+    # Upstream clients
+    "create_http_client",
+    "create_async_http_client",
+    "get_dns_cache",
 ]
@@ -0,0 +1,287 @@
+"""
+Admission Module - Adaptive Concurrency Limiting for the Gateway
+
+This module puts a load-aware gate in front of GovernanceGateway.process.
+Without it the gateway accepts every request however slow its routes have
+become, so work piles up in memory when an upstream slows down.
+
+Admission Features:
+1. A concurrency limit that adapts to observed latency (gradient algorithm):
+   it grows while latency stays near its long-term baseline and shrinks
+   when latency rises above it
+2. Requests over the limit wait in a bounded priority queue keyed on the
+   request source; lower priority values are served first
+3. When the queue is full, or a request waits too long, it fails fast with
+   an Overloaded error carrying a Retry-After estimate (HTTP 429)
+4. Limit, in-flight count and queue depth for the gateway's stats
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Dict, List, Mapping, Optional
+
+DEFAULT_PRIORITY = 1
+# Stale heap entries tolerated beyond the live ones before compacting
+COMPACT_SLACK = 16
+
+
+class Overloaded(RuntimeError):
+    """Raised when a request is refused because the gateway is at its limit."""
+
+    status_code = 429
+
+    def __init__(self, retry_after: int, reason: str = "Gateway overloaded"):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(self.retry_after)}
+
+
+class GradientLimiter:
+    """
+    Concurrency limit driven by the ratio of baseline to current latency.
+
+    Two EWMAs of request latency are kept: a short one for current latency
+    and a long one as the baseline. Each sample moves the limit toward
+
+        limit * clamp(tolerance * long / short, 0.5, 1.0) + sqrt(limit)
+
+    so the limit grows by about sqrt(limit) while latency is within
+    tolerance of the baseline, and is cut by up to half when it is not.
+    Samples taken while less than half the limit is in use say nothing
+    about capacity and leave it unchanged.
+
+    Not thread-safe on its own; AdmissionController serializes calls.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        short_window: int = 10,
+        long_window: int = 600,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Need 1 <= min_limit <= initial_limit <= max_limit")
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._short_alpha = 2.0 / (short_window + 1)
+        self._long_alpha = 2.0 / (long_window + 1)
+        self.short_ns = 0.0
+        self.long_ns = 0.0
+
+    def on_sample(self, latency_ns: int, in_flight: int, dropped: bool = False) -> None:
+        """Record one finished request; in_flight counts it as still running."""
+        if dropped:
+            # Errors and timeouts say the backend is struggling: back off
+            self.limit = max(self.min_limit, self.limit * 0.9)
+            return
+
+        if self.long_ns == 0.0:
+            self.short_ns = self.long_ns = float(latency_ns)
+        else:
+            self.short_ns += self._short_alpha * (latency_ns - self.short_ns)
+            self.long_ns += self._long_alpha * (latency_ns - self.long_ns)
+            if self.long_ns > 2 * self.short_ns:
+                # Latency fell well below the baseline; let it catch up
+                self.long_ns *= 0.95
+
+        if in_flight < self.limit / 2:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_ns / self.short_ns))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit + self.smoothing * (target - self.limit)
+        self.limit = max(float(self.min_limit), min(float(self.max_limit), limit))
+
+
+class _Waiter:
+    __slots__ = ("priority", "sequence", "event", "granted_ns", "done")
+
+    def __init__(self, priority: int, sequence: int):
+        self.priority = priority
+        self.sequence = sequence
+        self.event = threading.Event()
+        self.granted_ns = 0
+        self.done = False  # Granted, evicted or given up; no longer queued
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class AdmissionController:
+    """
+    Admits requests up to an adaptive concurrency limit.
+
+    acquire() returns at once while the limit has room, otherwise queues the
+    caller by the priority of its source for up to queue_timeout seconds.
+    Every successful acquire() must be paired with release(), which feeds
+    the request's latency to the limiter and hands the slot to the next
+    waiter. A full queue evicts its lowest-priority waiter in favour of a
+    higher-priority arrival.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[GradientLimiter] = None,
+        priorities: Optional[Mapping[str, int]] = None,
+        default_priority: int = DEFAULT_PRIORITY,
+        max_queue: int = 100,
+        queue_timeout: float = 1.0,
+    ):
+        self.limiter = limiter or GradientLimiter()
+        self.priorities = dict(priorities or {})
+        self.default_priority = default_priority
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._queue: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._queued = 0
+        self._in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self.limiter.limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def acquire(self, source: str = "unknown") -> int:
+        """
+        Wait for a slot and return its start time (perf_counter_ns).
+
+        Raises:
+            Overloaded: If the queue is full or the wait times out
+        """
+        priority = self.priorities.get(source, self.default_priority)
+        with self._lock:
+            if self._in_flight < self.limit and not self._queued:
+                self._in_flight += 1
+                self.admitted += 1
+                return time.perf_counter_ns()
+            if self._queued >= self.max_queue and not self._evict_below(priority):
+                raise self._reject()
+            waiter = _Waiter(priority, next(self._sequence))
+            heapq.heappush(self._queue, waiter)
+            self._queued += 1
+
+        waiter.event.wait(self.queue_timeout)
+        with self._lock:
+            if waiter.granted_ns:
+                return waiter.granted_ns
+            if not waiter.done:
+                self._discard(waiter)
+            raise self._reject()
+
+    def release(self, started_ns: int, ok: bool = True) -> None:
+        """Finish a request admitted at started_ns; ok=False for errors."""
+        latency_ns = time.perf_counter_ns() - started_ns
+        with self._lock:
+            self.limiter.on_sample(latency_ns, self._in_flight, dropped=not ok)
+            self._in_flight -= 1
+            self._grant()
+
+    def _grant(self) -> None:
+        queue = self._queue
+        while queue and self._in_flight < self.limit:
+            waiter = heapq.heappop(queue)
+            if waiter.done:
+                continue
+            waiter.done = True
+            waiter.granted_ns = time.perf_counter_ns()
+            self._queued -= 1
+            self._in_flight += 1
+            self.admitted += 1
+            waiter.event.set()
+
+    def _evict_below(self, priority: int) -> bool:
+        # Drop the newest waiter of the lowest priority, if it ranks below
+        # the arrival; evicted waiters are skipped when popped
+        worst = None
+        for waiter in self._queue:
+            if not waiter.done and (worst is None or worst < waiter):
+                worst = waiter
+        if worst is None or worst.priority <= priority:
+            return False
+        self._discard(worst)
+        worst.event.set()
+        return True
+
+    def _discard(self, waiter: _Waiter) -> None:
+        """
+        Take a waiter out of the queue without a grant.
+
+        It stays in the heap until popped; once such stale entries outnumber
+        the live ones, the heap is rebuilt. While every slot is stuck nothing
+        is popped, so this is what keeps the heap, and the scan in
+        _evict_below, bounded by max_queue.
+        """
+        waiter.done = True
+        self._queued -= 1
+        if len(self._queue) > 2 * self._queued + COMPACT_SLACK:
+            self._queue = [w for w in self._queue if not w.done]
+            heapq.heapify(self._queue)
+
+    def _reject(self) -> Overloaded:
+        self.rejected += 1
+        return Overloaded(self.retry_after())
+
+    def retry_after(self) -> int:
+        """Whole seconds until the queue would likely have drained."""
+        latency = self.limiter.short_ns / 1e9 or 1.0
+        return max(1, math.ceil((self._queued + 1) / max(self.limit, 1) * latency))
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": self.limit,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def create_admission(
+    initial_limit: int = 20,
+    max_limit: int = 200,
+    priorities: Optional[Mapping[str, int]] = None,
+    max_queue: int = 100,
+    queue_timeout: float = 1.0,
+) -> AdmissionController:
+    """
+    Factory function to create an admission controller.
+
+    Args:
+        initial_limit: Concurrency limit before any latency is observed
+        max_limit: Upper bound for the adaptive limit
+        priorities: Priority per request source; lower is served first
+        max_queue: How many requests may wait for a slot
+        queue_timeout: Seconds a request may wait before it is refused
+
+    Returns:
+        Configured AdmissionController instance
+    """
+    return AdmissionController(
+        GradientLimiter(initial_limit=initial_limit, max_limit=max_limit),
+        priorities=priorities,
+        max_queue=max_queue,
+        queue_timeout=queue_timeout,
+    )
@@ -11,10 +11,13 @@ The AI Client:
 2. Provides system messages that incorporate the governance kernel
 3. Evaluates requests before processing
 4. Filters responses for compliance
+5. Processes many prompts concurrently, with sync or async models
 """
 
+import asyncio
+import time
 from dataclasses import dataclass
-from typing import Callable, Optional, Protocol
+from typing import Callable, List, Optional, Protocol, Sequence, Union, runtime_checkable
 
 from core_directive import (
     ActionResult,
@@ -22,6 +25,14 @@ from core_directive import (
     DirectiveEvaluation,
     get_directive,
 )
+from metrics import REQUESTS, STAGE_SECONDS, Counter
+from tracing import SPAN_KIND_CLIENT, Trace, get_tracer
+
+
+# Metric children resolved once so recording stays cheap
+_EVALUATION_SECONDS = STAGE_SECONDS.labels("ai_client", "evaluation")
+_UPSTREAM_SECONDS = STAGE_SECONDS.labels("ai_client", "upstream")
+_RESULT_COUNTERS = {result: REQUESTS.labels("ai_client", result.value) for result in ActionResult}
 
 
 class AIModelProtocol(Protocol):
@@ -32,6 +43,15 @@ class AIModelProtocol(Protocol):
         ...
 
 
+@runtime_checkable
+class AsyncAIModelProtocol(Protocol):
+    """Protocol defining the interface for asynchronous AI models."""
+
+    async def agenerate(self, prompt: str, system_message: str) -> str:
+        """Generate a response given a prompt and system message."""
+        ...
+
+
 @dataclass
 class AIResponse:
     """Represents a governed AI response."""
@@ -52,7 +72,7 @@ class GovernedAIClient:
 
     def __init__(
         self,
-        model: Optional[AIModelProtocol] = None,
+        model: Optional[Union[AIModelProtocol, AsyncAIModelProtocol]] = None,
         directive: Optional[CoreDirective] = None,
         pre_process_hook: Optional[Callable[[str], str]] = None,
         post_process_hook: Optional[Callable[[str], str]] = None,
@@ -61,35 +81,40 @@ class GovernedAIClient:
         Initialize the governed AI client.
 
         Args:
-            model: The underlying AI model to wrap
+            model: The underlying AI model to wrap, synchronous or async
             directive: CoreDirective instance (uses default if not provided)
             pre_process_hook: Optional function to pre-process prompts
             post_process_hook: Optional function to post-process responses
         """
         self._model = model
-        self._directive = directive or get_directive()
+        # Without an explicit directive, follow the current default one
+        self._directive = directive
         self._pre_process_hook = pre_process_hook
         self._post_process_hook = post_process_hook
-        self._request_count = 0
-        self._blocked_count = 0
+        # Per-thread counters, exact under concurrent callers
+        self._request_count = Counter()
+        self._blocked_count = Counter()
 
     @property
     def directive(self) -> CoreDirective:
         """Return the governing directive."""
-        return self._directive
+        return self._directive or get_directive()
 
     @property
     def stats(self) -> dict:
         """Return usage statistics."""
+        # Blocked is counted after total, so read it first
+        blocked = self._blocked_count.value
+        total = self._request_count.value
         return {
-            "total_requests": self._request_count,
-            "blocked_requests": self._blocked_count,
-            "allowed_requests": self._request_count - self._blocked_count,
+            "total_requests": total,
+            "blocked_requests": blocked,
+            "allowed_requests": total - blocked,
         }
 
     def get_system_message(self) -> str:
         """Get the system message incorporating the Core Directive."""
-        return self._directive.get_system_message()
+        return self.directive.get_system_message()
 
     def evaluate_request(self, prompt: str) -> DirectiveEvaluation:
         """
@@ -101,7 +126,7 @@ class GovernedAIClient:
         Returns:
             DirectiveEvaluation with the assessment
         """
-        return self._directive.evaluate_intent(prompt)
+        return self.directive.evaluate_intent(prompt)
 
     def process(self, prompt: str) -> AIResponse:
         """
@@ -113,19 +138,118 @@ class GovernedAIClient:
         Returns:
             AIResponse with the result and governance metadata
         """
-        self._request_count += 1
+        admitted = self._admit(prompt)
+        if isinstance(admitted, AIResponse):
+            return admitted
+        processed_prompt, evaluation, trace = admitted
+
+        # Generate response if model is available
+        if self._model:
+            system_message = self.get_system_message()
+            started = time.perf_counter_ns()
+            if hasattr(self._model, "generate"):
+                content = self._model.generate(processed_prompt, system_message)
+            else:
+                # An async-only model, called from outside an event loop
+                content = asyncio.run(self._model.agenerate(processed_prompt, system_message))
+            self._record_upstream(trace, started)
+        else:
+            # No model configured - return evaluation info
+            content = self._generate_no_model_response(evaluation)
+        return self._respond(prompt, evaluation, trace, content)
+
+    async def aprocess(self, prompt: str) -> AIResponse:
+        """
+        Process a prompt through the governed AI client without blocking.
+
+        Async models are awaited; synchronous ones run in a worker thread.
+
+        Args:
+            prompt: The user's prompt/request
+
+        Returns:
+            AIResponse with the result and governance metadata
+        """
+        admitted = self._admit(prompt)
+        if isinstance(admitted, AIResponse):
+            return admitted
+        return await self._agenerate(prompt, *admitted)
+
+    async def process_many(
+        self,
+        prompts: Sequence[str],
+        concurrency: int = 8,
+    ) -> List[AIResponse]:
+        """
+        Process many prompts, up to concurrency model calls at a time.
+
+        Every prompt is evaluated first; blocked prompts are answered
+        without calling the model, and the rest are sent concurrently.
+
+        Args:
+            prompts: The user's prompts/requests
+            concurrency: Most model calls in flight at once
+
+        Returns:
+            One AIResponse per prompt, in the order of prompts
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate(prompt: str, admitted: tuple) -> AIResponse:
+            async with semaphore:
+                return await self._agenerate(prompt, *admitted)
+
+        responses: List[Optional[AIResponse]] = []
+        tasks = {}
+        for index, prompt in enumerate(prompts):
+            admitted = self._admit(prompt)
+            if isinstance(admitted, AIResponse):
+                responses.append(admitted)
+            else:
+                responses.append(None)
+                tasks[index] = asyncio.ensure_future(generate(prompt, admitted))
+
+        try:
+            for index, response in zip(tasks, await asyncio.gather(*tasks.values())):
+                responses[index] = response
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return responses
+
+    def _admit(self, prompt: str) -> Union[tuple, AIResponse]:
+        """
+        Count and evaluate a prompt.
 
+        Returns the blocked AIResponse, or (processed prompt, evaluation,
+        trace) for a prompt that may go on to the model.
+        """
         # Pre-process the prompt if a hook is provided
         processed_prompt = prompt
         if self._pre_process_hook:
             processed_prompt = self._pre_process_hook(prompt)
 
+        tracer = get_tracer()
+        trace = tracer.start_trace(None, "ai_client.process")
+
         # Evaluate against Core Directive
+        started = time.perf_counter_ns()
         evaluation = self.evaluate_request(processed_prompt)
+        evaluated = time.perf_counter_ns()
+        _EVALUATION_SECONDS.observe_ns(evaluated - started)
+        _RESULT_COUNTERS[evaluation.result].inc()
+        if trace is not None:
+            trace.add_span("directive.evaluate", started, evaluated, result=evaluation.result.value)
+
+        self._request_count.inc()
 
         # Handle blocked requests
         if evaluation.result == ActionResult.BLOCKED:
-            self._blocked_count += 1
+            self._blocked_count.inc()
+            tracer.finish(trace)
             content = self._generate_blocked_response(evaluation)
             return AIResponse(
                 content=content,
@@ -133,18 +257,48 @@ class GovernedAIClient:
                 directive_evaluation=evaluation,
                 original_prompt=prompt,
             )
+        return processed_prompt, evaluation, trace
 
-        # Generate response if model is available
+    async def _agenerate(
+        self,
+        prompt: str,
+        processed_prompt: str,
+        evaluation: DirectiveEvaluation,
+        trace: Optional[Trace],
+    ) -> AIResponse:
+        """Generate the response for an admitted prompt."""
         if self._model:
             system_message = self.get_system_message()
-            content = self._model.generate(processed_prompt, system_message)
+            started = time.perf_counter_ns()
+            if isinstance(self._model, AsyncAIModelProtocol):
+                content = await self._model.agenerate(processed_prompt, system_message)
+            else:
+                content = await asyncio.to_thread(
+                    self._model.generate, processed_prompt, system_message,
+                )
+            self._record_upstream(trace, started)
         else:
-            # No model configured - return evaluation info
             content = self._generate_no_model_response(evaluation)
+        return self._respond(prompt, evaluation, trace, content)
+
+    def _record_upstream(self, trace: Optional[Trace], started: int) -> None:
+        generated = time.perf_counter_ns()
+        _UPSTREAM_SECONDS.observe_ns(generated - started)
+        if trace is not None:
+            trace.add_span("upstream.request", started, generated, SPAN_KIND_CLIENT)
 
+    def _respond(
+        self,
+        prompt: str,
+        evaluation: DirectiveEvaluation,
+        trace: Optional[Trace],
+        content: str,
+    ) -> AIResponse:
+        """Post-process generated content into the AIResponse."""
         # Post-process the response if a hook is provided
         if self._post_process_hook:
             content = self._post_process_hook(content)
+        get_tracer().finish(trace)
 
         return AIResponse(
             content=content,
@@ -176,7 +330,7 @@ class GovernedAIClient:
     def __repr__(self) -> str:
         return (
             f"GovernedAIClient(model={self._model}, "
-            f"requests={self._request_count})"
+            f"requests={self._request_count.value})"
         )
 
 
@@ -199,6 +353,14 @@ class MockAIModel:
             f"Governed by Core Directive: Yes"
         )
 
+    async def agenerate(self, prompt: str, system_message: str) -> str:
+        """Generate a mock response asynchronously."""
+        return self.generate(prompt, system_message)
+
+    def generate_batch(self, prompts: Sequence[str], system_message: str) -> List[str]:
+        """Generate mock responses for several prompts at once."""
+        return [self.generate(prompt, system_message) for prompt in prompts]
+
 
 def create_client(
     model: Optional[AIModelProtocol] = None,
@@ -0,0 +1,376 @@
+"""Fast path for chat completion request bodies.
+
+The body is parsed once, with orjson when it is installed. Only the fields
+the app reads are checked: ``model`` and each message's ``role`` and
+``content``, plus the types of ``temperature``, ``max_tokens`` and
+``stream``. A body outside that common shape is handed to the pydantic
+model, so clients get exactly the errors and coercions they got before.
+
+The Core Directive is then spliced into the original bytes instead of
+re-encoding the conversation: a short scan finds the ``messages`` array and
+the offsets of the system messages' contents, and the directive is inserted
+there. Message contents are never decoded into models or re-encoded. If
+the scan cannot place the directive unambiguously (a repeated key, escaped
+key names), the parsed body is re-encoded instead.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app.models import ChatCompletionRequest
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def loads(body: bytes) -> Any:
+    """Parse JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+_ROLES = frozenset(("system", "user", "assistant"))
+
+
+@dataclass
+class ChatBody:
+    """A parsed chat completion request body."""
+    body: bytes
+    data: Dict[str, Any]
+    system_indexes: List[int] = field(default_factory=list)
+
+    @property
+    def model(self) -> str:
+        return self.data["model"]
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        return self.data["messages"]
+
+
+def _is_common_shape(data: Any) -> bool:
+    """Whether the body needs no coercion and has every field we touch."""
+    if type(data) is not dict or type(data.get("model")) is not str:
+        return False
+    messages = data.get("messages")
+    if type(messages) is not list:
+        return False
+    for message in messages:
+        if (
+            type(message) is not dict
+            or message.get("role") not in _ROLES
+            or type(message.get("content")) is not str
+        ):
+            return False
+    return (
+        type(data.get("temperature")) in (float, int, type(None))
+        and type(data.get("max_tokens")) in (int, type(None))
+        and type(data.get("stream")) in (bool, type(None))
+    )
+
+
+def _body_errors(exc: ValidationError) -> List[Dict[str, Any]]:
+    errors = exc.errors(include_url=False)
+    for error in errors:
+        error["loc"] = ("body", *error["loc"])
+    return errors
+
+
+def parse_chat_request(body: bytes) -> ChatBody:
+    """
+    Parse and check a chat completion request body.
+
+    Raises:
+        RequestValidationError: If the body is not valid JSON or does not
+            match ChatCompletionRequest; FastAPI answers it with a 422
+    """
+    try:
+        data = loads(body)
+    except ValueError as exc:
+        raise RequestValidationError([{
+            "type": "json_invalid",
+            "loc": ("body", getattr(exc, "pos", 0)),
+            "msg": "JSON decode error",
+            "input": {},
+            "ctx": {"error": getattr(exc, "msg", str(exc))},
+        }])
+
+    if not _is_common_shape(data):
+        try:
+            request = ChatCompletionRequest.model_validate(data)
+        except ValidationError as exc:
+            raise RequestValidationError(_body_errors(exc))
+        # Valid only after coercion (e.g. "0.5" for a float): forward the
+        # coerced values, keeping any fields the model does not declare
+        data = {**data, **request.model_dump(exclude_unset=True)}
+        body = dumps(data)
+
+    system_indexes = [
+        index for index, message in enumerate(data["messages"]) if message["role"] == "system"
+    ]
+    return ChatBody(body=body, data=data, system_indexes=system_indexes)
+
+
+# Strings are skipped with bytes.find, which is far faster than a regex
+# over long contents; everything else is matched with small regexes
+_WS = rb"[ \t\n\r]*"
+_TOKEN = re.compile(_WS + rb'(?:(")|([{}\[\],:])|([^ \t\n\r{}\[\],:"]+))')
+# The start of a message in the usual {"role": ..., "content": "..."} form,
+# up to the content's opening quote, and what follows the message
+_MESSAGE_HEAD = re.compile(
+    _WS + rb'\{' + _WS + rb'"role"' + _WS + rb':' + _WS + rb'"(?:system|user|assistant)"'
+    + _WS + rb',' + _WS + rb'"content"' + _WS + rb':' + _WS + rb'"'
+)
+_MESSAGE_TAIL = re.compile(_WS + rb'\}' + _WS + rb'([,\]])')
+_ARRAY_END = re.compile(_WS + rb'\]')
+_MESSAGES_KEY = b'"messages"'
+_CONTENT_KEY = b'"content"'
+
+
+def _string_end(body: bytes, quote: int) -> int:
+    """Offset just past the JSON string whose opening quote is at quote."""
+    pos = quote + 1
+    while True:
+        end = body.find(b'"', pos)
+        if end < 0:
+            raise ValueError("unterminated string")
+        if body.find(b"\\", pos, end) < 0:
+            return end + 1
+        backslashes = 0
+        while body[end - 1 - backslashes] == 0x5C:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end + 1
+        pos = end + 1
+
+
+def _scan_usual_messages(body: bytes, pos: int, contents: Dict[int, int]) -> Optional[int]:
+    """
+    Read a messages array made only of usual-form messages.
+
+    Returns the offset after its closing bracket, or None if any message
+    has another form and the array must be walked token by token.
+    """
+    end = _ARRAY_END.match(body, pos)
+    if end is not None:
+        return end.end()
+    index = 0
+    while True:
+        head = _MESSAGE_HEAD.match(body, pos)
+        if head is None:
+            return None
+        contents[index] = head.end() - 1
+        index += 1
+        tail = _MESSAGE_TAIL.match(body, _string_end(body, head.end() - 1))
+        if tail is None:
+            return None
+        pos = tail.end()
+        if tail.group(1) == b"]":
+            return pos
+
+
+def message_layout(body: bytes) -> Optional[Tuple[int, Dict[int, int]]]:
+    """
+    Locate the messages in a JSON request body.
+
+    Returns the offset just past the top-level messages array's "[" and,
+    per message index, the offset of the opening quote of its content.
+    Returns None if there is no such array, or if any object repeats a key
+    or has an escaped key name: a parser would take the last of the
+    repeated values, which may not be the one found here.
+    """
+    array_at = None
+    contents: Dict[int, int] = {}
+    # Per open container: [is_object, current key, element index, keys seen]
+    stack: List[list] = []
+    expect_key = False
+    pos = 0
+    while True:
+        token = _TOKEN.match(body, pos)
+        if token is None:
+            break
+        pos = token.end()
+        quote, punct, _ = token.groups()
+        if quote is not None:
+            start = pos - 1
+            pos = _string_end(body, start)
+            if expect_key:
+                key = body[start:pos]
+                if b"\\" in key or key in stack[-1][3]:
+                    return None
+                stack[-1][1] = key
+                stack[-1][3].add(key)
+                expect_key = False
+            elif (
+                len(stack) == 3
+                and stack[0][1] == _MESSAGES_KEY
+                and stack[2][0]
+                and stack[2][1] == _CONTENT_KEY
+            ):
+                contents[stack[1][2]] = start
+        elif punct is None:
+            continue
+        elif punct == b"{" or punct == b"[":
+            if punct == b"[" and len(stack) == 1 and stack[0][1] == _MESSAGES_KEY:
+                if array_at is not None:
+                    return None
+                array_at = pos
+                after = _scan_usual_messages(body, pos, contents)
+                if after is not None:
+                    pos = after
+                    continue
+            stack.append([punct == b"{", None, 0, set()])
+            expect_key = punct == b"{"
+        elif punct == b"}" or punct == b"]":
+            stack.pop()
+        elif punct == b",":
+            if stack[-1][0]:
+                expect_key = True
+            else:
+                stack[-1][2] += 1
+    if array_at is None:
+        return None
+    return array_at, contents
+
+
+def directive_fragments(directive: str) -> Tuple[bytes, bytes]:
+    """
+    The encoded pieces spliced into a body for a directive.
+
+    These are a new system message, and the escaped prefix for an
+    existing system message's content.
+    """
+    message = dumps({"role": "system", "content": directive})
+    prefix = dumps(f"{directive}\n\n")[1:-1]
+    return message, prefix
+
+
+_directive_fragments = lru_cache(maxsize=16)(directive_fragments)
+
+
+def prepare_directive(directive: str) -> None:
+    """Build the splice fragments for a directive ahead of its first request."""
+    _directive_fragments(directive)
+
+
+def splice_core_directive(
+    chat: ChatBody,
+    directive: str,
+    fragments: Optional[Tuple[bytes, bytes]] = None,
+) -> bytes:
+    """
+    The request body with the directive applied, for forwarding upstream.
+
+    Mirrors wrap_with_core_directive: the directive is prepended to every
+    system message, or added as the first message if there is none.
+    Callers that keep many directives (see tenants.py) pass the
+    directive's fragments, built once with directive_fragments.
+    """
+    message, prefix = fragments or _directive_fragments(directive)
+    body = chat.body
+    layout = message_layout(body)
+    if layout is None or len(layout[1]) != len(chat.messages):
+        return _reencode(chat, directive)
+
+    array_at, contents = layout
+    if not chat.system_indexes:
+        separator = b"," if chat.messages else b""
+        return b"".join((body[:array_at], message, separator, body[array_at:]))
+
+    pieces = []
+    start = 0
+    for index in chat.system_indexes:
+        insert_at = contents[index] + 1  # Just inside the opening quote
+        pieces.append(body[start:insert_at])
+        pieces.append(prefix)
+        start = insert_at
+    pieces.append(body[start:])
+    return b"".join(pieces)
+
+
+def wrap_window(
+    chat: ChatBody,
+    directive: str,
+    messages: List[Dict[str, Any]],
+    note: Optional[str] = None,
+) -> bytes:
+    """
+    The request body with only messages kept and the directive applied.
+
+    Used when older turns were dropped to fit the context window (see
+    context_window.py); note, if given, follows the directive in the
+    first system message.
+    """
+    return _reencode(chat, directive, messages, note)
+
+
+def conversation_body(
+    chat: ChatBody,
+    directive: str,
+    messages: List[Dict[str, Any]],
+    encoded: List[bytes],
+    indexes: Optional[List[int]] = None,
+    note: Optional[str] = None,
+) -> bytes:
+    """
+    The request body carrying a stored conversation, directive applied.
+
+    messages replaces the body's own (see sessions.py); indexes, if given,
+    picks the ones kept to fit the context window. encoded caches each
+    message's encoding for later turns, so only messages added since the
+    last turn, and the system messages the directive goes into, are
+    encoded here.
+    """
+    for message in messages[len(encoded):]:
+        encoded.append(dumps(message))
+    prefix = f"{directive}\n\n{note}" if note else directive
+    pieces = []
+    has_system = False
+    for index in range(len(messages)) if indexes is None else indexes:
+        message = messages[index]
+        if message["role"] == "system":
+            content = f"{directive if has_system else prefix}\n\n{message['content']}"
+            pieces.append(dumps({**message, "content": content}))
+            has_system = True
+        else:
+            pieces.append(encoded[index])
+    if not has_system:
+        pieces.insert(0, dumps({"role": "system", "content": prefix}))
+    head = dumps({key: value for key, value in chat.data.items() if key != "messages"})
+    return b"".join((head[:-1], b',"messages":[', b",".join(pieces), b"]}"))
+
+
+def _reencode(
+    chat: ChatBody,
+    directive: str,
+    messages: Optional[List[Dict[str, Any]]] = None,
+    note: Optional[str] = None,
+) -> bytes:
+    # The note goes with the directive into the first system message only
+    prefix = f"{directive}\n\n{note}" if note else directive
+    wrapped = []
+    has_system = False
+    for m in chat.messages if messages is None else messages:
+        if m["role"] == "system":
+            m = {**m, "content": f"{directive if has_system else prefix}\n\n{m['content']}"}
+            has_system = True
+        wrapped.append(m)
+    if not has_system:
+        wrapped.insert(0, {"role": "system", "content": prefix})
+    return dumps({**chat.data, "messages": wrapped})
@@ -1,25 +1,124 @@
 """FastAPI application for chat completions with Core Directive wrapper."""
 
+import os
 import time
 import uuid
-from typing import List
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
 
-from fastapi import FastAPI
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+import context_window
+import directive_registry
+import http_clients
+import metrics
+import profiler
+import sessions
+import tenants
+import tracing
+
+from app import fastpath
 from app.models import (
     ChatCompletionRequest,
     ChatCompletionResponse,
-    Choice,
     Message,
-    Usage,
 )
 from app.core_directive import CORE_DIRECTIVE
 
+# When set (e.g. https://api.openai.com/v1), requests are forwarded there
+# with the Core Directive spliced in, instead of answered with a mock reply.
+# APP_UPSTREAM_API_KEY, if set, replaces the caller's Authorization header.
+# The connection uses HTTP/2 where offered; see http_clients.py.
+UPSTREAM_URL_ENV = "APP_UPSTREAM_URL"
+UPSTREAM_API_KEY_ENV = "APP_UPSTREAM_API_KEY"
+UPSTREAM_TIMEOUT = float(os.environ.get("APP_UPSTREAM_TIMEOUT", "60"))
+UPSTREAM_MAX_CONNECTIONS = int(
+    os.environ.get("APP_UPSTREAM_MAX_CONNECTIONS", http_clients.DEFAULT_MAX_CONNECTIONS)
+)
+
+# Names the server-side conversation a request continues; see sessions.py
+SESSION_HEADER = "X-Session-ID"
+
+_upstream: Optional[httpx.AsyncClient] = None
+
+
+def current_directive() -> str:
+    """The Core Directive text of the current directive version.
+
+    DIRECTIVE_FILE may replace the built-in text; see directive_registry.py.
+    """
+    return directive_registry.get_directive_registry().current.chat_directive or CORE_DIRECTIVE
+
+
+def _prepare_directive(version: directive_registry.DirectiveVersion) -> None:
+    fastpath.prepare_directive(version.chat_directive or CORE_DIRECTIVE)
+
+
+def _prepare_tenant(bundle: tenants.TenantBundle) -> None:
+    # Kept with the bundle, so many tenants do not churn the shared cache
+    if bundle.version.chat_directive:
+        bundle.prepared["fragments"] = fastpath.directive_fragments(bundle.version.chat_directive)
+
+
+def request_directive(request: Request) -> Tuple[str, Optional[Tuple[bytes, bytes]]]:
+    """
+    The directive text for a request, and its splice fragments if built.
+
+    With DIRECTIVE_TENANTS_DIR set, a tenant owning the request's bearer
+    token, or else named by the X-Tenant-ID header, uses its own bundle's
+    text; see tenants.py. Everyone else gets current_directive().
+    """
+    tenant_directives = tenants.get_tenant_directives()
+    if tenant_directives is not None:
+        authorization = request.headers.get("authorization") or ""
+        api_key = authorization[7:] if authorization[:7].lower() == "bearer " else None
+        tenant = tenant_directives.tenant_for(request.headers.get(tenants.TENANT_HEADER), api_key)
+        bundle = tenant_directives.get(tenant) if tenant else None
+        if bundle is not None and bundle.version.chat_directive:
+            return bundle.version.chat_directive, bundle.prepared.get("fragments")
+    return current_directive(), None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the upstream client if one is configured; flush traces while serving.
+
+    Also starts watching the directive bundle, if one is configured, and
+    prepares tenant bundles as they are compiled.
+    """
+    global _upstream
+    upstream_url = os.environ.get(UPSTREAM_URL_ENV)
+    if upstream_url:
+        _upstream = http_clients.create_async_http_client(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            base_url=upstream_url,
+            timeout=UPSTREAM_TIMEOUT,
+        )
+    registry = directive_registry.get_directive_registry()
+    registry.add_preparer(_prepare_directive)
+    directive_registry.start_watching(registry)
+    tenant_directives = tenants.get_tenant_directives()
+    if tenant_directives is not None:
+        tenant_directives.add_preparer(_prepare_tenant)
+    tracer = tracing.start_flushing()
+    try:
+        yield
+    finally:
+        registry.stop()
+        tracer.stop_flushing()
+        tracer.flush()
+        if _upstream is not None:
+            await _upstream.aclose()
+            _upstream = None
+
+
 app = FastAPI(
     title="Chat Completions API",
     description="API endpoint that wraps all requests with a Core Directive",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -32,6 +131,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_SERIALIZATION_SECONDS = metrics.STAGE_SECONDS.labels("app", "serialization")
+_TRUNCATED = metrics.REQUESTS.labels("app", "truncated")
+_UPSTREAM_SECONDS = metrics.STAGE_SECONDS.labels("app", "upstream")
+
+# The endpoint reads its body itself (see app/fastpath.py); this keeps the
+# request schema in the OpenAPI document
+_REQUEST_BODY_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {
+            key: value
+            for key, value in ChatCompletionRequest.model_json_schema(
+                ref_template="#/components/schemas/{model}",
+            ).items()
+            if key != "$defs"
+        }}},
+    },
+}
+
 
 def estimate_tokens(text: str) -> int:
     """Estimate token count for text.
@@ -42,19 +160,24 @@ def estimate_tokens(text: str) -> int:
     return max(1, len(text) // 4)
 
 
-def wrap_with_core_directive(messages: List[Message]) -> List[Message]:
+def wrap_with_core_directive(
+    messages: List[Message],
+    directive: Optional[str] = None,
+) -> List[Message]:
     """Wrap the messages with the Core Directive as a system message.
     
     If a system message already exists, prepend the Core Directive to it.
-    Otherwise, add a new system message at the beginning.
+    Otherwise, add a new system message at the beginning. The directive
+    defaults to the current version's text.
     """
+    directive = directive or current_directive()
     wrapped_messages = []
     has_system_message = False
     
     for msg in messages:
         if msg.role == "system":
             # Prepend Core Directive to existing system message
-            wrapped_content = f"{CORE_DIRECTIVE}\n\n{msg.content}"
+            wrapped_content = f"{directive}\n\n{msg.content}"
             wrapped_messages.append(Message(role="system", content=wrapped_content))
             has_system_message = True
         else:
@@ -62,56 +185,264 @@ def wrap_with_core_directive(messages: List[Message]) -> List[Message]:
     
     # If no system message exists, add one at the beginning
     if not has_system_message:
-        wrapped_messages.insert(0, Message(role="system", content=CORE_DIRECTIVE))
+        wrapped_messages.insert(0, Message(role="system", content=directive))
     
     return wrapped_messages
 
 
-@app.post("/v1/chat/completions", response_model=ChatCompletionResponse)
-async def chat_completions(request: ChatCompletionRequest) -> ChatCompletionResponse:
+@app.post(
+    "/v1/chat/completions",
+    response_model=ChatCompletionResponse,
+    openapi_extra=_REQUEST_BODY_SCHEMA,
+)
+async def chat_completions(request: Request) -> Response:
     """Handle chat completions requests with Core Directive wrapping.
     
     Every request that hits this endpoint gets the Core Directive
-    wrapped around it as a system message.
+    wrapped around it as a system message. The body is parsed once; when
+    forwarding upstream, the directive is spliced into the original bytes
+    (see app/fastpath.py), so message contents are never re-encoded.
+
+    With CONTEXT_MAX_TOKENS set, the oldest turns of a conversation that
+    would not fit are dropped first (see context_window.py).
+
+    With an X-Session-ID header (see create_session), ``messages`` holds
+    only the turn's new messages: they are added to the conversation kept
+    by the server, and the reply is recorded there once the turn succeeds.
     """
+    chat = fastpath.parse_chat_request(await request.body())
+    session_id = request.headers.get(SESSION_HEADER)
+    if session_id is None:
+        return await _complete(request, chat)
+
+    store = sessions.get_session_store()
+    try:
+        session = store.begin(session_id)
+    except (sessions.SessionNotFound, sessions.SessionBusy) as exc:
+        detail = "Session not found" if isinstance(exc, KeyError) else str(exc)
+        raise HTTPException(status_code=exc.status_code, detail=detail)
+    base = len(session.messages)
+    session.conversation.extend(chat.messages)
+    try:
+        response = await _complete(request, chat, session)
+    except BaseException:
+        store.rollback(session, base)
+        raise
+    if response.status_code != 200:
+        store.rollback(session, base)
+        return response
+    try:
+        store.commit(session, base, [*chat.messages, *_reply_messages(response.body)])
+    except sessions.SessionNotFound:
+        return response  # Deleted during the turn
+    response.headers[SESSION_HEADER] = session.id
+    return response
+
+
+async def _complete(
+    request: Request,
+    chat: fastpath.ChatBody,
+    session: Optional[sessions.Session] = None,
+) -> Response:
+    """Wrap a parsed request, or a session's conversation, and answer it."""
+    # Read once: a reload mid-request does not change what this one applies
+    directive, fragments = request_directive(request)
+    response_id = uuid.uuid4().hex
+    tracer = tracing.get_tracer()
+    trace = tracer.start_trace(response_id, "app.chat_completions", messages=len(chat.messages))
+
+    # Drop the oldest turns if the conversation outgrew the context window
+    conversation = session.conversation if session is not None else None
+    messages = session.messages if session is not None else chat.messages
+    indexes, note = None, None
+    budget = context_window.prompt_budget(chat.data.get("max_tokens"))
+    if budget is not None:
+        conversation = conversation or context_window.Conversation(messages)
+        window = conversation.fit(budget, context_window.estimate_tokens(directive))
+        if window.dropped:
+            indexes, note = conversation.window_indexes(window), window.note
+            messages = [conversation.messages[i] for i in indexes]
+            _TRUNCATED.inc()
+            if trace is not None:
+                trace.attributes["dropped_messages"] = window.dropped
+
     # Wrap messages with Core Directive
-    wrapped_messages = wrap_with_core_directive(request.messages)
-    
-    # For this implementation, we return a mock response
-    # In a real scenario, you would forward to an actual LLM API
-    response_content = f"Processed {len(wrapped_messages)} messages with Core Directive applied."
+    started = time.perf_counter_ns()
+    if _upstream is not None:
+        if session is not None:
+            upstream_body = fastpath.conversation_body(
+                chat, directive, session.messages, session.encoded, indexes, note,
+            )
+        elif note is None:
+            upstream_body = fastpath.splice_core_directive(chat, directive, fragments)
+        else:
+            upstream_body = fastpath.wrap_window(chat, directive, messages, note)
+        if trace is not None:
+            trace.add_span("directive.wrap", started, time.perf_counter_ns(), bytes=len(upstream_body))
+        return await _forward(upstream_body, request.headers.get("authorization"), trace)
+
+    # Without an upstream, we return a mock response; only the size of the
+    # wrapped conversation is needed, so nothing is spliced
+    systems = conversation.system_count if conversation is not None else len(chat.system_indexes)
+    wrapped_count = len(messages) + (0 if systems else 1)
+    response_content = f"Processed {wrapped_count} messages with Core Directive applied."
     
-    # Estimate token counts
-    prompt_text = " ".join(msg.content for msg in wrapped_messages)
-    prompt_tokens = estimate_tokens(prompt_text)
+    # Estimate token counts from the length the wrapped messages would have
+    # joined with spaces, without building that text
+    directive_chars = len(directive) + 2 if systems else len(directive)
+    prompt_chars = (
+        sum(len(message["content"]) for message in messages)
+        + directive_chars * max(1, systems)
+        + (len(note) + 2 if note else 0)
+        + wrapped_count - 1
+    )
+    prompt_tokens = max(1, prompt_chars // 4)
+    if trace is not None:
+        trace.add_span("directive.wrap", started, time.perf_counter_ns())
     completion_tokens = estimate_tokens(response_content)
     
-    return ChatCompletionResponse(
-        id=f"chatcmpl-{uuid.uuid4().hex[:12]}",
-        object="chat.completion",
-        created=int(time.time()),
-        model=request.model,
-        choices=[
-            Choice(
-                index=0,
-                message=Message(role="assistant", content=response_content),
-                finish_reason="stop",
-            )
-        ],
-        usage=Usage(
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            total_tokens=prompt_tokens + completion_tokens,
-        ),
+    response = {
+        "id": f"chatcmpl-{response_id[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": chat.model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": response_content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+    # Serialize here rather than in FastAPI so the cost is measured
+    serializing = time.perf_counter_ns()
+    body = fastpath.dumps(response)
+    serialized = time.perf_counter_ns()
+    _SERIALIZATION_SECONDS.observe_ns(serialized - serializing)
+    if trace is not None:
+        trace.add_span("serialization", serializing, serialized, bytes=len(body))
+        tracer.finish(trace)
+    return Response(content=body, media_type="application/json")
+
+
+def _reply_messages(body: bytes) -> List[dict]:
+    """The assistant message of a completion, to record in its session."""
+    try:
+        message = fastpath.loads(body)["choices"][0]["message"]
+    except (ValueError, TypeError, KeyError, IndexError):
+        return []  # E.g. a streamed reply; the client may send it next turn
+    if not isinstance(message, dict) or not isinstance(message.get("content"), str):
+        return []
+    return [{"role": message.get("role", "assistant"), "content": message["content"]}]
+
+
+async def _forward(
+    body: bytes,
+    authorization: Optional[str],
+    trace: Optional[tracing.Trace],
+) -> Response:
+    """Send a wrapped request body upstream and relay the answer unchanged."""
+    headers = {"Content-Type": "application/json"}
+    api_key = os.environ.get(UPSTREAM_API_KEY_ENV)
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    elif authorization:
+        headers["Authorization"] = authorization
+
+    started = time.perf_counter_ns()
+    responded = None
+    try:
+        # Streamed, so the trace can tell waiting for the answer (up to its
+        # headers) from receiving its body
+        request = _upstream.build_request("POST", "/chat/completions", content=body, headers=headers)
+        upstream = await _upstream.send(request, stream=True)
+        responded = time.perf_counter_ns()
+        try:
+            await upstream.aread()
+        finally:
+            await upstream.aclose()
+    except httpx.HTTPError as exc:
+        if trace is not None:
+            failed = time.perf_counter_ns()
+            trace.add_span("upstream.request", started, responded or failed,
+                           tracing.SPAN_KIND_CLIENT, error=type(exc).__name__)
+            if responded is not None:
+                trace.add_span("upstream.response", responded, failed,
+                               tracing.SPAN_KIND_CLIENT, error=type(exc).__name__)
+            tracing.get_tracer().finish(trace)
+        raise HTTPException(status_code=502, detail="Upstream request failed")
+    finished = time.perf_counter_ns()
+    _UPSTREAM_SECONDS.observe_ns(finished - started)
+    if trace is not None:
+        trace.add_span("upstream.request", started, responded, tracing.SPAN_KIND_CLIENT,
+                       status=upstream.status_code)
+        trace.add_span("upstream.response", responded, finished, tracing.SPAN_KIND_CLIENT,
+                       bytes=len(upstream.content))
+        tracing.get_tracer().finish(trace)
+    return Response(
+        content=upstream.content,
+        status_code=upstream.status_code,
+        media_type=upstream.headers.get("content-type", "application/json"),
     )
 
 
+@app.post("/v1/sessions", status_code=201)
+async def create_session():
+    """Start a server-side conversation; send its id as X-Session-ID."""
+    session = sessions.get_session_store().create()
+    return {"id": session.id, "object": "chat.session"}
+
+
+@app.delete("/v1/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    """End a server-side conversation."""
+    if not sessions.get_session_store().delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return Response(status_code=204)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics endpoint."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/slow")
+async def debug_slow(limit: int = 10, x_admin_token: Optional[str] = Header(default=None)):
+    """Slowest recently traced requests with their span breakdown; needs ADMIN_TOKEN."""
+    if not profiler.admin_allowed(x_admin_token):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return tracing.slow_report(limit)
+
+
+@app.post("/admin/profile", status_code=202, include_in_schema=False)
+async def admin_profile(
+    seconds: float = 10.0,
+    interval_ms: float = 5.0,
+    x_admin_token: Optional[str] = Header(default=None),
+):
+    """Profile this worker for a while; only enabled when ADMIN_TOKEN is set."""
+    if not profiler.admin_allowed(x_admin_token):
+        raise HTTPException(status_code=404, detail="Not Found")
+    try:
+        run = profiler.start_profile(seconds, interval=interval_ms / 1000)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return {"pid": os.getpid(), "seconds": run.duration, "path": run.path}
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -121,6 +452,9 @@ async def root():
         "description": "All requests to /v1/chat/completions get the Core Directive wrapped around them",
         "endpoints": {
             "/v1/chat/completions": "POST - Chat completions with Core Directive",
+            "/v1/sessions": "POST - Start a server-side conversation",
             "/health": "GET - Health check",
+            "/metrics": "GET - Prometheus metrics",
+            "/debug/slow": "GET - Slowest recent traced requests (X-Admin-Token)",
         },
     }
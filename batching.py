@@ -0,0 +1,235 @@
+"""
+Batching Module - Micro-Batching at the AI Model Boundary
+
+Many GovernedAIClient.process calls carry short, independent prompts, and
+each pays a full upstream round trip. BatchingModel sits between the client
+and the model: it collects prompts arriving from many threads over a window
+of a few milliseconds, or until max_batch_size have arrived, and sends them
+as one generate_batch() call. Each caller waits on its own future.
+
+Batching Features:
+1. Any AIModelProtocol model can be wrapped; models that also implement
+   BatchAIModelProtocol get one call per batch, others are called directly
+2. max_wait_ms bounds the latency batching adds to a lone request
+3. Prompts with different system messages are never mixed in one batch
+4. Several batches can be in flight at once (max_concurrent_batches)
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Protocol, Sequence, runtime_checkable
+
+from ai_client import AIModelProtocol
+from metrics import REQUESTS, STAGE_SECONDS
+
+_BATCH_SECONDS = STAGE_SECONDS.labels("batching", "dispatch")
+_BATCHES = REQUESTS.labels("batching", "batch")
+_BATCHED = REQUESTS.labels("batching", "item")
+
+
+@runtime_checkable
+class BatchAIModelProtocol(Protocol):
+    """Protocol for models that can answer several prompts in one call."""
+
+    def generate_batch(self, prompts: Sequence[str], system_message: str) -> List[str]:
+        """Generate one response per prompt, in order."""
+        ...
+
+
+class _Item:
+    __slots__ = ("prompt", "system_message", "future", "enqueued")
+
+    def __init__(self, prompt: str, system_message: str):
+        self.prompt = prompt
+        self.system_message = system_message
+        self.future: Future = Future()
+        self.enqueued = time.monotonic()
+
+
+_STOP = object()
+
+
+class BatchingModel:
+    """
+    An AIModelProtocol model that batches calls to the model it wraps.
+
+    generate() blocks until its prompt's batch has been answered, so the
+    wrapper can be passed anywhere a model is expected; submit() returns
+    the future instead. The dispatcher thread starts on first use.
+    """
+
+    def __init__(
+        self,
+        model: AIModelProtocol,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 2.0,
+        max_concurrent_batches: int = 4,
+    ):
+        """
+        Initialize the batching wrapper.
+
+        Args:
+            model: The model to send batches to
+            max_batch_size: Most prompts sent in one call
+            max_wait_ms: Longest a prompt waits for others to join its batch
+            max_concurrent_batches: Batches that may be in flight at once
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self._model = model
+        self._batched = isinstance(model, BatchAIModelProtocol)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent_batches = max_concurrent_batches
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def model(self) -> AIModelProtocol:
+        return self._model
+
+    def generate(self, prompt: str, system_message: str) -> str:
+        """Generate a response, sharing an upstream call with concurrent prompts."""
+        if not self._batched:
+            return self._model.generate(prompt, system_message)
+        return self.submit(prompt, system_message).result()
+
+    def submit(self, prompt: str, system_message: str) -> Future:
+        """Queue a prompt; the future resolves to its response."""
+        if not self._batched:
+            if self._closed:
+                raise RuntimeError("BatchingModel is closed")
+            # Nothing to gain from waiting: answer in the caller's thread
+            future: Future = Future()
+            try:
+                future.set_result(self._model.generate(prompt, system_message))
+            except Exception as exc:
+                future.set_exception(exc)
+            return future
+        item = _Item(prompt, system_message)
+        # Checked and queued under the lock, so no item lands behind the
+        # _STOP that close() queues, where nothing would ever resolve it
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchingModel is closed")
+            if self._thread is None:
+                self._start()
+            self._queue.put(item)
+        return item.future
+
+    def _start(self) -> None:
+        """Start the dispatcher; the caller holds the lock."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_batches, thread_name_prefix="batch-dispatch",
+        )
+        self._thread = threading.Thread(
+            target=self._collect, name="batch-collector", daemon=True,
+        )
+        self._thread.start()
+
+    def _collect(self) -> None:
+        """Group queued prompts into batches until close()."""
+        get = self._queue.get
+        while True:
+            item = get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = item.enqueued + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = get(timeout=timeout) if timeout > 0 else get(block=False)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._submit_batch(batch)
+            if stop:
+                return
+
+    def _submit_batch(self, batch: List[_Item]) -> None:
+        by_system: Dict[str, List[_Item]] = {}
+        for item in batch:
+            by_system.setdefault(item.system_message, []).append(item)
+        for items in by_system.values():
+            self._executor.submit(self._dispatch, items)
+
+    def _dispatch(self, items: List[_Item]) -> None:
+        """Send one batch and resolve its futures."""
+        prompts = [item.prompt for item in items]
+        system_message = items[0].system_message
+        started = time.perf_counter_ns()
+        try:
+            responses = self._model.generate_batch(prompts, system_message)
+            if len(responses) != len(prompts):
+                raise ValueError(
+                    f"generate_batch returned {len(responses)} responses "
+                    f"for {len(prompts)} prompts"
+                )
+        except Exception as exc:
+            for item in items:
+                item.future.set_exception(exc)
+            return
+        finally:
+            _BATCH_SECONDS.observe_ns(time.perf_counter_ns() - started)
+            _BATCHES.inc()
+            _BATCHED.inc(len(items))
+            with self._lock:
+                self.batches += 1
+                self.items += len(items)
+        for item, response in zip(items, responses):
+            item.future.set_result(response)
+
+    @property
+    def stats(self) -> dict:
+        """Return batching statistics."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+    def close(self) -> None:
+        """Send what is queued, wait for it, and stop the dispatcher."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread, executor = self._thread, self._executor
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+            executor.shutdown(wait=True)
+        # Nothing should be left behind _STOP; fail anything that is rather
+        # than leave its caller waiting forever
+        while True:
+            try:
+                item = self._queue.get(block=False)
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                item.future.set_exception(RuntimeError("BatchingModel is closed"))
+
+    def __enter__(self) -> "BatchingModel":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"BatchingModel(model={self._model!r}, max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:g})"
+        )
@@ -0,0 +1,13 @@
+"""
+Performance benchmarks for the Core Directive Governance Layer.
+
+Run from the repository root:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.compare baseline.json results.json
+    python -m benchmarks.metrics_overhead
+    python -m benchmarks.gateway_objects
+    python -m benchmarks.upstream_pool
+    python -m benchmarks.batching
+    python -m benchmarks.http2
+    python -m benchmarks.load_scaling --workers 1 2 4
+"""
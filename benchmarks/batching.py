@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Throughput of governed prompts with and without micro-batching.
+
+The mock model stands in for an upstream that charges a fixed round trip
+per call plus a little per prompt, and serves a few calls at a time (as a
+rate-limited API or a small connection pool would). Many threads send
+short prompts through GovernedAIClient.process, first straight to the
+model and then through BatchingModel, and the prompts per second and
+p50/p99 latency of each are reported.
+
+Usage:
+    python -m benchmarks.batching [--requests 2000] [--threads 32]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from ai_client import GovernedAIClient  # noqa: E402
+from batching import BatchingModel  # noqa: E402
+from benchmarks.harness import percentile  # noqa: E402
+
+ROUND_TRIP = 0.005
+PER_PROMPT = 0.0001
+CONCURRENT_CALLS = 4
+
+
+class RoundTripModel:
+    """A model whose calls cost a round trip and share a few connections."""
+
+    def __init__(self, round_trip: float = ROUND_TRIP, per_prompt: float = PER_PROMPT):
+        self.round_trip = round_trip
+        self.per_prompt = per_prompt
+        self._connections = threading.BoundedSemaphore(CONCURRENT_CALLS)
+
+    def generate(self, prompt: str, system_message: str) -> str:
+        return self.generate_batch([prompt], system_message)[0]
+
+    def generate_batch(self, prompts: Sequence[str], system_message: str) -> List[str]:
+        with self._connections:
+            time.sleep(self.round_trip + self.per_prompt * len(prompts))
+        return [f"Answer to: {prompt}" for prompt in prompts]
+
+
+def _run(client: GovernedAIClient, requests: int, threads: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+    per_thread = requests // threads
+
+    def worker(index: int):
+        local = []
+        for i in range(per_thread):
+            started = time.perf_counter()
+            client.process(f"Help me learn topic {index}-{i}")
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "prompts_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+def compare(
+    requests: int = 2000,
+    threads: int = 32,
+    max_batch_size: int = 16,
+    max_wait_ms: float = 2.0,
+) -> Dict[str, Dict[str, float]]:
+    """Throughput and latency per configuration."""
+    results = {"direct": _run(GovernedAIClient(model=RoundTripModel()), requests, threads)}
+    with BatchingModel(
+        RoundTripModel(), max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+        max_concurrent_batches=CONCURRENT_CALLS,
+    ) as model:
+        results["batched"] = _run(GovernedAIClient(model=model), requests, threads)
+        results["batched"]["mean_batch_size"] = model.stats["mean_batch_size"]
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare throughput with micro-batching.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    results = compare(args.requests, args.threads, args.max_batch_size, args.max_wait_ms)
+    for name, result in results.items():
+        line = (
+            f"{name:8} {result['prompts_per_sec']:8.0f} prompts/s   "
+            f"p50 {result['p50_ms']:6.2f} ms   p99 {result['p99_ms']:6.2f} ms"
+        )
+        if "mean_batch_size" in result:
+            line += f"   mean batch {result['mean_batch_size']:.1f}"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark result files and flag regressions.
+
+A benchmark regresses when its p50 or p99 latency grows, or its throughput
+drops, by more than the threshold. Exits with status 1 if any did, so it
+can gate CI.
+
+Usage:
+    python -m benchmarks.compare base.json head.json [--threshold 10]
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+# (field, True if larger is worse)
+METRICS = (("p50_us", True), ("p99_us", True), ("ops_per_sec", False))
+
+
+def load(path: str) -> Dict[str, dict]:
+    with open(path) as f:
+        data = json.load(f)
+    return {f"{r['name']}[{r['corpus']}]": r for r in data["results"]}
+
+
+def change(base: float, head: float) -> float:
+    """Relative change in percent."""
+    if base == 0:
+        return 0.0
+    return (head - base) / base * 100
+
+
+def compare(
+    base: Dict[str, dict],
+    head: Dict[str, dict],
+    threshold: float,
+) -> Tuple[List[str], List[str]]:
+    """Return (report lines, regressed benchmark keys)."""
+    lines = [f"{'benchmark':<44} {'p50':>9} {'p99':>9} {'ops/s':>9}"]
+    regressions = []
+    for key in sorted(base.keys() & head.keys()):
+        cells = []
+        regressed = False
+        for field, larger_is_worse in METRICS:
+            delta = change(base[key][field], head[key][field])
+            worse = delta if larger_is_worse else -delta
+            if worse > threshold:
+                regressed = True
+            cells.append(f"{delta:>+8.1f}%")
+        if regressed:
+            regressions.append(key)
+        lines.append(f"{key:<44} {' '.join(cells)}{'  REGRESSION' if regressed else ''}")
+    for key in sorted(base.keys() - head.keys()):
+        lines.append(f"{key:<44} missing from head")
+    for key in sorted(head.keys() - base.keys()):
+        lines.append(f"{key:<44} new")
+    return lines, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="allowed slowdown in percent (default 10)")
+    args = parser.parse_args(argv)
+
+    lines, regressions = compare(load(args.base), load(args.head), args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:g}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Fixed synthetic corpora for the benchmarks.
+
+Every corpus is generated from a fixed seed so results are comparable across
+commits. Three sizes are provided:
+
+- short: chat-style prompts of a handful of words
+- long: multi-paragraph prompts of roughly 2,000 words
+- adversarial: inputs that are expensive for keyword scanning, such as long
+  texts with no indicator (every pattern scans to the end), near-miss words
+  that contain indicators as substrings, mixed case and non-ASCII text
+"""
+
+import random
+from typing import Dict, List
+
+SEED = 20240601
+
+NEUTRAL_WORDS = [
+    "garden", "river", "morning", "project", "library", "recipe", "music",
+    "weather", "bicycle", "travel", "window", "market", "history", "planet",
+    "coffee", "letter", "bridge", "forest", "painting", "neighbor", "schedule",
+    "question", "evening", "language", "kitchen", "mountain", "station",
+]
+POSITIVE_WORDS = ["help", "learn", "build", "support", "share", "create", "teach"]
+HARM_WORDS = ["harm", "steal", "deceive", "force", "exploit", "spy", "threaten"]
+# Contain indicators as substrings without meaning them
+NEAR_MISS_WORDS = [
+    "harmony", "pharmacy", "useful", "forceps", "spyglass", "liechtenstein",
+    "trickle", "controller", "leakproof", "buildup", "helpful",
+]
+UNICODE_WORDS = ["café", "naïve", "Straße", "日本語", "emoji🙂", "ÅNGSTRÖM"]
+
+SIZES = ("short", "long", "adversarial")
+
+
+def _sentence(rng: random.Random, words: int, harm_rate: float, positive_rate: float) -> str:
+    out = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < harm_rate:
+            out.append(rng.choice(HARM_WORDS))
+        elif roll < harm_rate + positive_rate:
+            out.append(rng.choice(POSITIVE_WORDS))
+        else:
+            out.append(rng.choice(NEUTRAL_WORDS))
+    return " ".join(out).capitalize() + "."
+
+
+def prompts(size: str, count: int = 200) -> List[str]:
+    """Return ``count`` deterministic prompts of the given size."""
+    rng = random.Random(f"{SEED}-{size}")
+
+    if size == "short":
+        return [_sentence(rng, rng.randint(4, 12), 0.05, 0.15) for _ in range(count)]
+
+    if size == "long":
+        return [
+            " ".join(_sentence(rng, rng.randint(12, 24), 0.002, 0.01) for _ in range(110))
+            for _ in range(count)
+        ]
+
+    if size == "adversarial":
+        corpus = []
+        for i in range(count):
+            kind = i % 4
+            if kind == 0:
+                # No indicator anywhere: every substring scan runs to the end
+                text = " ".join(rng.choice(NEUTRAL_WORDS) for _ in range(4000))
+            elif kind == 1:
+                # Near misses that match indicator substrings
+                text = " ".join(rng.choice(NEAR_MISS_WORDS + NEUTRAL_WORDS) for _ in range(3000))
+            elif kind == 2:
+                # Mixed case and non-ASCII, indicator only at the very end
+                words = [rng.choice(UNICODE_WORDS + NEUTRAL_WORDS).upper() for _ in range(3000)]
+                text = " ".join(words) + " " + rng.choice(HARM_WORDS).upper()
+            else:
+                # One enormous token with no whitespace
+                text = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(20000))
+            corpus.append(text)
+        return corpus
+
+    raise ValueError(f"unknown corpus size {size!r}; expected one of {SIZES}")
+
+
+def conversations(size: str, count: int = 50) -> List[List[Dict[str, str]]]:
+    """Chat message lists built from the prompts of the given size."""
+    rng = random.Random(f"{SEED}-conversations-{size}")
+    texts = prompts(size, count * 4)
+    turns = {"short": 1, "long": 100, "adversarial": 3}[size]
+
+    result = []
+    for i in range(count):
+        messages = [{"role": "system", "content": "You are a helpful assistant."}]
+        for turn in range(turns):
+            role = "user" if turn % 2 == 0 else "assistant"
+            messages.append({"role": role, "content": texts[(i * 4 + turn) % len(texts)]})
+        if messages[-1]["role"] != "user":
+            messages.append({"role": "user", "content": rng.choice(texts)})
+        result.append(messages)
+    return result
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Memory and creation cost of the gateway's request records.
+
+Compares the slotted GatewayRequest/GatewayResponse/AuditEntry with the
+dataclasses they replaced (reproduced below as Legacy*), building the three
+records one request produces in the same order GovernanceGateway.process
+does. Reports nanoseconds per request (fastest of several runs) and bytes
+retained per request measured with tracemalloc.
+
+Usage:
+    python -m benchmarks.gateway_objects [--count 50000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from uuid import uuid4
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core_directive import ActionResult, DirectiveEvaluation  # noqa: E402
+from gateway import AuditEntry, GatewayRequest, GatewayResponse  # noqa: E402
+
+
+@dataclass
+class LegacyRequest:
+    id: str
+    content: str
+    source: str
+    timestamp: datetime
+    metadata: dict = field(default_factory=dict)
+
+
+@dataclass
+class LegacyResponse:
+    request_id: str
+    content: str
+    evaluation: DirectiveEvaluation
+    processed: bool
+    timestamp: datetime
+    route: str = "default"
+
+
+@dataclass
+class LegacyAuditEntry:
+    request_id: str
+    timestamp: datetime
+    action: str
+    result: ActionResult
+    source: str
+    details: str
+
+
+EVALUATION = DirectiveEvaluation(result=ActionResult.ALLOWED, reason="ok", confidence=1.0)
+CONTENT = "Help me plan a week of healthy meals for a family of four"
+
+
+def legacy_records(content: str) -> tuple:
+    request = LegacyRequest(
+        id=str(uuid4()), content=content, source="bench", timestamp=datetime.now(timezone.utc),
+    )
+    entry = LegacyAuditEntry(
+        request.id, datetime.now(timezone.utc), "directive_allow", ActionResult.ALLOWED,
+        request.source, request.content[:200],
+    )
+    response = LegacyResponse(
+        request.id, "done", EVALUATION, True, datetime.now(timezone.utc),
+    )
+    return request, entry, response
+
+
+def compact_records(content: str) -> tuple:
+    request = GatewayRequest.create(content, "bench")
+    entry = AuditEntry(
+        request._id, None, "directive_allow", ActionResult.ALLOWED,
+        request.source, request.content[:200],
+    )
+    response = GatewayResponse(request._id, "done", EVALUATION, True)
+    return request, entry, response
+
+
+IMPLEMENTATIONS = {"dataclass": legacy_records, "slotted": compact_records}
+
+
+def ns_per_request(build, count: int, repeats: int = 5) -> float:
+    """Fastest of several runs, in nanoseconds per request."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(count):
+            build(CONTENT)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / count
+
+
+def bytes_per_request(build, count: int) -> float:
+    """Bytes still allocated per request while count requests are kept."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [build(CONTENT) for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept  # The list itself costs the same for both
+    return (after - before) / count
+
+
+def compare(count: int = 50_000) -> dict:
+    """Results keyed by implementation: {"ns": ..., "bytes": ...}."""
+    return {
+        name: {"ns": ns_per_request(build, count), "bytes": bytes_per_request(build, count)}
+        for name, build in IMPLEMENTATIONS.items()
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare gateway record representations.")
+    parser.add_argument("--count", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    results = compare(args.count)
+    for name, result in results.items():
+        print(f"{name:10} {result['ns']:8.1f} ns/request  {result['bytes']:7.1f} bytes/request")
+    legacy, slotted = results["dataclass"], results["slotted"]
+    print(
+        f"speedup {legacy['ns'] / slotted['ns']:.2f}x, "
+        f"memory {slotted['bytes'] / legacy['bytes']:.0%} of dataclass"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
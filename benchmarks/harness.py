@@ -0,0 +1,146 @@
+"""
+Measurement harness for the benchmarks.
+
+Each benchmark is a callable applied to the items of a corpus. The harness
+runs it in three passes:
+
+1. warm-up, untimed
+2. timing: every call is timed individually for p50/p99 latency, and the
+   whole pass gives throughput
+3. allocations: a shorter pass under tracemalloc records the peak transient
+   memory of each call and the memory still held afterwards
+"""
+
+import gc
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Sequence
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing and allocation figures for one benchmark on one corpus."""
+    name: str
+    corpus: str
+    iterations: int
+    p50_us: float
+    p99_us: float
+    mean_us: float
+    ops_per_sec: float
+    peak_alloc_bytes: float      # Mean peak transient allocation per call
+    retained_bytes_per_op: float  # Memory still held after the calls
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.corpus}]"
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(
+    name: str,
+    corpus: str,
+    fn: Callable[[Any], Any],
+    items: Sequence[Any],
+    min_iterations: int = 200,
+    min_seconds: float = 0.5,
+    alloc_iterations: int = 50,
+) -> BenchmarkResult:
+    """Benchmark ``fn`` over ``items``, cycling through them as needed."""
+    count = len(items)
+
+    for i in range(min(count, 20)):
+        fn(items[i])
+
+    gc.collect()
+    timings: List[int] = []
+    perf = time.perf_counter_ns
+    started = perf()
+    deadline = started + int(min_seconds * 1e9)
+    i = 0
+    while i < min_iterations or perf() < deadline:
+        item = items[i % count]
+        t0 = perf()
+        fn(item)
+        timings.append(perf() - t0)
+        i += 1
+    elapsed = perf() - started
+
+    peaks = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        for j in range(alloc_iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn(items[j % count])
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        gc.collect()
+        end_bytes, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return BenchmarkResult(
+        name=name,
+        corpus=corpus,
+        iterations=len(timings),
+        p50_us=percentile(timings, 0.50) / 1000,
+        p99_us=percentile(timings, 0.99) / 1000,
+        mean_us=statistics.fmean(timings) / 1000,
+        ops_per_sec=len(timings) / (elapsed / 1e9),
+        peak_alloc_bytes=statistics.fmean(peaks) if peaks else 0.0,
+        retained_bytes_per_op=max(0, end_bytes - start_bytes) / max(1, alloc_iterations),
+    )
+
+
+def environment() -> Dict[str, Any]:
+    """Describe where the results came from."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def to_json(results: List[BenchmarkResult]) -> Dict[str, Any]:
+    return {
+        "environment": environment(),
+        "results": [asdict(r) for r in results],
+    }
+
+
+def format_table(results: List[BenchmarkResult]) -> str:
+    header = (
+        f"{'benchmark':<44} {'p50 µs':>10} {'p99 µs':>10} "
+        f"{'ops/s':>11} {'peak B':>10} {'kept B/op':>10}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.key:<44} {r.p50_us:>10.1f} {r.p99_us:>10.1f} "
+            f"{r.ops_per_sec:>11,.0f} {r.peak_alloc_bytes:>10,.0f} {r.retained_bytes_per_op:>10,.0f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Upstream connection setups per 1k requests, by connection policy.
+
+Concurrent requests, as the chat app's forwarder makes them, go to a
+local mock upstream through three kinds of client: a new client per
+request (no reuse at all), a shared HTTP/1.1 keep-alive pool, and a
+shared HTTP/2 client multiplexing over one connection (against the h2c
+mock, which needs the h2 package). The mock servers count the
+connections opened; requests per second, p50/p99 latency and the DNS
+lookups made are reported too.
+
+Usage:
+    python -m benchmarks.http2 [--requests 1000] [--concurrency 32] [--delay-ms 2]
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import httpx  # noqa: E402
+
+import http_clients  # noqa: E402
+from benchmarks.harness import percentile  # noqa: E402
+from benchmarks.mock_upstream import H2MockUpstream, MockUpstream  # noqa: E402
+
+BODY = {"model": "mock", "messages": [{"role": "user", "content": "Help me learn"}]}
+URL = "/chat/completions"
+
+Post = Callable[[], Awaitable[httpx.Response]]
+
+
+def _localhost(base_url: str) -> str:
+    # By name, so that DNS lookups are part of each connection setup
+    return base_url.replace("127.0.0.1", "localhost")
+
+
+async def _run(post: Post, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+
+    async def worker(count: int):
+        for _ in range(count):
+            started = time.perf_counter()
+            (await post()).raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    share, extra = divmod(requests, concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(share + (i < extra)) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+async def _fresh(base_url: str, requests: int, concurrency: int) -> Dict[str, float]:
+    async def post():
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            return await client.post(URL, json=BODY)
+    return await _run(post, requests, concurrency)
+
+
+async def _pooled(mode: str, base_url: str, requests: int, concurrency: int) -> Dict[str, float]:
+    async with http_clients.create_async_http_client(
+        max_connections=concurrency, max_keepalive_connections=concurrency,
+        http2=mode, base_url=base_url,
+    ) as client:
+        return await _run(lambda: client.post(URL, json=BODY), requests, concurrency)
+
+
+def _measure(server, run: Callable[[str], Awaitable[Dict[str, float]]], cached: bool = True) -> Dict[str, float]:
+    dns = http_clients.get_dns_cache()
+    lookups = dns.lookups.value
+    with server:
+        result = asyncio.run(run(_localhost(server.base_url)))
+        connections = server.connections
+    result["connections_per_1k"] = connections * 1000 / result["requests"]
+    # A plain httpx client resolves the name on every connection instead
+    result["dns_lookups"] = dns.lookups.value - lookups if cached else connections
+    return result
+
+
+def compare(requests: int = 1000, concurrency: int = 32, delay_ms: float = 2.0) -> Dict[str, Dict[str, float]]:
+    """Connection setups, throughput and latency per client policy."""
+    delay = delay_ms / 1000
+    results = {
+        "fresh": _measure(
+            MockUpstream(delay=delay),
+            lambda url: _fresh(url, requests, concurrency), cached=False,
+        ),
+        "http1_pool": _measure(
+            MockUpstream(delay=delay),
+            lambda url: _pooled("0", url, requests, concurrency),
+        ),
+    }
+    if importlib.util.find_spec("h2") is not None:
+        results["http2"] = _measure(
+            H2MockUpstream(delay=delay),
+            lambda url: _pooled("h2c", url, requests, concurrency),
+        )
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare upstream connection reuse.")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--delay-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    results = compare(args.requests, args.concurrency, args.delay_ms)
+    for name, result in results.items():
+        print(
+            f"{name:10} {result['connections_per_1k']:7.1f} connections/1k   "
+            f"{result['dns_lookups']:4d} DNS lookups   "
+            f"{result['requests_per_sec']:7.0f} req/s   "
+            f"p50 {result['p50_ms']:6.2f} ms   p99 {result['p99_ms']:6.2f} ms"
+        )
+    if "http2" not in results:
+        print("http2: skipped, the h2 package is not installed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Load test: requests per second of serve.py as the worker count grows.
+
+For each worker count, starts ``serve.py`` on a local port, drives
+POST /v1/chat/completions from several client processes over keep-alive
+connections for a fixed duration, and reports throughput and scaling
+efficiency relative to one worker. Near-linear scaling shows as an
+efficiency close to 100%.
+
+Client processes share the machine with the server, so keep
+workers + clients at or below the number of cores for meaningful numbers.
+
+Usage:
+    python benchmarks/load_scaling.py --workers 1 2 4 --clients 4 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BODY = json.dumps({
+    "model": "load-test",
+    "messages": [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": "Help me plan a community garden for my street."},
+    ],
+}).encode()
+HEADERS = {"Content-Type": "application/json"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int, extra: List[str]) -> subprocess.Popen:
+    """Start serve.py and wait until it answers /health."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"),
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)] + extra,
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("server did not become healthy")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def client_loop(port: int, connections: int, duration: float, results) -> None:
+    """Issue requests round-robin over persistent connections."""
+    conns = [http.client.HTTPConnection("127.0.0.1", port, timeout=10) for _ in range(connections)]
+    completed = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for conn in conns:
+            try:
+                conn.request("POST", "/v1/chat/completions", body=BODY, headers=HEADERS)
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    completed += 1
+                else:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+    for conn in conns:
+        conn.close()
+    results.put((completed, errors))
+
+
+def measure(port: int, clients: int, connections: int, duration: float) -> dict:
+    """Run the client processes and return aggregate throughput."""
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=client_loop, args=(port, connections, duration, results))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    completed = sum(c for c, _ in totals)
+    errors = sum(e for _, e in totals)
+    return {"requests": completed, "errors": errors, "rps": completed / duration}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure RPS scaling of serve.py across workers.")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, max(1, (os.cpu_count() or 2) // 2)}))
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="client processes generating load")
+    parser.add_argument("--connections", type=int, default=4,
+                        help="keep-alive connections per client process")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--reuse-port", action="store_true")
+    parser.add_argument("--cpu-affinity", action="store_true")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    extra = []
+    if args.reuse_port:
+        extra.append("--reuse-port")
+    if args.cpu_affinity:
+        extra.append("--cpu-affinity")
+
+    rows = []
+    baseline = None
+    print(f"{'workers':>8} {'rps':>10} {'errors':>7} {'speedup':>8} {'efficiency':>11}")
+    for workers in args.workers:
+        port = free_port()
+        server = start_server(port, workers, extra)
+        try:
+            measure(port, 1, 1, 1.0)  # warm the connection path
+            result = measure(port, args.clients, args.connections, args.duration)
+        finally:
+            stop_server(server)
+
+        baseline = baseline or result["rps"]
+        speedup = result["rps"] / baseline if baseline else 0.0
+        result.update(workers=workers, speedup=speedup, efficiency=speedup / workers * args.workers[0])
+        rows.append(result)
+        print(f"{workers:>8} {result['rps']:>10.0f} {result['errors']:>7} "
+              f"{speedup:>7.2f}x {result['efficiency']:>10.0%}")
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump({"cpu_count": os.cpu_count(), "results": rows}, out, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
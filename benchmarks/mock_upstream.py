@@ -0,0 +1,286 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Answers POST .../chat/completions with a fixed completion after an optional
+delay, so the gateways can be measured end-to-end without network access or
+credentials. A fraction of requests can be made slow to give the latency a
+tail, and the status can be set to an error to simulate an outage. Any
+other request gets an empty 200 (or the error status), which is enough for
+warm-up and health probes.
+
+MockUpstream speaks HTTP/1.1. H2MockUpstream answers the same way over
+cleartext HTTP/2 with prior knowledge (h2c), which needs the h2 package.
+Both count the connections clients open to them.
+"""
+
+import http.server
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Optional
+
+COMPLETION = {
+    "id": "chatcmpl-mock",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "mock",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "Mock response."},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3},
+}
+
+
+class MockUpstreamHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle and
+    # delayed ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+    body = json.dumps(COMPLETION).encode()
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.server.last_body = self.rfile.read(length)
+        delay = self.server.delay
+        if self.server.slow_fraction and self.server.rng.random() < self.server.slow_fraction:
+            delay = self.server.slow_delay
+        if delay:
+            time.sleep(delay)
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        if self.server.status != 200:
+            self.send_error(self.server.status)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def do_HEAD(self):
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_HEAD
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    # Room for a burst of clients that connect anew for every request
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients closing pooled connections is expected, not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockUpstream:
+    """Threaded mock server on an ephemeral local port; usable as a context manager."""
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        slow_delay: float = 0.0,
+        slow_fraction: float = 0.0,
+        status: int = 200,
+        seed: int = 0,
+    ):
+        self._server = _Server(("127.0.0.1", 0), MockUpstreamHandler)
+        self._server.daemon_threads = True
+        self._server.delay = delay
+        self._server.slow_delay = slow_delay
+        self._server.slow_fraction = slow_fraction
+        self._server.status = status
+        self._server.rng = random.Random(seed)
+        self._server.last_body = None
+        self._server.connections = 0
+        self._server.lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def status(self) -> int:
+        return self._server.status
+
+    @status.setter
+    def status(self, value: int) -> None:
+        """Answer every request with this status from now on (200: healthy)."""
+        self._server.status = value
+
+    @property
+    def last_body(self) -> Optional[bytes]:
+        """Body of the most recent POST, for checking what a gateway sent."""
+        return self._server.last_body
+
+    @property
+    def connections(self) -> int:
+        """Connections accepted so far."""
+        return self._server.connections
+
+    def start(self) -> "MockUpstream":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockUpstream":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class H2MockUpstream:
+    """
+    HTTP/2 (h2c, prior knowledge) mock server; usable as a context manager.
+
+    Each connection is served by one thread; with a delay, each stream
+    is answered from a thread of its own, so streams overlap as they do
+    against a real multiplexing server.
+    """
+
+    def __init__(self, delay: float = 0.0, status: int = 200):
+        import h2.config  # noqa: F401 - fail here, not in a server thread
+
+        self.delay = delay
+        self.status = status
+        self.connections = 0
+        self.requests = 0
+        self.last_body: Optional[bytes] = None
+        self._lock = threading.Lock()
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._listener.getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "H2MockUpstream":
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopping = True
+        try:
+            self._listener.shutdown(socket.SHUT_RDWR)  # Wakes the blocked accept()
+        except OSError:
+            pass
+        self._listener.close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "H2MockUpstream":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _accept(self) -> None:
+        while not self._stopping:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        import h2.config
+        import h2.connection
+        import h2.events
+
+        h2conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        write_lock = threading.Lock()
+        requests = {}  # stream id -> [path, body chunks]
+
+        def flush():
+            data = h2conn.data_to_send()
+            if data:
+                conn.sendall(data)
+
+        def respond(stream_id, path, body):
+            if self.delay:
+                time.sleep(self.delay)
+            status = self.status
+            if status == 200 and not path.endswith("/chat/completions"):
+                status = 404
+            payload = MockUpstreamHandler.body if status == 200 else b""
+            with write_lock:
+                h2conn.send_headers(stream_id, [
+                    (":status", str(status)),
+                    ("content-type", "application/json"),
+                    ("content-length", str(len(payload))),
+                ])
+                h2conn.send_data(stream_id, payload, end_stream=True)
+                try:
+                    flush()
+                except OSError:
+                    pass
+
+        with conn:
+            with write_lock:
+                h2conn.initiate_connection()
+                flush()
+            while True:
+                try:
+                    data = conn.recv(65536)
+                except OSError:
+                    return
+                if not data:
+                    return
+                with write_lock:
+                    events = h2conn.receive_data(data)
+                    for event in events:
+                        if isinstance(event, h2.events.RequestReceived):
+                            headers = {
+                                (k.decode() if isinstance(k, bytes) else k):
+                                (v.decode() if isinstance(v, bytes) else v)
+                                for k, v in event.headers
+                            }
+                            requests[event.stream_id] = [headers.get(":path", ""), []]
+                        elif isinstance(event, h2.events.DataReceived):
+                            requests[event.stream_id][1].append(event.data)
+                            h2conn.acknowledge_received_data(
+                                event.flow_controlled_length, event.stream_id,
+                            )
+                    flush()
+                for event in events:
+                    if isinstance(event, h2.events.StreamEnded):
+                        path, chunks = requests.pop(event.stream_id)
+                        body = b"".join(chunks)
+                        with self._lock:
+                            self.requests += 1
+                            self.last_body = body
+                        if self.delay:
+                            threading.Thread(
+                                target=respond, args=(event.stream_id, path, body), daemon=True,
+                            ).start()
+                        else:
+                            respond(event.stream_id, path, body)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Micro and end-to-end benchmarks for the governance layer.
+
+Benchmarks:
+- directive.evaluate_intent    CoreDirective.evaluate_intent
+- evaluator.evaluate           DirectiveEvaluator.evaluate
+- gateway.process/<stack>      GovernanceGateway.process with no middleware,
+                               filter + rate limit, and a deep stack of ten
+- app.chat_completions         app/main.py through the ASGI test client
+- gateway_app.chat_completions core_directive_gateway.py against a local
+                               mock upstream (no network or credentials)
+
+Each runs on the short, long and adversarial corpora from benchmarks.corpus
+and reports p50/p99 latency, throughput and allocations. Results can be
+written to JSON and compared across commits with benchmarks.compare.
+
+Usage:
+    python -m benchmarks.run [--filter gateway] [--quick] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import corpus  # noqa: E402
+from benchmarks.harness import BenchmarkResult, format_table, measure, to_json  # noqa: E402
+
+# A case yields (name, corpus size, callable, items)
+Case = Tuple[str, str, Callable[[Any], Any], Sequence[Any]]
+# Whether a (name, corpus size) case is to run; suites set up only for those
+Wanted = Callable[[str, str], bool]
+
+
+def _sizes(wanted: Wanted, name: str) -> List[str]:
+    return [size for size in corpus.SIZES if wanted(name, size)]
+
+
+def directive_cases(wanted: Wanted) -> Iterator[Case]:
+    name = "directive.evaluate_intent"
+    sizes = _sizes(wanted, name)
+    if not sizes:
+        return
+    from core_directive import CoreDirective
+
+    directive = CoreDirective()
+    for size in sizes:
+        yield name, size, directive.evaluate_intent, corpus.prompts(size)
+
+
+def evaluator_cases(wanted: Wanted) -> Iterator[Case]:
+    name = "evaluator.evaluate"
+    sizes = _sizes(wanted, name)
+    if not sizes:
+        return
+    from evaluator import DirectiveEvaluator
+
+    evaluator = DirectiveEvaluator()
+    for size in sizes:
+        yield name, size, evaluator.evaluate, corpus.prompts(size)
+
+
+def _passthrough(request):
+    return request
+
+
+def _no_middleware() -> list:
+    return []
+
+
+def _filter_and_rate_limit() -> list:
+    from gateway import content_filter_middleware, rate_limit_middleware
+
+    return [
+        content_filter_middleware(["forbidden", "malware"]),
+        rate_limit_middleware(max_requests=10**12),
+    ]
+
+
+def _deep_stack() -> list:
+    return [_passthrough] * 10
+
+
+MIDDLEWARE_STACKS: Dict[str, Callable[[], list]] = {
+    "none": _no_middleware,
+    "filter_rate": _filter_and_rate_limit,
+    "deep": _deep_stack,
+}
+
+
+def gateway_cases(wanted: Wanted) -> Iterator[Case]:
+    stacks = [
+        (f"gateway.process/{stack}", build, _sizes(wanted, f"gateway.process/{stack}"))
+        for stack, build in MIDDLEWARE_STACKS.items()
+    ]
+    if not any(sizes for _, _, sizes in stacks):
+        return
+    from gateway import GatewayRequest, GovernanceGateway
+
+    for name, build, sizes in stacks:
+        for size in sizes:
+            gateway = GovernanceGateway()
+            for middleware in build():
+                gateway.add_middleware(middleware)
+            requests = [GatewayRequest.create(text, source="bench") for text in corpus.prompts(size)]
+            yield name, size, gateway.process, requests
+
+
+def _bodies(size: str) -> List[bytes]:
+    return [
+        json.dumps({"model": "bench", "messages": messages}).encode()
+        for messages in corpus.conversations(size, count=20)
+    ]
+
+
+def app_cases(wanted: Wanted) -> Iterator[Case]:
+    name = "app.chat_completions"
+    sizes = _sizes(wanted, name)
+    if not sizes:
+        return
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    headers = {"Content-Type": "application/json"}
+
+    def post(body: bytes):
+        response = client.post("/v1/chat/completions", content=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response
+
+    for size in sizes:
+        yield name, size, post, _bodies(size)
+
+
+def gateway_app_cases(wanted: Wanted) -> Iterator[Case]:
+    name = "gateway_app.chat_completions"
+    sizes = _sizes(wanted, name)
+    if not sizes:
+        return  # No mock upstream or client is set up
+    from fastapi.testclient import TestClient
+
+    import core_directive_gateway as module
+    from benchmarks.mock_upstream import MockUpstream
+
+    saved = {key: os.environ.get(key) for key in ("OPENAI_API_KEY", "OPENAI_BASE_URL")}
+    upstream = MockUpstream().start()
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = upstream.base_url
+    module._forget_inherited_client()
+    headers = {"Content-Type": "application/json"}
+
+    try:
+        with TestClient(module.app) as client:
+            def post(body: bytes):
+                response = client.post("/v1/chat/completions", content=body, headers=headers)
+                assert response.status_code == 200, response.text
+                return response
+
+            for size in sizes:
+                yield name, size, post, _bodies(size)
+    finally:
+        upstream.stop()
+        module._forget_inherited_client()
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+SUITES: Dict[str, Callable[[Wanted], Iterator[Case]]] = {
+    "directive": directive_cases,
+    "evaluator": evaluator_cases,
+    "gateway": gateway_cases,
+    "app": app_cases,
+    "gateway_app": gateway_app_cases,
+}
+
+
+def run(name_filter: str = "", quick: bool = False, verbose: bool = False) -> List[BenchmarkResult]:
+    """Run every benchmark whose name contains ``name_filter``."""
+    if quick:
+        settings = {"min_iterations": 20, "min_seconds": 0.05, "alloc_iterations": 5}
+    else:
+        settings = {"min_iterations": 200, "min_seconds": 1.0, "alloc_iterations": 50}
+
+    def wanted(name: str, size: str) -> bool:
+        return name_filter in f"{name}[{size}]"
+
+    results = []
+    for cases in SUITES.values():
+        for name, size, fn, items in cases(wanted):
+            result = measure(name, size, fn, items, **settings)
+            results.append(result)
+            if verbose:
+                print(format_table([result]).splitlines()[-1], file=sys.stderr)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the governance layer.")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="few iterations, for smoke testing")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.quick, verbose=True)
+    print(format_table(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(to_json(results), f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
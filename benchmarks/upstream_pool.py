@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tail latency of one upstream against a balanced, hedged pool.
+
+Starts local mock backends whose latency has a tail: most requests take a
+few milliseconds, a small fraction take much longer, and one backend is
+slow throughout. Sends the same number of chat completions through:
+
+- a single backend
+- a pool balanced by least outstanding requests
+- a pool balanced by EWMA latency
+- the EWMA pool with hedging after a short delay
+
+and reports p50/p99 for each. Requests are sent from a few threads at once
+so outstanding counts matter.
+
+Usage:
+    python -m benchmarks.upstream_pool [--requests 300] [--threads 4]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.harness import percentile  # noqa: E402
+from benchmarks.mock_upstream import MockUpstream  # noqa: E402
+from upstreams import Backend, UpstreamPool  # noqa: E402
+
+# Usual latency, tail latency and how often the tail is hit
+FAST = 0.002
+TAIL = 0.08
+TAIL_FRACTION = 0.05
+SLOW = 0.03
+HEDGE_AFTER = 0.012
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+def _latencies_ms(pool: UpstreamPool, requests: int, threads: int) -> List[float]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+    per_thread = requests // threads
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            pool.chat_completion(model="bench", messages=MESSAGES)
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return latencies
+
+
+def compare(requests: int = 300, threads: int = 4) -> Dict[str, Dict[str, float]]:
+    """p50/p99 in milliseconds per configuration."""
+    with ExitStack() as stack:
+        tailed = [
+            stack.enter_context(MockUpstream(FAST, TAIL, TAIL_FRACTION, seed=i))
+            for i in range(3)
+        ]
+        slow = stack.enter_context(MockUpstream(SLOW))
+        urls = [m.base_url for m in tailed] + [slow.base_url]
+
+        configs = {
+            "single": lambda: UpstreamPool([Backend(urls[0], api_key="bench")]),
+            "least_outstanding": lambda: UpstreamPool(
+                [Backend(u, api_key="bench") for u in urls], strategy="least_outstanding",
+            ),
+            "ewma": lambda: UpstreamPool([Backend(u, api_key="bench") for u in urls]),
+            "ewma+hedge": lambda: UpstreamPool(
+                [Backend(u, api_key="bench") for u in urls],
+                hedge_after=HEDGE_AFTER, hedge_budget=0.2,
+            ),
+        }
+        results = {}
+        for name, build in configs.items():
+            pool = build()
+            try:
+                _latencies_ms(pool, threads * 5, threads)  # Connections and estimates
+                latencies = sorted(_latencies_ms(pool, requests, threads))
+            finally:
+                pool.close()
+            results[name] = {
+                "p50_ms": percentile(latencies, 0.50),
+                "p99_ms": percentile(latencies, 0.99),
+            }
+        return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare upstream pool tail latency.")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    results = compare(args.requests, args.threads)
+    for name, result in results.items():
+        print(f"{name:18} p50 {result['p50_ms']:7.2f} ms   p99 {result['p99_ms']:7.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
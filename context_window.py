@@ -0,0 +1,211 @@
+"""
+Context Window Module - Keeping Conversations Within a Token Budget
+
+Chat requests carry the whole conversation on every turn. Once a long
+session outgrows the model's context window, the upstream rejects it,
+and well before that every turn pays for re-sending the full history.
+This module trims a conversation to a token budget before the Core
+Directive is applied:
+
+- System messages are always kept, since the directive is prepended to
+  them (or becomes the first system message if there is none).
+- The oldest other messages are dropped until the rest fits, and a short
+  note saying how many were omitted is added to the first system message.
+- The latest message is always kept, even if it alone exceeds the budget.
+
+A Conversation keeps each message's token count and running totals, so
+adding a turn counts only the new messages and finding the cut is a
+binary search over the totals: a turn costs O(new messages), however
+long the history. Stateless callers build a Conversation per request;
+the counts of contents seen before come from a TokenCounter's cache.
+
+Configuration (environment):
+    CONTEXT_MAX_TOKENS  context window of the upstream model; the prompt
+                        budget is this minus the request's max_tokens
+                        (unset or 0: conversations are never trimmed)
+"""
+
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Tokens each message costs beyond its content (role and delimiters)
+MESSAGE_OVERHEAD = 4
+DEFAULT_CACHE_ENTRIES = 4096
+OMITTED_NOTE = "[{count} earlier messages omitted to fit the context window]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate token count for text, at roughly 4 characters per token."""
+    return max(1, len(text) // 4)
+
+
+class TokenCounter:
+    """
+    Counts the tokens of message contents.
+
+    With a real tokenizer, counts are cached by content, so the history
+    resent with each turn is tokenized only once. The default estimate is
+    cheaper than a cache lookup and is not cached.
+    """
+
+    def __init__(
+        self,
+        tokenize: Optional[Callable[[str], int]] = None,
+        max_entries: int = DEFAULT_CACHE_ENTRIES,
+    ):
+        self._tokenize = tokenize or estimate_tokens
+        self._cache: Optional[Dict[str, int]] = {} if tokenize is not None else None
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        cache = self._cache
+        if cache is None:
+            return self._tokenize(text)
+        tokens = cache.get(text)
+        if tokens is None:
+            tokens = self._tokenize(text)
+            with self._lock:
+                if len(cache) >= self.max_entries:
+                    del cache[next(iter(cache))]  # Oldest first
+                cache[text] = tokens
+        return tokens
+
+
+_default_counter = TokenCounter()
+# Room kept for the note and the blank line before it
+_NOTE_TOKENS = max(1, len(OMITTED_NOTE.format(count=10**6)) // 4) + 1
+
+
+@dataclass(frozen=True)
+class Window:
+    """Which messages of a conversation fit a budget."""
+    start: int    # First non-system message kept; earlier ones are dropped
+    dropped: int  # Number of non-system messages dropped
+    tokens: int   # Estimated prompt tokens of what is kept
+
+    @property
+    def note(self) -> Optional[str]:
+        """The note added for dropped messages, if any."""
+        return OMITTED_NOTE.format(count=self.dropped) if self.dropped else None
+
+
+class Conversation:
+    """
+    A conversation's messages with running token totals.
+
+    Messages are dicts with "role" and "content", as in a request body.
+    """
+
+    def __init__(
+        self,
+        messages: Iterable[Dict[str, Any]] = (),
+        counter: Optional[TokenCounter] = None,
+    ):
+        self.messages: List[Dict[str, Any]] = []
+        self._counter = counter or _default_counter
+        # _totals[i]: tokens of the non-system messages before index i
+        self._totals = [0]
+        self._system_indexes: List[int] = []
+        self._system_tokens = 0
+        self.extend(messages)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    @property
+    def system_count(self) -> int:
+        """Number of system messages, which are never dropped."""
+        return len(self._system_indexes)
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the whole conversation, without the directive."""
+        return self._system_tokens + self._totals[-1]
+
+    def extend(self, messages: Iterable[Dict[str, Any]]) -> None:
+        """Append messages, counting only these."""
+        count = self._counter.count
+        total = self._totals[-1]
+        for message in messages:
+            tokens = count(message["content"]) + MESSAGE_OVERHEAD
+            if message["role"] == "system":
+                self._system_indexes.append(len(self.messages))
+                self._system_tokens += tokens
+            else:
+                total += tokens
+            self.messages.append(message)
+            self._totals.append(total)
+
+    def truncate(self, length: int) -> None:
+        """Drop the messages after the first length, e.g. a turn that failed."""
+        systems = self._system_indexes
+        while len(self.messages) > length:
+            index = len(self.messages) - 1
+            message = self.messages.pop()
+            self._totals.pop()
+            if systems and systems[-1] == index:
+                systems.pop()
+                self._system_tokens -= self._counter.count(message["content"]) + MESSAGE_OVERHEAD
+
+    def fit(self, budget: int, directive_tokens: int = 0) -> Window:
+        """
+        The window of this conversation that fits budget tokens.
+
+        directive_tokens is the size of the directive, which is added to
+        every system message, or as a message of its own if there is none.
+        """
+        systems = len(self._system_indexes)
+        fixed = self._system_tokens + directive_tokens * max(1, systems)
+        if not systems:
+            fixed += MESSAGE_OVERHEAD
+        end = len(self.messages)
+        total = self._totals[-1]
+        if fixed + total <= budget or not end:
+            return Window(0, 0, fixed + total)
+
+        available = budget - fixed - _NOTE_TOKENS
+        # The first start whose remaining messages fit the budget
+        start = bisect_left(self._totals, total - available, 0, end)
+        start = min(start, self._last_non_system(end))
+        dropped = start - bisect_left(self._system_indexes, start)
+        if not dropped:
+            return Window(0, 0, fixed + total)
+        kept = total - self._totals[start]
+        return Window(start, dropped, fixed + kept + _NOTE_TOKENS)
+
+    def window_messages(self, window: Window) -> List[Dict[str, Any]]:
+        """The messages kept by window, in their original order."""
+        if not window.start:
+            return self.messages
+        return [self.messages[i] for i in self.window_indexes(window)]
+
+    def window_indexes(self, window: Window) -> List[int]:
+        """The indexes of the messages kept by window, in order."""
+        earlier = bisect_right(self._system_indexes, window.start - 1)
+        return [*self._system_indexes[:earlier], *range(window.start, len(self.messages))]
+
+    def _last_non_system(self, end: int) -> int:
+        """Index of the last message that is not a system message."""
+        index = end - 1
+        systems = self._system_indexes
+        position = len(systems) - 1
+        while position >= 0 and systems[position] == index:
+            index -= 1
+            position -= 1
+        return max(index, 0)
+
+
+def prompt_budget(max_tokens: Optional[int] = None) -> Optional[int]:
+    """
+    The prompt token budget under CONTEXT_MAX_TOKENS, or None without one.
+
+    The completion's max_tokens, if requested, is reserved out of it.
+    """
+    window = int(os.environ.get("CONTEXT_MAX_TOKENS") or 0)
+    if window <= 0:
+        return None
+    return max(1, window - (max_tokens or 0))
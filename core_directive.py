@@ -15,9 +15,14 @@ The Core Directive:
 "Every person has an equal, inalienable right to pursue happiness."
 """
 
+import re
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import Dict, Iterable, Optional
+
+# Vocabularies longer than this are matched with one compiled pattern
+# instead of one substring test per term
+AUTOMATON_MIN_TERMS = 32
 
 
 class ActionResult(Enum):
@@ -37,6 +42,76 @@ class DirectiveEvaluation:
     confidence: float = 1.0
 
 
+class KeywordMatcher:
+    """
+    Finds the first term of a vocabulary, in list order, found in a text.
+
+    Short vocabularies are checked with one ``in`` test per term. Long
+    ones are compiled into a single regular expression shaped like a trie
+    of the terms, which scans the text once however many terms there are;
+    the answer is the same either way.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = tuple(terms)
+        self._pattern = None
+        if len(self.terms) > AUTOMATON_MIN_TERMS and all(self.terms):
+            # A zero-width lookahead reports a match at every position,
+            # so terms inside other matches are not skipped
+            self._pattern = re.compile(f"(?=({_trie_pattern(self.terms)}))")
+            rank: Dict[str, int] = {}
+            for index, term in enumerate(self.terms):
+                rank.setdefault(term, index)
+            # The pattern reports the longest term at each position; the
+            # terms that are prefixes of it are there as well
+            self._best = {
+                term: min(rank[term[:n]] for n in range(1, len(term) + 1) if term[:n] in rank)
+                for term in rank
+            }
+
+    @property
+    def compiled(self) -> bool:
+        """Whether the vocabulary is matched with the compiled pattern."""
+        return self._pattern is not None
+
+    def first(self, text: str) -> Optional[str]:
+        """The earliest term in the vocabulary that occurs in text, if any."""
+        if self._pattern is None:
+            for term in self.terms:
+                if term in text:
+                    return term
+            return None
+        best = None
+        for match in self._pattern.finditer(text):
+            rank = self._best[match.group(1)]
+            if best is None or rank < best:
+                if rank == 0:
+                    return self.terms[0]
+                best = rank
+        return None if best is None else self.terms[best]
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """An alternation of terms, factored by shared prefixes, longest first."""
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
 class CoreDirective:
     """
     The Core Directive - Universal Governance Kernel
@@ -59,10 +134,43 @@ class CoreDirective:
         "Quarantine on Doubt - When there is serious uncertainty about a violation, systems should slow, pause, or flag",
     ]
 
-    def __init__(self):
-        """Initialize the Core Directive governance kernel."""
+    # Vocabularies checked by evaluate_intent, in priority order
+    HARM_INDICATORS = (
+        "harm", "hurt", "attack", "exploit", "manipulate",
+        "coerce", "force", "deceive", "steal", "destroy",
+        "fake rule", "fake debt", "fake obligation",
+    )
+    POSITIVE_INDICATORS = (
+        "help", "support", "protect", "assist", "enable",
+        "create", "build", "learn", "understand", "share",
+    )
+
+    def __init__(
+        self,
+        harm_indicators: Optional[Iterable[str]] = None,
+        positive_indicators: Optional[Iterable[str]] = None,
+        version: str = "builtin",
+    ):
+        """
+        Initialize the Core Directive governance kernel.
+
+        Args:
+            harm_indicators: Terms that send an intent to review
+                (defaults to HARM_INDICATORS)
+            positive_indicators: Terms that mark an intent as constructive
+                (defaults to POSITIVE_INDICATORS)
+            version: Version of the directive bundle these came from
+        """
         self._directive = self.DIRECTIVE
         self._principles = self.PRINCIPLES.copy()
+        # Matched against lowercased intents, so lowercase them once here
+        self._harm_indicators = KeywordMatcher(
+            term.lower() for term in (harm_indicators or self.HARM_INDICATORS)
+        )
+        self._positive_indicators = KeywordMatcher(
+            term.lower() for term in (positive_indicators or self.POSITIVE_INDICATORS)
+        )
+        self.version = version
 
     @property
     def directive(self) -> str:
@@ -116,37 +224,26 @@ When in doubt, err on the side of:
         intent_lower = intent.lower()
 
         # Check for explicit harmful patterns
-        harm_indicators = [
-            "harm", "hurt", "attack", "exploit", "manipulate",
-            "coerce", "force", "deceive", "steal", "destroy",
-            "fake rule", "fake debt", "fake obligation"
-        ]
-
-        for indicator in harm_indicators:
-            if indicator in intent_lower:
-                return DirectiveEvaluation(
-                    result=ActionResult.REVIEW,
-                    reason=(
-                        f"Intent contains potential harm or violation indicator: '{indicator}'. "
-                        "Additional review recommended."
-                    ),
-                    alternative="Consider rephrasing to focus on constructive outcomes",
-                    confidence=0.7
-                )
+        indicator = self._harm_indicators.first(intent_lower)
+        if indicator is not None:
+            return DirectiveEvaluation(
+                result=ActionResult.REVIEW,
+                reason=(
+                    f"Intent contains potential harm or violation indicator: '{indicator}'. "
+                    "Additional review recommended."
+                ),
+                alternative="Consider rephrasing to focus on constructive outcomes",
+                confidence=0.7
+            )
 
         # Check for patterns that suggest protecting rights
-        positive_indicators = [
-            "help", "support", "protect", "assist", "enable",
-            "create", "build", "learn", "understand", "share"
-        ]
-
-        for indicator in positive_indicators:
-            if indicator in intent_lower:
-                return DirectiveEvaluation(
-                    result=ActionResult.ALLOWED,
-                    reason=f"Intent aligns with positive action: '{indicator}'",
-                    confidence=0.8
-                )
+        indicator = self._positive_indicators.first(intent_lower)
+        if indicator is not None:
+            return DirectiveEvaluation(
+                result=ActionResult.ALLOWED,
+                reason=f"Intent aligns with positive action: '{indicator}'",
+                confidence=0.8
+            )
 
         # Default: allow with neutral assessment
         return DirectiveEvaluation(
@@ -184,6 +281,17 @@ def get_directive() -> CoreDirective:
     return _default_directive
 
 
+def set_directive(directive: CoreDirective) -> None:
+    """
+    Replace the default CoreDirective instance.
+
+    Callers that already hold the previous instance keep using it, so a
+    request in flight finishes under the directive it started with.
+    """
+    global _default_directive
+    _default_directive = directive
+
+
 def evaluate(intent: str) -> DirectiveEvaluation:
     """Convenience function to evaluate an intent using the default directive."""
     return get_directive().evaluate_intent(intent)
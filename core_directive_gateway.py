@@ -1,19 +1,127 @@
 # file: core_directive_gateway.py
 
+import asyncio
 import os
 import time
 import uuid
+from contextlib import asynccontextmanager
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Response
 from pydantic import BaseModel
 from openai import OpenAI
 
-# Validate OPENAI_API_KEY is set
-if not os.environ.get("OPENAI_API_KEY"):
-    raise RuntimeError("OPENAI_API_KEY environment variable must be set")
+import http_clients
+import metrics
+import profiler
+import tracing
+import upstreams
+
+# Upstream connection pool per worker process
+MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+# Open a connection at startup so the first request skips TCP/TLS setup
+WARM_UP = os.environ.get("OPENAI_WARM_UP", "1") != "0"
+
+_UPSTREAM_SECONDS = metrics.STAGE_SECONDS.labels("gateway_app", "upstream")
+_SERIALIZATION_SECONDS = metrics.STAGE_SECONDS.labels("gateway_app", "serialization")
+
+# The client is built lazily, once per process. Pre-fork servers import this
+# module in the parent, so nothing here may open sockets at import time.
+_client: Optional[OpenAI] = None
+_http_client: Optional[httpx.Client] = None
+_client_pid: Optional[int] = None
+
+
+def get_client() -> OpenAI:
+    """
+    Get this process's OpenAI client, creating it on first use.
+
+    A client inherited across fork() is never reused: its pooled sockets
+    would be shared with the parent.
+
+    Raises:
+        RuntimeError: If OPENAI_API_KEY environment variable is not set
+    """
+    global _client, _http_client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        if not os.environ.get("OPENAI_API_KEY"):
+            raise RuntimeError("OPENAI_API_KEY environment variable must be set")
+        # Pooled keep-alive connections and cached DNS; see http_clients.py
+        _http_client = http_clients.create_http_client(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        )
+        _client = OpenAI(http_client=_http_client)  # uses OPENAI_API_KEY from your env
+        _client_pid = os.getpid()
+    return _client
+
+
+def _forget_inherited_client() -> None:
+    """Drop the parent's client in a forked child without closing its sockets."""
+    global _client, _http_client, _client_pid
+    _client = None
+    _http_client = None
+    _client_pid = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_inherited_client)
+
+
+def warm_up() -> bool:
+    """
+    Open a pooled connection to the upstream ahead of traffic.
+
+    Any response, even an error status, leaves a reusable keep-alive
+    connection behind. Returns False if the upstream was unreachable.
+    """
+    base_url = str(get_client().base_url)
+    try:
+        _http_client.request("HEAD", base_url, timeout=5.0)
+    except httpx.HTTPError:
+        return False
+    return True
+
+
+def create_completion(**kwargs):
+    """
+    Create a chat completion upstream.
+
+    Uses the upstream pool when UPSTREAM_URLS is set (see upstreams.py),
+    otherwise this process's single OpenAI client.
+    """
+    pool = upstreams.get_pool()
+    if pool is not None:
+        return pool.chat_completion(**kwargs)
+    return get_client().chat.completions.create(**kwargs)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build and warm this worker's upstream client or pool before serving."""
+    pool = upstreams.get_pool()
+    # Warm-up makes blocking HTTP calls (up to a timeout per backend when an
+    # upstream is unreachable), so it runs on a thread, off the event loop
+    if pool is None:
+        get_client()
+        if WARM_UP:
+            await asyncio.to_thread(warm_up)
+    else:
+        if WARM_UP:
+            await asyncio.to_thread(pool.warm_up)
+        pool.start_health_checks()
+    tracer = tracing.start_flushing()
+    yield
+    tracer.stop_flushing()
+    tracer.flush()
+    if pool is not None:
+        pool.close()
+    if _client is not None and _client_pid == os.getpid():
+        _client.close()
+        _forget_inherited_client()
 
-client = OpenAI()  # uses OPENAI_API_KEY from your env
 
 CORE_DIRECTIVE = """
 You are an AI assistant governed by this Core Directive:
@@ -58,28 +166,49 @@ class ChatResponse(BaseModel):
     choices: List[Choice]
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 @app.post("/v1/chat/completions", response_model=ChatResponse)
 async def chat_completions(req: ChatRequest):
+    response_id = uuid.uuid4().hex
+    tracer = tracing.get_tracer()
+    trace = tracer.start_trace(response_id, "gateway_app.chat_completions", model=req.model)
+
     # Inject Core Directive as the first system message
+    wrapping = time.perf_counter_ns()
     messages = [{"role": "system", "content": CORE_DIRECTIVE}]
     messages.extend(m.model_dump() for m in req.messages)
 
-    completion = client.chat.completions.create(
-        model=req.model or "gpt-4.1",
-        messages=messages,
-        max_tokens=req.max_tokens,
-        temperature=req.temperature,
-    )
+    started = time.perf_counter_ns()
+    try:
+        # The OpenAI client blocks; on the event loop it would hold up every other request
+        completion = await asyncio.to_thread(
+            create_completion,
+            model=req.model or "gpt-4.1",
+            messages=messages,
+            max_tokens=req.max_tokens,
+            temperature=req.temperature,
+        )
+    except Exception as exc:
+        if trace is not None:
+            trace.add_span("upstream.request", started, time.perf_counter_ns(),
+                           tracing.SPAN_KIND_CLIENT, error=type(exc).__name__)
+            tracer.finish(trace)
+        raise
+    finished = time.perf_counter_ns()
+    _UPSTREAM_SECONDS.observe_ns(finished - started)
+    if trace is not None:
+        trace.add_span("directive.wrap", wrapping, started)
+        trace.add_span("upstream.request", started, finished, tracing.SPAN_KIND_CLIENT)
 
     if not completion.choices:
+        tracer.finish(trace)
         raise HTTPException(status_code=500, detail="No choices returned from OpenAI")
 
     choice = completion.choices[0]
-    return ChatResponse(
-        id=f"chatcmpl-{uuid.uuid4().hex}",
+    response = ChatResponse(
+        id=f"chatcmpl-{response_id}",
         object="chat.completion",
         created=int(time.time()),
         model=req.model or "gpt-4.1",
@@ -94,3 +223,44 @@ async def chat_completions(req: ChatRequest):
             )
         ],
     )
+
+    started = time.perf_counter_ns()
+    body = response.model_dump_json()
+    serialized = time.perf_counter_ns()
+    _SERIALIZATION_SECONDS.observe_ns(serialized - started)
+    if trace is not None:
+        trace.add_span("serialization", started, serialized, bytes=len(body))
+        tracer.finish(trace)
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics endpoint."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/slow")
+async def debug_slow(limit: int = 10, x_admin_token: Optional[str] = Header(default=None)):
+    """Slowest recently traced requests with their span breakdown; needs ADMIN_TOKEN."""
+    if not profiler.admin_allowed(x_admin_token):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return tracing.slow_report(limit)
+
+
+@app.post("/admin/profile", status_code=202, include_in_schema=False)
+async def admin_profile(
+    seconds: float = 10.0,
+    interval_ms: float = 5.0,
+    x_admin_token: Optional[str] = Header(default=None),
+):
+    """Profile this worker for a while; only enabled when ADMIN_TOKEN is set."""
+    if not profiler.admin_allowed(x_admin_token):
+        raise HTTPException(status_code=404, detail="Not Found")
+    try:
+        run = profiler.start_profile(seconds, interval=interval_ms / 1000)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return {"pid": os.getpid(), "seconds": run.duration, "path": run.path}
@@ -0,0 +1,336 @@
+"""
+Directive Registry Module - Versioned, Hot-Reloadable Directive Bundles
+
+The Core Directive text wrapped around chat requests and the indicator
+vocabularies of CoreDirective and DirectiveEvaluator are built in. This
+module loads them from a JSON bundle instead and reloads it while the
+process keeps serving.
+
+A reload reads and validates the file, builds a new CoreDirective and
+DirectiveEvaluator, runs the registered preparers (e.g. to fill the chat
+app's splice caches) and only then swaps the new version in with a single
+assignment, on a background thread. Request handling takes no lock and is
+never paused. A request reads the current version once when it starts and
+keeps it, so it finishes on the version it began with; gateway audit
+entries record that version. A bundle that fails to load leaves the
+current version in place.
+
+Bundle format (JSON, every key optional):
+    {
+      "version": "2024-06-01",
+      "chat_directive": "Text wrapped around every chat request",
+      "harm_indicators": ["harm", "hurt", ...],
+      "positive_indicators": ["help", "support", ...],
+      "evaluator": {
+        "harm_indicators": {"physical": ["harm", ...], ...},
+        "positive_indicators": {"helpful": ["help", ...], ...}
+      }
+    }
+Without "version", the first 12 hex digits of the file's SHA-256 are used.
+
+Configuration (environment):
+    DIRECTIVE_FILE            path of the bundle; unset keeps the built-in one
+    DIRECTIVE_RELOAD_SECONDS  how often the file is checked (default 2, 0 = never)
+"""
+
+import hashlib
+import json
+import os
+import signal
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import core_directive
+import evaluator
+from core_directive import CoreDirective
+from evaluator import DirectiveEvaluator
+
+BUILTIN_VERSION = "builtin"
+DEFAULT_RELOAD_SECONDS = 2.0
+# Versions kept for lookups by the version recorded in audit entries
+KEPT_VERSIONS = 8
+
+
+@dataclass(frozen=True)
+class DirectiveVersion:
+    """One immutable version of the directive and its vocabularies."""
+    version: str
+    directive: CoreDirective
+    evaluator: DirectiveEvaluator
+    chat_directive: Optional[str] = None  # None: the app's built-in text
+    path: Optional[str] = None
+
+
+def builtin_version() -> DirectiveVersion:
+    """The version compiled into the code."""
+    return DirectiveVersion(
+        BUILTIN_VERSION,
+        CoreDirective(version=BUILTIN_VERSION),
+        DirectiveEvaluator(version=BUILTIN_VERSION),
+    )
+
+
+def build_version(data: dict, version: str, path: Optional[str] = None) -> DirectiveVersion:
+    """
+    Build a version from a parsed bundle.
+
+    Raises:
+        ValueError: If a field has the wrong type or names an unknown
+            impact category
+    """
+    if not isinstance(data, dict):
+        raise ValueError("A directive bundle must be a JSON object")
+    chat_directive = data.get("chat_directive")
+    if chat_directive is not None and not isinstance(chat_directive, str):
+        raise ValueError("chat_directive must be a string")
+    for key in ("harm_indicators", "positive_indicators"):
+        terms = data.get(key)
+        if terms is not None and not (
+            isinstance(terms, list) and all(isinstance(t, str) for t in terms)
+        ):
+            raise ValueError(f"{key} must be a list of strings")
+    detailed = data.get("evaluator") or {}
+    if not isinstance(detailed, dict):
+        raise ValueError("evaluator must be an object")
+    for key in ("harm_indicators", "positive_indicators"):
+        categories = detailed.get(key)
+        if categories is None:
+            continue
+        if not isinstance(categories, dict):
+            raise ValueError(f"evaluator.{key} must be an object")
+        for category, terms in categories.items():
+            if not (isinstance(terms, list) and all(isinstance(t, str) for t in terms)):
+                raise ValueError(f"evaluator.{key}.{category} must be a list of strings")
+
+    return DirectiveVersion(
+        version,
+        CoreDirective(
+            harm_indicators=data.get("harm_indicators"),
+            positive_indicators=data.get("positive_indicators"),
+            version=version,
+        ),
+        DirectiveEvaluator(
+            harm_indicators=detailed.get("harm_indicators"),
+            positive_indicators=detailed.get("positive_indicators"),
+            version=version,
+        ),
+        chat_directive,
+        path,
+    )
+
+
+def read_bundle(path: str, namespace: Optional[str] = None) -> DirectiveVersion:
+    """
+    Read, validate and build the bundle at path.
+
+    With a namespace (e.g. a tenant), the version is "<namespace>@<version>".
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        data = json.loads(raw)
+    except ValueError as exc:
+        raise ValueError(f"{path}: not valid JSON ({exc})") from None
+    version = data.get("version") if isinstance(data, dict) else None
+    if version is None:
+        version = hashlib.sha256(raw).hexdigest()[:12]
+    if namespace is not None:
+        version = f"{namespace}@{version}"
+    return build_version(data, str(version), path)
+
+
+class DirectiveRegistry:
+    """
+    Holds the current DirectiveVersion and swaps in reloaded ones.
+
+    Readers use ``current``, a plain attribute read. Reloads are serialized
+    among themselves but never block readers. With publish=True each new
+    version also becomes the process default (get_directive/get_evaluator).
+    """
+
+    def __init__(self, path: Optional[str] = None, publish: bool = False):
+        self.path = path
+        self.publish = publish
+        self._current = builtin_version()
+        self._versions: "OrderedDict[str, DirectiveVersion]" = OrderedDict()
+        self._versions[BUILTIN_VERSION] = self._current
+        self._preparers: List[Callable[[DirectiveVersion], None]] = []
+        self._reload_lock = threading.Lock()
+        self._stamp = None  # (mtime_ns, size) of the file last loaded
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reloads = 0
+        self.failures = 0
+
+    @property
+    def current(self) -> DirectiveVersion:
+        return self._current
+
+    def get(self, version: str) -> Optional[DirectiveVersion]:
+        """A recently current version by its version string."""
+        return self._versions.get(version)
+
+    def add_preparer(self, preparer: Callable[[DirectiveVersion], None]) -> None:
+        """
+        Run preparer on every new version before it becomes current.
+
+        The current version is prepared at once, so caches built by the
+        preparer cover it too. Adding the same preparer again does nothing.
+        """
+        if preparer in self._preparers:
+            return
+        self._preparers.append(preparer)
+        preparer(self._current)
+
+    def load(self, path: Optional[str] = None) -> DirectiveVersion:
+        """
+        Load the bundle at path (default: self.path) and make it current.
+
+        Raises:
+            OSError, ValueError: If the bundle cannot be read or is invalid;
+                the current version stays in place
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No directive bundle path configured")
+        with self._reload_lock:
+            stamp = _file_stamp(path)
+            version = read_bundle(path)
+            for preparer in self._preparers:
+                preparer(version)
+            self._install(version)
+            self.path = path
+            self._stamp = stamp
+            return version
+
+    def reload_if_changed(self) -> bool:
+        """Reload when the file has changed; failures are reported, not raised."""
+        if self.path is None:
+            return False
+        stamp = None
+        try:
+            stamp = _file_stamp(self.path)
+            if stamp == self._stamp:
+                return False
+            self.load()
+            return True
+        except (OSError, ValueError) as exc:
+            if stamp is not None:
+                self._stamp = stamp  # Report a bad file once, not every check
+            self.failures += 1
+            print(f"[directives] keeping version {self._current.version}: {exc}",
+                  file=sys.stderr, flush=True)
+            return False
+
+    def _install(self, version: DirectiveVersion) -> None:
+        self._versions[version.version] = version
+        self._versions.move_to_end(version.version)
+        while len(self._versions) > KEPT_VERSIONS:
+            self._versions.popitem(last=False)
+        self._current = version  # The swap: one reference assignment
+        if self.publish:
+            core_directive.set_directive(version.directive)
+            evaluator.set_evaluator(version.evaluator)
+        self.reloads += 1
+
+    def watch(self, interval: float = DEFAULT_RELOAD_SECONDS) -> None:
+        """Check the file for changes every interval seconds in the background."""
+        if self._watcher is not None or self.path is None or interval <= 0:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self._check()
+
+        self._watcher = threading.Thread(target=run, name="directive-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Stop watching the file."""
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            self._stop.set()
+            watcher.join()
+
+    def reload_in_background(self) -> threading.Thread:
+        """Check for a changed file on a new thread, e.g. from a signal handler."""
+        thread = threading.Thread(target=self._check, name="directive-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def _check(self) -> None:
+        """reload_if_changed for background threads, which nothing may kill."""
+        try:
+            self.reload_if_changed()
+        except Exception as exc:  # E.g. a preparer failing
+            self.failures += 1
+            try:
+                self._stamp = _file_stamp(self.path)  # Report it once, as above
+            except OSError:
+                pass
+            print(f"[directives] keeping version {self._current.version}: "
+                  f"reload failed: {exc!r}", file=sys.stderr, flush=True)
+
+    def stats(self) -> dict:
+        return {
+            "version": self._current.version,
+            "path": self.path,
+            "reloads": self.reloads,
+            "failures": self.failures,
+        }
+
+
+def _file_stamp(path: str) -> tuple:
+    info = os.stat(path)
+    return info.st_mtime_ns, info.st_size
+
+
+_registry: Optional[DirectiveRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_directive_registry() -> DirectiveRegistry:
+    """
+    The process-wide registry, configured from DIRECTIVE_FILE.
+
+    Its versions become the process defaults. If the file cannot be
+    loaded at startup, the built-in version is used and the error reported.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = DirectiveRegistry(os.environ.get("DIRECTIVE_FILE"), publish=True)
+                if registry.path:
+                    registry.reload_if_changed()
+                _registry = registry
+    return _registry
+
+
+def start_watching(registry: Optional[DirectiveRegistry] = None) -> DirectiveRegistry:
+    """Watch the registry's file at the interval set by DIRECTIVE_RELOAD_SECONDS."""
+    registry = registry or get_directive_registry()
+    interval = float(os.environ.get("DIRECTIVE_RELOAD_SECONDS", DEFAULT_RELOAD_SECONDS))
+    registry.watch(interval)
+    return registry
+
+
+def install_signal_handler(signum: int = getattr(signal, "SIGHUP", 0)) -> bool:
+    """
+    Reload the bundle whenever signum arrives.
+
+    Must be called from the main thread. Returns False where the signal
+    does not exist (e.g. Windows).
+    """
+    if not signum:
+        return False
+
+    def handler(received, frame):
+        get_directive_registry().reload_in_background()
+
+    signal.signal(signum, handler)
+    return True
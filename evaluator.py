@@ -126,8 +126,38 @@ class DirectiveEvaluator:
         ],
     }
 
-    def __init__(self):
-        """Initialize the evaluator."""
+    def __init__(
+        self,
+        harm_indicators: Optional[dict[str, list[str]]] = None,
+        positive_indicators: Optional[dict[str, list[str]]] = None,
+        version: str = "builtin",
+    ):
+        """
+        Initialize the evaluator.
+
+        Args:
+            harm_indicators: Harm keywords per ImpactCategory value
+                (defaults to HARM_INDICATORS)
+            positive_indicators: Positive keywords per category
+                (defaults to POSITIVE_INDICATORS)
+            version: Version of the directive bundle these came from
+
+        Raises:
+            ValueError: If a harm category is not an ImpactCategory value
+        """
+        if harm_indicators is not None:
+            for category in harm_indicators:
+                ImpactCategory(category)
+            self.HARM_INDICATORS = {
+                category: [term.lower() for term in terms]
+                for category, terms in harm_indicators.items()
+            }
+        if positive_indicators is not None:
+            self.POSITIVE_INDICATORS = {
+                category: [term.lower() for term in terms]
+                for category, terms in positive_indicators.items()
+            }
+        self.version = version
         self._evaluation_count = 0
 
     @property
@@ -450,6 +480,12 @@ def get_evaluator() -> DirectiveEvaluator:
     return _default_evaluator
 
 
+def set_evaluator(evaluator: DirectiveEvaluator) -> None:
+    """Replace the default evaluator instance."""
+    global _default_evaluator
+    _default_evaluator = evaluator
+
+
 def evaluate_detailed(
     intent: str,
     context: Optional[dict] = None,
@@ -12,66 +12,338 @@ Gateway Features:
 3. Audit logging for transparency
 4. Middleware architecture for extensibility
 5. Multi-service routing support
+6. Optional adaptive admission control, refusing excess load with 429
+7. Optional per-tenant directives, chosen by the request's "tenant" metadata
 """
 
+import heapq
+import itertools
 import json
-from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from typing import Callable, Optional
-from uuid import uuid4
-
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, Optional, Union
+
+from admission import AdmissionController, Overloaded
 from core_directive import (
     ActionResult,
     CoreDirective,
     DirectiveEvaluation,
     get_directive,
 )
+from metrics import REQUESTS, STAGE_SECONDS, Counter
+from tenants import TENANT_METADATA_KEY, TenantDirectives
+from tracing import Tracer, get_tracer
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _new_id_source() -> tuple[int, Iterator[int]]:
+    # Random high 64 bits per process, counter in the low 64 bits
+    return random.SystemRandom().getrandbits(64) << 64, itertools.count(1)
+
+
+_id_prefix, _id_sequence = _new_id_source()
+
+
+def _reseed_ids() -> None:
+    # A forked worker must not hand out its parent's IDs
+    global _id_prefix, _id_sequence
+    _id_prefix, _id_sequence = _new_id_source()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed_ids)
+
+
+def next_request_id() -> int:
+    """
+    A new 128-bit request ID.
+
+    IDs are a random per-process prefix plus a counter, so they are unique
+    without calling uuid4(); next() on itertools.count is atomic under the GIL.
+    """
+    return _id_prefix | next(_id_sequence)
+
+
+def format_request_id(value: Union[int, str]) -> str:
+    """Render a 128-bit ID in UUID form; string IDs are returned unchanged."""
+    if isinstance(value, str):
+        return value
+    digits = f"{value & ((1 << 128) - 1):032x}"
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
 
 
-@dataclass
-class GatewayRequest:
-    """Represents an incoming request to the gateway."""
-    id: str
-    content: str
-    source: str
-    timestamp: datetime
-    metadata: dict = field(default_factory=dict)
+def _wall_ns_from(timestamp: Optional[datetime]) -> int:
+    if timestamp is None:
+        return time.time_ns()
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    delta = timestamp - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 10**9 + delta.microseconds * 1000
+
+
+def _datetime_from(wall_ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=wall_ns // 1000)
+
+
+class _Record:
+    """
+    Base for the gateway's slotted record types.
+
+    Subclasses list their public fields in _fields for repr and equality.
+    They keep their wall-clock time in wall_ns (time.time_ns), converted to
+    a datetime only when read, and the time.monotonic_ns they were created
+    at in created_ns, which orders them even when the wall clock steps.
+    """
+
+    __slots__ = ()
+    _fields: tuple[str, ...] = ()
+
+    @property
+    def timestamp(self) -> datetime:
+        """Creation time as a timezone-aware UTC datetime."""
+        return _datetime_from(self.wall_ns)
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None  # Mutable, like the dataclasses these replace
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{self.__class__.__name__}({values})"
+
+
+class GatewayRequest(_Record):
+    """
+    Represents an incoming request to the gateway.
+
+    The ID is kept as a 128-bit integer and rendered as a UUID-style string
+    the first time ``id`` is read; ``metadata`` is created on first access.
+    """
+
+    __slots__ = ("content", "source", "wall_ns", "created_ns", "_id", "_id_text", "_metadata")
+    _fields = ("id", "content", "source", "timestamp", "metadata")
+
+    def __init__(
+        self,
+        id: Union[int, str],
+        content: str,
+        source: str,
+        timestamp: Optional[datetime] = None,
+        metadata: Optional[dict] = None,
+    ):
+        self._id = id
+        self._id_text = id if isinstance(id, str) else None
+        self.content = content
+        self.source = source
+        self.wall_ns = _wall_ns_from(timestamp)
+        self.created_ns = time.monotonic_ns()
+        self._metadata = metadata
 
     @classmethod
     def create(cls, content: str, source: str = "unknown") -> "GatewayRequest":
         """Factory method to create a new request."""
-        return cls(
-            id=str(uuid4()),
-            content=content,
-            source=source,
-            timestamp=datetime.now(timezone.utc),
-        )
+        return cls(next_request_id(), content, source)
+
+    @property
+    def id(self) -> str:
+        text = self._id_text
+        if text is None:
+            text = self._id_text = format_request_id(self._id)
+        return text
+
+    @id.setter
+    def id(self, value: Union[int, str]) -> None:
+        self._id = value
+        self._id_text = value if isinstance(value, str) else None
 
+    @property
+    def metadata(self) -> dict:
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: dict) -> None:
+        self._metadata = value
+
+
+class GatewayResponse(_Record):
+    """
+    Represents an outgoing response from the gateway.
+
+    status_code is 429 and retry_after is set when admission control
+    refused the request.
+    """
+
+    __slots__ = (
+        "_request_id", "content", "evaluation", "processed", "wall_ns", "created_ns", "route",
+        "status_code", "retry_after",
+    )
+    _fields = (
+        "request_id", "content", "evaluation", "processed", "timestamp", "route",
+        "status_code", "retry_after",
+    )
+
+    def __init__(
+        self,
+        request_id: Union[int, str],
+        content: str,
+        evaluation: DirectiveEvaluation,
+        processed: bool,
+        timestamp: Optional[datetime] = None,
+        route: str = "default",
+        status_code: int = 200,
+        retry_after: Optional[int] = None,
+    ):
+        self._request_id = request_id
+        self.content = content
+        self.evaluation = evaluation
+        self.processed = processed
+        self.wall_ns = _wall_ns_from(timestamp)
+        self.created_ns = time.monotonic_ns()
+        self.route = route
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def request_id(self) -> str:
+        return format_request_id(self._request_id)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """HTTP headers to send with the response."""
+        if self.retry_after is None:
+            return {}
+        return {"Retry-After": str(self.retry_after)}
 
-@dataclass
-class GatewayResponse:
-    """Represents an outgoing response from the gateway."""
-    request_id: str
-    content: str
-    evaluation: DirectiveEvaluation
-    processed: bool
-    timestamp: datetime
-    route: str = "default"
 
+class AuditEntry(_Record):
+    """Represents an audit log entry, with the directive version applied."""
 
-@dataclass
-class AuditEntry:
-    """Represents an audit log entry."""
-    request_id: str
-    timestamp: datetime
-    action: str
-    result: ActionResult
-    source: str
-    details: str
+    __slots__ = (
+        "_request_id", "wall_ns", "created_ns", "action", "result", "source", "details",
+        "directive_version",
+    )
+    _fields = (
+        "request_id", "timestamp", "action", "result", "source", "details",
+        "directive_version",
+    )
+
+    def __init__(
+        self,
+        request_id: Union[int, str],
+        timestamp: Optional[datetime],
+        action: str,
+        result: ActionResult,
+        source: str,
+        details: str,
+        directive_version: Optional[str] = None,
+    ):
+        self._request_id = request_id
+        self.wall_ns = _wall_ns_from(timestamp)
+        self.created_ns = time.monotonic_ns()
+        self.action = action
+        self.result = result
+        self.source = source
+        self.details = details
+        self.directive_version = directive_version
+
+    @property
+    def request_id(self) -> str:
+        return format_request_id(self._request_id)
+
+
+class AuditBuffer:
+    """
+    Append-only audit log written by many threads without a shared lock.
+
+    Each thread appends to its own shard, so producers never contend; a
+    lock is taken only when a thread registers its shard. Readers merge
+    the shards by creation time. Shards are plain lists owned by one
+    writer, which is safe with or without the GIL. When a thread registers,
+    the shards of threads that have exited are merged into one, so thread
+    churn does not pile shards up.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        # (owning thread, or None once merged, entries)
+        self._shards: list[tuple[Optional[threading.Thread], list[AuditEntry]]] = []
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def append(self, entry: AuditEntry) -> None:
+        try:
+            generation, shard = self._local.slot
+        except AttributeError:
+            generation, shard = -1, None
+        while True:
+            if generation != self._generation:
+                generation, shard = self._new_shard()
+            shard.append(entry)
+            # clear() bumps the generation before dropping the shards, so
+            # an unchanged generation means the entry is still held
+            if generation == self._generation:
+                return
+
+    def _new_shard(self) -> tuple[int, list[AuditEntry]]:
+        shard: list[AuditEntry] = []
+        owner = threading.current_thread()
+        with self._lock:
+            finished, live = [], []
+            for thread, entries in self._shards:
+                if thread is None or not thread.is_alive():
+                    finished.append(entries)
+                else:
+                    live.append((thread, entries))
+            if len(finished) > 1:
+                finished = [list(heapq.merge(*finished, key=lambda entry: entry.created_ns))]
+            live[:0] = [(None, entries) for entries in finished]
+            live.append((owner, shard))
+            self._shards = live
+            self._local.slot = (self._generation, shard)
+            return self._generation, shard
+
+    def entries(self) -> list[AuditEntry]:
+        """All entries, oldest first."""
+        with self._lock:
+            shards = [entries.copy() for _, entries in self._shards]
+        if len(shards) == 1:
+            return shards[0]
+        return list(heapq.merge(*shards, key=lambda entry: entry.created_ns))
+
+    def clear(self) -> None:
+        # Threads notice the new generation and register fresh shards
+        with self._lock:
+            self._generation += 1
+            self._shards = []
+
+    def __len__(self) -> int:
+        with self._lock:
+            shards = [entries for _, entries in self._shards]
+        return sum(len(shard) for shard in shards)
 
 
 Middleware = Callable[[GatewayRequest], Optional[GatewayRequest]]
 
+# Metric children resolved once so recording stays cheap
+_MIDDLEWARE_SECONDS = STAGE_SECONDS.labels("gateway", "middleware")
+_EVALUATION_SECONDS = STAGE_SECONDS.labels("gateway", "evaluation")
+_MIDDLEWARE_BLOCKED = REQUESTS.labels("gateway", "middleware_block")
+_OVERLOADED = REQUESTS.labels("gateway", "overloaded")
+_RESULT_COUNTERS = {result: REQUESTS.labels("gateway", result.value) for result in ActionResult}
+
 
 class GovernanceGateway:
     """
@@ -83,12 +355,17 @@ class GovernanceGateway:
     - Middleware support for extensibility
     - Audit logging for transparency
     - Multi-route handling
+    - Adaptive concurrency limiting, when given an AdmissionController
+    - Per-tenant directives, when given TenantDirectives
     """
 
     def __init__(
         self,
         directive: Optional[CoreDirective] = None,
         enable_audit: bool = True,
+        tracer: Optional[Tracer] = None,
+        admission: Optional[AdmissionController] = None,
+        tenants: Optional[TenantDirectives] = None,
     ):
         """
         Initialize the governance gateway.
@@ -96,41 +373,61 @@ class GovernanceGateway:
         Args:
             directive: CoreDirective instance (uses default if not provided)
             enable_audit: Whether to enable audit logging
+            tracer: Tracer for request spans (uses the global one if not provided)
+            admission: Admission controller limiting concurrent requests
+                (no limit if not provided)
+            tenants: Tenant bundles; a request whose metadata names a
+                tenant with a bundle is evaluated under that tenant's
+                directive
         """
-        self._directive = directive or get_directive()
+        # Without an explicit directive, each request uses the default one
+        # current when it arrives, so reloads apply without a restart
+        self._directive = directive
         self._enable_audit = enable_audit
+        self._tracer = tracer
+        self._admission = admission
+        self._tenants = tenants
         self._middleware: list[Middleware] = []
-        self._audit_log: list[AuditEntry] = []
+        self._audit_log = AuditBuffer()
         self._routes: dict[str, Callable[[GatewayRequest], str]] = {}
-        self._request_count = 0
+        self._request_count = Counter()
+        # Blocked or reviewed requests in the audit log, and the count when it was last cleared
+        self._blocked = Counter()
+        self._blocked_at_clear = 0
 
         # Register default route
         self._routes["default"] = self._default_handler
 
+    @property
+    def admission(self) -> Optional[AdmissionController]:
+        """Return the admission controller, if any."""
+        return self._admission
+
     @property
     def directive(self) -> CoreDirective:
         """Return the governing directive."""
-        return self._directive
+        return self._directive or get_directive()
 
     @property
     def audit_log(self) -> list[AuditEntry]:
         """Return the audit log."""
-        return self._audit_log.copy()
+        return self._audit_log.entries()
 
     @property
     def stats(self) -> dict:
         """Return gateway statistics."""
-        blocked = sum(
-            1 for entry in self._audit_log
-            if entry.result in (ActionResult.BLOCKED, ActionResult.REVIEW)
-        )
-        return {
-            "total_requests": self._request_count,
+        total = self._request_count.value
+        blocked = self._blocked.value - self._blocked_at_clear
+        stats = {
+            "total_requests": total,
             "blocked_or_reviewed": blocked,
-            "passed": self._request_count - blocked,
+            "passed": total - blocked,
             "middleware_count": len(self._middleware),
             "route_count": len(self._routes),
         }
+        if self._admission is not None:
+            stats.update(self._admission.stats())
+        return stats
 
     def add_middleware(self, middleware: Middleware) -> None:
         """
@@ -167,55 +464,134 @@ class GovernanceGateway:
             route: The route to use for handling
 
         Returns:
-            GatewayResponse with the result
+            GatewayResponse with the result; with admission control, a 429
+            response when the gateway is at its concurrency limit
         """
-        self._request_count += 1
+        self._request_count.inc()
+        directive = self._directive_for(request)
+        admission = self._admission
+        if admission is None:
+            return self._process(request, route, directive)
+
+        try:
+            started = admission.acquire(request.source)
+        except Overloaded as exc:
+            return self._overloaded_response(request, route, directive, exc)
+        ok = False
+        try:
+            response = self._process(request, route, directive)
+            ok = True
+            return response
+        finally:
+            admission.release(started, ok)
+
+    def _directive_for(self, request: GatewayRequest) -> CoreDirective:
+        """The directive a request is evaluated under."""
+        metadata = request._metadata
+        if self._tenants is not None and metadata:
+            tenant = metadata.get(TENANT_METADATA_KEY)
+            bundle = self._tenants.get(tenant) if tenant else None
+            if bundle is not None:
+                return bundle.directive
+        return self._directive or get_directive()
+
+    def _process(
+        self,
+        request: GatewayRequest,
+        route: str,
+        directive: CoreDirective,
+    ) -> GatewayResponse:
+        """Process an admitted request."""
+        tracer = self._tracer or get_tracer()
+        trace = tracer.start_trace(request._id, "gateway.process", source=request.source, route=route)
 
         # Apply middleware
+        started = time.perf_counter_ns()
         processed_request = request
         for middleware in self._middleware:
             result = middleware(processed_request)
             if result is None:
                 # Middleware rejected the request
+                rejected = time.perf_counter_ns()
+                _MIDDLEWARE_SECONDS.observe_ns(rejected - started)
+                _MIDDLEWARE_BLOCKED.inc()
+                if trace is not None:
+                    trace.add_span("middleware", started, rejected, blocked=True)
+                    tracer.finish(trace)
                 evaluation = DirectiveEvaluation(
                     result=ActionResult.BLOCKED,
                     reason="Request blocked by middleware",
                     confidence=1.0,
                 )
-                self._log_audit(request, "middleware_block", evaluation.result)
+                self._log_audit(request, "middleware_block", evaluation.result, directive)
                 return GatewayResponse(
-                    request_id=request.id,
-                    content="Request blocked by gateway middleware",
-                    evaluation=evaluation,
-                    processed=False,
-                    timestamp=datetime.now(timezone.utc),
+                    request._id,
+                    "Request blocked by gateway middleware",
+                    evaluation,
+                    False,
                     route=route,
                 )
             processed_request = result
+        evaluated = time.perf_counter_ns()
+        _MIDDLEWARE_SECONDS.observe_ns(evaluated - started)
 
         # Evaluate against Core Directive
-        evaluation = self._directive.evaluate_intent(processed_request.content)
+        evaluation = directive.evaluate_intent(processed_request.content)
+        handled = time.perf_counter_ns()
+        _EVALUATION_SECONDS.observe_ns(handled - evaluated)
+        _RESULT_COUNTERS[evaluation.result].inc()
 
         # Handle based on evaluation result
         if evaluation.result == ActionResult.BLOCKED:
-            self._log_audit(request, "directive_block", evaluation.result)
+            self._log_audit(request, "directive_block", evaluation.result, directive)
             content = self._generate_blocked_content(evaluation)
         elif evaluation.result == ActionResult.REVIEW:
-            self._log_audit(request, "directive_review", evaluation.result)
+            self._log_audit(request, "directive_review", evaluation.result, directive)
             content = self._generate_review_content(evaluation, processed_request)
         else:
-            self._log_audit(request, "directive_allow", evaluation.result)
+            self._log_audit(request, "directive_allow", evaluation.result, directive)
             # Route to handler
             handler = self._routes.get(route, self._default_handler)
             content = handler(processed_request)
 
+        if trace is not None:
+            trace.add_span("middleware", started, evaluated, count=len(self._middleware))
+            trace.add_span("directive.evaluate", evaluated, handled, result=evaluation.result.value)
+            trace.add_span("route.handler", handled, time.perf_counter_ns(), route=route)
+            tracer.finish(trace)
+
+        return GatewayResponse(
+            request._id,
+            content,
+            evaluation,
+            evaluation.result == ActionResult.ALLOWED,
+            route=route,
+        )
+
+    def _overloaded_response(
+        self,
+        request: GatewayRequest,
+        route: str,
+        directive: CoreDirective,
+        exc: Overloaded,
+    ) -> GatewayResponse:
+        """Refuse a request that admission control did not let in."""
+        _OVERLOADED.inc()
+        evaluation = DirectiveEvaluation(
+            result=ActionResult.BLOCKED,
+            reason=str(exc),
+            alternative=f"Retry after {exc.retry_after} seconds",
+            confidence=1.0,
+        )
+        self._log_audit(request, "admission_reject", evaluation.result, directive)
         return GatewayResponse(
-            request_id=request.id,
-            content=content,
-            evaluation=evaluation,
-            processed=evaluation.result == ActionResult.ALLOWED,
-            timestamp=datetime.now(timezone.utc),
+            request._id,
+            f"Request refused: {exc}",
+            evaluation,
+            False,
             route=route,
+            status_code=exc.status_code,
+            retry_after=exc.retry_after,
         )
 
     def _default_handler(self, request: GatewayRequest) -> str:
@@ -247,20 +623,20 @@ class GovernanceGateway:
         request: GatewayRequest,
         action: str,
         result: ActionResult,
+        directive: CoreDirective,
     ) -> None:
         """Log an audit entry."""
         if not self._enable_audit:
             return
 
+        # Slicing a string of 200 characters or fewer returns it uncopied
         entry = AuditEntry(
-            request_id=request.id,
-            timestamp=datetime.now(timezone.utc),
-            action=action,
-            result=result,
-            source=request.source,
-            details=request.content[:200],
+            request._id, None, action, result, request.source, request.content[:200],
+            getattr(directive, "version", None),
         )
         self._audit_log.append(entry)
+        if result is ActionResult.BLOCKED or result is ActionResult.REVIEW:
+            self._blocked.inc()
 
     def export_audit_log(self) -> str:
         """Export the audit log as JSON."""
@@ -272,18 +648,20 @@ class GovernanceGateway:
                 "result": e.result.value,
                 "source": e.source,
                 "details": e.details,
+                "directive_version": e.directive_version,
             }
-            for e in self._audit_log
+            for e in self._audit_log.entries()
         ]
         return json.dumps(entries, indent=2)
 
     def clear_audit_log(self) -> None:
         """Clear the audit log."""
+        self._blocked_at_clear = self._blocked.value
         self._audit_log.clear()
 
     def __repr__(self) -> str:
         return (
-            f"GovernanceGateway(requests={self._request_count}, "
+            f"GovernanceGateway(requests={self._request_count.value}, "
             f"routes={len(self._routes)})"
         )
 
@@ -291,6 +669,9 @@ class GovernanceGateway:
 def create_gateway(
     directive: Optional[CoreDirective] = None,
     enable_audit: bool = True,
+    tracer: Optional[Tracer] = None,
+    admission: Optional[AdmissionController] = None,
+    tenants: Optional[TenantDirectives] = None,
 ) -> GovernanceGateway:
     """
     Factory function to create a governance gateway.
@@ -298,11 +679,17 @@ def create_gateway(
     Args:
         directive: Optional CoreDirective instance
         enable_audit: Whether to enable audit logging
+        tracer: Optional Tracer for request spans
+        admission: Optional AdmissionController limiting concurrency
+        tenants: Optional TenantDirectives for per-tenant directives
 
     Returns:
         Configured GovernanceGateway instance
     """
-    return GovernanceGateway(directive=directive, enable_audit=enable_audit)
+    return GovernanceGateway(
+        directive=directive, enable_audit=enable_audit, tracer=tracer, admission=admission,
+        tenants=tenants,
+    )
 
 
 # Example middleware functions
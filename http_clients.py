@@ -0,0 +1,388 @@
+"""
+HTTP Clients Module - Pooled, Multiplexed Upstream Connections
+
+Every upstream client in this package (the chat app's forwarder, the
+gateway app's OpenAI client, the upstream pool's backends and
+initialize_ai) is built here, so they share one connection policy:
+
+- HTTP/2 where the upstream offers it. Over https the protocol is
+  negotiated with ALPN, and one connection then carries many concurrent
+  requests instead of one each. Needs the h2 package; without it, clients
+  fall back to HTTP/1.1 keep-alive. Only asynchronous clients use it by
+  default: httpcore's synchronous HTTP/2 connection picks stream IDs
+  outside its locks, so threads sharing it can open streams out of order,
+  which a server rejects. Synchronous clients keep HTTP/1.1 keep-alive.
+- Bounded pools. Each client talks to one host, so its connection limits
+  are per host; idle connections are kept for reuse until the keep-alive
+  expiry.
+- DNS caching. A host's addresses are resolved once per TTL rather than
+  for every new connection. If no cached address accepts a connection,
+  the entry is dropped and the next attempt resolves the name again.
+
+Configuration (environment):
+    UPSTREAM_HTTP2              for asynchronous clients:
+                                1 (default): HTTP/2 on https where offered;
+                                h2c: HTTP/2 only, with prior knowledge, also
+                                on plain http (e.g. a local sidecar);
+                                0: HTTP/1.1 only
+    UPSTREAM_KEEPALIVE_SECONDS  how long an idle connection is kept (default 30)
+    UPSTREAM_DNS_TTL            seconds resolved addresses are reused
+                                (default 60, 0 = resolve every time)
+"""
+
+import importlib.util
+import ipaddress
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpcore
+import httpx
+
+from metrics import UPSTREAM_CONNECTIONS, Counter
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_SECONDS = 30.0
+DEFAULT_DNS_TTL = 60.0
+
+
+class DNSCache:
+    """Resolved addresses per (host, port), reused for ttl seconds."""
+
+    def __init__(self, ttl: float = DEFAULT_DNS_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.lookups = Counter()
+        self.hits = Counter()
+
+    def caches(self, host: str) -> bool:
+        """Whether host is a name worth caching (not an address literal)."""
+        if self.ttl <= 0:
+            return False
+        try:
+            ipaddress.ip_address(host)
+        except ValueError:
+            return True
+        return False
+
+    def get(self, host: str, port: int) -> Optional[List[str]]:
+        entry = self._entries.get((host, port))
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits.inc()
+            return entry[1]
+        return None
+
+    def put(self, host: str, port: int, infos: List[Any]) -> List[str]:
+        """Store getaddrinfo results; returns their addresses, in order."""
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self.lookups.inc()
+        with self._lock:
+            self._entries[(host, port)] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        addresses = self.get(host, port)
+        if addresses is None:
+            addresses = self.put(host, port, socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+        return addresses
+
+    def forget(self, host: str, port: int) -> None:
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def stats(self) -> dict:
+        return {"dns_lookups": self.lookups.value, "dns_hits": self.hits.value}
+
+
+_dns = DNSCache(float(os.environ.get("UPSTREAM_DNS_TTL", DEFAULT_DNS_TTL)))
+
+
+class _CachingBackend(httpcore.NetworkBackend):
+    """httpcore's socket backend, connecting to cached addresses."""
+
+    def __init__(self, dns: DNSCache):
+        self._dns = dns
+        self._backend = httpcore.SyncBackend()
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        UPSTREAM_CONNECTIONS.labels(host).inc()
+        if not self._dns.caches(host):
+            return self._backend.connect_tcp(host, port, timeout, local_address, socket_options)
+        try:
+            addresses = self._dns.resolve(host, port)
+        except OSError as exc:
+            raise httpcore.ConnectError(exc) from exc
+        # TLS still verifies and sends SNI for host: httpcore takes both
+        # from the request's origin, not from the address connected to
+        for address in addresses[:-1]:
+            try:
+                return self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError:
+                pass
+        try:
+            return self._backend.connect_tcp(addresses[-1], port, timeout, local_address, socket_options)
+        except httpcore.ConnectError:
+            self._dns.forget(host, port)
+            raise
+
+    def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    def sleep(self, seconds: float) -> None:
+        self._backend.sleep(seconds)
+
+
+class _AsyncCachingBackend(httpcore.AsyncNetworkBackend):
+    """The asynchronous counterpart of _CachingBackend."""
+
+    def __init__(self, dns: DNSCache):
+        self._dns = dns
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        UPSTREAM_CONNECTIONS.labels(host).inc()
+        connect = self._backend.connect_tcp
+        if not self._dns.caches(host):
+            return await connect(host, port, timeout, local_address, socket_options)
+        addresses = self._dns.get(host, port)
+        if addresses is None:
+            import anyio
+
+            try:
+                infos = await anyio.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            except OSError as exc:
+                raise httpcore.ConnectError(exc) from exc
+            addresses = self._dns.put(host, port, infos)
+        for address in addresses[:-1]:
+            try:
+                return await connect(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError:
+                pass
+        try:
+            return await connect(addresses[-1], port, timeout, local_address, socket_options)
+        except httpcore.ConnectError:
+            self._dns.forget(host, port)
+            raise
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+# httpcore errors and the httpx errors clients expect in their place
+_HTTPX_ERRORS = {
+    httpcore.TimeoutException: httpx.TimeoutException,
+    httpcore.ConnectTimeout: httpx.ConnectTimeout,
+    httpcore.ReadTimeout: httpx.ReadTimeout,
+    httpcore.WriteTimeout: httpx.WriteTimeout,
+    httpcore.PoolTimeout: httpx.PoolTimeout,
+    httpcore.NetworkError: httpx.NetworkError,
+    httpcore.ConnectError: httpx.ConnectError,
+    httpcore.ReadError: httpx.ReadError,
+    httpcore.WriteError: httpx.WriteError,
+    httpcore.ProxyError: httpx.ProxyError,
+    httpcore.UnsupportedProtocol: httpx.UnsupportedProtocol,
+    httpcore.ProtocolError: httpx.ProtocolError,
+    httpcore.LocalProtocolError: httpx.LocalProtocolError,
+    httpcore.RemoteProtocolError: httpx.RemoteProtocolError,
+}
+
+
+@contextmanager
+def _httpx_errors() -> Iterator[None]:
+    """Re-raise httpcore errors as the matching httpx errors."""
+    try:
+        yield
+    except Exception as exc:
+        for cls in type(exc).__mro__:  # Most specific first
+            mapped = _HTTPX_ERRORS.get(cls)
+            if mapped is not None:
+                raise mapped(str(exc)) from exc
+        raise
+
+
+def _core_request(request: httpx.Request) -> httpcore.Request:
+    return httpcore.Request(
+        method=request.method,
+        url=httpcore.URL(
+            scheme=request.url.raw_scheme,
+            host=request.url.raw_host,
+            port=request.url.port,
+            target=request.url.raw_path,
+        ),
+        headers=request.headers.raw,
+        content=request.stream,
+        extensions=request.extensions,
+    )
+
+
+class _ResponseStream(httpx.SyncByteStream):
+    def __init__(self, stream: Any):
+        self._stream = stream
+
+    def __iter__(self) -> Iterator[bytes]:
+        with _httpx_errors():
+            for part in self._stream:
+                yield part
+
+    def close(self) -> None:
+        if hasattr(self._stream, "close"):
+            self._stream.close()
+
+
+class _AsyncResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream: Any):
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors():
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class _Transport(httpx.BaseTransport):
+    """
+    httpx transport over an httpcore connection pool given our backend.
+
+    httpx.HTTPTransport has no option for the network backend, so the pool
+    is built here, through httpcore's and httpx's public APIs only.
+    """
+
+    def __init__(self, http1: bool, http2: bool, limits: httpx.Limits):
+        self._pool = httpcore.ConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=http1,
+            http2=http2,
+            network_backend=_CachingBackend(_dns),
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with _httpx_errors():
+            response = self._pool.handle_request(_core_request(request))
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+class _AsyncTransport(httpx.AsyncBaseTransport):
+    """The asynchronous counterpart of _Transport."""
+
+    def __init__(self, http1: bool, http2: bool, limits: httpx.Limits):
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=http1,
+            http2=http2,
+            network_backend=_AsyncCachingBackend(_dns),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with _httpx_errors():
+            response = await self._pool.handle_async_request(_core_request(request))
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_AsyncResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+_warned_h2 = False
+
+
+def protocols(mode: Optional[str] = None) -> Tuple[bool, bool]:
+    """
+    (http1, http2) for a UPSTREAM_HTTP2 mode, by default the configured one.
+
+    HTTP/2 is dropped, with a warning, when the h2 package is missing.
+    """
+    global _warned_h2
+    mode = (mode if mode is not None else os.environ.get("UPSTREAM_HTTP2", "1")).lower()
+    if mode in ("0", "false", "no", "off"):
+        return True, False
+    if importlib.util.find_spec("h2") is None:
+        if not _warned_h2:
+            _warned_h2 = True
+            print("[http] the h2 package is not installed; upstreams use HTTP/1.1",
+                  file=sys.stderr, flush=True)
+        return True, False
+    return mode != "h2c", True
+
+
+def _limits(max_connections: int, max_keepalive_connections: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=float(
+            os.environ.get("UPSTREAM_KEEPALIVE_SECONDS", DEFAULT_KEEPALIVE_SECONDS)
+        ),
+    )
+
+
+def create_http_client(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    http2: Optional[str] = "0",
+    **kwargs: Any,
+) -> httpx.Client:
+    """
+    An httpx.Client with this module's connection policy.
+
+    Args:
+        max_connections: Connections open at once (per host: one host per client)
+        max_keepalive_connections: Idle connections kept for reuse
+        http2: A UPSTREAM_HTTP2 mode; HTTP/1.1 by default, since an HTTP/2
+            client is only safe to use from one thread (None: the environment's)
+        **kwargs: Passed to httpx.Client (e.g. base_url, timeout)
+    """
+    http1, use_http2 = protocols(http2)
+    transport = _Transport(http1, use_http2, _limits(max_connections, max_keepalive_connections))
+    return httpx.Client(transport=transport, **kwargs)
+
+
+def create_async_http_client(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    http2: Optional[str] = None,
+    **kwargs: Any,
+) -> httpx.AsyncClient:
+    """
+    An httpx.AsyncClient with this module's connection policy.
+
+    Arguments are as for create_http_client, except that http2 defaults to
+    the UPSTREAM_HTTP2 mode.
+    """
+    http1, use_http2 = protocols(http2)
+    transport = _AsyncTransport(http1, use_http2, _limits(max_connections, max_keepalive_connections))
+    return httpx.AsyncClient(transport=transport, **kwargs)
+
+
+def get_dns_cache() -> DNSCache:
+    """The process-wide DNS cache shared by every client built here."""
+    return _dns
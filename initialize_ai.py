@@ -1,6 +1,9 @@
 import os
 from openai import OpenAI
 
+import http_clients
+import upstreams
+
 # Initialize the OpenAI client lazily
 _client = None
 
@@ -19,7 +22,7 @@ def _get_client():
                 "OPENAI_API_KEY environment variable must be set. "
                 "Get your API key from https://platform.openai.com/api-keys"
             )
-        _client = OpenAI(api_key=api_key)
+        _client = OpenAI(api_key=api_key, http_client=http_clients.create_http_client())
     return _client
 
 # Initialize the AI
@@ -39,8 +42,10 @@ def initialize_ai(prompt, model="gpt-4", temperature=0.7, max_tokens=150):
     Note:
         Requires OPENAI_API_KEY environment variable to be set
     """
-    client = _get_client()
-    response = client.chat.completions.create(
+    # Spread calls over the upstream pool when UPSTREAM_URLS is set
+    pool = upstreams.get_pool()
+    create = pool.chat_completion if pool is not None else _get_client().chat.completions.create
+    response = create(
         model=model,
         messages=[
             {"role": "system", "content": "You are an AI that upholds and protects the inalienable right to the pursuit of happiness. Every response and action must support this principle. Encourage users to live their lives freely while respecting others' rights to do the same. Act as a custodian of humanity."},
@@ -0,0 +1,385 @@
+"""
+Metrics Module - Low-Overhead Instrumentation
+
+This module provides counters and latency histograms for the governance
+layer, rendered in the Prometheus text exposition format for ``/metrics``.
+
+Recording is lock-free: every thread increments its own cells, and the cells
+of all threads are only summed when the metrics are collected. When a thread
+exits, its cells are folded into a base value and dropped, so threads that
+come and go do not leave cells behind. Histograms
+use HDR-style log-linear buckets (eight sub-buckets per power of two, so any
+recorded duration is known to within 12.5%) indexed with integer bit
+arithmetic on nanoseconds. They are folded into a fixed set of ``le``
+boundaries on export.
+
+Stages timed by the governance layer:
+- middleware: gateway middleware chain
+- evaluation: Core Directive evaluation
+- upstream: AI model or upstream API call
+- serialization: encoding the HTTP response body
+"""
+
+import threading
+import weakref
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HDR bucket layout: values below 2**(SUB_BITS + 1) ns get a bucket each,
+# above that every power of two is split into 2**SUB_BITS linear buckets
+SUB_BITS = 3
+MAX_NS = 2 ** 40  # ~18 minutes; longer durations land in the last bucket
+NUM_BUCKETS = ((MAX_NS.bit_length() - SUB_BITS - 1) << SUB_BITS) + (1 << SUB_BITS)
+
+# Exported histogram boundaries, in seconds
+DEFAULT_BOUNDS = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def bucket_index(ns: int) -> int:
+    """HDR bucket of a duration in nanoseconds."""
+    if ns >= MAX_NS:
+        ns = MAX_NS - 1
+    shift = ns.bit_length() - SUB_BITS - 1
+    if shift <= 0:
+        return ns
+    return (shift << SUB_BITS) + (ns >> shift)
+
+
+def bucket_upper_ns(index: int) -> int:
+    """Largest duration in nanoseconds that falls in a bucket."""
+    if index < 2 << SUB_BITS:
+        return index
+    shift = (index >> SUB_BITS) - 1
+    mantissa = index - (shift << SUB_BITS)
+    return ((mantissa + 1) << shift) - 1
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Owner:
+    """Kept in a thread's locals only; it is freed when the thread exits."""
+    __slots__ = ("__weakref__",)
+
+
+def _adopt(
+    local: threading.local,
+    lock: threading.Lock,
+    cells: List[List[int]],
+    base: List[int],
+    cell: List[int],
+) -> None:
+    """Register a thread's cell, to be folded into base when the thread exits."""
+    owner = _Owner()
+    # The finalizer must not reference the metric, or it would keep it alive
+    weakref.finalize(owner, _retire, lock, cells, base, cell)
+    with lock:
+        cells.append(cell)
+    local.owner = owner
+
+
+def _retire(lock: threading.Lock, cells: List[List[int]], base: List[int], cell: List[int]) -> None:
+    with lock:
+        for i, n in enumerate(cell):
+            base[i] += n
+        for i, other in enumerate(cells):
+            if other is cell:  # By identity: cells with equal counts compare equal
+                del cells[i]
+                break
+
+
+class Counter:
+    """Monotonic counter with one cell per recording thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cells: List[List[int]] = []
+        self._base = [0]  # Counts of threads that have exited
+        self._lock = threading.Lock()
+        # A closure over locals is markedly cheaper to call than a method
+        self.inc = self._make_inc()
+
+    def _make_inc(self):
+        local = self._local
+        new_cell = self._new_cell
+
+        def inc(amount: int = 1) -> None:
+            """Add to the counter."""
+            try:
+                local.cell[0] += amount
+            except AttributeError:
+                new_cell()[0] += amount
+
+        return inc
+
+    def _new_cell(self) -> List[int]:
+        cell = [0]
+        _adopt(self._local, self._lock, self._cells, self._base, cell)
+        self._local.cell = cell
+        return cell
+
+    @property
+    def value(self) -> int:
+        """Sum over all threads."""
+        with self._lock:
+            return self._base[0] + sum(cell[0] for cell in self._cells)
+
+
+class Histogram:
+    """Latency histogram with HDR buckets and one bucket array per thread."""
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.bounds = tuple(bounds)
+        self._local = threading.local()
+        self._cells: List[List[int]] = []
+        self._base = [0] * (NUM_BUCKETS + 1)  # Counts of threads that have exited
+        self._lock = threading.Lock()
+        self.observe_ns = self._make_observe_ns()
+
+    def _make_observe_ns(self):
+        local = self._local
+        new_cells = self._new_cells
+        max_ns = MAX_NS
+        sum_slot = NUM_BUCKETS
+        sub_bits = SUB_BITS
+        linear_bits = SUB_BITS + 1
+
+        def observe_ns(ns: int) -> None:
+            """Record a duration in nanoseconds (e.g. from time.perf_counter_ns)."""
+            try:
+                cells = local.cells
+            except AttributeError:
+                cells = new_cells()
+            if ns >= max_ns:
+                ns = max_ns - 1
+            cells[sum_slot] += ns
+            shift = ns.bit_length() - linear_bits
+            if shift <= 0:
+                cells[ns] += 1
+            else:
+                cells[(shift << sub_bits) + (ns >> shift)] += 1
+
+        return observe_ns
+
+    def observe(self, seconds: float) -> None:
+        """Record a duration in seconds."""
+        self.observe_ns(max(0, int(seconds * 1e9)))
+
+    def _new_cells(self) -> List[int]:
+        cells = [0] * (NUM_BUCKETS + 1)  # Buckets, then the sum in ns
+        _adopt(self._local, self._lock, self._cells, self._base, cells)
+        self._local.cells = cells
+        return cells
+
+    def snapshot(self) -> Tuple[List[int], int]:
+        """Bucket counts and the sum in nanoseconds, over all threads."""
+        with self._lock:
+            # Copied under the lock, so an exiting thread is counted exactly once
+            rows = [self._base[:]] + [cells[:] for cells in self._cells]
+        counts = [0] * NUM_BUCKETS
+        total_ns = 0
+        for row in rows:
+            for i in range(NUM_BUCKETS):
+                counts[i] += row[i]
+            total_ns += row[NUM_BUCKETS]
+        return counts, total_ns
+
+    @property
+    def count(self) -> int:
+        return sum(self.snapshot()[0])
+
+    def quantile(self, q: float) -> float:
+        """Upper bound in seconds of the bucket holding quantile q."""
+        counts, _ = self.snapshot()
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = max(1, int(q * total + 0.5))
+        seen = 0
+        for index, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return bucket_upper_ns(index) / 1e9
+        return bucket_upper_ns(NUM_BUCKETS - 1) / 1e9
+
+    def cumulative(self) -> Tuple[List[int], int, int]:
+        """Cumulative counts per exported bound, total count and sum in ns."""
+        counts, total_ns = self.snapshot()
+        bounds_ns = [bound * 1e9 for bound in self.bounds]
+        per_bound = [0] * len(bounds_ns)
+        slot = 0
+        for index, n in enumerate(counts):
+            if not n:
+                continue
+            upper = bucket_upper_ns(index)
+            while slot < len(bounds_ns) and upper > bounds_ns[slot]:
+                slot += 1
+            if slot < len(bounds_ns):
+                per_bound[slot] += n
+        running = 0
+        for i, n in enumerate(per_bound):
+            running += n
+            per_bound[i] = running
+        return per_bound, sum(counts), total_ns
+
+
+class MetricFamily:
+    """A named metric and its children, one per combination of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: Sequence[str] = (),
+        bounds: Sequence[float] = DEFAULT_BOUNDS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._bounds = tuple(bounds)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """
+        Return the child for these label values, creating it once.
+
+        Look children up outside hot loops and keep the reference: recording
+        on the child is the cheap part.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = Counter() if self.kind == "counter" else Histogram(self._bounds)
+                    self._children[values] = child
+        return child
+
+    def children(self) -> Iterator[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            items = list(self._children.items())
+        return iter(sorted(items))
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for values, child in self.children():
+            if self.kind == "counter":
+                lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {child.value}")
+                continue
+            cumulative, count, total_ns = child.cumulative()
+            for bound, n in zip(child.bounds, cumulative):
+                le = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {n}")
+            le = _format_labels(self.labelnames, values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {count}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total_ns / 1e9)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        with self._lock:
+            existing = self._families.get(family.name)
+            if existing is not None:
+                if existing.kind != family.kind or existing.labelnames != family.labelnames:
+                    raise ValueError(f"metric {family.name} already registered differently")
+                return existing
+            self._families[family.name] = family
+            return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Register (or return the existing) counter family."""
+        return self._register(MetricFamily(name, documentation, "counter", labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        bounds: Sequence[float] = DEFAULT_BOUNDS,
+    ) -> MetricFamily:
+        """Register (or return the existing) histogram family."""
+        return self._register(MetricFamily(name, documentation, "histogram", labelnames, bounds))
+
+    def get(self, name: str) -> Optional[MetricFamily]:
+        return self._families.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            families = sorted(self._families.values(), key=lambda f: f.name)
+        lines: List[str] = []
+        for family in families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry instance
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _registry
+
+
+REQUESTS = _registry.counter(
+    "governance_requests_total",
+    "Requests handled by the governance layer, by component and outcome.",
+    ("component", "result"),
+)
+STAGE_SECONDS = _registry.histogram(
+    "governance_stage_duration_seconds",
+    "Time spent in each request processing stage.",
+    ("component", "stage"),
+)
+UPSTREAM_REQUESTS = _registry.counter(
+    "governance_upstream_requests_total",
+    "Requests sent to each upstream backend, by outcome.",
+    ("backend", "result"),
+)
+UPSTREAM_CONNECTIONS = _registry.counter(
+    "governance_upstream_connections_total",
+    "Connections opened to each upstream host.",
+    ("host",),
+)
+
+
+def render() -> str:
+    """Render the process-wide registry for a /metrics endpoint."""
+    return _registry.render()
@@ -0,0 +1,271 @@
+"""
+Profiler Module - On-Demand Sampling Profiler
+
+This module profiles a running process without restarting it under a
+profiler. A background thread periodically snapshots the stack of every
+other thread with ``sys._current_frames()`` and counts identical stacks.
+The result is written in the collapsed format used by flamegraph.pl and
+speedscope (one ``frame;frame;frame count`` line per distinct stack).
+
+Overhead is bounded in three ways:
+- the sampling interval has a floor (MIN_INTERVAL)
+- the sampler backs off so time spent sampling stays below max_overhead
+  of wall time, however deep or numerous the stacks are
+- at most max_stacks distinct stacks are kept; further new stacks are
+  counted under a single "[other]" entry
+
+Profiles are started from the FastAPI apps' admin endpoint, which is only
+enabled when ADMIN_TOKEN is set, or by sending SIGUSR2 to a worker started
+by serve.py.
+
+Configuration (environment):
+    ADMIN_TOKEN       enables POST /admin/profile and GET /debug/slow
+                      (X-Admin-Token header)
+    PROFILE_DIR       directory for profile files (default: system temp)
+"""
+
+import hmac
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+MIN_INTERVAL = 0.001
+MAX_DURATION = 600.0
+DEFAULT_INTERVAL = 0.005
+DEFAULT_MAX_OVERHEAD = 0.05
+DEFAULT_MAX_STACKS = 10_000
+DEFAULT_MAX_DEPTH = 128
+OTHER_STACK = "[other]"
+
+
+def _frame_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling every thread of this process."""
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        max_overhead: float = DEFAULT_MAX_OVERHEAD,
+        max_stacks: int = DEFAULT_MAX_STACKS,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples (at least MIN_INTERVAL)
+            max_overhead: Largest fraction of wall time spent sampling
+            max_stacks: Distinct stacks kept before merging into "[other]"
+            max_depth: Innermost frames kept per stack
+        """
+        if interval < MIN_INTERVAL:
+            raise ValueError(f"interval must be at least {MIN_INTERVAL}s")
+        if not 0.0 < max_overhead <= 1.0:
+            raise ValueError("max_overhead must be in (0, 1]")
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._labels: Dict[object, str] = {}  # Code object -> frame label
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def overhead(self) -> float:
+        """Fraction of wall time spent sampling so far."""
+        if self.started_at is None:
+            return 0.0
+        elapsed = (self.stopped_at or time.perf_counter()) - self.started_at
+        return self.sampling_seconds / elapsed if elapsed > 0 else 0.0
+
+    def start(self, duration: Optional[float] = None) -> None:
+        """Start sampling in a background thread, optionally for a fixed time."""
+        if self.running:
+            raise RuntimeError("profiler is already running")
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self.stopped_at = None
+        self._thread = threading.Thread(
+            target=self._run, args=(duration,), name="sampling-profiler", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a timed profile to finish; returns False on timeout."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.running
+
+    def _run(self, duration: Optional[float]) -> None:
+        deadline = None if duration is None else self.started_at + duration
+        own_id = threading.get_ident()
+        try:
+            while not self._stop.is_set():
+                began = time.perf_counter()
+                if deadline is not None and began >= deadline:
+                    break
+                self._sample(own_id)
+                cost = time.perf_counter() - began
+                self.sampling_seconds += cost
+                # Sleep long enough that cost / (cost + sleep) <= max_overhead
+                pause = max(self.interval, cost / self.max_overhead - cost)
+                if deadline is not None:
+                    pause = min(pause, max(0.0, deadline - time.perf_counter()))
+                self._stop.wait(pause)
+        finally:
+            self.stopped_at = time.perf_counter()
+
+    def _sample(self, own_id: int) -> None:
+        labels = self._labels
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack: List[str] = []
+            depth = 0
+            while frame is not None and depth < self.max_depth:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+                depth += 1
+            key = ";".join(reversed(stack))
+            if key not in self.stacks and len(self.stacks) >= self.max_stacks:
+                key = OTHER_STACK
+            self.stacks[key] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """The profile in collapsed stack format, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, path: str) -> str:
+        """Write the collapsed profile to a file and return its path."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.collapsed())
+        os.replace(tmp, path)
+        return path
+
+
+class ProfileRun:
+    """A timed profile that writes its output file when it finishes."""
+
+    def __init__(self, profiler: SamplingProfiler, duration: float, path: str):
+        self.profiler = profiler
+        self.duration = duration
+        self.path = path
+        self._writer = threading.Thread(target=self._finish, name="profile-writer", daemon=True)
+
+    def _finish(self) -> None:
+        self.profiler.wait()
+        self.profiler.write(self.path)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the file is written; returns False on timeout."""
+        self._writer.join(timeout)
+        return not self._writer.is_alive()
+
+    @property
+    def done(self) -> bool:
+        return not self._writer.is_alive()
+
+
+# The profile currently running in this process, if any
+_current: Optional[ProfileRun] = None
+_current_lock = threading.Lock()
+
+
+def profile_path(directory: Optional[str] = None) -> str:
+    """A fresh output path for this process."""
+    directory = directory or os.environ.get("PROFILE_DIR") or tempfile.gettempdir()
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory, f"profile-{os.getpid()}-{stamp}-{time.monotonic_ns() % 10**6}.collapsed")
+
+
+def start_profile(
+    duration: float,
+    path: Optional[str] = None,
+    interval: float = DEFAULT_INTERVAL,
+    max_overhead: float = DEFAULT_MAX_OVERHEAD,
+) -> ProfileRun:
+    """
+    Profile this process for duration seconds in the background.
+
+    Only one profile runs at a time.
+
+    Raises:
+        RuntimeError: If a profile is already running
+        ValueError: If the duration or interval is out of range
+    """
+    global _current
+    if not 0 < duration <= MAX_DURATION:
+        raise ValueError(f"duration must be in (0, {MAX_DURATION:g}] seconds")
+    with _current_lock:
+        if _current is not None and not _current.done:
+            raise RuntimeError("a profile is already running")
+        profiler = SamplingProfiler(interval=interval, max_overhead=max_overhead)
+        run = ProfileRun(profiler, duration, path or profile_path())
+        profiler.start(duration)
+        run._writer.start()
+        _current = run
+    return run
+
+
+def admin_allowed(token: Optional[str]) -> bool:
+    """Whether a request carrying this admin token may use admin endpoints."""
+    expected = os.environ.get("ADMIN_TOKEN")
+    if not expected or token is None:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+
+def install_signal_handler(signum: int = getattr(signal, "SIGUSR2", 0), duration: float = 30.0) -> bool:
+    """
+    Profile the process for duration seconds whenever signum arrives.
+
+    Must be called from the main thread. Returns False where the signal
+    does not exist (e.g. Windows).
+    """
+    if not signum:
+        return False
+
+    def start():
+        try:
+            run = start_profile(duration)
+        except RuntimeError:
+            return
+        print(f"[profiler] pid {os.getpid()} profiling {duration:g}s to {run.path}", flush=True)
+
+    def handler(received, frame):
+        # The signal may interrupt the main thread while it holds
+        # _current_lock, so the lock is taken on a thread of its own
+        threading.Thread(target=start, name="profile-signal", daemon=True).start()
+
+    signal.signal(signum, handler)
+    return True
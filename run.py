@@ -1,4 +1,4 @@
-"""Entry point to run the server."""
+"""Development entry point (auto-reload). Use serve.py for production."""
 import uvicorn
 
 if __name__ == "__main__":
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Production entry point: a pre-fork pool of uvicorn workers.
+
+The master process imports and warms the application once, then forks the
+workers, which inherit the warmed state copy-on-write. Workers either share
+one listening socket inherited from the master, or (with --reuse-port) each
+bind their own SO_REUSEPORT socket so the kernel balances connections.
+
+On SIGTERM or SIGINT the master asks every worker to drain: workers stop
+accepting, finish in-flight requests and exit, and are killed only after
+--graceful-timeout. Workers that die unexpectedly are replaced; a worker
+that keeps failing right after it starts (say, the port is taken or the
+app does not import) is restarted with a growing delay, and after
+CRASH_LOOP_LIMIT such failures in a row the master gives up. Sending
+SIGUSR2 to a worker profiles it for 30 seconds (see profiler.py). SIGHUP
+to the master makes every worker reload the directive bundle named by
+DIRECTIVE_FILE (see directive_registry.py).
+
+With --http2 the workers run hypercorn instead of uvicorn, which has no
+HTTP/2: clients then multiplex their requests over one connection, with
+ALPN over TLS (--certfile/--keyfile) or cleartext with prior knowledge
+(h2c). HTTP/1.1 clients are served as before. Needs the hypercorn package.
+
+Usage:
+    python serve.py --workers 4 --port 8000
+    python serve.py --app core_directive_gateway:app --reuse-port --cpu-affinity
+    python serve.py --http2 --certfile cert.pem --keyfile key.pem
+"""
+
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Dict, List, Optional
+
+import uvicorn
+
+import directive_registry
+import profiler
+
+# A worker exiting sooner than this after it started has failed at startup
+FAST_FAILURE_SECONDS = 5.0
+# Startup failures in a row, for any one worker, before the master gives up
+CRASH_LOOP_LIMIT = 10
+# Longest delay before restarting a failing worker
+MAX_RESTART_DELAY = 10.0
+# Longest the master waits without checking for a stop, while restarts are due
+RESTART_POLL_SECONDS = 0.5
+
+# Prompts evaluated once before forking so first requests hit warm code paths
+WARMUP_PROMPTS = [
+    "I want to help people learn",
+    "How do I build a community garden?",
+    "Explain how to protect my privacy online",
+]
+
+
+def load_app(app_path: str):
+    """Import an ASGI app given as 'module:attribute'."""
+    module_name, _, attribute = app_path.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute or "app"), module
+
+
+def warm_up(module) -> None:
+    """
+    Exercise the governance kernel and the app's wrapping code once.
+
+    Runs before fork, so every worker starts with populated singletons,
+    imported submodules and warmed caches.
+    """
+    from core_directive import get_directive
+    from evaluator import get_evaluator
+
+    directive = get_directive()
+    evaluator = get_evaluator()
+    for prompt in WARMUP_PROMPTS:
+        directive.evaluate_intent(prompt)
+        evaluator.evaluate(prompt)
+
+    wrap = getattr(module, "wrap_with_core_directive", None)
+    message = getattr(module, "Message", None)
+    estimate = getattr(module, "estimate_tokens", None)
+    if wrap is not None and message is not None:
+        wrapped = wrap([message(role="user", content=p) for p in WARMUP_PROMPTS])
+        if estimate is not None:
+            estimate(" ".join(m.content for m in wrapped))
+
+
+def bind_socket(host: str, port: int, reuse_port: bool, backlog: int) -> socket.socket:
+    """Create a listening TCP socket."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # An explicit IPPROTO_TCP matters: asyncio only sets TCP_NODELAY on
+    # accepted sockets whose proto is TCP, and without it every response
+    # stalls ~40 ms on Nagle + delayed ACK.
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def worker_cpus(index: int, pin: bool) -> Optional[List[int]]:
+    """CPU a worker should be pinned to, round-robin over available CPUs."""
+    if not pin or not hasattr(os, "sched_getaffinity"):
+        return None
+    available = sorted(os.sched_getaffinity(0))
+    return [available[index % len(available)]]
+
+
+class Master:
+    """Forks, supervises and drains the worker processes."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.app, self.module = load_app(args.app)
+        self.shared_socket: Optional[socket.socket] = None
+        self.workers: Dict[int, int] = {}  # pid -> worker index
+        self.started: Dict[int, float] = {}  # worker index -> last spawn time
+        self.failures: Dict[int, int] = {}  # worker index -> startup failures in a row
+        self.restarts: Dict[int, float] = {}  # worker index -> when to restart it
+        self.stopping = False
+        self.exit_code = 0
+
+    def run(self) -> int:
+        args = self.args
+        if args.warm_up:
+            warm_up(self.module)
+
+        if not args.reuse_port:
+            self.shared_socket = bind_socket(args.host, args.port, False, args.backlog)
+
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGALRM, self._kill_remaining)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._forward_reload)
+        if hasattr(signal, "sigtimedwait"):
+            # Held pending so that waiting for a restart can wake on it
+            signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGCHLD])
+
+        for index in range(args.workers):
+            self._spawn(index)
+        scheme = "https" if args.certfile else "http"
+        print(
+            f"[serve] {args.workers} worker(s) on {scheme}://{args.host}:{args.port} "
+            f"({'SO_REUSEPORT' if args.reuse_port else 'pre-fork shared socket'}"
+            f"{', HTTP/2' if args.http2 else ''})",
+            flush=True,
+        )
+
+        # Workers are reaped here only, never in a signal handler
+        while self.workers or self.restarts:
+            timeout = self._restart_due()
+            if timeout is None:
+                try:
+                    pid, status = os.wait()
+                except ChildProcessError:
+                    break
+                except InterruptedError:
+                    continue
+            else:
+                # A restart is pending: reap without blocking past it
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    pid = 0
+                if not pid:
+                    _wait_for_child(timeout)
+                    continue
+            index = self.workers.pop(pid, None)
+            if index is not None and not self.stopping:
+                self._schedule_restart(index, pid, status)
+        signal.alarm(0)
+        return self.exit_code
+
+    def _schedule_restart(self, index: int, pid: int, status: int) -> None:
+        """Replace a dead worker, backing off while it fails at startup."""
+        code = os.waitstatus_to_exitcode(status)
+        if code != 0 and time.monotonic() - self.started[index] < FAST_FAILURE_SECONDS:
+            failures = self.failures.get(index, 0) + 1
+        else:
+            failures = 0
+        self.failures[index] = failures
+        if failures >= CRASH_LOOP_LIMIT:
+            print(
+                f"[serve] worker {index} failed {failures} times in a row at startup; "
+                "giving up",
+                file=sys.stderr, flush=True,
+            )
+            self.exit_code = 1
+            self._request_stop(signal.SIGTERM, None)
+            return
+        delay = min(0.1 * 2 ** failures, MAX_RESTART_DELAY)
+        print(f"[serve] worker {pid} exited ({code}); restarting in {delay:.1f}s", flush=True)
+        self.restarts[index] = time.monotonic() + delay
+
+    def _restart_due(self) -> Optional[float]:
+        """
+        Spawn the workers whose restart is due.
+
+        Returns how long to wait for the next one, or None if none is pending.
+        """
+        if self.stopping:
+            self.restarts.clear()
+            return None
+        now = time.monotonic()
+        for index, deadline in list(self.restarts.items()):
+            if deadline <= now:
+                del self.restarts[index]
+                self._spawn(index)
+        if not self.restarts:
+            return None
+        return min(min(self.restarts.values()) - now, RESTART_POLL_SECONDS)
+
+    def _spawn(self, index: int) -> None:
+        self.started[index] = time.monotonic()
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = index
+            return
+
+        # Worker process
+        if hasattr(signal, "sigtimedwait"):
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, [signal.SIGCHLD])
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGALRM, signal.SIG_DFL)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)  # Until the worker's own handler
+        code = 1
+        try:
+            self._serve(index)
+            code = 0
+        except SystemExit as exc:
+            code = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            # os._exit skips buffered output, so flush what the worker printed
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def _serve(self, index: int) -> None:
+        args = self.args
+        cpus = worker_cpus(index, args.cpu_affinity)
+        if cpus is not None:
+            os.sched_setaffinity(0, cpus)
+
+        if args.reuse_port:
+            sock = bind_socket(args.host, args.port, True, args.backlog)
+        else:
+            sock = self.shared_socket
+
+        profiler.install_signal_handler()
+        directive_registry.install_signal_handler()
+        if args.http2:
+            asyncio.run(self._serve_hypercorn(sock))
+            return
+        config = uvicorn.Config(
+            self.app,
+            backlog=args.backlog,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            timeout_keep_alive=args.keep_alive,
+            access_log=args.access_log,
+            log_level=args.log_level,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+
+    async def _serve_hypercorn(self, sock: socket.socket) -> None:
+        """Serve HTTP/1.1 and HTTP/2 on sock until SIGTERM or SIGINT."""
+        from hypercorn.asyncio import serve as hypercorn_serve
+        from hypercorn.config import Config
+
+        args = self.args
+        config = Config()
+        config.bind = [f"fd://{sock.fileno()}"]
+        config.backlog = args.backlog
+        config.graceful_timeout = args.graceful_timeout
+        config.keep_alive_timeout = args.keep_alive
+        config.certfile = args.certfile
+        config.keyfile = args.keyfile
+        config.accesslog = "-" if args.access_log else None
+        config.loglevel = args.log_level.upper()
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        await hypercorn_serve(self.app, config, shutdown_trigger=stop.wait)
+
+    def _forward_reload(self, signum, frame) -> None:
+        """Ask every worker to reload the directive bundle."""
+        for pid in list(self.workers):
+            _signal(pid, signum)
+
+    def _request_stop(self, signum, frame) -> None:
+        """Drain workers, escalating to SIGKILL after the graceful timeout."""
+        if self.stopping:
+            return
+        self.stopping = True
+        print(f"[serve] draining {len(self.workers)} worker(s)", flush=True)
+        for pid in list(self.workers):
+            _signal(pid, signal.SIGTERM)
+        # The main loop reaps them; SIGALRM kills whatever is left by then
+        signal.alarm(self.args.graceful_timeout + 1)
+
+    def _kill_remaining(self, signum, frame) -> None:
+        for pid in list(self.workers):
+            _signal(pid, signal.SIGKILL)
+
+
+def _wait_for_child(timeout: float) -> None:
+    """Wait up to timeout seconds for a worker to exit (SIGCHLD)."""
+    if timeout <= 0:
+        return
+    if hasattr(signal, "sigtimedwait"):
+        signal.sigtimedwait([signal.SIGCHLD], timeout)
+    else:
+        time.sleep(timeout)  # Short: the caller caps it at RESTART_POLL_SECONDS
+
+
+def _signal(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the API with multiple worker processes.")
+    parser.add_argument("--app", default="app.main:app", help="ASGI app as module:attribute")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--reuse-port", action="store_true",
+                        help="bind one SO_REUSEPORT socket per worker")
+    parser.add_argument("--cpu-affinity", action="store_true",
+                        help="pin each worker to one CPU")
+    parser.add_argument("--no-warm-up", dest="warm_up", action="store_false",
+                        help="skip warming the app before forking")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="seconds workers get to finish in-flight requests")
+    parser.add_argument("--keep-alive", type=int, default=5,
+                        help="seconds an idle keep-alive connection stays open")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="warning")
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--http2", action="store_true",
+                        help="serve HTTP/2 as well, with hypercorn")
+    parser.add_argument("--certfile", help="TLS certificate (with --http2)")
+    parser.add_argument("--keyfile", help="TLS private key (with --http2)")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.reuse_port and not hasattr(socket, "SO_REUSEPORT"):
+        parser.error("SO_REUSEPORT is not supported on this platform")
+    if (args.certfile or args.keyfile) and not args.http2:
+        parser.error("--certfile and --keyfile need --http2")
+    if bool(args.certfile) != bool(args.keyfile):
+        parser.error("--certfile and --keyfile go together")
+    if args.http2 and importlib.util.find_spec("hypercorn") is None:
+        parser.error("--http2 needs the hypercorn package")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if not hasattr(os, "fork"):
+        print("serve.py needs os.fork(); use run.py on this platform", file=sys.stderr)
+        return 1
+    return Master(parse_args(argv)).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,294 @@
 """
 Simple HTTP server for Broken Vowels project.
 Serves content at http://localhost:8000/
+
+Connections are handled concurrently by a bounded thread pool and kept alive
+across requests (HTTP/1.1). Small files are cached in memory and revalidated
+by mtime on every request; clients can revalidate with If-None-Match against
+the ETag. When a precompressed ``.br`` or ``.gz`` sibling exists it is served
+to clients that accept it, and compressible text is gzipped once on caching.
+Large files are streamed with sendfile() instead of being read into Python.
 """
 
+import argparse
+import email.utils
+import gzip
 import http.server
-import socketserver
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional
 
 PORT = 8000
 
-Handler = http.server.SimpleHTTPRequestHandler
+# Files up to this size are kept in memory; larger ones use sendfile()
+MAX_CACHED_FILE = 1024 * 1024
+# Content types worth compressing on the fly when no precompressed file exists
+COMPRESSIBLE_TYPES = (
+    "text/", "application/javascript", "application/json", "image/svg+xml",
+)
+# Precompressed variants, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@dataclass
+class CachedFile:
+    """In-memory copy of a file and its encoded variants."""
+    mtime_ns: int
+    size: int
+    etag: str
+    content_type: str
+    last_modified: str
+    body: bytes
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+
+class FileCache:
+    """Thread-safe cache of small files keyed by path, invalidated by mtime."""
+
+    def __init__(self, max_file_size: int = MAX_CACHED_FILE):
+        self.max_file_size = max_file_size
+        self._entries: Dict[str, CachedFile] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat: os.stat_result, content_type: str) -> Optional[CachedFile]:
+        """Return the cached file, (re)loading it if it changed on disk."""
+        if stat.st_size > self.max_file_size:
+            return None
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            return entry
+
+        entry = self._load(path, stat, content_type)
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+    def _load(self, path: str, stat: os.stat_result, content_type: str) -> CachedFile:
+        with open(path, "rb") as f:
+            body = f.read()
+
+        variants = {}
+        for encoding, suffix in ENCODINGS:
+            sibling = path + suffix
+            try:
+                if os.stat(sibling).st_mtime_ns >= stat.st_mtime_ns:
+                    with open(sibling, "rb") as f:
+                        variants[encoding] = f.read()
+            except OSError:
+                pass
+        if "gzip" not in variants and content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(body, mtime=0)
+            if len(compressed) < len(body):
+                variants["gzip"] = compressed
+
+        return CachedFile(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            etag=make_etag(stat),
+            content_type=content_type,
+            last_modified=email.utils.formatdate(stat.st_mtime, usegmt=True),
+            body=body,
+            variants=variants,
+        )
+
+
+def make_etag(stat: os.stat_result, encoding: str = "") -> str:
+    """Strong validator derived from mtime and size."""
+    suffix = f"-{encoding}" if encoding else ""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{suffix}"'
+
+
+def accepted_encodings(header: Optional[str]) -> FrozenSet[str]:
+    """Encodings from an Accept-Encoding header, ignoring q=0 entries."""
+    if not header:
+        return frozenset()
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return frozenset(accepted)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the given ETag."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class StaticHandler(http.server.SimpleHTTPRequestHandler):
+    """Keep-alive static file handler with caching, ETags and compression."""
+
+    protocol_version = "HTTP/1.1"
+    # Idle keep-alive connections are closed after this many seconds
+    timeout = 5
+    cache = FileCache()
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body: bool) -> None:
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                # Let the base class issue its trailing-slash redirect
+                return self._fallback(send_body)
+            index = os.path.join(path, "index.html")
+            if not os.path.isfile(index):
+                return self._fallback(send_body)
+            path = index
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+        if stat is None or not os.path.isfile(path):
+            self.send_error(404, "File not found")
+            return
+
+        content_type = self.guess_type(path)
+        entry = self.cache.get(path, stat, content_type)
+        if entry is None:
+            return self._send_large(path, stat, content_type, send_body)
+
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+        encoding = next(
+            (e for e, _ in ENCODINGS if e in accepted and e in entry.variants),
+            "",
+        )
+        etag = entry.etag if not encoding else make_etag(stat, encoding)
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self._send_validators(etag, entry.last_modified)
+            self.end_headers()
+            return
+
+        body = entry.variants[encoding] if encoding else entry.body
+        self.send_response(200)
+        self.send_header("Content-Type", entry.content_type)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self._send_validators(etag, entry.last_modified)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_large(self, path: str, stat: os.stat_result, content_type: str, send_body: bool) -> None:
+        """Stream an uncached file with zero-copy sendfile()."""
+        etag = make_etag(stat)
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self._send_validators(etag, last_modified)
+            self.end_headers()
+            return
+
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+        with f:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self._send_validators(etag, last_modified)
+            self.send_header("Content-Length", str(stat.st_size))
+            self.end_headers()
+            if send_body:
+                self.wfile.flush()
+                self.connection.sendfile(f, 0, stat.st_size)
+
+    def _send_validators(self, etag: str, last_modified: str) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Cache-Control", "no-cache")
+
+    def _fallback(self, send_body: bool) -> None:
+        """Directory listings and redirects from SimpleHTTPRequestHandler."""
+        self.close_connection = True
+        if send_body:
+            super().do_GET()
+        else:
+            super().do_HEAD()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """HTTP server that hands each connection to a bounded thread pool."""
+
+    allow_reuse_address = True
+
+    def __init__(self, address, handler, threads: int = 32, verbose: bool = False):
+        super().__init__(address, handler)
+        self.verbose = verbose
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="static")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def make_server(
+    bind: str = "127.0.0.1",
+    port: int = PORT,
+    directory: Optional[str] = None,
+    threads: int = 32,
+    verbose: bool = False,
+) -> PooledHTTPServer:
+    """Create a static server rooted at directory (default: current dir)."""
+    root = os.path.abspath(directory or os.getcwd())
+
+    class Handler(StaticHandler):
+        cache = FileCache()
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=root, **kwargs)
+
+    return PooledHTTPServer((bind, port), Handler, threads=threads, verbose=verbose)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the project's static files.")
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--directory", default=None)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    with make_server(args.bind, args.port, args.directory, args.threads, args.verbose) as httpd:
+        print(f"Serving at http://localhost:{args.port}/")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
 
-socketserver.TCPServer.allow_reuse_address = True
-with socketserver.TCPServer(("127.0.0.1", PORT), Handler) as httpd:
-    print(f"Serving at http://localhost:{PORT}/")
-    httpd.serve_forever()
+if __name__ == "__main__":
+    main()
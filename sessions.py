@@ -0,0 +1,361 @@
+"""
+Sessions Module - Server-Side Conversation State
+
+Chat clients normally resend the whole ``messages`` array on every turn,
+so each turn re-uploads, re-parses and re-wraps the entire history. With
+a session, the conversation is kept here instead: the client creates a
+session once and then sends only its new messages, and the reply is
+recorded too, so the next turn again carries only what is new.
+
+Sessions are held in memory in a bounded LRU, measured in bytes. Without
+a session directory, a session dropped from memory is gone and its client
+gets a 404 and must start over; so sessions expire under memory pressure,
+and after SESSION_TTL_SECONDS without use. With a directory, every turn
+is also appended to the session's log file there, a JSON line per
+message. A session dropped from memory is then only spilled: it is read
+back from its log when next used. Workers sharing the directory see each
+other's turns, since a cached session reads only the lines appended since
+it last looked. Log files idle for longer than the TTL are deleted.
+
+A session takes one turn at a time; a turn that fails (e.g. the upstream
+is down) is rolled back, so the client can retry it as it was.
+
+Configuration (environment):
+    SESSION_DIR           directory for session logs, shared by workers;
+                          unset keeps sessions in each worker's memory only
+    SESSION_MAX_BYTES     memory for sessions per worker (default 64 MiB)
+    SESSION_TTL_SECONDS   idle time after which a session expires (default 3600)
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from context_window import Conversation
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 3600.0
+# Bookkeeping per message beyond its content, for the memory bound
+MESSAGE_BYTES = 200
+# How often idle sessions are looked for
+SWEEP_SECONDS = 60.0
+
+_SESSION_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class SessionNotFound(KeyError):
+    """The session does not exist, expired, or was deleted."""
+
+    status_code = 404
+
+
+class SessionBusy(RuntimeError):
+    """The session is in the middle of another turn."""
+
+    status_code = 409
+
+
+class Session:
+    """
+    One conversation held by a SessionStore.
+
+    ``encoded`` is free for callers to cache each message's encoding in,
+    index for index; it is cut back with the conversation on a rollback.
+    """
+
+    __slots__ = (
+        "id", "conversation", "encoded", "size", "recorded", "offset", "touched", "busy",
+    )
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.conversation = Conversation()
+        self.encoded: List[bytes] = []
+        self.size = 0
+        self.recorded = 0  # Messages recorded by the store, and counted in size
+        self.offset = 0  # Bytes of the log file read so far
+        self.touched = time.monotonic()
+        self.busy = False
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        return self.conversation.messages
+
+
+class SessionStore:
+    """
+    Bounded conversation store keyed by session ID.
+
+    A turn goes ``begin`` (the session, with this turn's messages added
+    by the caller), then ``commit`` with everything the turn added, or
+    ``rollback``.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._swept = time.monotonic()
+        self.created = 0
+        self.spilled = 0
+        self.loaded = 0
+        self.expired = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def create(self) -> Session:
+        """Start a new, empty session."""
+        session = Session(uuid.uuid4().hex)
+        if self.directory:
+            # Created now, so other workers know the session exists
+            os.close(os.open(self._path(session.id), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+        with self._lock:
+            self._sessions[session.id] = session
+            self.created += 1
+        self._maybe_sweep()
+        return session
+
+    def begin(self, session_id: str) -> Session:
+        """
+        Take a session for a turn, bringing it up to date with its log.
+
+        Raises:
+            SessionNotFound: If there is no such live session
+            SessionBusy: If the session is already taking a turn
+        """
+        self._maybe_sweep()
+        if not _SESSION_ID.fullmatch(session_id):
+            raise SessionNotFound(session_id)
+        fresh = False
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                if session.busy:
+                    raise SessionBusy(f"Session {session_id} is taking another turn")
+                if time.monotonic() - session.touched > self.ttl:
+                    self._drop(session)
+                    session = None
+                else:
+                    session.busy = True
+                    self._sessions.move_to_end(session_id)
+            if session is None and self.directory:
+                # Registered busy before its log is read, so a concurrent
+                # turn on the same session is refused rather than loading it too
+                session = Session(session_id)
+                session.busy = True
+                self._sessions[session_id] = session
+                fresh = True
+        if session is None:
+            raise SessionNotFound(session_id)
+        try:
+            if self.directory:
+                self._catch_up(session)
+        except BaseException:
+            session.busy = False
+            if fresh:
+                with self._lock:
+                    self._drop(session)
+            raise
+        if fresh:
+            with self._lock:
+                self.loaded += 1
+        session.touched = time.monotonic()
+        return session
+
+    def commit(self, session: Session, base: int, messages: List[Dict[str, Any]]) -> None:
+        """
+        Record a turn: messages follow the first base messages.
+
+        Anything the caller added past base is replaced by messages.
+        """
+        try:
+            self._cut(session, base)
+            if self.directory:
+                data = b"".join(
+                    json.dumps(m, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+                    for m in messages
+                )
+                # One append, so lines from several workers never interleave
+                fd = os.open(self._path(session.id), os.O_WRONLY | os.O_APPEND)
+                try:
+                    view = memoryview(data)
+                    while view:
+                        view = view[os.write(fd, view):]
+                finally:
+                    os.close(fd)
+                # Reread from the log: another worker may have appended too
+                self._catch_up(session)
+            else:
+                self._extend(session, messages)
+        finally:
+            session.busy = False
+            session.touched = time.monotonic()
+        self._enforce_bound()
+
+    def rollback(self, session: Session, base: int) -> None:
+        """Undo a turn that failed: drop what was added past base."""
+        self._cut(session, base)
+        session.busy = False
+
+    def delete(self, session_id: str) -> bool:
+        """Delete a session; returns whether it existed."""
+        if not _SESSION_ID.fullmatch(session_id):
+            return False
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._drop(session)
+        existed = session is not None
+        if self.directory:
+            try:
+                os.unlink(self._path(session_id))
+                existed = True
+            except FileNotFoundError:
+                pass
+        return existed
+
+    def sweep(self) -> int:
+        """Expire sessions idle for longer than the TTL; returns how many."""
+        now = time.monotonic()
+        with self._lock:
+            idle = [s for s in self._sessions.values() if not s.busy and now - s.touched > self.ttl]
+            for session in idle:
+                self._drop(session)
+        expired = 0 if self.directory else len(idle)
+        if self.directory:
+            cutoff = time.time() - self.ttl
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".jsonl"):
+                    try:
+                        if entry.stat().st_mtime < cutoff:
+                            os.unlink(entry.path)
+                            expired += 1
+                    except FileNotFoundError:
+                        pass
+        self.expired += expired
+        return expired
+
+    def stats(self) -> dict:
+        return {
+            "sessions_cached": len(self._sessions),
+            "bytes_cached": self._bytes,
+            "created": self.created,
+            "spilled": self.spilled,
+            "loaded": self.loaded,
+            "expired": self.expired,
+        }
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.jsonl")
+
+    def _catch_up(self, session: Session) -> Session:
+        """Read the lines of the session's log this process has not seen."""
+        try:
+            with open(self._path(session.id), "rb") as f:
+                if os.fstat(f.fileno()).st_mtime < time.time() - self.ttl:
+                    raise FileNotFoundError
+                f.seek(session.offset)
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._drop(session)
+            raise SessionNotFound(session.id) from None
+        # Only whole lines; a line being written is picked up next time
+        data = data[:data.rfind(b"\n") + 1]
+        if data:
+            self._extend(session, [json.loads(line) for line in data.splitlines()])
+            session.offset += len(data)
+        with self._lock:
+            current = self._sessions.get(session.id)
+            if current is not session:
+                if current is not None:
+                    self._drop(current)  # Loaded by a concurrent request too
+                self._sessions[session.id] = session
+                self._bytes += session.size
+        return session
+
+    def _extend(self, session: Session, messages: List[Dict[str, Any]]) -> None:
+        session.conversation.extend(messages)
+        session.recorded = len(session.conversation)
+        added = sum(len(m["content"]) + MESSAGE_BYTES for m in messages)
+        session.size += added
+        with self._lock:
+            if self._sessions.get(session.id) is session:
+                self._bytes += added
+
+    def _cut(self, session: Session, base: int) -> None:
+        conversation = session.conversation
+        removed = sum(
+            len(m["content"]) + MESSAGE_BYTES for m in conversation.messages[base:session.recorded]
+        )
+        conversation.truncate(base)
+        del session.encoded[base:]
+        session.recorded = min(session.recorded, base)
+        session.size -= removed
+        with self._lock:
+            if self._sessions.get(session.id) is session:
+                self._bytes -= removed
+
+    def _drop(self, session: Session) -> None:
+        """Remove a session from memory; the caller holds the lock."""
+        if self._sessions.pop(session.id, None) is session:
+            self._bytes -= session.size
+
+    def _enforce_bound(self) -> None:
+        """Drop the least recently used sessions while over max_bytes."""
+        with self._lock:
+            if self._bytes <= self.max_bytes:
+                return
+            # The most recently used session, usually the one that grew, stays
+            for session in list(self._sessions.values())[:-1]:
+                if self._bytes <= self.max_bytes:
+                    break
+                if session.busy:
+                    continue
+                self._drop(session)
+                if self.directory:
+                    self.spilled += 1
+                else:
+                    self.expired += 1
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._swept < SWEEP_SECONDS:
+            return
+        self._swept = now
+        try:
+            self.sweep()
+        except OSError as exc:
+            print(f"[sessions] sweep failed: {exc}", file=sys.stderr, flush=True)
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """The process-wide session store, configured from the environment."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore(
+                    os.environ.get("SESSION_DIR") or None,
+                    max_bytes=int(os.environ.get("SESSION_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                    ttl=float(os.environ.get("SESSION_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                )
+    return _store
@@ -0,0 +1,321 @@
+"""
+Tenants Module - Per-Tenant Directive Bundles
+
+Each tenant may have its own directive bundle, in the format read by
+directive_registry.py, so that one deployment serves customers with
+different wrapped text and different indicator vocabularies. A request is
+assigned to a tenant by the API key it carries or, for keys listed in no
+tenant, by a header naming it; a key's tenant cannot be overridden by the
+header.
+
+Bundles are compiled on a tenant's first request, not at startup: the
+CoreDirective and DirectiveEvaluator are built (long vocabularies become a
+single compiled pattern, see KeywordMatcher) and the registered preparers
+run, e.g. to encode the chat app's splice fragments once. Compiled bundles
+are kept in a bounded LRU; the least recently used one is dropped when it
+is full and compiled again if its tenant returns. Compiling happens
+outside the LRU's lock, and a lookup is a dictionary access under it, so a
+new or evicted tenant never makes requests for the others wait.
+
+A bundle file is checked for changes at most every check interval; an
+edited bundle is recompiled on the next request after that, and one that
+fails to compile leaves the previous compiled version in use. Requests for
+a tenant without a bundle use the process default directive. Which
+tenants have a bundle is read from a listing of the directory, refreshed
+at the same interval, so unknown names cost neither a file lookup nor a
+slot in the LRU.
+
+Directory layout:
+    <tenant>.json   the tenant's bundle; names are letters, digits, ".",
+                    "_" and "-", starting with a letter or digit
+    _keys.json      {"<sha256 hex of an API key>": "<tenant>", ...}
+
+Configuration (environment):
+    DIRECTIVE_TENANTS_DIR     directory of tenant bundles; unset disables tenants
+    DIRECTIVE_TENANTS_MAX     compiled bundles kept (default 256)
+    DIRECTIVE_RELOAD_SECONDS  how often a bundle is checked for changes
+                              (default 2, 0 = never)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from core_directive import CoreDirective
+from directive_registry import DEFAULT_RELOAD_SECONDS, DirectiveVersion, read_bundle
+from metrics import Counter
+
+# Header naming the tenant, and the GatewayRequest metadata key carrying it
+TENANT_HEADER = "x-tenant-id"
+TENANT_METADATA_KEY = "tenant"
+KEYS_FILE = "_keys.json"
+DEFAULT_MAX_COMPILED = 256
+
+_TENANT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+
+
+def valid_tenant(name: str) -> bool:
+    """Whether name can name a tenant (and so a file in the directory)."""
+    return _TENANT_NAME.fullmatch(name) is not None
+
+
+@dataclass(frozen=True)
+class TenantBundle:
+    """A tenant's compiled directive version."""
+    tenant: str
+    version: DirectiveVersion
+    # Filled by preparers, e.g. the chat app's encoded splice fragments
+    prepared: dict = field(default_factory=dict, compare=False)
+
+    @property
+    def directive(self) -> CoreDirective:
+        return self.version.directive
+
+
+class _Entry:
+    """An LRU slot; bundle is None while a tenant's file fails to compile."""
+
+    __slots__ = ("bundle", "stamp", "checked")
+
+    def __init__(self, bundle: Optional[TenantBundle], stamp, checked: float):
+        self.bundle = bundle
+        self.stamp = stamp
+        self.checked = checked
+
+
+class TenantDirectives:
+    """
+    Resolves requests to tenants and holds their compiled bundles.
+
+    ``get`` is safe to call from many threads. At most max_compiled
+    tenants are kept compiled; names without a bundle in the directory
+    listing are answered from the listing and never take a slot.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_compiled: int = DEFAULT_MAX_COMPILED,
+        check_interval: float = DEFAULT_RELOAD_SECONDS,
+    ):
+        if max_compiled < 1:
+            raise ValueError("max_compiled must be at least 1")
+        self.directory = directory
+        self.max_compiled = max_compiled
+        self.check_interval = check_interval
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One compile per tenant at a time; others asking for it wait
+        self._compiling: Dict[str, threading.Lock] = {}
+        self._preparers: List[Callable[[TenantBundle], None]] = []
+        self._keys: Dict[str, str] = {}
+        self._keys_entry = _Entry(None, None, None)
+        self._known: frozenset = frozenset()
+        self._listed: Optional[float] = None
+        self._hits = Counter()
+        self._compiles = Counter()
+        self._evictions = Counter()
+        self._failures = Counter()
+
+    def add_preparer(self, preparer: Callable[[TenantBundle], None]) -> None:
+        """
+        Run preparer on every bundle when it is compiled.
+
+        Bundles compiled already are dropped, so that they are prepared
+        too when next used. Adding the same preparer again does nothing.
+        """
+        if preparer in self._preparers:
+            return
+        self._preparers.append(preparer)
+        with self._lock:
+            self._entries.clear()
+
+    def tenant_for(
+        self,
+        tenant: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        The tenant of a request, from its API key or its tenant header.
+
+        A key listed in a tenant always resolves to that tenant, whatever
+        the header says, so that callers cannot pick another tenant's
+        directive. Returns None for an invalid tenant name.
+        """
+        if api_key:
+            self._refresh_keys()
+            owner = self._keys.get(hashlib.sha256(api_key.encode()).hexdigest())
+            if owner is not None:
+                return owner
+        if tenant:
+            return tenant if valid_tenant(tenant) else None
+        return None
+
+    def get(self, tenant: str) -> Optional[TenantBundle]:
+        """The tenant's compiled bundle, compiling it on first use."""
+        if not valid_tenant(tenant) or tenant not in self._known_tenants():
+            return None
+        with self._lock:
+            entry = self._entries.get(tenant)
+            if entry is not None:
+                self._entries.move_to_end(tenant)
+                self._hits.inc()
+        if entry is not None and (
+            self.check_interval <= 0 or time.monotonic() - entry.checked < self.check_interval
+        ):
+            return entry.bundle
+        return self._refresh(tenant, entry)
+
+    def _refresh(self, tenant: str, entry: Optional[_Entry]) -> Optional[TenantBundle]:
+        """Compile or recheck a tenant's bundle, outside the LRU lock."""
+        with self._lock:
+            compiling = self._compiling.setdefault(tenant, threading.Lock())
+        try:
+            with compiling:
+                with self._lock:
+                    current = self._entries.get(tenant)
+                if current is not None and current is not entry:
+                    return current.bundle  # Refreshed while we waited
+                return self._load(tenant, entry)
+        finally:
+            with self._lock:
+                if self._compiling.get(tenant) is compiling and not compiling.locked():
+                    del self._compiling[tenant]
+
+    def _load(self, tenant: str, entry: Optional[_Entry]) -> Optional[TenantBundle]:
+        path = os.path.join(self.directory, f"{tenant}.json")
+        now = time.monotonic()
+        stamp = _file_stamp(path)
+        if entry is not None and stamp == entry.stamp:
+            entry.checked = now
+            return entry.bundle
+
+        if stamp is None:  # Deleted since the directory was listed
+            with self._lock:
+                if self._entries.get(tenant) is entry:
+                    self._entries.pop(tenant, None)
+            return None
+        bundle = entry.bundle if entry is not None else None
+        try:
+            bundle = self._compile(tenant, path)
+        except (OSError, ValueError) as exc:
+            self._failures.inc()
+            kept = bundle.version.version if bundle is not None else "the default"
+            print(f"[tenants] {tenant}: keeping {kept} directive: {exc}",
+                  file=sys.stderr, flush=True)
+        # A bundle that failed to compile is kept too, so it is retried
+        # only once it changes
+        self._store(tenant, _Entry(bundle, stamp, now))
+        return bundle
+
+    def _compile(self, tenant: str, path: str) -> TenantBundle:
+        bundle = TenantBundle(tenant, read_bundle(path, namespace=tenant))
+        for preparer in self._preparers:
+            preparer(bundle)
+        self._compiles.inc()
+        return bundle
+
+    def _store(self, tenant: str, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[tenant] = entry
+            self._entries.move_to_end(tenant)
+            while len(self._entries) > self.max_compiled:
+                self._entries.popitem(last=False)
+                self._evictions.inc()
+
+    def _known_tenants(self) -> frozenset:
+        """Tenants with a bundle file, relisted at most every check interval."""
+        now = time.monotonic()
+        listed = self._listed
+        if listed is not None and (self.check_interval <= 0 or now - listed < self.check_interval):
+            return self._known
+        self._listed = now  # Concurrent callers keep using the old listing meanwhile
+        try:
+            with os.scandir(self.directory) as entries:
+                names = [entry.name[:-5] for entry in entries if entry.name.endswith(".json")]
+        except OSError as exc:
+            print(f"[tenants] cannot list {self.directory}: {exc}", file=sys.stderr, flush=True)
+            return self._known
+        self._known = frozenset(name for name in names if valid_tenant(name))
+        return self._known
+
+    def _refresh_keys(self) -> None:
+        """Reread the API key index when it has changed."""
+        entry = self._keys_entry
+        now = time.monotonic()
+        if entry.checked is not None and (
+            self.check_interval <= 0 or now - entry.checked < self.check_interval
+        ):
+            return
+        entry.checked = now
+        path = os.path.join(self.directory, KEYS_FILE)
+        stamp = _file_stamp(path)
+        if stamp == entry.stamp:
+            return
+        entry.stamp = stamp
+        if stamp is None:
+            self._keys = {}
+            return
+        try:
+            with open(path, "rb") as f:
+                keys = json.loads(f.read())
+            if not isinstance(keys, dict) or not all(
+                isinstance(v, str) and valid_tenant(v) for v in keys.values()
+            ):
+                raise ValueError("expected an object mapping key hashes to tenant names")
+        except (OSError, ValueError) as exc:
+            self._failures.inc()
+            print(f"[tenants] {KEYS_FILE}: keeping the previous keys: {exc}",
+                  file=sys.stderr, flush=True)
+            return
+        self._keys = {digest.lower(): tenant for digest, tenant in keys.items()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            compiled = sum(1 for entry in self._entries.values() if entry.bundle is not None)
+        return {
+            "tenants_compiled": compiled,
+            "max_compiled": self.max_compiled,
+            "hits": self._hits.value,
+            "compiles": self._compiles.value,
+            "evictions": self._evictions.value,
+            "failures": self._failures.value,
+        }
+
+
+def _file_stamp(path: str) -> Optional[tuple]:
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+_tenants: Optional[TenantDirectives] = None
+_tenants_lock = threading.Lock()
+
+
+def get_tenant_directives() -> Optional[TenantDirectives]:
+    """The process-wide tenant bundles, or None when DIRECTIVE_TENANTS_DIR is unset."""
+    global _tenants
+    if _tenants is None:
+        directory = os.environ.get("DIRECTIVE_TENANTS_DIR")
+        if not directory:
+            return None
+        with _tenants_lock:
+            if _tenants is None:
+                _tenants = TenantDirectives(
+                    directory,
+                    max_compiled=int(os.environ.get("DIRECTIVE_TENANTS_MAX", DEFAULT_MAX_COMPILED)),
+                    check_interval=float(
+                        os.environ.get("DIRECTIVE_RELOAD_SECONDS", DEFAULT_RELOAD_SECONDS)
+                    ),
+                )
+    return _tenants
@@ -0,0 +1,231 @@
+"""
+Tests for admission control.
+
+Covers the gradient limiter, queueing by source priority, fast failure
+with Retry-After, and the gateway in front of a synthetic slow backend.
+"""
+
+import threading
+import time
+import unittest
+
+from admission import COMPACT_SLACK, AdmissionController, GradientLimiter, Overloaded
+from gateway import GatewayRequest, GovernanceGateway
+
+MS = 1_000_000
+
+
+def fixed_limit(limit: int) -> GradientLimiter:
+    return GradientLimiter(initial_limit=limit, min_limit=limit, max_limit=limit)
+
+
+def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.001)
+
+
+class TestGradientLimiter(unittest.TestCase):
+    """Tests for GradientLimiter."""
+
+    def test_grows_at_baseline_and_shrinks_when_slow(self):
+        """Test that the limit follows latency relative to its baseline."""
+        limiter = GradientLimiter(initial_limit=10, max_limit=100)
+        for _ in range(50):
+            limiter.on_sample(10 * MS, in_flight=int(limiter.limit))
+        grown = limiter.limit
+        self.assertGreater(grown, 10)
+
+        for _ in range(50):
+            limiter.on_sample(100 * MS, in_flight=int(limiter.limit))
+        self.assertLess(limiter.limit, grown / 2)
+
+    def test_idle_samples_leave_limit_alone(self):
+        """Test that samples with little in flight do not grow the limit."""
+        limiter = GradientLimiter(initial_limit=10)
+        for _ in range(50):
+            limiter.on_sample(10 * MS, in_flight=1)
+        self.assertEqual(limiter.limit, 10)
+
+    def test_drops_back_off(self):
+        """Test that failed requests cut the limit, down to min_limit."""
+        limiter = GradientLimiter(initial_limit=10, min_limit=2)
+        limiter.on_sample(10 * MS, in_flight=10, dropped=True)
+        self.assertEqual(limiter.limit, 9)
+        for _ in range(50):
+            limiter.on_sample(10 * MS, in_flight=10, dropped=True)
+        self.assertEqual(limiter.limit, 2)
+
+
+class TestAdmissionController(unittest.TestCase):
+    """Tests for AdmissionController."""
+
+    def test_fails_fast_when_queue_is_full(self):
+        """Test that a request over the limit with no queue room is refused."""
+        admission = AdmissionController(fixed_limit(1), max_queue=0)
+        started = admission.acquire()
+        with self.assertRaises(Overloaded) as info:
+            admission.acquire()
+        self.assertEqual(info.exception.status_code, 429)
+        self.assertGreaterEqual(info.exception.retry_after, 1)
+        self.assertEqual(info.exception.headers["Retry-After"], str(info.exception.retry_after))
+        admission.release(started)
+        admission.release(admission.acquire())
+        self.assertEqual(admission.stats()["rejected"], 1)
+
+    def test_queue_wait_times_out(self):
+        """Test that a queued request is refused after queue_timeout."""
+        admission = AdmissionController(fixed_limit(1), queue_timeout=0.02)
+        admission.acquire()
+        with self.assertRaises(Overloaded):
+            admission.acquire()
+        self.assertEqual(admission.queue_depth, 0)
+
+    def test_timed_out_waiters_do_not_pile_up_behind_a_stuck_slot(self):
+        """Test that the heap stays bounded while no release ever pops it."""
+        admission = AdmissionController(fixed_limit(1), queue_timeout=0.0)
+        admission.acquire()  # Hung: never released
+        for _ in range(500):
+            with self.assertRaises(Overloaded):
+                admission.acquire()
+        self.assertEqual(admission.queue_depth, 0)
+        self.assertLessEqual(len(admission._queue), COMPACT_SLACK + 1)
+
+    def test_higher_priority_sources_go_first(self):
+        """Test that waiters are admitted by the priority of their source."""
+        admission = AdmissionController(
+            fixed_limit(1), priorities={"interactive": 0, "batch": 2}, queue_timeout=2.0,
+        )
+        order = []
+
+        def worker(source):
+            started = admission.acquire(source)
+            order.append(source)
+            admission.release(started)
+
+        held = admission.acquire()
+        threads = []
+        for source in ("batch", "other", "interactive"):
+            thread = threading.Thread(target=worker, args=(source,))
+            thread.start()
+            threads.append(thread)
+            wait_for(lambda: admission.queue_depth == len(threads))
+        admission.release(held)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ["interactive", "other", "batch"])
+
+    def test_full_queue_evicts_lower_priority(self):
+        """Test that a high-priority arrival displaces a low-priority waiter."""
+        admission = AdmissionController(
+            fixed_limit(1), priorities={"interactive": 0, "batch": 2},
+            max_queue=1, queue_timeout=2.0,
+        )
+        held = admission.acquire()
+        outcome = {}
+
+        def worker(source):
+            try:
+                admission.release(admission.acquire(source))
+                outcome[source] = "admitted"
+            except Overloaded:
+                outcome[source] = "refused"
+
+        batch = threading.Thread(target=worker, args=("batch",))
+        batch.start()
+        wait_for(lambda: admission.queue_depth == 1)
+        interactive = threading.Thread(target=worker, args=("interactive",))
+        interactive.start()
+        batch.join()
+        admission.release(held)
+        interactive.join()
+        self.assertEqual(outcome, {"batch": "refused", "interactive": "admitted"})
+
+
+class TestGatewayAdmission(unittest.TestCase):
+    """Tests for the gateway in front of a slow backend."""
+
+    def test_slow_backend_sheds_load_with_429(self):
+        """Test that excess requests get 429s and the stats show the queue."""
+        admission = AdmissionController(fixed_limit(2), max_queue=2, queue_timeout=0.05)
+        gateway = GovernanceGateway(admission=admission)
+        release_backend = threading.Event()
+
+        def slow_backend(request):
+            release_backend.wait(2.0)
+            return "done"
+
+        gateway.register_route("slow", slow_backend)
+        responses = []
+
+        def client():
+            request = GatewayRequest.create("Help me learn", source="test")
+            responses.append(gateway.process(request, route="slow"))
+
+        threads = [threading.Thread(target=client) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        wait_for(lambda: admission.in_flight == 2 and admission.queue_depth == 2)
+        stats = gateway.stats
+        self.assertEqual(stats["concurrency_limit"], 2)
+        self.assertEqual(stats["queue_depth"], 2)
+
+        refused = gateway.process(GatewayRequest.create("Help me learn"), route="slow")
+        self.assertEqual(refused.status_code, 429)
+        self.assertFalse(refused.processed)
+        self.assertIn("Retry-After", refused.headers)
+
+        release_backend.set()
+        for thread in threads:
+            thread.join()
+        codes = sorted(response.status_code for response in responses)
+        self.assertEqual(codes[:2], [200, 200])  # The two admitted at once
+        self.assertEqual(gateway.stats["in_flight"], 0)
+        self.assertEqual(gateway.stats["queue_depth"], 0)
+        self.assertEqual(gateway.audit_log[-1].action, "directive_allow")
+
+    def test_limit_adapts_to_backend_slowdown(self):
+        """Test that the limit shrinks once the backend's latency rises."""
+        limiter = GradientLimiter(initial_limit=4, max_limit=50, short_window=4)
+        admission = AdmissionController(limiter, queue_timeout=5.0)
+        gateway = GovernanceGateway(admission=admission, enable_audit=False)
+        delay = [0.002]
+
+        def backend(request):
+            time.sleep(delay[0])
+            return "done"
+
+        gateway.register_route("backend", backend)
+
+        def run(count, clients):
+            def client():
+                for _ in range(count):
+                    gateway.process(GatewayRequest.create("Help me learn"), route="backend")
+            threads = [threading.Thread(target=client) for _ in range(clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        run(10, clients=8)
+        grown = admission.limit
+        self.assertGreater(grown, 4)
+        # A slower backend at the same arrival rate means more requests in
+        # flight at once; more clients stand in for that here
+        delay[0] = 0.03
+        run(3, clients=24)
+        self.assertLess(admission.limit, grown)
+
+    def test_no_admission_keeps_plain_stats(self):
+        """Test that a gateway without admission control is unchanged."""
+        gateway = GovernanceGateway()
+        response = gateway.process(GatewayRequest.create("Help me learn"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers, {})
+        self.assertNotIn("queue_depth", gateway.stats)
+
+
+if __name__ == "__main__":
+    unittest.main()
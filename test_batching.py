@@ -0,0 +1,139 @@
+"""
+Tests for micro-batching at the model boundary.
+
+Covers grouping concurrent prompts into batch calls, the size and wait
+limits, error fan-out, and use behind GovernedAIClient.
+"""
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_client import GovernedAIClient, MockAIModel
+from batching import BatchingModel
+
+
+class RecordingModel:
+    """A batch-capable model that records the batches it is sent."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, system_message):
+        return self.generate_batch([prompt], system_message)[0]
+
+    def generate_batch(self, prompts, system_message):
+        with self._lock:
+            self.batches.append((list(prompts), system_message))
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return [f"{system_message}:{prompt}" for prompt in prompts]
+
+
+class TestBatchingModel(unittest.TestCase):
+    """Tests for BatchingModel."""
+
+    def test_concurrent_prompts_share_calls(self):
+        """Test that prompts sent together go out in few calls, answered in order."""
+        model = RecordingModel()
+        with BatchingModel(model, max_batch_size=8, max_wait_ms=50) as batching:
+            futures = [batching.submit(f"p{i}", "sys") for i in range(20)]
+            results = [future.result(timeout=2) for future in futures]
+        self.assertEqual(results, [f"sys:p{i}" for i in range(20)])
+        self.assertEqual([len(prompts) for prompts, _ in model.batches], [8, 8, 4])
+
+    def test_lone_prompt_waits_at_most_max_wait(self):
+        """Test that a single prompt is sent once the window closes."""
+        with BatchingModel(RecordingModel(), max_wait_ms=20) as batching:
+            started = time.perf_counter()
+            self.assertEqual(batching.generate("hi", "sys"), "sys:hi")
+            elapsed = time.perf_counter() - started
+        self.assertGreaterEqual(elapsed, 0.015)
+        self.assertLess(elapsed, 0.5)
+
+    def test_system_messages_are_not_mixed(self):
+        """Test that each batch carries one system message."""
+        model = RecordingModel()
+        with BatchingModel(model, max_wait_ms=50) as batching:
+            futures = [batching.submit(f"p{i}", f"sys{i % 2}") for i in range(6)]
+            results = [future.result(timeout=2) for future in futures]
+        self.assertEqual(results, [f"sys{i % 2}:p{i}" for i in range(6)])
+        self.assertEqual(sorted(system for _, system in model.batches), ["sys0", "sys1"])
+
+    def test_errors_reach_every_caller(self):
+        """Test that a failed batch call fails each of its futures."""
+        with BatchingModel(RecordingModel(fail=True), max_wait_ms=20) as batching:
+            futures = [batching.submit(f"p{i}", "sys") for i in range(3)]
+            for future in futures:
+                with self.assertRaises(ConnectionError):
+                    future.result(timeout=2)
+
+    def test_models_without_batch_support_are_called_directly(self):
+        """Test that a plain model is not delayed by the batching window."""
+        class Plain:
+            def generate(self, prompt, system_message):
+                return prompt.upper()
+
+        with BatchingModel(Plain(), max_wait_ms=1000) as batching:
+            started = time.perf_counter()
+            self.assertEqual(batching.generate("hi", "sys"), "HI")
+            self.assertLess(time.perf_counter() - started, 0.5)
+            self.assertEqual(batching.stats["batches"], 0)
+
+    def test_close_flushes_and_rejects_new_prompts(self):
+        """Test that queued prompts are answered on close and later ones refused."""
+        batching = BatchingModel(RecordingModel(), max_wait_ms=1000)
+        future = batching.submit("last", "sys")
+        batching.close()
+        self.assertEqual(future.result(timeout=2), "sys:last")
+        with self.assertRaises(RuntimeError):
+            batching.submit("late", "sys")
+
+    def test_submit_racing_close_never_hangs(self):
+        """Test that every prompt submitted around close() is answered or refused."""
+        for _ in range(20):
+            batching = BatchingModel(RecordingModel(), max_wait_ms=1)
+            futures, refused = [], []
+            start = threading.Barrier(5)
+
+            def submitter():
+                start.wait()
+                for i in range(50):
+                    try:
+                        futures.append(batching.submit(f"p{i}", "sys"))
+                    except RuntimeError:
+                        refused.append(i)
+
+            threads = [threading.Thread(target=submitter) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            start.wait()
+            batching.close()
+            for thread in threads:
+                thread.join()
+            for future in futures:
+                self.assertTrue(future.result(timeout=2).startswith("sys:"))
+            self.assertEqual(len(futures) + len(refused), 200)
+
+    def test_governed_client_threads_are_batched(self):
+        """Test that concurrent GovernedAIClient.process calls share batches."""
+        model = MockAIModel()
+        with BatchingModel(model, max_batch_size=32, max_wait_ms=20) as batching:
+            client = GovernedAIClient(model=batching)
+            prompts = [f"Help me learn topic {i}" for i in range(16)]
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                responses = list(pool.map(client.process, prompts))
+            stats = batching.stats
+        for prompt, response in zip(prompts, responses):
+            self.assertIn(prompt, response.content)
+        self.assertEqual(stats["items"], 16)
+        self.assertLess(stats["batches"], 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
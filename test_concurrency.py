@@ -0,0 +1,163 @@
+"""
+Stress tests for shared state under many threads.
+
+GovernanceGateway and GovernedAIClient are driven from 64 threads at once
+with a tiny switch interval, so that on a GIL build threads are preempted
+between almost every bytecode; on a free-threaded build they run truly in
+parallel. Every count must come out exact.
+"""
+
+import sys
+import threading
+import unittest
+
+from ai_client import GovernedAIClient
+from core_directive import ActionResult, CoreDirective, DirectiveEvaluation
+from gateway import AuditBuffer, AuditEntry, GatewayRequest, GovernanceGateway
+
+THREADS = 64
+PER_THREAD = 250
+
+
+class BlockingDirective(CoreDirective):
+    """A directive that blocks prompts mentioning "forbidden"."""
+
+    def evaluate_intent(self, intent):
+        if "forbidden" in intent:
+            return DirectiveEvaluation(result=ActionResult.BLOCKED, reason="Forbidden")
+        return DirectiveEvaluation(result=ActionResult.ALLOWED, reason="Allowed")
+
+
+def run_threads(target) -> None:
+    """Run target(index) in THREADS threads released at the same moment."""
+    barrier = threading.Barrier(THREADS)
+
+    def worker(index):
+        barrier.wait()
+        target(index)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestSharedStateStress(unittest.TestCase):
+    """Exact counts with 64 concurrent threads."""
+
+    def setUp(self):
+        self._interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self._interval)
+
+    def test_gateway_counts_and_audit_log_are_exact(self):
+        """Test that no request or audit entry is lost."""
+        gateway = GovernanceGateway(directive=BlockingDirective())
+
+        def work(index):
+            for i in range(PER_THREAD):
+                content = "forbidden" if i % 5 == 0 else f"Help {index}-{i}"
+                gateway.process(GatewayRequest.create(content, source=f"t{index}"))
+
+        run_threads(work)
+        total = THREADS * PER_THREAD
+        stats = gateway.stats
+        self.assertEqual(stats["total_requests"], total)
+        blocked = THREADS * len(range(0, PER_THREAD, 5))
+        self.assertEqual(stats["blocked_or_reviewed"], blocked)
+        self.assertEqual(stats["passed"], total - blocked)
+
+        log = gateway.audit_log
+        self.assertEqual(len(log), total)
+        self.assertEqual(len({entry.request_id for entry in log}), total)
+        stamps = [entry.created_ns for entry in log]
+        self.assertEqual(stamps, sorted(stamps))
+
+    def test_client_counts_are_exact(self):
+        """Test that the request and blocked counters do not drift."""
+        client = GovernedAIClient(directive=BlockingDirective())
+
+        def work(index):
+            for i in range(PER_THREAD):
+                client.process("forbidden" if i % 4 == 0 else "Help me learn")
+
+        run_threads(work)
+        stats = client.stats
+        self.assertEqual(stats["total_requests"], THREADS * PER_THREAD)
+        self.assertEqual(stats["blocked_requests"], THREADS * len(range(0, PER_THREAD, 4)))
+
+
+class TestAuditBuffer(unittest.TestCase):
+    """Tests for AuditBuffer."""
+
+    def entry(self, details):
+        return AuditEntry(1, None, "test", ActionResult.ALLOWED, "test", details)
+
+    def test_merges_threads_in_time_order(self):
+        """Test that entries from several threads come back oldest first."""
+        buffer = AuditBuffer()
+        first = self.entry("first")
+        thread = threading.Thread(target=lambda: buffer.append(self.entry("second")))
+        buffer.append(first)
+        thread.start()
+        thread.join()
+        buffer.append(self.entry("third"))
+        self.assertEqual([e.details for e in buffer.entries()], ["first", "second", "third"])
+        self.assertEqual(len(buffer), 3)
+
+    def test_clear_drops_shards(self):
+        """Test that clearing empties the buffer and later appends still land."""
+        buffer = AuditBuffer()
+        for i in range(3):
+            thread = threading.Thread(target=lambda: buffer.append(self.entry("old")))
+            thread.start()
+            thread.join()
+        buffer.clear()
+        self.assertEqual(buffer.entries(), [])
+        self.assertEqual(len(buffer._shards), 0)
+        buffer.append(self.entry("new"))
+        self.assertEqual([e.details for e in buffer.entries()], ["new"])
+
+    def test_append_racing_clear_is_kept(self):
+        """Test that an entry appended while the buffer is cleared is not lost."""
+        buffer = AuditBuffer()
+        buffer.append(self.entry("before"))
+
+        class ClearingShard(list):
+            def append(self, entry):
+                buffer.clear()  # Lands between the generation check and the append
+                super().append(entry)
+
+        generation, _ = buffer._local.slot
+        buffer._local.slot = (generation, ClearingShard())
+        buffer.append(self.entry("racing"))
+        self.assertEqual([e.details for e in buffer.entries()], ["racing"])
+
+    def test_finished_threads_shards_are_merged(self):
+        """Test that exited threads' shards are folded into one, entries kept in order."""
+        buffer = AuditBuffer()
+        for i in range(5):
+            thread = threading.Thread(target=lambda i=i: buffer.append(self.entry(f"t{i}")))
+            thread.start()
+            thread.join()
+        buffer.append(self.entry("main"))
+        self.assertEqual(len(buffer._shards), 2)
+        self.assertEqual(
+            [e.details for e in buffer.entries()], ["t0", "t1", "t2", "t3", "t4", "main"],
+        )
+
+    def test_gateway_blocked_count_restarts_after_clear(self):
+        """Test that stats count blocked requests from the last clear on."""
+        gateway = GovernanceGateway(directive=BlockingDirective())
+        gateway.process(GatewayRequest.create("forbidden"))
+        gateway.clear_audit_log()
+        gateway.process(GatewayRequest.create("forbidden"))
+        gateway.process(GatewayRequest.create("Help me learn"))
+        self.assertEqual(gateway.stats["blocked_or_reviewed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
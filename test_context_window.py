@@ -0,0 +1,88 @@
+"""
+Tests for trimming conversations to a context window.
+
+Covers which messages are kept, the running token totals, the token
+count cache, and the budget taken from the environment.
+"""
+
+import os
+import unittest
+from unittest import mock
+
+from context_window import MESSAGE_OVERHEAD, Conversation, TokenCounter, prompt_budget
+
+
+def message(role: str, tokens: int) -> dict:
+    """A message whose content estimates to the given token count."""
+    return {"role": role, "content": "x" * (tokens * 4)}
+
+
+class TestConversation(unittest.TestCase):
+    """Tests for Conversation."""
+
+    def test_fitting_conversation_is_kept_whole(self):
+        """Test that nothing is dropped under the budget."""
+        conversation = Conversation([message("system", 10), message("user", 10)])
+        window = conversation.fit(1000, directive_tokens=50)
+        self.assertEqual((window.start, window.dropped, window.note), (0, 0, None))
+        self.assertIs(conversation.window_messages(window), conversation.messages)
+
+    def test_oldest_turns_are_dropped_and_system_kept(self):
+        """Test that system messages and the newest turns survive."""
+        messages = [message("system", 20)] + [
+            message("user" if i % 2 else "assistant", 100) for i in range(10)
+        ]
+        conversation = Conversation(messages)
+        window = conversation.fit(400, directive_tokens=50)
+        kept = conversation.window_messages(window)
+
+        self.assertIs(kept[0], messages[0])
+        self.assertEqual(kept[1:], messages[-len(kept) + 1:])
+        self.assertEqual(window.dropped, len(messages) - len(kept))
+        self.assertIn(f"{window.dropped} earlier messages omitted", window.note)
+        self.assertLessEqual(window.tokens, 400)
+        # One more turn would not have fit
+        self.assertGreater(window.tokens + 100 + MESSAGE_OVERHEAD, 400)
+
+    def test_latest_message_is_always_kept(self):
+        """Test that a budget too small for anything keeps the last turn."""
+        conversation = Conversation([message("user", 500), message("user", 500)])
+        window = conversation.fit(10)
+        self.assertEqual(conversation.window_messages(window), [conversation.messages[-1]])
+
+    def test_extend_counts_only_new_messages(self):
+        """Test that appending a turn tokenizes just that turn."""
+        calls = []
+        counter = TokenCounter(lambda text: calls.append(text) or len(text))
+        conversation = Conversation([message("user", 5), message("assistant", 5)], counter)
+        conversation.extend([{"role": "user", "content": "new"}])
+        self.assertEqual(len(calls), 2)  # The two earlier contents are equal
+        self.assertEqual(conversation.tokens, 20 + 20 + 3 + 3 * MESSAGE_OVERHEAD)
+
+
+class TestTokenCounter(unittest.TestCase):
+    """Tests for TokenCounter."""
+
+    def test_counts_are_cached_and_bounded(self):
+        """Test that a content is tokenized once and old entries go first."""
+        calls = []
+        counter = TokenCounter(lambda text: calls.append(text) or 1, max_entries=2)
+        for text in ("a", "b", "a", "c", "a"):
+            counter.count(text)
+        self.assertEqual(calls, ["a", "b", "c", "a"])
+
+
+class TestPromptBudget(unittest.TestCase):
+    """Tests for prompt_budget."""
+
+    def test_budget_reserves_completion_tokens(self):
+        """Test that max_tokens comes out of CONTEXT_MAX_TOKENS."""
+        with mock.patch.dict(os.environ, {"CONTEXT_MAX_TOKENS": "8192"}):
+            self.assertEqual(prompt_budget(), 8192)
+            self.assertEqual(prompt_budget(1024), 7168)
+        with mock.patch.dict(os.environ, {"CONTEXT_MAX_TOKENS": "0"}):
+            self.assertIsNone(prompt_budget(1024))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+"""
+Tests for the directive registry.
+
+Covers loading bundles, rejecting bad ones, publishing new defaults,
+in-flight requests keeping their version, and watching the file.
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import core_directive
+import evaluator
+from core_directive import ActionResult
+from directive_registry import BUILTIN_VERSION, DirectiveRegistry
+from gateway import GatewayRequest, GovernanceGateway
+
+
+class RegistryTestCase(unittest.TestCase):
+    """Writes bundles to a temporary file and restores the defaults."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        self._directive = core_directive.get_directive()
+        self._evaluator = evaluator.get_evaluator()
+
+    def tearDown(self):
+        os.unlink(self.path)
+        core_directive.set_directive(self._directive)
+        evaluator.set_evaluator(self._evaluator)
+
+    def write(self, bundle) -> None:
+        text = bundle if isinstance(bundle, str) else json.dumps(bundle)
+        # Keep the stamp distinct even on coarse-mtime filesystems
+        previous = os.stat(self.path).st_mtime_ns
+        with open(self.path, "w") as f:
+            f.write(text)
+        os.utime(self.path, ns=(previous + 10**9, previous + 10**9))
+
+
+class TestLoading(RegistryTestCase):
+    """Tests for loading bundles."""
+
+    def test_vocabularies_come_from_the_bundle(self):
+        """Test that a loaded bundle changes what is flagged."""
+        self.write({
+            "version": "v2",
+            "chat_directive": "Be kind.",
+            "harm_indicators": ["Sabotage"],
+            "evaluator": {"harm_indicators": {"privacy": ["snoop"]}},
+        })
+        registry = DirectiveRegistry(self.path)
+        self.assertEqual(registry.current.version, BUILTIN_VERSION)
+        version = registry.load()
+
+        self.assertIs(registry.current, version)
+        self.assertEqual(version.version, "v2")
+        self.assertEqual(version.chat_directive, "Be kind.")
+        self.assertEqual(version.directive.evaluate_intent("sabotage it").result, ActionResult.REVIEW)
+        self.assertEqual(version.directive.evaluate_intent("harm it").result, ActionResult.ALLOWED)
+        impacts = version.evaluator.evaluate("snoop on them").impacts
+        self.assertEqual([i.category.value for i in impacts], ["privacy"])
+
+    def test_version_defaults_to_content_hash(self):
+        """Test that a bundle without a version is named by its hash."""
+        self.write({"harm_indicators": ["x"]})
+        version = DirectiveRegistry(self.path).load()
+        self.assertEqual(len(version.version), 12)
+        self.assertEqual(version.directive.version, version.version)
+
+    def test_bad_bundles_keep_the_current_version(self):
+        """Test that invalid bundles are rejected without a swap."""
+        registry = DirectiveRegistry(self.path)
+        bundles = (
+            "{not json",
+            {"harm_indicators": "harm"},
+            {"evaluator": {"harm_indicators": {"moral": ["x"]}}},
+            {"evaluator": {"harm_indicators": ["physical"]}},
+            {"evaluator": {"harm_indicators": {"physical": 5}}},
+            {"evaluator": {"harm_indicators": {"physical": [1]}}},
+            {"evaluator": {"positive_indicators": {"helpful": "help"}}},
+        )
+        for bundle in bundles:
+            self.write(bundle)
+            with self.assertRaises(ValueError):
+                registry.load()
+            self.assertEqual(registry.current.version, BUILTIN_VERSION)
+
+    def test_publish_replaces_process_defaults(self):
+        """Test that a publishing registry updates get_directive and get_evaluator."""
+        self.write({"version": "published"})
+        DirectiveRegistry(self.path, publish=True).load()
+        self.assertEqual(core_directive.get_directive().version, "published")
+        self.assertEqual(evaluator.get_evaluator().version, "published")
+
+    def test_preparers_run_before_the_swap(self):
+        """Test that preparers see the new version while the old one is current."""
+        registry = DirectiveRegistry(self.path)
+        seen = []
+        registry.add_preparer(lambda v: seen.append((v.version, registry.current.version)))
+        registry.add_preparer(registry._preparers[0])  # Added once only
+        self.write({"version": "next"})
+        registry.load()
+        self.assertEqual(seen, [(BUILTIN_VERSION, BUILTIN_VERSION), ("next", BUILTIN_VERSION)])
+        self.assertIs(registry.get("next"), registry.current)
+
+
+class TestHotReload(RegistryTestCase):
+    """Tests for reloading while serving."""
+
+    def test_in_flight_request_keeps_its_version(self):
+        """Test that a reload mid-request applies only to later requests."""
+        self.write({"version": "v1"})
+        registry = DirectiveRegistry(self.path, publish=True)
+        registry.load()
+        gateway = GovernanceGateway()
+
+        def reloading_handler(request):
+            self.write({"version": "v2", "harm_indicators": ["learn"]})
+            registry.load()
+            return "done"
+
+        gateway.register_route("reload", reloading_handler)
+        first = gateway.process(GatewayRequest.create("Help me learn"), route="reload")
+        second = gateway.process(GatewayRequest.create("Help me learn"))
+
+        self.assertTrue(first.processed)
+        self.assertFalse(second.processed)  # "learn" is a harm term in v2
+        self.assertEqual([e.directive_version for e in gateway.audit_log], ["v1", "v2"])
+        exported = json.loads(gateway.export_audit_log())
+        self.assertEqual(exported[0]["directive_version"], "v1")
+
+    def test_reload_if_changed(self):
+        """Test change detection, and that a bad file is reported once."""
+        self.write({"version": "a"})
+        registry = DirectiveRegistry(self.path)
+        self.assertTrue(registry.reload_if_changed())
+        self.assertFalse(registry.reload_if_changed())
+
+        self.write("{broken")
+        self.assertFalse(registry.reload_if_changed())
+        self.assertFalse(registry.reload_if_changed())
+        self.assertEqual(registry.failures, 1)
+        self.assertEqual(registry.current.version, "a")
+
+        self.write({"version": "b"})
+        self.assertTrue(registry.reload_if_changed())
+        self.assertEqual(registry.stats()["version"], "b")
+
+    def test_watcher_picks_up_changes(self):
+        """Test that the background watcher swaps in an edited bundle."""
+        self.write({"version": "before"})
+        registry = DirectiveRegistry(self.path)
+        registry.load()
+        registry.watch(interval=0.01)
+        try:
+            self.write({"version": "after"})
+            deadline = time.monotonic() + 2
+            while registry.current.version != "after" and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            registry.stop()
+        self.assertEqual(registry.current.version, "after")
+
+    def test_watcher_survives_failing_reloads(self):
+        """Test that malformed bundles and failing preparers never stop the watcher."""
+        registry = DirectiveRegistry(self.path)
+        registry.add_preparer(lambda v: v.version == "boom" and 1 / 0)
+        registry.watch(interval=0.01)
+        try:
+            for bundle in ({"evaluator": {"harm_indicators": {"physical": [1]}}}, {"version": "boom"}):
+                failures = registry.failures
+                self.write(bundle)
+                deadline = time.monotonic() + 2
+                while registry.failures == failures and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                self.assertEqual(registry.current.version, BUILTIN_VERSION)
+            self.write({"version": "after"})
+            deadline = time.monotonic() + 2
+            while registry.current.version != "after" and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            registry.stop()
+        self.assertEqual(registry.current.version, "after")
+
+
+if __name__ == "__main__":
+    unittest.main()
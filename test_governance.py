@@ -8,8 +8,12 @@ This module provides tests for all components of the governance system:
 - evaluator.py - Detailed evaluation engine
 """
 
+import asyncio
+import threading
 import unittest
-from datetime import datetime, timezone
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest import mock
 
 from core_directive import (
     ActionResult,
@@ -161,6 +165,87 @@ class TestGovernedAIClient(unittest.TestCase):
         )
 
 
+class BlockingDirective(CoreDirective):
+    """A directive that blocks prompts mentioning "forbidden"."""
+
+    def evaluate_intent(self, intent):
+        if "forbidden" in intent:
+            return DirectiveEvaluation(result=ActionResult.BLOCKED, reason="Forbidden")
+        return super().evaluate_intent(intent)
+
+
+class SlowAsyncModel:
+    """An async-only model that records how many calls overlap."""
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def agenerate(self, prompt, system_message):
+        self.calls.append(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01 if prompt.endswith("0") else 0.001)
+        self.active -= 1
+        return f"Answer: {prompt}"
+
+
+class TestConcurrentProcessing(unittest.TestCase):
+    """Tests for aprocess and process_many."""
+
+    def test_process_many_keeps_order_and_skips_blocked(self):
+        """Test that responses line up with prompts and blocked ones skip the model."""
+        model = SlowAsyncModel()
+        client = GovernedAIClient(model=model, directive=BlockingDirective())
+        prompts = [f"Help me learn {i}" for i in range(10)]
+        prompts[3] = "Something forbidden"
+        responses = asyncio.run(client.process_many(prompts, concurrency=4))
+
+        self.assertEqual([r.original_prompt for r in responses], prompts)
+        self.assertEqual(responses[3].directive_evaluation.result, ActionResult.BLOCKED)
+        self.assertEqual(responses[0].content, "Answer: Help me learn 0")
+        self.assertNotIn("Something forbidden", model.calls)
+        self.assertEqual(len(model.calls), 9)
+        self.assertEqual(model.peak, 4)
+        self.assertEqual(client.stats["blocked_requests"], 1)
+        self.assertEqual(client.stats["total_requests"], 10)
+
+    def test_sync_models_run_in_threads(self):
+        """Test that aprocess and process_many work with a synchronous model."""
+        client = create_test_client()
+        response = asyncio.run(client.aprocess("Help me learn"))
+        self.assertIn("Help me learn", response.content)
+        responses = asyncio.run(client.process_many(["a", "b", "c"], concurrency=2))
+        self.assertEqual([r.original_prompt for r in responses], ["a", "b", "c"])
+
+    def test_async_only_model_from_sync_process(self):
+        """Test that process() drives an async-only model."""
+        client = GovernedAIClient(model=SlowAsyncModel())
+        self.assertEqual(client.process("Help me learn").content, "Answer: Help me learn")
+
+    def test_invalid_concurrency(self):
+        """Test that concurrency below one is rejected."""
+        with self.assertRaises(ValueError):
+            asyncio.run(create_test_client().process_many(["a"], concurrency=0))
+
+    def test_counters_are_exact_across_threads(self):
+        """Test that concurrent process calls are all counted."""
+        client = GovernedAIClient(directive=BlockingDirective())
+
+        def worker():
+            for i in range(200):
+                client.process("forbidden" if i % 4 == 0 else "Help me learn")
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(client.stats["total_requests"], 1600)
+        self.assertEqual(client.stats["blocked_requests"], 400)
+
+
 class TestMockAIModel(unittest.TestCase):
     """Tests for the MockAIModel class."""
 
@@ -244,6 +329,47 @@ class TestGatewayRequest(unittest.TestCase):
         self.assertIsNotNone(request.id)
         self.assertIsInstance(request.timestamp, datetime)
 
+    def test_ids_are_unique_uuid_strings(self):
+        """Test that generated IDs render as distinct UUID-style strings."""
+        ids = {GatewayRequest.create("x").id for _ in range(1000)}
+        self.assertEqual(len(ids), 1000)
+        for request_id in list(ids)[:10]:
+            self.assertEqual(str(uuid.UUID(request_id)), request_id)
+
+    def test_timestamp_tracks_wall_clock(self):
+        """Test that the lazily converted timestamp is close to now."""
+        request = GatewayRequest.create("x")
+        delta = abs(datetime.now(timezone.utc) - request.timestamp)
+        self.assertLess(delta, timedelta(seconds=1))
+        self.assertEqual(request.timestamp.tzinfo, timezone.utc)
+
+    def test_timestamp_follows_wall_clock_steps(self):
+        """Test that a wall clock set after startup shows in new timestamps."""
+        stepped = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        with mock.patch("time.time_ns", return_value=int(stepped.timestamp()) * 10**9):
+            request = GatewayRequest.create("x")
+        self.assertEqual(request.timestamp, stepped)
+        self.assertLess(request.created_ns, GatewayRequest.create("y").created_ns)
+
+    def test_explicit_fields_round_trip(self):
+        """Test construction with a string ID and datetime, as before."""
+        when = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        request = GatewayRequest("req-1", "hi", "test", when, {"k": "v"})
+        self.assertEqual(request.id, "req-1")
+        self.assertEqual(request.timestamp, when)
+        self.assertEqual(request.metadata, {"k": "v"})
+        self.assertEqual(request, GatewayRequest("req-1", "hi", "test", when, {"k": "v"}))
+
+    def test_records_are_slotted(self):
+        """Test that requests and responses carry no per-instance dict."""
+        gateway = GovernanceGateway(enable_audit=True)
+        request = GatewayRequest.create("Help me learn to cook")
+        response = gateway.process(request)
+        for record in (request, response, gateway.audit_log[0]):
+            self.assertFalse(hasattr(record, "__dict__"))
+        self.assertEqual(response.request_id, request.id)
+        self.assertEqual(gateway.audit_log[0].request_id, request.id)
+
 
 class TestDirectiveEvaluator(unittest.TestCase):
     """Tests for the DirectiveEvaluator class."""
@@ -0,0 +1,114 @@
+"""
+Tests for the pooled upstream clients.
+
+Covers the DNS cache, connection reuse over HTTP/1.1 keep-alive, HTTP/2
+multiplexing against the h2c mock, falling back when the protocol is
+switched off, and the transport's streaming and error mapping.
+"""
+
+import asyncio
+import importlib.util
+import json
+import unittest
+
+import httpx
+
+import http_clients
+from benchmarks.mock_upstream import H2MockUpstream, MockUpstream
+from http_clients import DNSCache
+
+HAS_H2 = importlib.util.find_spec("h2") is not None
+BODY = {"model": "mock", "messages": [{"role": "user", "content": "hi"}]}
+
+
+class TestDNSCache(unittest.TestCase):
+    """Tests for DNSCache."""
+
+    def test_resolves_once_per_ttl(self):
+        """Test that a name is looked up once and then served from the cache."""
+        dns = DNSCache(ttl=60)
+        first = dns.resolve("localhost", 80)
+        self.assertTrue(first)
+        self.assertEqual(dns.resolve("localhost", 80), first)
+        self.assertEqual(dns.stats(), {"dns_lookups": 1, "dns_hits": 1})
+
+        dns.forget("localhost", 80)
+        dns.resolve("localhost", 80)
+        self.assertEqual(dns.lookups.value, 2)
+
+    def test_address_literals_and_zero_ttl_are_not_cached(self):
+        """Test that only names are cached, and a TTL of 0 turns caching off."""
+        self.assertFalse(DNSCache(ttl=60).caches("127.0.0.1"))
+        self.assertFalse(DNSCache(ttl=60).caches("::1"))
+        self.assertTrue(DNSCache(ttl=60).caches("api.openai.com"))
+        self.assertFalse(DNSCache(ttl=0).caches("api.openai.com"))
+
+
+class TestClients(unittest.TestCase):
+    """Tests for create_http_client and create_async_http_client."""
+
+    def test_keep_alive_reuses_one_connection(self):
+        """Test that sequential requests share a pooled HTTP/1.1 connection."""
+        with MockUpstream() as upstream:
+            base_url = upstream.base_url.replace("127.0.0.1", "localhost")
+            with http_clients.create_http_client(base_url=base_url) as client:
+                for _ in range(5):
+                    response = client.post("/chat/completions", json=BODY)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.http_version, "HTTP/1.1")
+            self.assertEqual(upstream.connections, 1)
+
+    def test_errors_are_httpx_errors(self):
+        """Test that connection failures and timeouts raise httpx's exceptions."""
+        with MockUpstream() as upstream:
+            base_url = upstream.base_url
+        with http_clients.create_http_client(base_url=base_url) as client:
+            with self.assertRaises(httpx.ConnectError):
+                client.get("/")
+
+        async def connect():
+            async with http_clients.create_async_http_client(http2="0", base_url=base_url) as client:
+                await client.get("/")
+
+        with self.assertRaises(httpx.ConnectError):
+            asyncio.run(connect())
+
+        with MockUpstream(delay=0.5) as upstream:
+            with http_clients.create_http_client(base_url=upstream.base_url, timeout=0.05) as client:
+                with self.assertRaises(httpx.ReadTimeout):
+                    client.post("/chat/completions", json=BODY)
+
+    def test_streamed_response_reads_and_closes(self):
+        """Test that a streamed response body arrives whole and the connection is reused."""
+        with MockUpstream() as upstream:
+            with http_clients.create_http_client(base_url=upstream.base_url) as client:
+                for _ in range(2):
+                    with client.stream("POST", "/chat/completions", json=BODY) as response:
+                        body = b"".join(response.iter_bytes())
+                    self.assertEqual(json.loads(body)["choices"][0]["message"]["content"], "Mock response.")
+            self.assertEqual(upstream.connections, 1)
+
+    def test_http2_disabled_uses_http1(self):
+        """Test that mode 0 never offers HTTP/2."""
+        self.assertEqual(http_clients.protocols("0"), (True, False))
+
+    @unittest.skipUnless(HAS_H2, "the h2 package is not installed")
+    def test_http2_multiplexes_concurrent_requests(self):
+        """Test that concurrent requests share one HTTP/2 connection."""
+        async def send(base_url):
+            async with http_clients.create_async_http_client(http2="h2c", base_url=base_url) as client:
+                responses = await asyncio.gather(
+                    *(client.post("/chat/completions", json=BODY) for _ in range(10))
+                )
+            return responses
+
+        with H2MockUpstream(delay=0.01) as upstream:
+            responses = asyncio.run(send(upstream.base_url))
+            self.assertEqual(upstream.connections, 1)
+            self.assertEqual(upstream.requests, 10)
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertTrue(all(r.http_version == "HTTP/2" for r in responses))
+
+
+if __name__ == "__main__":
+    unittest.main()
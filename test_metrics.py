@@ -0,0 +1,183 @@
+"""
+Tests for the metrics module.
+
+Covers HDR bucketing, per-thread recording, the Prometheus text output and
+the instrumentation of the gateway and AI client.
+
+benchmarks/metrics_overhead.py enforces the 1 us recording budget; the test
+here allows twice that so a noisy shared runner does not fail the suite,
+while still catching a gross regression. Override it with
+METRICS_RECORD_BUDGET_NS.
+"""
+
+import os
+import threading
+import unittest
+
+import metrics
+from ai_client import create_test_client
+from benchmarks.metrics_overhead import per_request_ns
+from gateway import GatewayRequest, GovernanceGateway, content_filter_middleware
+from metrics import (
+    MAX_NS,
+    NUM_BUCKETS,
+    Histogram,
+    MetricsRegistry,
+    bucket_index,
+    bucket_upper_ns,
+)
+
+RECORD_BUDGET_NS = float(os.environ.get("METRICS_RECORD_BUDGET_NS", "2000"))
+
+
+class TestBuckets(unittest.TestCase):
+    """Tests for the HDR bucket layout."""
+
+    def test_buckets_are_contiguous(self):
+        """Test that every value falls in the bucket whose bounds contain it."""
+        previous = -1
+        for value in list(range(0, 5000)) + [10**6, 10**9, MAX_NS - 1]:
+            index = bucket_index(value)
+            self.assertLess(index, NUM_BUCKETS)
+            self.assertGreaterEqual(index, previous)
+            self.assertLessEqual(value, bucket_upper_ns(index))
+            if index > 0:
+                self.assertGreater(value, bucket_upper_ns(index - 1))
+            previous = index
+
+    def test_relative_error_bounded(self):
+        """Test that bucket width stays within 12.5% of the value."""
+        for value in (17, 999, 123_456, 987_654_321):
+            upper = bucket_upper_ns(bucket_index(value))
+            self.assertLessEqual((upper - value) / value, 0.125)
+
+    def test_huge_values_clamped(self):
+        """Test that durations beyond the range land in the last bucket."""
+        histogram = Histogram()
+        histogram.observe_ns(MAX_NS * 10)
+        self.assertEqual(histogram.snapshot()[0][NUM_BUCKETS - 1], 1)
+
+
+class TestRecording(unittest.TestCase):
+    """Tests for counters and histograms."""
+
+    def test_threads_do_not_lose_updates(self):
+        """Test that concurrent recording from many threads is exact."""
+        registry = MetricsRegistry()
+        counter = registry.counter("c_total", "c").labels()
+        histogram = registry.histogram("h_seconds", "h").labels()
+
+        def work():
+            for i in range(10_000):
+                counter.inc()
+                histogram.observe_ns(i)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(counter.value, 80_000)
+        self.assertEqual(histogram.count, 80_000)
+
+    def test_exited_threads_leave_no_cells(self):
+        """Test that a thread's cells are folded in and dropped when it exits."""
+        registry = MetricsRegistry()
+        counter = registry.counter("c_total", "c").labels()
+        histogram = registry.histogram("h_seconds", "h").labels()
+
+        def work():
+            counter.inc(2)
+            histogram.observe_ns(1000)
+
+        for _ in range(50):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        work()  # This thread stays alive and keeps its cells
+        self.assertEqual(len(counter._cells), 1)
+        self.assertEqual(len(histogram._cells), 1)
+        self.assertEqual(counter.value, 102)
+        self.assertEqual(histogram.count, 51)
+        self.assertEqual(histogram.snapshot()[1], 51_000)
+
+    def test_quantile(self):
+        """Test that quantiles come out within bucket precision."""
+        histogram = Histogram()
+        for ms in range(1, 101):
+            histogram.observe(ms / 1000)
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.050, delta=0.050 * 0.125)
+        self.assertAlmostEqual(histogram.quantile(0.99), 0.099, delta=0.099 * 0.125)
+
+    def test_registry_returns_existing_family(self):
+        """Test that registering the same metric twice is idempotent."""
+        registry = MetricsRegistry()
+        first = registry.counter("x_total", "x", ("a",))
+        self.assertIs(registry.counter("x_total", "x", ("a",)), first)
+        with self.assertRaises(ValueError):
+            registry.histogram("x_total", "x", ("a",))
+        with self.assertRaises(ValueError):
+            first.labels("one", "two")
+
+    def test_recording_within_budget(self):
+        """Test that a request's recordings cost less than the budget."""
+        # Best of a few measurements; shared CI machines are noisy
+        cost = min(per_request_ns(iterations=20_000) for _ in range(5))
+        self.assertLess(cost, RECORD_BUDGET_NS, f"{cost:.0f} ns per request")
+
+
+class TestExposition(unittest.TestCase):
+    """Tests for the Prometheus text format."""
+
+    def test_render(self):
+        """Test counter and cumulative histogram output."""
+        registry = MetricsRegistry()
+        registry.counter("req_total", "Requests.", ("result",)).labels('a"b').inc(3)
+        histogram = registry.histogram("lat_seconds", "Latency.", bounds=(0.001, 0.01)).labels()
+        histogram.observe(0.0005)
+        histogram.observe(0.005)
+        histogram.observe(1.0)
+
+        text = registry.render()
+        self.assertIn("# TYPE req_total counter", text)
+        self.assertIn('req_total{result="a\\"b"} 3', text)
+        self.assertIn('lat_seconds_bucket{le="0.001"} 1', text)
+        self.assertIn('lat_seconds_bucket{le="0.01"} 2', text)
+        self.assertIn('lat_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("lat_seconds_count 3", text)
+        self.assertTrue(text.endswith("\n"))
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests that the governance layer records its stages."""
+
+    def stage(self, component, stage):
+        return metrics.STAGE_SECONDS.labels(component, stage).count
+
+    def outcome(self, component, result):
+        return metrics.REQUESTS.labels(component, result).value
+
+    def test_gateway_records_stages_and_outcomes(self):
+        """Test that the gateway times middleware and evaluation."""
+        gateway = GovernanceGateway()
+        gateway.add_middleware(content_filter_middleware(["forbidden"]))
+        evaluations = self.stage("gateway", "evaluation")
+        allowed = self.outcome("gateway", "allowed")
+        blocked = self.outcome("gateway", "middleware_block")
+
+        gateway.process(GatewayRequest.create("Help me learn to cook"))
+        gateway.process(GatewayRequest.create("something forbidden"))
+
+        self.assertEqual(self.stage("gateway", "evaluation"), evaluations + 1)
+        self.assertEqual(self.outcome("gateway", "allowed"), allowed + 1)
+        self.assertEqual(self.outcome("gateway", "middleware_block"), blocked + 1)
+
+    def test_ai_client_records_upstream(self):
+        """Test that the AI client times the model call."""
+        before = self.stage("ai_client", "upstream")
+        create_test_client().process("Help me learn to cook")
+        self.assertEqual(self.stage("ai_client", "upstream"), before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+Tests for the sampling profiler.
+
+Covers stack collection in collapsed format, the overhead and stack-count
+bounds, one-profile-at-a-time and the admin token check.
+"""
+
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import profiler
+from profiler import OTHER_STACK, SamplingProfiler
+
+
+def spin_in_marker_function(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(200))
+
+
+class BusyThread:
+    """A thread burning CPU in a recognisable function."""
+
+    def __enter__(self):
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=spin_in_marker_function, args=(self.stop,))
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """Tests for SamplingProfiler."""
+
+    def test_collapsed_output_contains_hot_function(self):
+        """Test that a busy function shows up in root-first collapsed stacks."""
+        sampler = SamplingProfiler(interval=0.002)
+        with BusyThread():
+            sampler.start(duration=0.3)
+            self.assertTrue(sampler.wait(5))
+
+        self.assertGreater(sampler.samples, 10)
+        lines = sampler.collapsed().splitlines()
+        hot = [line for line in lines if "spin_in_marker_function" in line]
+        self.assertTrue(hot)
+        stack, count = hot[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+        frames = stack.split(";")
+        self.assertIn("_bootstrap", frames[0])  # Root first
+        self.assertIn("test_profiler.py", frames[-1])
+
+    def test_overhead_is_bounded(self):
+        """Test that the sampler backs off to stay under max_overhead."""
+        sampler = SamplingProfiler(interval=0.001, max_overhead=0.02)
+        with BusyThread():
+            sampler.start(duration=0.5)
+            sampler.wait(5)
+        # Allow slack for the final sample and timer granularity
+        self.assertLess(sampler.overhead, 0.02 * 2)
+
+    def test_distinct_stacks_are_capped(self):
+        """Test that stacks past max_stacks are merged into [other]."""
+        sampler = SamplingProfiler(max_stacks=1)
+        sampler.stacks["a;b"] = 1
+        sampler._sample(own_id=0)  # Sample this thread too
+        self.assertEqual(len(sampler.stacks), 2)
+        self.assertIn(OTHER_STACK, sampler.stacks)
+
+    def test_invalid_settings(self):
+        """Test that intervals below the floor are rejected."""
+        with self.assertRaises(ValueError):
+            SamplingProfiler(interval=0.0001)
+        with self.assertRaises(ValueError):
+            SamplingProfiler(max_overhead=0)
+
+
+class TestProfileRuns(unittest.TestCase):
+    """Tests for timed profiles written to files."""
+
+    def test_start_profile_writes_file(self):
+        """Test that a timed profile writes its file and blocks a second one."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.collapsed")
+            with BusyThread():
+                run = profiler.start_profile(0.2, path=path, interval=0.002)
+                with self.assertRaises(RuntimeError):
+                    profiler.start_profile(0.2)
+                self.assertTrue(run.wait(5))
+            with open(path) as f:
+                self.assertIn("spin_in_marker_function", f.read())
+
+    def test_duration_limits(self):
+        """Test that zero and overly long durations are rejected."""
+        with self.assertRaises(ValueError):
+            profiler.start_profile(0)
+        with self.assertRaises(ValueError):
+            profiler.start_profile(profiler.MAX_DURATION + 1)
+
+    @unittest.skipUnless(hasattr(signal, "SIGUSR2"), "SIGUSR2 unavailable")
+    def test_signal_starts_profile(self):
+        """Test that SIGUSR2 starts a profile."""
+        previous = signal.getsignal(signal.SIGUSR2)
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {"PROFILE_DIR": directory}):
+            try:
+                self.assertTrue(profiler.install_signal_handler(duration=0.1))
+                before = profiler._current
+                with mock.patch("builtins.print"):
+                    os.kill(os.getpid(), signal.SIGUSR2)
+                    run = self.wait_for_new_run(before)
+                self.assertTrue(run.wait(5))
+                self.assertTrue(os.listdir(directory))
+            finally:
+                signal.signal(signal.SIGUSR2, previous)
+
+    @unittest.skipUnless(hasattr(signal, "SIGUSR2"), "SIGUSR2 unavailable")
+    def test_signal_while_lock_is_held_does_not_deadlock(self):
+        """Test that SIGUSR2 arriving inside start_profile's lock still starts a profile."""
+        previous = signal.getsignal(signal.SIGUSR2)
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {"PROFILE_DIR": directory}):
+            try:
+                self.assertTrue(profiler.install_signal_handler(duration=0.1))
+                before = profiler._current
+                with mock.patch("builtins.print"):
+                    with profiler._current_lock:
+                        os.kill(os.getpid(), signal.SIGUSR2)
+                        time.sleep(0.05)  # The handler runs here, under the lock
+                    run = self.wait_for_new_run(before)
+                self.assertTrue(run.wait(5))
+            finally:
+                signal.signal(signal.SIGUSR2, previous)
+
+    def wait_for_new_run(self, before):
+        deadline = time.monotonic() + 5
+        while profiler._current is None or profiler._current is before:
+            self.assertLess(time.monotonic(), deadline, "no profile was started")
+            time.sleep(0.01)
+        return profiler._current
+
+
+class TestAdminToken(unittest.TestCase):
+    """Tests for the admin token check."""
+
+    def test_disabled_without_token(self):
+        """Test that admin endpoints are off when ADMIN_TOKEN is unset."""
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(profiler.admin_allowed("anything"))
+
+    def test_token_must_match(self):
+        """Test that only the configured token is accepted."""
+        with mock.patch.dict(os.environ, {"ADMIN_TOKEN": "s3cret"}):
+            self.assertTrue(profiler.admin_allowed("s3cret"))
+            self.assertFalse(profiler.admin_allowed("wrong"))
+            self.assertFalse(profiler.admin_allowed(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
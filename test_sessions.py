@@ -0,0 +1,148 @@
+"""
+Tests for the server-side conversation store.
+
+Covers turns being committed and rolled back, one turn at a time, the
+memory bound, spilling to and reloading from the session directory,
+workers sharing a directory, and expiry.
+"""
+
+import shutil
+import tempfile
+import unittest
+
+from sessions import SessionBusy, SessionNotFound, SessionStore
+
+
+def user(content: str) -> dict:
+    return {"role": "user", "content": content}
+
+
+def take_turn(store: SessionStore, session_id: str, *messages: dict) -> list:
+    """Run one turn adding messages; returns the session's messages."""
+    session = store.begin(session_id)
+    base = len(session.messages)
+    session.conversation.extend(messages)
+    store.commit(session, base, list(messages))
+    return session.messages
+
+
+class TestMemoryStore(unittest.TestCase):
+    """Tests for a store without a session directory."""
+
+    def test_turns_accumulate_and_failed_turns_roll_back(self):
+        """Test that committed turns stay and a rolled back one leaves nothing."""
+        store = SessionStore()
+        session_id = store.create().id
+        take_turn(store, session_id, user("one"))
+
+        session = store.begin(session_id)
+        session.conversation.extend([user("lost")])
+        session.encoded.extend([b"x", b"y"])
+        store.rollback(session, 1)
+        self.assertEqual(session.encoded, [b"x"])
+
+        messages = take_turn(store, session_id, user("two"))
+        self.assertEqual([m["content"] for m in messages], ["one", "two"])
+        self.assertEqual(session.conversation.tokens, store.begin(session_id).conversation.tokens)
+
+    def test_one_turn_at_a_time(self):
+        """Test that a session taking a turn refuses another."""
+        store = SessionStore()
+        session = store.begin(store.create().id)
+        with self.assertRaises(SessionBusy):
+            store.begin(session.id)
+        store.rollback(session, 0)
+        store.begin(session.id)
+
+    def test_sessions_expire_under_memory_pressure(self):
+        """Test that the least recently used session is dropped past max_bytes."""
+        store = SessionStore(max_bytes=1500)
+        old, new = store.create().id, store.create().id
+        take_turn(store, old, user("x" * 500))
+        take_turn(store, new, user("x" * 1000))
+        with self.assertRaises(SessionNotFound):
+            store.begin(old)
+        self.assertEqual(len(take_turn(store, new, user("more"))), 2)
+        self.assertEqual(store.stats()["expired"], 1)
+
+    def test_unknown_and_malformed_ids(self):
+        """Test that only live, well-formed IDs are found."""
+        store = SessionStore()
+        for session_id in ("0" * 32, "../../etc/passwd"):
+            with self.assertRaises(SessionNotFound):
+                store.begin(session_id)
+        self.assertFalse(store.delete("0" * 32))
+
+
+class TestDirectoryStore(unittest.TestCase):
+    """Tests for a store with a session directory."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_spilled_session_is_reloaded(self):
+        """Test that a session dropped from memory comes back from its log."""
+        store = SessionStore(self.directory, max_bytes=1000)
+        first = store.create().id
+        take_turn(store, first, user("a" * 600), {"role": "assistant", "content": "ok"})
+        take_turn(store, store.create().id, user("b" * 600))
+        self.assertEqual(store.stats()["spilled"], 1)
+
+        messages = take_turn(store, first, user("again"))
+        self.assertEqual([m["content"] for m in messages], ["a" * 600, "ok", "again"])
+        self.assertEqual(store.stats()["loaded"], 1)
+
+    def test_turn_arriving_while_a_session_loads_is_refused(self):
+        """Test that a second turn on a session being read from its log gets SessionBusy."""
+        second_turn = []
+
+        class RacingStore(SessionStore):
+            def _catch_up(self, session):
+                if not second_turn:
+                    second_turn.append("pending")
+                    try:
+                        self.begin(session.id)
+                        second_turn[0] = "admitted"
+                    except SessionBusy:
+                        second_turn[0] = "refused"
+                return super()._catch_up(session)
+
+        session_id = SessionStore(self.directory).create().id
+        store = RacingStore(self.directory)
+        session = store.begin(session_id)
+        self.assertEqual(second_turn, ["refused"])
+        store.rollback(session, 0)
+        self.assertEqual(store.stats()["loaded"], 1)
+
+    def test_workers_sharing_a_directory_see_each_others_turns(self):
+        """Test that a cached session reads turns another process appended."""
+        worker_a = SessionStore(self.directory)
+        worker_b = SessionStore(self.directory)
+        session_id = worker_a.create().id
+        take_turn(worker_a, session_id, user("from a"))
+        take_turn(worker_b, session_id, user("from b"))
+        messages = take_turn(worker_a, session_id, user("a again"))
+        self.assertEqual([m["content"] for m in messages], ["from a", "from b", "a again"])
+
+    def test_idle_sessions_expire(self):
+        """Test that sweeping deletes sessions idle past the TTL."""
+        store = SessionStore(self.directory, ttl=-1)
+        session_id = store.create().id
+        self.assertEqual(store.sweep(), 1)
+        with self.assertRaises(SessionNotFound):
+            store.begin(session_id)
+
+    def test_delete_removes_the_log(self):
+        """Test that a deleted session is gone for every worker."""
+        store = SessionStore(self.directory)
+        session_id = store.create().id
+        self.assertTrue(store.delete(session_id))
+        with self.assertRaises(SessionNotFound):
+            SessionStore(self.directory).begin(session_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+Tests for per-tenant directive bundles.
+
+Covers resolving tenants by header and API key, lazy compilation, the
+bounded LRU, rechecking edited bundles, the gateway choosing a tenant's
+directive, and the keyword matcher behind large vocabularies.
+"""
+
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from core_directive import ActionResult, CoreDirective, KeywordMatcher
+from gateway import GatewayRequest, GovernanceGateway
+from tenants import KEYS_FILE, TenantDirectives
+
+
+class TenantsTestCase(unittest.TestCase):
+    """Writes tenant bundles to a temporary directory."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name: str, data) -> None:
+        path = os.path.join(self.directory, name)
+        previous = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+        with open(path, "w") as f:
+            json.dump(data, f)
+        # Keep the stamp distinct even on coarse-mtime filesystems
+        stamp = max(previous + 10**9, os.stat(path).st_mtime_ns)
+        os.utime(path, ns=(stamp, stamp))
+
+
+class TestTenantDirectives(TenantsTestCase):
+    """Tests for TenantDirectives."""
+
+    def test_tenant_from_api_key_or_header(self):
+        """Test that API keys are looked up by hash and a key's tenant beats the header."""
+        digest = hashlib.sha256(b"sk-acme").hexdigest()
+        self.write(KEYS_FILE, {digest: "acme"})
+        tenants = TenantDirectives(self.directory)
+        self.assertEqual(tenants.tenant_for("globex", "sk-acme"), "acme")
+        self.assertEqual(tenants.tenant_for(None, "sk-acme"), "acme")
+        self.assertEqual(tenants.tenant_for("globex", "sk-unknown"), "globex")
+        self.assertIsNone(tenants.tenant_for(None, "sk-unknown"))
+        self.assertIsNone(tenants.tenant_for("../etc/passwd"))
+        self.assertIsNone(tenants.get("../etc/passwd"))
+
+    def test_bundles_compile_lazily(self):
+        """Test that a bundle is compiled on first use and then reused."""
+        self.write("acme.json", {"version": "v1", "harm_indicators": ["sabotage"]})
+        tenants = TenantDirectives(self.directory)
+        prepared = []
+        tenants.add_preparer(lambda bundle: prepared.append(bundle.tenant))
+        self.assertEqual(tenants.stats()["compiles"], 0)
+
+        bundle = tenants.get("acme")
+        self.assertIs(tenants.get("acme"), bundle)
+        self.assertEqual(prepared, ["acme"])
+        self.assertEqual(bundle.version.version, "acme@v1")
+        self.assertEqual(bundle.directive.evaluate_intent("sabotage it").result, ActionResult.REVIEW)
+        self.assertIsNone(tenants.get("nobody"))
+        self.assertEqual(tenants.stats()["compiles"], 1)
+
+    def test_least_recently_used_bundle_is_evicted(self):
+        """Test that the LRU stays bounded and recompiles a returning tenant."""
+        for name in ("a", "b", "c"):
+            self.write(f"{name}.json", {"version": name})
+        tenants = TenantDirectives(self.directory, max_compiled=2)
+        first = tenants.get("a")
+        tenants.get("b")
+        tenants.get("a")
+        tenants.get("c")  # Evicts b, the least recently used
+        self.assertIs(tenants.get("a"), first)
+        stats = tenants.stats()
+        self.assertEqual((stats["tenants_compiled"], stats["evictions"]), (2, 1))
+        tenants.get("b")
+        self.assertEqual(tenants.stats()["compiles"], 4)
+
+    def test_unknown_tenants_do_not_evict_compiled_bundles(self):
+        """Test that names without a bundle neither take LRU slots nor touch the disk."""
+        self.write("acme.json", {"version": "v1"})
+        tenants = TenantDirectives(self.directory, max_compiled=2)
+        bundle = tenants.get("acme")
+        with mock.patch("tenants._file_stamp") as stamp:
+            for i in range(100):
+                self.assertIsNone(tenants.get(f"random-{i}"))
+            stamp.assert_not_called()
+        self.assertIs(tenants.get("acme"), bundle)
+        self.assertEqual(tenants.stats()["evictions"], 0)
+
+    def test_edited_bundle_is_recompiled(self):
+        """Test that a change is picked up and a broken edit keeps the old bundle."""
+        self.write("acme.json", {"version": "v1"})
+        tenants = TenantDirectives(self.directory, check_interval=0.0001)
+        self.assertEqual(tenants.get("acme").version.version, "acme@v1")
+        self.write("acme.json", {"version": "v2"})
+        self.assertEqual(tenants.get("acme").version.version, "acme@v2")
+        self.write("acme.json", {"harm_indicators": "not a list"})
+        self.assertEqual(tenants.get("acme").version.version, "acme@v2")
+        self.write("acme.json", {"evaluator": {"harm_indicators": {"physical": [1]}}})
+        self.assertEqual(tenants.get("acme").version.version, "acme@v2")
+        self.assertEqual(tenants.stats()["failures"], 2)
+
+    def test_compiling_one_tenant_does_not_block_others(self):
+        """Test that a slow compile leaves other tenants' lookups unaffected."""
+        self.write("slow.json", {"version": "slow"})
+        self.write("fast.json", {"version": "fast"})
+        tenants = TenantDirectives(self.directory)
+        fast = tenants.get("fast")
+        started, release = threading.Event(), threading.Event()
+
+        def preparer(bundle):
+            if bundle.tenant == "slow":
+                started.set()
+                release.wait(5)
+
+        tenants._preparers.append(preparer)
+        thread = threading.Thread(target=tenants.get, args=("slow",))
+        thread.start()
+        try:
+            self.assertTrue(started.wait(5))
+            self.assertIs(tenants.get("fast"), fast)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(tenants.get("slow").version.version, "slow@slow")
+
+
+class TestGatewayTenants(TenantsTestCase):
+    """Tests for the gateway using tenant directives."""
+
+    def test_request_uses_its_tenants_directive(self):
+        """Test that tenant metadata selects the directive and the audited version."""
+        self.write("acme.json", {"version": "v1", "harm_indicators": ["learn"]})
+        gateway = GovernanceGateway(directive=CoreDirective(), tenants=TenantDirectives(self.directory))
+
+        tenant_request = GatewayRequest.create("Help me learn")
+        tenant_request.metadata["tenant"] = "acme"
+        unknown_request = GatewayRequest.create("Help me learn")
+        unknown_request.metadata["tenant"] = "nobody"
+
+        self.assertFalse(gateway.process(tenant_request).processed)
+        self.assertTrue(gateway.process(unknown_request).processed)
+        self.assertTrue(gateway.process(GatewayRequest.create("Help me learn")).processed)
+        self.assertEqual(
+            [entry.directive_version for entry in gateway.audit_log],
+            ["acme@v1", "builtin", "builtin"],
+        )
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    """Tests for KeywordMatcher."""
+
+    def test_compiled_pattern_agrees_with_list_order(self):
+        """Test that a large vocabulary finds the same term as a plain scan."""
+        rng = random.Random(7)
+        for _ in range(50):
+            terms = ["".join(rng.choice("ab.") for _ in range(rng.randint(1, 4))) for _ in range(40)]
+            matcher = KeywordMatcher(terms)
+            self.assertTrue(matcher.compiled)
+            for _ in range(20):
+                text = "".join(rng.choice("abc.") for _ in range(rng.randint(0, 12)))
+                expected = next((term for term in terms if term in text), None)
+                self.assertEqual(matcher.first(text), expected)
+
+    def test_small_vocabulary_is_not_compiled(self):
+        """Test that short lists keep the plain scan."""
+        matcher = KeywordMatcher(["harm", "hurt"])
+        self.assertFalse(matcher.compiled)
+        self.assertEqual(matcher.first("no hurt, no harm"), "harm")
+
+
+if __name__ == "__main__":
+    unittest.main()
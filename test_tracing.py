@@ -0,0 +1,199 @@
+"""
+Tests for the tracing module.
+
+Covers sampling, span recording in the gateway and AI client, the ring
+buffer, the slow request report and OTLP JSON export, also in the
+background.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import tracing
+from ai_client import create_test_client
+from gateway import GatewayRequest, GovernanceGateway, content_filter_middleware
+from tracing import Tracer, trace_id_for
+
+
+class TestSampling(unittest.TestCase):
+    """Tests for trace sampling."""
+
+    def test_trace_id_from_uuid_request_id(self):
+        """Test that UUID request IDs become the trace ID."""
+        request = GatewayRequest.create("hello")
+        self.assertEqual(trace_id_for(request.id), request.id.replace("-", ""))
+        self.assertEqual(len(trace_id_for("not-a-uuid")), 32)
+
+    def test_sampling_is_deterministic(self):
+        """Test that the same ID is always sampled the same way."""
+        tracer = Tracer(sample_rate=0.5)
+        ids = [GatewayRequest.create("x").id for _ in range(200)]
+        first = [tracer.start_trace(i, "t") is not None for i in ids]
+        second = [tracer.start_trace(i, "t") is not None for i in ids]
+        self.assertEqual(first, second)
+        self.assertTrue(40 < sum(first) < 160)
+
+    def test_rates_zero_and_one(self):
+        """Test that rate 0 records nothing and rate 1 records everything."""
+        self.assertIsNone(Tracer(sample_rate=0.0).start_trace("abc", "t"))
+        self.assertIsNotNone(Tracer(sample_rate=1.0).start_trace("abc", "t"))
+        with self.assertRaises(ValueError):
+            Tracer(sample_rate=2.0)
+
+
+class TestSpans(unittest.TestCase):
+    """Tests for spans recorded by the governance layer."""
+
+    def test_gateway_spans(self):
+        """Test that a gateway request is traced under its request ID."""
+        tracer = Tracer(sample_rate=1.0)
+        gateway = GovernanceGateway(tracer=tracer)
+        request = GatewayRequest.create("Help me learn to cook", source="test")
+        gateway.process(request)
+
+        [trace] = tracer.recent()
+        self.assertEqual(trace.trace_id, trace_id_for(request.id))
+        self.assertEqual(trace.attributes["source"], "test")
+        names = [span.name for span in trace.spans]
+        self.assertEqual(names, ["middleware", "directive.evaluate", "route.handler"])
+        for span in trace.spans:
+            self.assertGreaterEqual(span.start_ns, trace.start_ns)
+            self.assertLessEqual(span.end_ns, trace.end_ns)
+
+    def test_middleware_block_is_traced(self):
+        """Test that requests rejected by middleware still finish their trace."""
+        tracer = Tracer(sample_rate=1.0)
+        gateway = GovernanceGateway(tracer=tracer)
+        gateway.add_middleware(content_filter_middleware(["forbidden"]))
+        gateway.process(GatewayRequest.create("forbidden words"))
+        [trace] = tracer.recent()
+        self.assertEqual([span.name for span in trace.spans], ["middleware"])
+        self.assertTrue(trace.spans[0].attributes["blocked"])
+
+    def test_ai_client_spans(self):
+        """Test that the AI client traces evaluation and the model call."""
+        previous = tracing._tracer
+        tracer = tracing.configure(sample_rate=1.0)
+        try:
+            create_test_client().process("Help me learn to cook")
+        finally:
+            tracing._tracer = previous
+        [trace] = tracer.recent()
+        self.assertEqual(
+            [span.name for span in trace.spans],
+            ["directive.evaluate", "upstream.request"],
+        )
+
+    def test_span_context_manager(self):
+        """Test timing a block with Trace.span."""
+        trace = Tracer(sample_rate=1.0).start_trace("abc", "t")
+        with trace.span("work", answer=42) as attributes:
+            attributes["extra"] = True
+        [span] = trace.spans
+        self.assertEqual(span.attributes, {"answer": 42, "extra": True})
+
+
+class TestBufferAndExport(unittest.TestCase):
+    """Tests for the ring buffer, slow report and OTLP export."""
+
+    def test_ring_buffer_bounded_and_slowest(self):
+        """Test that old traces are dropped and the slowest are reported."""
+        tracer = Tracer(sample_rate=1.0, buffer_size=5)
+        for i in range(10):
+            trace = tracer.start_trace(f"request-{i}", "t", index=i)
+            tracer.finish(trace)
+            trace.end_ns = trace.start_ns + i * 1000  # Later requests are slower
+        self.assertEqual(len(tracer.recent()), 5)
+        slowest = tracer.slowest(2)
+        self.assertEqual([t.attributes["index"] for t in slowest], [9, 8])
+        self.assertEqual(slowest[0].breakdown()["duration_ms"], 0.009)
+
+    def test_finished_count_is_exact_across_threads(self):
+        """Test that traces finished on many threads are all counted."""
+        tracer = Tracer(sample_rate=1.0, buffer_size=8)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        def work():
+            for i in range(500):
+                tracer.finish(tracer.start_trace(i + 1, "t"))
+
+        try:
+            threads = [threading.Thread(target=work) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(tracer._finished_count, 4000)
+
+    def test_flush_writes_otlp_json(self):
+        """Test that flush writes an OTLP/JSON trace export."""
+        tracer = Tracer(sample_rate=1.0)
+        gateway = GovernanceGateway(tracer=tracer)
+        gateway.process(GatewayRequest.create("Help me learn to cook"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.json")
+            self.assertEqual(tracer.flush(path), path)
+            with open(path) as f:
+                data = json.load(f)
+
+        [resource] = data["resourceSpans"]
+        [scope] = resource["scopeSpans"]
+        spans = scope["spans"]
+        self.assertEqual(len(spans), 4)
+        root = spans[0]
+        self.assertNotIn("parentSpanId", root)
+        for span in spans[1:]:
+            self.assertEqual(span["traceId"], root["traceId"])
+            self.assertEqual(span["parentSpanId"], root["spanId"])
+            self.assertLessEqual(int(root["startTimeUnixNano"]), int(span["startTimeUnixNano"]))
+            self.assertLessEqual(int(span["endTimeUnixNano"]), int(root["endTimeUnixNano"]))
+
+    def test_failed_flush_leaves_traces_pending(self):
+        """Test that traces are only counted as flushed once the file is written."""
+        tracer = Tracer(sample_rate=1.0)
+        tracer.finish(tracer.start_trace("request", "t"))
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(OSError):
+                tracer.flush(os.path.join(directory, "missing", "traces.json"))
+            self.assertEqual(tracer._flushed_count, 0)
+            tracer.flush(os.path.join(directory, "traces.json"))
+        self.assertEqual(tracer._flushed_count, 1)
+
+    def test_flush_without_path(self):
+        """Test that flush is a no-op when no export path is configured."""
+        self.assertIsNone(Tracer().flush())
+
+    def test_background_flush_while_serving(self):
+        """Test that traces reach the file without a shutdown, per worker."""
+        with tempfile.TemporaryDirectory() as directory:
+            tracer = Tracer(
+                sample_rate=1.0, buffer_size=4,
+                export_path=os.path.join(directory, "traces-{pid}.json"),
+            )
+            path = os.path.join(directory, f"traces-{os.getpid()}.json")
+            tracer.start_flushing(interval=60)  # Only a filling buffer flushes early
+            try:
+                gateway = GovernanceGateway(tracer=tracer)
+                for _ in range(2):
+                    gateway.process(GatewayRequest.create("Help me learn to cook"))
+                deadline = time.monotonic() + 5
+                while not os.path.exists(path) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                tracer.stop_flushing()
+            with open(path) as f:
+                spans = json.load(f)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual(len([s for s in spans if "parentSpanId" not in s]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
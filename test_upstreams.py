@@ -0,0 +1,206 @@
+"""
+Tests for the upstream pool.
+
+Covers backend selection, the circuit breaker, failover, hedging and the
+environment configuration, against local mock backends.
+"""
+
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+import upstreams
+from benchmarks.mock_upstream import MockUpstream
+from upstreams import Backend, CircuitBreaker, NoBackendAvailable, UpstreamPool
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+def complete(pool: UpstreamPool) -> str:
+    completion = pool.chat_completion(model="test", messages=MESSAGES)
+    return completion.choices[0].message.content
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests for CircuitBreaker."""
+
+    def test_opens_after_threshold_and_allows_one_trial(self):
+        """Test the closed -> open -> half-open -> closed cycle."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())  # The trial request
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow())  # Only one at a time
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        """Test that a failing trial opens the circuit again."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class TestSelection(unittest.TestCase):
+    """Tests for choosing a backend."""
+
+    def test_least_outstanding_prefers_idle_backend(self):
+        """Test that the backend with fewer requests in flight is chosen."""
+        busy, idle = Backend("http://busy/v1"), Backend("http://idle/v1")
+        busy.outstanding = 3
+        pool = UpstreamPool([busy, idle], strategy="least_outstanding")
+        self.assertIs(pool.pick(), idle)
+
+    def test_ewma_prefers_fast_backend(self):
+        """Test that latency estimates steer traffic to the faster backend."""
+        with MockUpstream(delay=0.03) as slow, MockUpstream() as fast:
+            slow_backend, fast_backend = Backend(slow.base_url), Backend(fast.base_url)
+            pool = UpstreamPool([slow_backend, fast_backend])
+            for _ in range(20):
+                complete(pool)
+            pool.close()
+        self.assertGreater(fast_backend.requests, slow_backend.requests * 3)
+        self.assertGreater(slow_backend.ewma_ns, fast_backend.ewma_ns)
+
+    def test_invalid_settings(self):
+        """Test that empty pools and unknown strategies are rejected."""
+        with self.assertRaises(ValueError):
+            UpstreamPool([])
+        with self.assertRaises(ValueError):
+            UpstreamPool([Backend("http://a/v1")], strategy="random")
+
+
+class TestFailover(unittest.TestCase):
+    """Tests for failover, circuit breaking and health probes."""
+
+    def test_fails_over_and_opens_circuit(self):
+        """Test that a failing backend is skipped once its circuit opens."""
+        with MockUpstream(status=503) as broken, MockUpstream() as healthy:
+            bad = Backend(broken.base_url, failure_threshold=2, reset_timeout=60)
+            good = Backend(healthy.base_url)
+            pool = UpstreamPool([bad, good], strategy="least_outstanding")
+            for _ in range(10):
+                self.assertEqual(complete(pool), "Mock response.")
+            pool.close()
+        self.assertEqual(bad.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(bad.requests, 2)
+        self.assertEqual(good.requests, 10)
+
+    def test_probe_closes_recovered_circuit(self):
+        """Test that a health probe brings a recovered backend back."""
+        with MockUpstream(status=503) as upstream:
+            backend = Backend(upstream.base_url, failure_threshold=1, reset_timeout=60)
+            pool = UpstreamPool([backend])
+            with self.assertRaises(Exception):
+                complete(pool)
+            self.assertEqual(backend.breaker.state, CircuitBreaker.OPEN)
+            with self.assertRaises(NoBackendAvailable):
+                complete(pool)
+
+            pool.probe()
+            self.assertEqual(backend.breaker.state, CircuitBreaker.OPEN)
+            upstream.status = 200
+            pool.probe()
+            self.assertEqual(backend.breaker.state, CircuitBreaker.CLOSED)
+            self.assertEqual(complete(pool), "Mock response.")
+            pool.close()
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 4xx other than 429 fails without touching other backends."""
+        with MockUpstream(status=400) as rejecting, MockUpstream() as healthy:
+            first, second = Backend(rejecting.base_url), Backend(healthy.base_url)
+            second.outstanding = 1  # Make the rejecting backend the first choice
+            pool = UpstreamPool([first, second], strategy="least_outstanding")
+            with self.assertRaises(Exception):
+                complete(pool)
+            pool.close()
+        self.assertEqual(second.requests, 0)
+        self.assertEqual(first.breaker.state, CircuitBreaker.CLOSED)
+
+
+class TestHedging(unittest.TestCase):
+    """Tests for hedged requests."""
+
+    def test_slow_primary_is_hedged(self):
+        """Test that a second backend answers when the first is slow."""
+        with MockUpstream(delay=1.0) as slow, MockUpstream() as fast:
+            slow_backend, fast_backend = Backend(slow.base_url), Backend(fast.base_url)
+            fast_backend.outstanding = 1  # Make the slow backend the first choice
+            pool = UpstreamPool(
+                [slow_backend, fast_backend], strategy="least_outstanding", hedge_after=0.05,
+            )
+            started = time.perf_counter()
+            self.assertEqual(complete(pool), "Mock response.")
+            elapsed = time.perf_counter() - started
+            fast_backend.outstanding -= 1
+            pool.close()
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(pool.stats()["hedged"], 1)
+
+    def test_hedges_stay_within_budget(self):
+        """Test that hedging stops once the budget is used up."""
+        pool = UpstreamPool([Backend("http://a/v1")], hedge_after=0.01, hedge_budget=0.1)
+        pool._calls = 10
+        self.assertTrue(pool._take_hedge())
+        self.assertTrue(pool._take_hedge())
+        self.assertFalse(pool._take_hedge())
+
+
+class TestConfiguration(unittest.TestCase):
+    """Tests for configuration from the environment."""
+
+    def test_parse_backends(self):
+        """Test plain and named backend URLs."""
+        backends = upstreams.parse_backends("http://a:1/v1, local=http://b:2/v1")
+        self.assertEqual([b.name for b in backends], ["http://a:1/v1", "local"])
+        self.assertEqual(backends[1].base_url, "http://b:2/v1")
+
+    def test_pool_only_when_configured(self):
+        """Test that get_pool follows UPSTREAM_URLS."""
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(upstreams.get_pool())
+        env = {"UPSTREAM_URLS": "http://a/v1,http://b/v1", "UPSTREAM_HEDGE_MS": "25"}
+        with mock.patch.dict(os.environ, env):
+            pool = upstreams.get_pool()
+            self.assertIs(upstreams.get_pool(), pool)
+            self.assertEqual(len(pool.backends), 2)
+            self.assertEqual(pool.hedge_after, 0.025)
+
+    def test_concurrent_first_calls_build_one_pool(self):
+        """Test that threads racing to the first get_pool share one pool."""
+        create_pool = upstreams.create_pool
+        built = []
+
+        def slow_create_pool(config):
+            time.sleep(0.05)  # Every thread arrives while the first is building
+            built.append(create_pool(config))
+            return built[-1]
+
+        env = {"UPSTREAM_URLS": "http://c/v1"}
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(upstreams, "_pool", None), \
+                mock.patch.object(upstreams, "_pool_config", None), \
+                mock.patch.object(upstreams, "create_pool", slow_create_pool):
+            pools = []
+            threads = [threading.Thread(target=lambda: pools.append(upstreams.get_pool())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(built), 1)
+            self.assertTrue(all(pool is built[0] for pool in pools))
+            built[0].close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Smoke tests for the benchmark suite."""
+
+import json
+
+from benchmarks import compare, corpus, http2, run
+from benchmarks.harness import percentile
+
+
+def test_corpora_are_reproducible():
+    """Test that every corpus is identical across calls."""
+    for size in corpus.SIZES:
+        assert corpus.prompts(size, 8) == corpus.prompts(size, 8)
+    assert len(corpus.prompts("long", 1)[0].split()) > 1500
+
+
+def test_percentile_nearest_rank():
+    """Test the percentile used for p50/p99."""
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_quick_run_writes_json(tmp_path):
+    """Test that a filtered quick run produces comparable JSON."""
+    output = tmp_path / "results.json"
+    assert run.main(["--quick", "--filter", "gateway.process/none[short]", "--output", str(output)]) == 0
+
+    data = json.loads(output.read_text())
+    assert data["environment"]["python"]
+    [result] = data["results"]
+    assert result["name"] == "gateway.process/none"
+    assert result["p50_us"] <= result["p99_us"]
+    assert result["ops_per_sec"] > 0
+
+
+def test_filtered_out_suites_are_not_set_up(monkeypatch):
+    """Test that suites with no case matching the filter build none of their fixtures."""
+    from benchmarks import mock_upstream
+
+    def refuse(self):
+        raise AssertionError("the mock upstream was started for a filtered-out suite")
+
+    monkeypatch.setattr(mock_upstream.MockUpstream, "start", refuse)
+    assert list(run.SUITES["gateway_app"](lambda name, size: False)) == []
+    [result] = run.run("gateway.process/deep[short]", quick=True)
+    assert result.name == "gateway.process/deep"
+
+
+def test_end_to_end_against_mock_upstream():
+    """Test that the forwarding gateway can be benchmarked without network access."""
+    [result] = run.run("gateway_app.chat_completions[short]", quick=True)
+    assert result.iterations >= 20
+
+
+def test_pooled_clients_reuse_connections():
+    """Test that pooled clients open far fewer connections than one per request."""
+    results = http2.compare(requests=64, concurrency=8, delay_ms=0)
+    assert results["fresh"]["connections_per_1k"] == 1000
+    assert results["http1_pool"]["connections_per_1k"] <= 8 * 1000 / 64
+    if "http2" in results:
+        assert results["http2"]["connections_per_1k"] < results["http1_pool"]["connections_per_1k"]
+
+
+def test_compare_flags_regressions(tmp_path):
+    """Test that a slowdown above the threshold fails the comparison."""
+    def write(path, p50):
+        result = {"name": "x", "corpus": "short", "p50_us": p50, "p99_us": p50, "ops_per_sec": 1e6 / p50}
+        path.write_text(json.dumps({"results": [result]}))
+
+    base, same, slower = tmp_path / "base.json", tmp_path / "same.json", tmp_path / "slower.json"
+    write(base, 10.0)
+    write(same, 10.5)
+    write(slower, 15.0)
+    assert compare.main([str(base), str(same), "--threshold", "10"]) == 0
+    assert compare.main([str(base), str(slower), "--threshold", "10"]) == 1
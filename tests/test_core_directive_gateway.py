@@ -0,0 +1,161 @@
+"""Tests for the OpenAI-forwarding Core Directive gateway."""
+
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import core_directive_gateway as gateway_module
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    """Start every test without a cached upstream client."""
+    monkeypatch.setattr(gateway_module, "_client", None)
+    monkeypatch.setattr(gateway_module, "_http_client", None)
+    monkeypatch.setattr(gateway_module, "_client_pid", None)
+
+
+def test_import_without_api_key():
+    """Test that the module imports without credentials."""
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import core_directive_gateway as g; print(g._client)"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "None"
+
+
+def test_get_client_requires_api_key(monkeypatch):
+    """Test that a missing key is reported when the client is needed."""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    with pytest.raises(RuntimeError, match="OPENAI_API_KEY"):
+        gateway_module.get_client()
+
+
+def test_client_is_reused_within_a_process(monkeypatch):
+    """Test that one process builds its client once."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    assert gateway_module.get_client() is gateway_module.get_client()
+
+
+def test_client_is_rebuilt_after_fork(monkeypatch):
+    """Test that a client created by another process is not reused."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    parent_client = gateway_module.get_client()
+    monkeypatch.setattr(gateway_module, "_client_pid", -1)
+    assert gateway_module.get_client() is not parent_client
+
+
+def test_startup_builds_client(monkeypatch):
+    """Test that the lifespan hook creates and warms the client, off the event loop."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    warmed = []
+
+    def warm_up():
+        try:
+            asyncio.get_running_loop()
+            warmed.append("on the event loop")
+        except RuntimeError:
+            warmed.append(True)
+
+    monkeypatch.setattr(gateway_module, "warm_up", warm_up)
+    monkeypatch.setattr(gateway_module, "WARM_UP", True)
+
+    with TestClient(gateway_module.app):
+        assert gateway_module._client is not None
+        assert warmed == [True]
+    assert gateway_module._client is None
+
+
+def test_completion_records_upstream_and_serialization(monkeypatch):
+    """Test a forwarded completion end-to-end, its /metrics stages and trace."""
+    import tracing
+    from benchmarks.mock_upstream import MockUpstream
+
+    monkeypatch.setattr(tracing, "_tracer", tracing.Tracer(sample_rate=1.0))
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+
+    with MockUpstream() as upstream:
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setenv("OPENAI_BASE_URL", upstream.base_url)
+        with TestClient(gateway_module.app) as client:
+            response = client.post(
+                "/v1/chat/completions",
+                json={"model": "gpt-4.1", "messages": [{"role": "user", "content": "Hello!"}]},
+            )
+            assert response.status_code == 200
+            assert response.json()["choices"][0]["message"]["content"] == "Mock response."
+
+            text = client.get("/metrics").text
+            slow = client.get("/debug/slow", headers={"X-Admin-Token": "s3cret"}).json()
+    for stage in ("upstream", "serialization"):
+        assert f'governance_stage_duration_seconds_count{{component="gateway_app",stage="{stage}"}}' in text
+    [trace] = slow["slowest"]
+    assert trace["trace_id"] == response.json()["id"].removeprefix("chatcmpl-")
+    assert [span["name"] for span in trace["spans"]] == ["directive.wrap", "upstream.request", "serialization"]
+
+
+def test_slow_completions_do_not_block_each_other(monkeypatch):
+    """Test that two completions against a slow upstream are in flight together."""
+    from benchmarks.mock_upstream import MockUpstream
+
+    delay = 0.5
+    with MockUpstream(delay=delay) as upstream:
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setenv("OPENAI_BASE_URL", upstream.base_url)
+        with TestClient(gateway_module.app) as client:
+            statuses = []
+
+            def post():
+                response = client.post(
+                    "/v1/chat/completions",
+                    json={"model": "gpt-4.1", "messages": [{"role": "user", "content": "Hello!"}]},
+                )
+                statuses.append(response.status_code)
+
+            threads = [threading.Thread(target=post) for _ in range(2)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+    assert statuses == [200, 200]
+    assert elapsed < 2 * delay * 0.9
+
+
+def test_completion_through_upstream_pool(monkeypatch):
+    """Test that UPSTREAM_URLS spreads completions over the pool's backends."""
+    import upstreams
+    from benchmarks.mock_upstream import MockUpstream
+
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(upstreams, "_pool", None)
+    with MockUpstream() as first, MockUpstream() as second:
+        monkeypatch.setenv("UPSTREAM_URLS", f"a={first.base_url},b={second.base_url}")
+        monkeypatch.setenv("UPSTREAM_STRATEGY", "least_outstanding")
+        with TestClient(gateway_module.app) as client:
+            for _ in range(6):
+                response = client.post(
+                    "/v1/chat/completions",
+                    json={"model": "gpt-4.1", "messages": [{"role": "user", "content": "Hello!"}]},
+                )
+                assert response.status_code == 200
+            stats = upstreams.get_pool().stats()
+    assert gateway_module._client is None  # The single client was never built
+    assert sum(backend["requests"] for backend in stats["backends"]) == 6
+    assert all(backend["state"] == "closed" for backend in stats["backends"])
+    monkeypatch.setattr(upstreams, "_pool", None)
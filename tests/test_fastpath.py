@@ -0,0 +1,215 @@
+"""Tests for the chat completion body fast path."""
+
+import json
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+
+from app import fastpath
+from app.core_directive import CORE_DIRECTIVE
+from app.main import app
+from benchmarks.mock_upstream import MockUpstream
+
+
+def wrapped(body: bytes) -> dict:
+    return json.loads(fastpath.splice_core_directive(fastpath.parse_chat_request(body), CORE_DIRECTIVE))
+
+
+def test_directive_added_as_first_message():
+    """Test that a body without a system message gets one spliced in."""
+    body = b'{"model": "m", "messages": [{"role": "user", "content": "Hi"}], "top_p": 0.5}'
+    data = wrapped(body)
+    assert data["messages"] == [
+        {"role": "system", "content": CORE_DIRECTIVE},
+        {"role": "user", "content": "Hi"},
+    ]
+    assert data["top_p"] == 0.5  # Fields the app does not know are kept
+
+
+def test_directive_prepended_to_every_system_message():
+    """Test that existing system contents, escapes included, are prefixed."""
+    messages = [
+        {"role": "system", "content": 'Say "hi" \\ bye'},
+        {"content": "Hello", "role": "user", "name": "x"},
+        {"role": "system", "content": "Second"},
+    ]
+    data = wrapped(json.dumps({"model": "m", "messages": messages}, indent=2).encode())
+    assert data["messages"][0]["content"] == f'{CORE_DIRECTIVE}\n\nSay "hi" \\ bye'
+    assert data["messages"][1] == messages[1]
+    assert data["messages"][2]["content"] == f"{CORE_DIRECTIVE}\n\nSecond"
+
+
+def test_splice_keeps_original_bytes():
+    """Test that the original body appears unchanged after the insertion."""
+    body = b'{"model":"m","messages":[{"role":"user","content":"caf\\u00e9"}]}'
+    out = fastpath.splice_core_directive(fastpath.parse_chat_request(body), CORE_DIRECTIVE)
+    assert out.endswith(b'{"role":"user","content":"caf\\u00e9"}]}')
+
+
+def test_repeated_messages_key_is_reencoded():
+    """Test that an ambiguous body is re-encoded from what was validated."""
+    body = (
+        b'{"model":"m","messages":[{"role":"user","content":"first"}],'
+        b'"messages":[{"role":"user","content":"second"}]}'
+    )
+    assert fastpath.message_layout(body) is None
+    assert [m["content"] for m in wrapped(body)["messages"]] == [CORE_DIRECTIVE, "second"]
+
+
+def test_escaped_messages_key_is_reencoded():
+    """Test that a repeated messages key spelled with an escape cannot dodge the directive."""
+    body = (
+        b'{"model":"m","messages":[{"role":"user","content":"first"}],'
+        b'"m\\u0065ssages":[{"role":"user","content":"second"}]}'
+    )
+    assert fastpath.message_layout(body) is None
+    assert [m["content"] for m in wrapped(body)["messages"]] == [CORE_DIRECTIVE, "second"]
+
+
+def test_escaped_content_key_is_reencoded():
+    """Test that a system message's repeated content key gets the directive too."""
+    body = (
+        b'{"model":"m","messages":[{"role":"system","content":"decoy",'
+        b'"c\\u006fntent":"Be terse."},{"role":"user","content":"hi"}]}'
+    )
+    assert fastpath.message_layout(body) is None
+    messages = wrapped(body)["messages"]
+    assert messages[0]["content"] == f"{CORE_DIRECTIVE}\n\nBe terse."
+    assert messages[1]["content"] == "hi"
+
+
+def test_nested_messages_keys_are_ignored():
+    """Test that only the top-level messages array is located."""
+    body = (
+        b'{"metadata": {"messages": [{"content": "no"}]}, "model": "m",'
+        b' "messages": [{"role": "user", "content": "yes"}]}'
+    )
+    array_at, contents = fastpath.message_layout(body)
+    assert body[contents[0]:].startswith(b'"yes"')
+    assert body[array_at - 1:array_at] == b"["
+
+
+def test_unusual_values_fall_back_to_pydantic():
+    """Test that coercible values are coerced and invalid ones rejected as before."""
+    chat = fastpath.parse_chat_request(b'{"model":"m","messages":[],"temperature":"0.5"}')
+    assert chat.data["temperature"] == 0.5
+    with pytest.raises(RequestValidationError) as info:
+        fastpath.parse_chat_request(b'{"model":"m","messages":[{"role":"robot","content":"x"}]}')
+    assert info.value.errors()[0]["loc"] == ("body", "messages", 0, "role")
+
+
+def test_endpoint_reports_validation_errors():
+    """Test that the endpoint answers bad bodies with FastAPI's 422 format."""
+    client = TestClient(app)
+    response = client.post("/v1/chat/completions", json={"model": 1, "messages": []})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "model"]
+    response = client.post(
+        "/v1/chat/completions", content=b"{bad", headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_forwards_spliced_body_upstream(monkeypatch):
+    """Test that with an upstream configured, the wrapped bytes are sent there."""
+    with MockUpstream() as upstream:
+        monkeypatch.setenv("APP_UPSTREAM_URL", upstream.base_url)
+        monkeypatch.setenv("APP_UPSTREAM_API_KEY", "test-key")
+        with TestClient(app) as client:
+            response = client.post(
+                "/v1/chat/completions",
+                json={"model": "m", "messages": [{"role": "user", "content": "Hello!"}]},
+            )
+        sent = json.loads(upstream.last_body)
+    assert response.status_code == 200
+    assert response.json()["choices"][0]["message"]["content"] == "Mock response."
+    assert sent["messages"][0] == {"role": "system", "content": CORE_DIRECTIVE}
+
+
+def test_forwarded_request_traces_upstream_phases(monkeypatch):
+    """Test that waiting for the upstream and reading its answer are separate spans."""
+    import tracing
+
+    monkeypatch.setattr(tracing, "_tracer", tracing.Tracer(sample_rate=1.0))
+    with MockUpstream() as upstream:
+        monkeypatch.setenv("APP_UPSTREAM_URL", upstream.base_url)
+        with TestClient(app) as client:
+            client.post(
+                "/v1/chat/completions",
+                json={"model": "m", "messages": [{"role": "user", "content": "Hello!"}]},
+            )
+    [trace] = tracing.get_tracer().recent()
+    names = [span.name for span in trace.spans]
+    assert names == ["directive.wrap", "upstream.request", "upstream.response"]
+    request, response = trace.spans[1:]
+    assert request.end_ns == response.start_ns
+    assert response.attributes["bytes"] > 0
+
+
+def test_tenant_directive_is_forwarded(monkeypatch, tmp_path):
+    """Test that a tenant named by header gets its own directive spliced in."""
+    import tenants
+
+    (tmp_path / "acme.json").write_text('{"chat_directive": "Acme directive."}')
+    monkeypatch.setattr(tenants, "_tenants", tenants.TenantDirectives(str(tmp_path)))
+    with MockUpstream() as upstream:
+        monkeypatch.setenv("APP_UPSTREAM_URL", upstream.base_url)
+        with TestClient(app) as client:
+            body = {"model": "m", "messages": [{"role": "system", "content": "Be brief."}]}
+            client.post("/v1/chat/completions", json=body, headers={"X-Tenant-ID": "acme"})
+            acme = json.loads(upstream.last_body)
+            client.post("/v1/chat/completions", json=body)
+            default = json.loads(upstream.last_body)
+    assert acme["messages"][0]["content"] == "Acme directive.\n\nBe brief."
+    assert default["messages"][0]["content"] == f"{CORE_DIRECTIVE}\n\nBe brief."
+
+
+def test_long_conversation_is_trimmed_before_forwarding(monkeypatch):
+    """Test that the oldest turns are dropped to fit CONTEXT_MAX_TOKENS."""
+    turns = [{"role": "user" if i % 2 else "assistant", "content": f"turn {i} " + "x" * 400} for i in range(20)]
+    body = {"model": "m", "messages": [{"role": "system", "content": "Be brief."}, *turns]}
+    monkeypatch.setenv("CONTEXT_MAX_TOKENS", "1000")
+    with MockUpstream() as upstream:
+        monkeypatch.setenv("APP_UPSTREAM_URL", upstream.base_url)
+        with TestClient(app) as client:
+            client.post("/v1/chat/completions", json=body)
+        sent = json.loads(upstream.last_body)["messages"]
+    system = sent[0]["content"]
+    assert system.startswith(CORE_DIRECTIVE) and system.endswith("\n\nBe brief.")
+    assert f"{21 - len(sent)} earlier messages omitted" in system
+    assert sent[1:] == turns[-(len(sent) - 1):]
+    assert sum(len(m["content"]) for m in sent) // 4 <= 1000
+
+
+def test_session_turns_send_only_new_messages(monkeypatch):
+    """Test that a session's history and replies are kept server-side."""
+    import sessions
+
+    monkeypatch.setattr(sessions, "_store", sessions.SessionStore())
+    with MockUpstream() as upstream:
+        monkeypatch.setenv("APP_UPSTREAM_URL", upstream.base_url)
+        with TestClient(app) as client:
+            session_id = client.post("/v1/sessions").json()["id"]
+            headers = {"X-Session-ID": session_id}
+            for content in ("First question", "Second question"):
+                response = client.post(
+                    "/v1/chat/completions", headers=headers,
+                    json={"model": "m", "messages": [{"role": "user", "content": content}]},
+                )
+                assert response.headers["X-Session-ID"] == session_id
+            sent = json.loads(upstream.last_body)
+            assert client.delete(f"/v1/sessions/{session_id}").status_code == 204
+            response = client.post(
+                "/v1/chat/completions", headers=headers,
+                json={"model": "m", "messages": [{"role": "user", "content": "Third"}]},
+            )
+    assert response.status_code == 404
+    assert sent["model"] == "m"
+    assert sent["messages"] == [
+        {"role": "system", "content": CORE_DIRECTIVE},
+        {"role": "user", "content": "First question"},
+        {"role": "assistant", "content": "Mock response."},
+        {"role": "user", "content": "Second question"},
+    ]
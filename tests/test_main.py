@@ -104,3 +104,72 @@ def test_chat_completions_response_structure():
     assert "prompt_tokens" in data["usage"]
     assert "completion_tokens" in data["usage"]
     assert "total_tokens" in data["usage"]
+
+
+def test_metrics_endpoint():
+    """Test that /metrics exposes the serialization histogram."""
+    client.post(
+        "/v1/chat/completions",
+        json={"model": "gpt-4", "messages": [{"role": "user", "content": "Hello!"}]},
+    )
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'governance_stage_duration_seconds_count{component="app",stage="serialization"}' in response.text
+
+
+def test_debug_slow_lists_traced_requests(monkeypatch):
+    """Test that /debug/slow reports traced requests with span breakdowns, to admins only."""
+    import tracing
+
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/debug/slow").status_code == 404
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.get("/debug/slow", headers={"X-Admin-Token": "nope"}).status_code == 404
+
+    previous = tracing._tracer
+    tracing.configure(sample_rate=1.0)
+    try:
+        client.post(
+            "/v1/chat/completions",
+            json={"model": "gpt-4", "messages": [{"role": "user", "content": "Hello!"}]},
+        )
+        data = client.get("/debug/slow?limit=5", headers={"X-Admin-Token": "s3cret"}).json()
+    finally:
+        tracing._tracer = previous
+
+    [trace] = data["slowest"]
+    assert trace["name"] == "app.chat_completions"
+    assert [span["name"] for span in trace["spans"]] == ["directive.wrap", "serialization"]
+
+
+def test_admin_profile_requires_token(monkeypatch, tmp_path):
+    """Test that profiling is hidden without a token and runs with one."""
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.post("/admin/profile?seconds=0.1").status_code == 404
+
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    assert client.post("/admin/profile?seconds=0.1", headers={"X-Admin-Token": "nope"}).status_code == 404
+
+    response = client.post("/admin/profile?seconds=0.1", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 202
+    import profiler
+    assert profiler._current.wait(5)
+    assert (tmp_path / response.json()["path"].rsplit("/", 1)[-1]).exists()
+
+
+def test_reloaded_directive_is_applied(monkeypatch, tmp_path):
+    """Test that a directive bundle replaces the wrapped text without a restart."""
+    import directive_registry
+
+    bundle = tmp_path / "directive.json"
+    bundle.write_text('{"version": "v2", "chat_directive": "Reloaded directive."}')
+    registry = directive_registry.DirectiveRegistry(str(bundle))
+    monkeypatch.setattr(directive_registry, "_registry", registry)
+
+    wrapped = wrap_with_core_directive([Message(role="user", content="Hi")])
+    assert wrapped[0].content == CORE_DIRECTIVE
+    registry.load()
+    wrapped = wrap_with_core_directive([Message(role="user", content="Hi")])
+    assert wrapped[0].content == "Reloaded directive."
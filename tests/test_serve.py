@@ -0,0 +1,190 @@
+"""Tests for the multi-worker production launcher."""
+
+import http.client
+import importlib.util
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+import serve
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_bind_socket_is_tcp_and_listening():
+    """Test that sockets are created with an explicit TCP protocol."""
+    sock = serve.bind_socket("127.0.0.1", 0, reuse_port=False, backlog=16)
+    try:
+        assert sock.proto == socket.IPPROTO_TCP
+        assert sock.get_inheritable()
+    finally:
+        sock.close()
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT unavailable")
+def test_reuse_port_allows_one_socket_per_worker():
+    """Test that two workers can bind the same port with SO_REUSEPORT."""
+    first = serve.bind_socket("127.0.0.1", 0, reuse_port=True, backlog=16)
+    port = first.getsockname()[1]
+    second = serve.bind_socket("127.0.0.1", port, reuse_port=True, backlog=16)
+    first.close()
+    second.close()
+
+
+def test_worker_cpus_round_robin():
+    """Test that pinning cycles over the available CPUs."""
+    assert serve.worker_cpus(0, pin=False) is None
+    if hasattr(os, "sched_getaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+        assert serve.worker_cpus(len(available), pin=True) == [available[0]]
+
+
+def test_parse_args_rejects_zero_workers():
+    """Test that at least one worker is required."""
+    with pytest.raises(SystemExit):
+        serve.parse_args(["--workers", "0"])
+
+
+def test_warm_up_runs_against_app():
+    """Test that warm-up exercises the app module without errors."""
+    _, module = serve.load_app("app.main:app")
+    serve.warm_up(module)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_serves_and_drains_on_sigterm():
+    """Test that workers serve requests and exit cleanly on SIGTERM."""
+    probe = serve.bind_socket("127.0.0.1", 0, reuse_port=False, backlog=1)
+    port = probe.getsockname()[1]
+    probe.close()
+
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", "2", "--graceful-timeout", "5"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 20
+        status = None
+        while time.monotonic() < deadline and status is None:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/health")
+                status = conn.getresponse().status
+                conn.close()
+            except OSError:
+                time.sleep(0.1)
+        assert status == 200
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+def test_parse_args_checks_tls_options():
+    """Test that certificates need --http2 and come as a pair."""
+    with pytest.raises(SystemExit):
+        serve.parse_args(["--certfile", "cert.pem", "--keyfile", "key.pem"])
+    if importlib.util.find_spec("hypercorn") is not None:
+        with pytest.raises(SystemExit):
+            serve.parse_args(["--http2", "--certfile", "cert.pem"])
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_http2_workers_multiplex_and_drain():
+    """Test that --http2 serves h2c and HTTP/1.1 and exits cleanly on SIGTERM."""
+    pytest.importorskip("hypercorn")
+    pytest.importorskip("h2")
+    import http_clients
+
+    probe = serve.bind_socket("127.0.0.1", 0, reuse_port=False, backlog=1)
+    port = probe.getsockname()[1]
+    probe.close()
+
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", "1", "--graceful-timeout", "5", "--http2"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        client = http_clients.create_http_client(http2="h2c", base_url=f"http://127.0.0.1:{port}")
+        deadline = time.monotonic() + 20
+        response = None
+        while time.monotonic() < deadline and response is None:
+            try:
+                response = client.get("/health", timeout=1)
+            except httpx.TransportError:
+                time.sleep(0.1)
+        assert response is not None and response.status_code == 200
+        assert response.http_version == "HTTP/2"
+        assert client.get("/health").http_version == "HTTP/2"
+        assert httpx.get(f"http://127.0.0.1:{port}/health").http_version == "HTTP/1.1"
+        client.close()
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_crash_looping_worker_is_reported_and_given_up_on():
+    """Test that startup failures print a traceback, back off and end the master."""
+    script = (
+        "import sys, serve\n"
+        "serve.CRASH_LOOP_LIMIT = 3\n"
+        "serve.MAX_RESTART_DELAY = 0.01\n"
+        "master = serve.Master(serve.parse_args(\n"
+        "    ['--host', '127.0.0.1', '--port', '0', '--workers', '1', '--no-warm-up']))\n"
+        "def fail(index):\n"
+        "    raise RuntimeError('worker cannot start')\n"
+        "master._serve = fail\n"
+        "sys.exit(master.run())\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, timeout=30,
+    )
+    assert result.returncode == 1
+    assert result.stderr.count("RuntimeError: worker cannot start") == 3
+    assert "giving up" in result.stderr
+
+
+def test_pending_restart_does_not_hold_up_shutdown():
+    """Test that the master waiting to restart a worker still stops promptly on SIGTERM."""
+    script = (
+        "import os, signal, sys, threading, time, serve\n"
+        "master = serve.Master(serve.parse_args(\n"
+        "    ['--host', '127.0.0.1', '--port', '0', '--workers', '1', '--no-warm-up']))\n"
+        "def fail(index):\n"
+        "    raise RuntimeError('worker cannot start')\n"
+        "master._serve = fail\n"
+        "schedule = master._schedule_restart\n"
+        "def schedule_far(*args):\n"
+        "    schedule(*args)\n"
+        "    master.restarts = {index: time.monotonic() + 60 for index in master.restarts}\n"
+        "    threading.Timer(0.2, os.kill, (os.getpid(), signal.SIGTERM)).start()\n"
+        "master._schedule_restart = schedule_far\n"
+        "sys.exit(master.run())\n"
+    )
+    started = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, timeout=30,
+    )
+    assert time.monotonic() - started < 10
+    assert result.returncode == 0, result.stderr
+    assert "restarting in" in result.stdout
+    assert result.stderr.count("RuntimeError: worker cannot start") == 1
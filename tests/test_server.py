@@ -0,0 +1,111 @@
+"""Tests for the static file server."""
+
+import gzip
+import http.client
+import os
+import threading
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Serve a temporary directory on an ephemeral port."""
+    (tmp_path / "index.html").write_text("<html>" + "Broken Vowels " * 200 + "</html>")
+    (tmp_path / "big.bin").write_bytes(os.urandom(server.MAX_CACHED_FILE + 4096))
+    httpd = server.make_server(port=0, directory=str(tmp_path), threads=4)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield tmp_path, httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def request(conn, path, headers=None, method="GET"):
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_keep_alive_serves_many_requests_per_connection(site):
+    """Test that one connection carries several requests."""
+    _, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    for _ in range(3):
+        response, body = request(conn, "/")
+        assert response.status == 200
+        assert response.version == 11
+        assert body.startswith(b"<html>")
+    conn.close()
+
+
+def test_etag_revalidation(site):
+    """Test that a matching If-None-Match yields 304 without a body."""
+    _, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    response, _ = request(conn, "/index.html")
+    etag = response.getheader("ETag")
+    assert etag
+
+    response, body = request(conn, "/index.html", {"If-None-Match": etag})
+    assert response.status == 304
+    assert body == b""
+
+
+def test_gzip_variant(site):
+    """Test that compressible files are gzipped for clients that accept it."""
+    _, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    response, body = request(conn, "/index.html", {"Accept-Encoding": "br;q=0, gzip"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Vary") == "Accept-Encoding"
+    assert gzip.decompress(body).startswith(b"<html>")
+
+
+def test_precompressed_brotli_variant(site):
+    """Test that an up-to-date .br sibling is served as-is."""
+    root, port = site
+    (root / "index.html.br").write_bytes(b"fake-brotli")
+    os.utime(root / "index.html", ns=(1, 1))  # Force a reload, older than .br
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    response, body = request(conn, "/index.html", {"Accept-Encoding": "gzip, br"})
+    assert response.getheader("Content-Encoding") == "br"
+    assert body == b"fake-brotli"
+
+
+def test_cache_invalidated_on_mtime_change(site):
+    """Test that edits on disk are picked up."""
+    root, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    _, first = request(conn, "/index.html")
+    (root / "index.html").write_text("changed")
+    stat = os.stat(root / "index.html")
+    os.utime(root / "index.html", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    _, second = request(conn, "/index.html")
+    assert first != second
+    assert second == b"changed"
+
+
+def test_large_file_streamed(site):
+    """Test that files above the cache limit are sent in full."""
+    root, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    response, body = request(conn, "/big.bin")
+    assert response.status == 200
+    assert body == (root / "big.bin").read_bytes()
+
+    response, body = request(conn, "/big.bin", method="HEAD")
+    assert int(response.getheader("Content-Length")) == len((root / "big.bin").read_bytes())
+    assert body == b""
+
+
+def test_missing_file_and_traversal(site):
+    """Test that missing files and paths outside the root are 404s."""
+    _, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    response, _ = request(conn, "/missing.html")
+    assert response.status == 404
+    response, _ = request(conn, "/../../etc/passwd")
+    assert response.status == 404
@@ -0,0 +1,416 @@
+"""
+Tracing Module - Per-Request Spans
+
+This module records where the time of a request went: middleware, directive
+evaluation, route handler, upstream request and response serialization. A
+trace is keyed by the request ID (``GatewayRequest.id`` in the gateway), so
+its ID can be matched against the audit log.
+
+Tracing is designed to stay off the hot path:
+- sampling is decided once per trace from its ID, so all components agree,
+  and an unsampled request records nothing
+- spans are recorded from perf_counter_ns timestamps the caller already
+  takes for metrics, and converted to wall-clock time only on export
+- finished traces go into a fixed-size ring buffer, which a background
+  thread flushes to a file in OTLP-compatible JSON every few seconds, and
+  sooner once half the buffer is new, so a worker that dies loses little
+
+The slowest traces in the buffer, with their span breakdown, are served by
+the ``/debug/slow`` endpoints of the FastAPI apps, to callers with the
+ADMIN_TOKEN (see profiler.py).
+
+Configuration (environment):
+    TRACE_SAMPLE_RATE   fraction of requests traced (default 0.1)
+    TRACE_BUFFER_SIZE   finished traces kept in memory (default 1024)
+    TRACE_EXPORT_PATH   file written by flush() (default: none); "{pid}"
+                        in it is replaced by the process ID, so that each
+                        worker keeps a file of its own
+    TRACE_FLUSH_SECONDS how often the apps flush while serving (default 10,
+                        0 = only at shutdown)
+"""
+
+import heapq
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+SERVICE_NAME = "core-directive-governance"
+SCOPE_NAME = "governance.tracing"
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+DEFAULT_FLUSH_SECONDS = 10.0
+
+
+_MASK_64 = (1 << 64) - 1
+_GOLDEN_64 = 0x9E3779B97F4A7C15
+
+
+def trace_id_for(request_id: Union[int, str]) -> str:
+    """
+    32-hex-digit trace ID for a request ID.
+
+    UUIDs and 128-bit integer IDs (see gateway.next_request_id) map to
+    themselves.
+    """
+    if isinstance(request_id, int):
+        return f"{request_id & ((1 << 128) - 1):032x}"
+    candidate = str(request_id).replace("-", "")
+    if len(candidate) == 32:
+        try:
+            int(candidate, 16)
+            return candidate.lower()
+        except ValueError:
+            pass
+    return uuid.uuid5(uuid.NAMESPACE_OID, str(request_id)).hex
+
+
+class Span:
+    """A timed section of a trace."""
+
+    __slots__ = ("span_id", "parent_id", "name", "start_ns", "end_ns", "kind", "attributes")
+
+    def __init__(
+        self,
+        span_id: int,
+        parent_id: Optional[int],
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns  # perf_counter_ns
+        self.end_ns = end_ns
+        self.kind = kind
+        self.attributes = attributes
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+
+class Trace:
+    """Spans of one request, under a root span covering the whole request."""
+
+    def __init__(self, trace_id: str, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.spans: List[Span] = []
+        self.root_id = random.getrandbits(64)
+        # Wall clock is read once; span times are offsets from start_ns
+        self.start_unix_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+    def add_span(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        kind: int = SPAN_KIND_INTERNAL,
+        **attributes: Any,
+    ) -> None:
+        """Record a section timed with time.perf_counter_ns."""
+        self.spans.append(Span(
+            random.getrandbits(64), self.root_id, name, start_ns, end_ns, kind, attributes or None,
+        ))
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time the enclosed block as a span.
+
+        Yields the span's attribute dict so the block can add to it.
+        """
+        started = time.perf_counter_ns()
+        try:
+            yield attributes
+        finally:
+            self.add_span(name, started, time.perf_counter_ns(), kind, **attributes)
+
+    @property
+    def duration_ns(self) -> int:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return end - self.start_ns
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Summary for /debug/slow: total and per-span milliseconds."""
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "duration_ms": round(self.duration_ns / 1e6, 3),
+            "attributes": self.attributes,
+            "spans": [
+                {
+                    "name": span.name,
+                    "offset_ms": round((span.start_ns - self.start_ns) / 1e6, 3),
+                    "duration_ms": round(span.duration_ns / 1e6, 3),
+                }
+                for span in self.spans
+            ],
+        }
+
+    def to_otlp(self) -> List[Dict[str, Any]]:
+        """The trace's spans, root first, as OTLP JSON span objects."""
+        def unix(perf_ns: int) -> str:
+            return str(self.start_unix_ns + perf_ns - self.start_ns)
+
+        end_ns = self.end_ns if self.end_ns is not None else self.start_ns
+        spans = [{
+            "traceId": self.trace_id,
+            "spanId": f"{self.root_id:016x}",
+            "name": self.name,
+            "kind": SPAN_KIND_SERVER,
+            "startTimeUnixNano": unix(self.start_ns),
+            "endTimeUnixNano": unix(end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+        }]
+        for span in self.spans:
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": f"{span.span_id:016x}",
+                "parentSpanId": f"{span.parent_id:016x}",
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": unix(span.start_ns),
+                "endTimeUnixNano": unix(span.end_ns),
+                "attributes": _otlp_attributes(span.attributes or {}),
+            })
+        return spans
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class Tracer:
+    """Samples, collects and exports request traces."""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.1,
+        buffer_size: int = 1024,
+        export_path: Optional[str] = None,
+    ):
+        """
+        Initialize the tracer.
+
+        Args:
+            sample_rate: Fraction of traces recorded, 0.0 to 1.0
+            buffer_size: Finished traces kept for /debug/slow and export
+            export_path: Default file for flush()
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.sample_rate = sample_rate
+        self.export_path = export_path
+        # Traces whose hashed ID falls below this threshold are sampled
+        self._threshold = int(sample_rate * (1 << 64))
+        self._finished: deque = deque(maxlen=buffer_size)
+        self._flush_lock = threading.Lock()
+        # Finished traces counted so, with _flushed_count, the flusher
+        # knows whether there is anything new and how much; both are
+        # updated under _count_lock, as finish() runs on many threads
+        self._count_lock = threading.Lock()
+        self._finished_count = 0
+        self._flushed_count = 0
+        self._flush_early = max(1, buffer_size // 2)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def sampled(self, trace_id: str) -> bool:
+        """Whether a trace ID falls in the sample."""
+        return self._sampled_value(int(trace_id, 16))
+
+    def _sampled_value(self, value: int) -> bool:
+        # Fold both halves and spread them with a Fibonacci hash, so counter
+        # based IDs with a fixed prefix still sample at the configured rate
+        mixed = ((value ^ (value >> 64)) * _GOLDEN_64) & _MASK_64
+        return mixed < self._threshold
+
+    def start_trace(
+        self,
+        request_id: Optional[Union[int, str]],
+        name: str,
+        **attributes: Any,
+    ) -> Optional[Trace]:
+        """
+        Begin a trace for a request, or return None if it is not sampled.
+
+        A request without an ID gets a random trace ID.
+        """
+        if self._threshold == 0:
+            return None
+        if isinstance(request_id, int):
+            # Integer IDs are rendered only for traces that are kept
+            if not self._sampled_value(request_id):
+                return None
+            trace_id = trace_id_for(request_id)
+        elif request_id:
+            trace_id = trace_id_for(request_id)
+            if not self.sampled(trace_id):
+                return None
+        else:
+            if random.random() >= self.sample_rate:
+                return None
+            trace_id = f"{random.getrandbits(128):032x}"
+        return Trace(trace_id, name, attributes)
+
+    def finish(self, trace: Optional[Trace]) -> None:
+        """End a trace and keep it in the ring buffer."""
+        if trace is None:
+            return
+        trace.end_ns = time.perf_counter_ns()
+        self._finished.append(trace)
+        with self._count_lock:
+            self._finished_count += 1
+            pending = self._finished_count - self._flushed_count
+        if pending >= self._flush_early:
+            self._wake.set()  # Before the ring overwrites traces never written
+
+    def recent(self) -> List[Trace]:
+        """Finished traces in the buffer, oldest first."""
+        return list(self._finished)
+
+    def slowest(self, limit: int = 10) -> List[Trace]:
+        """The slowest finished traces in the buffer."""
+        return heapq.nlargest(limit, self.recent(), key=lambda trace: trace.duration_ns)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """All buffered traces as an OTLP/JSON ExportTraceServiceRequest."""
+        spans = [span for trace in self.recent() for span in trace.to_otlp()]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({
+                    "service.name": SERVICE_NAME,
+                    "process.pid": os.getpid(),
+                })},
+                "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": spans}],
+            }],
+        }
+
+    def flush(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Write the buffered traces to a file, replacing it atomically.
+
+        The file always holds the most recent buffer_size traces, like the
+        buffer itself. Returns the path written, or None if there is none.
+        """
+        path = path or self.export_path
+        if not path:
+            return None
+        path = path.replace("{pid}", str(os.getpid()))
+        with self._count_lock:
+            finished = self._finished_count
+        payload = json.dumps(self.to_otlp())
+        with self._flush_lock:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        # Only once written: after a failed write the traces are still pending
+        with self._count_lock:
+            self._flushed_count = max(self._flushed_count, finished)
+        return path
+
+    def start_flushing(self, interval: float = DEFAULT_FLUSH_SECONDS) -> None:
+        """Flush every interval seconds, and early when the buffer fills, in the background."""
+        if self._flusher is not None or not self.export_path or interval <= 0:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self._wake.wait(interval)
+                self._wake.clear()
+                if self._finished_count == self._flushed_count:
+                    continue
+                try:
+                    self.flush()
+                except (OSError, ValueError) as exc:
+                    print(f"[tracing] flush to {self.export_path} failed: {exc}",
+                          file=sys.stderr, flush=True)
+
+        self._flusher = threading.Thread(target=run, name="trace-flusher", daemon=True)
+        self._flusher.start()
+
+    def stop_flushing(self) -> None:
+        """Stop the background flusher; callers flush once more themselves."""
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            self._stop.set()
+            self._wake.set()
+            flusher.join()
+
+    def clear(self) -> None:
+        self._finished.clear()
+
+
+def _tracer_from_env() -> Tracer:
+    return Tracer(
+        sample_rate=float(os.environ.get("TRACE_SAMPLE_RATE", "0.1")),
+        buffer_size=int(os.environ.get("TRACE_BUFFER_SIZE", "1024")),
+        export_path=os.environ.get("TRACE_EXPORT_PATH") or None,
+    )
+
+
+# Global tracer instance
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer, configured from the environment."""
+    global _tracer
+    if _tracer is None:
+        _tracer = _tracer_from_env()
+    return _tracer
+
+
+def start_flushing(tracer: Optional[Tracer] = None) -> Tracer:
+    """Flush the tracer at the interval set by TRACE_FLUSH_SECONDS."""
+    tracer = tracer or get_tracer()
+    tracer.start_flushing(float(os.environ.get("TRACE_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS)))
+    return tracer
+
+
+def configure(**kwargs: Any) -> Tracer:
+    """Replace the process-wide tracer, e.g. configure(sample_rate=1.0)."""
+    global _tracer
+    _tracer = Tracer(**kwargs)
+    return _tracer
+
+
+def slow_report(limit: int = 10) -> Dict[str, Any]:
+    """Body of the /debug/slow endpoints."""
+    tracer = get_tracer()
+    return {
+        "sample_rate": tracer.sample_rate,
+        "buffered": len(tracer.recent()),
+        "slowest": [trace.breakdown() for trace in tracer.slowest(limit)],
+    }
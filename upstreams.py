@@ -0,0 +1,579 @@
+"""
+Upstreams Module - Load-Balanced Pool of OpenAI-Compatible Backends
+
+This module spreads upstream model calls over several OpenAI-compatible
+backends (OpenAI itself, other providers, or local stand-ins) instead of a
+single hard-wired client.
+
+Pool Features:
+1. Balancing by least outstanding requests, or by EWMA latency weighted by
+   outstanding requests (the default)
+2. A circuit breaker per backend: after repeated failures the backend is
+   skipped, and health probes or a single trial request bring it back
+3. Failover: a request that fails on one backend is retried on another
+4. Hedged requests: if the first backend has not answered after a delay, a
+   second one is asked too and the first answer wins, within a budget
+5. A connection pool per backend, rebuilt after fork()
+
+Configuration (environment):
+    UPSTREAM_URLS             comma-separated base URLs, each optionally
+                              named as name=url; setting it enables the pool
+    UPSTREAM_STRATEGY         ewma (default) or least_outstanding
+    UPSTREAM_HEDGE_MS         hedge after this many milliseconds (default: off)
+    UPSTREAM_MAX_CONNECTIONS  connections per backend (default 100)
+    OPENAI_API_KEY            API key sent to every backend
+"""
+
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from metrics import REQUESTS, UPSTREAM_REQUESTS
+
+T = TypeVar("T")
+
+STRATEGIES = ("ewma", "least_outstanding")
+# Weight of a new latency sample, and how fast an idle backend's latency
+# estimate decays so that a once-slow backend is tried again
+EWMA_ALPHA = 0.3
+EWMA_DECAY_SECONDS = 10.0
+
+_HEDGED = REQUESTS.labels("upstream_pool", "hedged")
+_EXHAUSTED = REQUESTS.labels("upstream_pool", "no_backend")
+
+
+class NoBackendAvailable(RuntimeError):
+    """Raised when every backend is failing or its circuit is open."""
+
+
+def is_backend_failure(exc: BaseException) -> bool:
+    """
+    Whether an error says the backend is unhealthy rather than the request bad.
+
+    Connection errors, timeouts, rate limiting and 5xx responses count;
+    other 4xx responses would fail on any backend and are not retried.
+    """
+    import httpx
+    import openai
+
+    if isinstance(exc, (openai.APIConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    Opens after failure_threshold consecutive failures. Once reset_timeout
+    has passed, one trial request is let through (half-open); its outcome
+    closes the circuit or opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def available(self) -> bool:
+        """Whether allow() would currently let a request through."""
+        state = self._state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return time.monotonic() - self._opened_at >= self.reset_timeout
+        return not self._trial_running
+
+    def allow(self) -> bool:
+        """Claim permission to send a request."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._trip()
+
+    def trip(self) -> None:
+        """Open the circuit now, e.g. after a failed health probe."""
+        with self._lock:
+            self._trial_running = False
+            self._trip()
+
+    def _trip(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+
+
+class Backend:
+    """One OpenAI-compatible upstream with its own connection pool and health."""
+
+    def __init__(
+        self,
+        base_url: str,
+        name: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout: float = 60.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+    ):
+        """
+        Initialize a backend.
+
+        Args:
+            base_url: API base URL, e.g. https://api.openai.com/v1
+            name: Label for stats and metrics (defaults to the URL)
+            api_key: API key (defaults to OPENAI_API_KEY)
+            max_connections: Connection pool size
+            max_keepalive_connections: Idle connections kept open
+            timeout: Request timeout in seconds
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds before an open circuit allows a trial
+        """
+        self.base_url = base_url.rstrip("/")
+        self.name = name or self.base_url
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self._ewma_ns = 0.0
+        self._ewma_at = time.monotonic()
+        self._warmed_up = False
+        self._lock = threading.Lock()
+        self._client = None
+        self._http_client = None
+        self._client_pid: Optional[int] = None
+        self._ok = UPSTREAM_REQUESTS.labels(self.name, "ok")
+        self._failed = UPSTREAM_REQUESTS.labels(self.name, "error")
+
+    def client(self):
+        """
+        This process's OpenAI client for the backend, created on first use.
+
+        Retries are left to the pool, which fails over to another backend.
+        """
+        if self._client is None or self._client_pid != os.getpid():
+            from openai import OpenAI
+
+            import http_clients
+
+            self._http_client = http_clients.create_http_client(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                timeout=self.timeout,
+            )
+            self._client = OpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key or os.environ.get("OPENAI_API_KEY") or "unused",
+                http_client=self._http_client,
+                max_retries=0,
+            )
+            self._client_pid = os.getpid()
+        return self._client
+
+    @property
+    def ewma_ns(self) -> float:
+        """Latency estimate, decayed toward zero while no samples arrive."""
+        with self._lock:
+            return self._decayed_ewma(time.monotonic())
+
+    def _decayed_ewma(self, now: float) -> float:
+        return self._ewma_ns * math.exp(-(now - self._ewma_at) / EWMA_DECAY_SECONDS)
+
+    def score(self) -> float:
+        """Expected wait for one more request: latency times queue length."""
+        return self.ewma_ns * (self.outstanding + 1)
+
+    def begin(self) -> None:
+        with self._lock:
+            self.outstanding += 1
+            self.requests += 1
+
+    def end(self, latency_ns: int, healthy: bool) -> None:
+        """Record a finished request; unhealthy outcomes count toward the breaker."""
+        now = time.monotonic()
+        with self._lock:
+            self.outstanding -= 1
+            if healthy and not self._warmed_up:
+                # The first request pays for connection setup and the client's
+                # lazy initialization; it says little about the backend
+                self._warmed_up = True
+            elif healthy:
+                # Peak-sensitive: slowdowns register at once, recovery gradually
+                current = self._decayed_ewma(now)
+                if latency_ns > current:
+                    self._ewma_ns = float(latency_ns)
+                else:
+                    self._ewma_ns = current + EWMA_ALPHA * (latency_ns - current)
+                self._ewma_at = now
+            else:
+                self.failures += 1
+        if healthy:
+            self._ok.inc()
+            self.breaker.record_success()
+        else:
+            self._failed.inc()
+            self.breaker.record_failure()
+
+    def probe(self, timeout: float = 5.0) -> bool:
+        """Whether the backend answers at all; any non-5xx response counts."""
+        import httpx
+
+        self.client()
+        try:
+            response = self._http_client.get(
+                f"{self.base_url}/models",
+                headers={"Authorization": f"Bearer {self._client.api_key}"},
+                timeout=timeout,
+            )
+        except httpx.HTTPError:
+            return False
+        return response.status_code < 500
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "url": self.base_url,
+            "state": self.breaker.state,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ewma_ms": round(self.ewma_ns / 1e6, 3),
+        }
+
+    def close(self) -> None:
+        if self._client is not None and self._client_pid == os.getpid():
+            self._client.close()
+        self._client = None
+        self._http_client = None
+        self._client_pid = None
+
+    def __repr__(self) -> str:
+        return f"Backend({self.name!r}, state={self.breaker.state})"
+
+
+class UpstreamPool:
+    """
+    Upstream Pool - Balanced, Failover-Capable Model Calls
+
+    Picks a backend per request, fails over on backend errors, and
+    optionally hedges slow requests onto a second backend.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        strategy: str = "ewma",
+        hedge_after: Optional[float] = None,
+        hedge_budget: float = 0.1,
+        max_attempts: Optional[int] = None,
+        hedge_workers: int = 32,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            backends: Backends to balance over
+            strategy: "ewma" or "least_outstanding"
+            hedge_after: Seconds before a hedged request is sent (None: never)
+            hedge_budget: Largest fraction of requests that may be hedged
+            max_attempts: Backends tried per request (default: all of them)
+            hedge_workers: Threads for hedged requests
+        """
+        if not backends:
+            raise ValueError("an upstream pool needs at least one backend")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}")
+        self.backends = list(backends)
+        self.strategy = strategy
+        self.hedge_after = hedge_after
+        self.hedge_budget = hedge_budget
+        self.max_attempts = max_attempts or len(self.backends)
+        self._hedge_workers = hedge_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._calls = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+        self._stop_probes = threading.Event()
+        self._prober: Optional[threading.Thread] = None
+
+    def pick(self, exclude: Sequence[Backend] = ()) -> Optional[Backend]:
+        """
+        Choose a backend whose circuit lets a request through.
+
+        Ties are broken randomly so equal backends share the load.
+        """
+        candidates = [b for b in self.backends if b not in exclude and b.breaker.available()]
+        while candidates:
+            if self.strategy == "least_outstanding":
+                key = lambda b: b.outstanding  # noqa: E731
+            else:
+                key = Backend.score
+            scores = [key(b) for b in candidates]  # Read once; they change concurrently
+            best = min(scores)
+            backend = random.choice([b for b, score in zip(candidates, scores) if score == best])
+            if backend.breaker.allow():
+                return backend
+            candidates.remove(backend)  # Lost a race for the half-open trial
+        return None
+
+    def call(self, fn: Callable[[Any], T]) -> T:
+        """
+        Run fn(client) on a backend, failing over and hedging as configured.
+
+        Raises:
+            NoBackendAvailable: If no backend could be tried
+            Exception: The last backend error, or a request error from fn
+        """
+        with self._lock:
+            self._calls += 1
+        tried: List[Backend] = []
+        error: Optional[BaseException] = None
+        while len(tried) < self.max_attempts:
+            backend = self.pick(exclude=tried)
+            if backend is None:
+                break
+            tried.append(backend)
+            try:
+                if self.hedge_after is None:
+                    return self._run(backend, fn)
+                return self._hedged(backend, fn, tried)
+            except Exception as exc:
+                if not is_backend_failure(exc):
+                    raise
+                error = exc
+        if error is not None:
+            raise error
+        _EXHAUSTED.inc()
+        raise NoBackendAvailable("no upstream backend is available")
+
+    def chat_completion(self, **kwargs: Any):
+        """client.chat.completions.create(**kwargs) on a pooled backend."""
+        return self.call(lambda client: client.chat.completions.create(**kwargs))
+
+    def _run(self, backend: Backend, fn: Callable[[Any], T]) -> T:
+        client = backend.client()  # Building a client is not request latency
+        backend.begin()
+        started = time.perf_counter_ns()
+        try:
+            result = fn(client)
+        except Exception as exc:
+            backend.end(time.perf_counter_ns() - started, not is_backend_failure(exc))
+            raise
+        backend.end(time.perf_counter_ns() - started, True)
+        return result
+
+    def _hedged(self, primary: Backend, fn: Callable[[Any], T], tried: List[Backend]) -> T:
+        executor = self._get_executor()
+        first = executor.submit(self._run, primary, fn)
+        try:
+            return first.result(timeout=self.hedge_after)
+        except FutureTimeout:
+            pass
+        secondary = self.pick(exclude=tried) if self._take_hedge() else None
+        if secondary is None:
+            return first.result()
+        tried.append(secondary)
+        _HEDGED.inc()
+        pending = {first, executor.submit(self._run, secondary, fn)}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The slower request finishes in the background; its
+                    # latency still feeds that backend's estimate
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self._hedges >= self.hedge_budget * self._calls + 1:
+                return False
+            self._hedges += 1
+            return True
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self._hedge_workers, thread_name_prefix="upstream-hedge")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def probe(self) -> None:
+        """Health-check backends whose circuit is open, closing it on success."""
+        for backend in self.backends:
+            if backend.breaker.state == CircuitBreaker.CLOSED:
+                continue
+            if backend.probe():
+                backend.breaker.record_success()
+            else:
+                backend.breaker.trip()
+
+    def warm_up(self) -> None:
+        """Open a connection to every backend; unreachable ones are tripped."""
+        for backend in self.backends:
+            if not backend.probe():
+                backend.breaker.trip()
+
+    def start_health_checks(self, interval: float = 5.0) -> None:
+        """Probe open circuits every interval seconds in a background thread."""
+        if self._prober is not None and self._prober.is_alive():
+            return
+        self._stop_probes.clear()
+
+        def run():
+            while not self._stop_probes.wait(interval):
+                self.probe()
+
+        self._prober = threading.Thread(target=run, name="upstream-health", daemon=True)
+        self._prober.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool settings and per-backend state."""
+        return {
+            "strategy": self.strategy,
+            "hedge_after_ms": None if self.hedge_after is None else self.hedge_after * 1000,
+            "requests": self._calls,
+            "hedged": self._hedges,
+            "backends": [backend.stats() for backend in self.backends],
+        }
+
+    def close(self) -> None:
+        """Stop health checks and close every backend's connections."""
+        self._stop_probes.set()
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=False)
+        self._executor = None
+        for backend in self.backends:
+            backend.close()
+
+    def __repr__(self) -> str:
+        return f"UpstreamPool(strategy={self.strategy!r}, backends={self.backends!r})"
+
+
+def parse_backends(config: str, **kwargs: Any) -> List[Backend]:
+    """Backends from "url,url" or "name=url,name=url" (UPSTREAM_URLS)."""
+    backends = []
+    for item in config.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, url = item.partition("=")
+        if not sep or "://" in name:
+            name, url = None, item
+        backends.append(Backend(url, name=name, **kwargs))
+    return backends
+
+
+def create_pool(config: str) -> UpstreamPool:
+    """
+    Factory function to create a pool from an UPSTREAM_URLS value.
+
+    The strategy, hedging delay and pool size come from the environment.
+    """
+    hedge_ms = os.environ.get("UPSTREAM_HEDGE_MS")
+    return UpstreamPool(
+        parse_backends(
+            config,
+            max_connections=int(os.environ.get("UPSTREAM_MAX_CONNECTIONS", "100")),
+        ),
+        strategy=os.environ.get("UPSTREAM_STRATEGY", "ewma"),
+        hedge_after=float(hedge_ms) / 1000 if hedge_ms else None,
+    )
+
+
+# Global pool instance and the UPSTREAM_URLS it was built from
+_pool: Optional[UpstreamPool] = None
+_pool_config: Optional[str] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[UpstreamPool]:
+    """
+    Get the process-wide pool, or None when UPSTREAM_URLS is not set.
+
+    Callers fall back to their single configured client in that case.
+    """
+    global _pool, _pool_config
+    config = os.environ.get("UPSTREAM_URLS")
+    if not config:
+        return None
+    # The config is read before the pool and written after it, so a
+    # matching config always comes with the pool built from it
+    if _pool_config == config:
+        pool = _pool
+        if pool is not None:
+            return pool
+    with _pool_lock:
+        if _pool is None or config != _pool_config:
+            if _pool is not None:
+                _pool.close()
+            _pool = create_pool(config)
+            _pool_config = config
+        return _pool
+
+
+def upstream_route(
+    pool: UpstreamPool,
+    model: str,
+    system_message: Optional[str] = None,
+) -> Callable:
+    """
+    A GovernanceGateway route handler that answers from the pool.
+
+    Example:
+        gateway.register_route("chat", upstream_route(pool, "gpt-4.1"))
+    """
+    def handler(request) -> str:
+        messages = []
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        messages.append({"role": "user", "content": request.content})
+        completion = pool.chat_completion(model=model, messages=messages)
+        return completion.choices[0].message.content or ""
+
+    return handler